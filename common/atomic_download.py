@@ -0,0 +1,181 @@
+"""
+Download satu file secara streaming ke `<dest>.part`, lalu fsync + rename atomik ke `<dest>`.
+
+- Memori konstan (chunk 64 KB), tidak ada resp.content
+- Kalau crash / koneksi putus, `.part` ditinggal; percobaan berikutnya lanjut dengan
+  header Range + If-Range (validator ETag / Last-Modified disimpan di `<dest>.part.validator`).
+  Jika server tidak mendukung Range atau file sudah berubah, download diulang dari awal.
+- File final hanya muncul kalau jumlah byte cocok dengan Content-Length / Content-Range,
+  jadi `os.path.exists(dest)` berarti file utuh.
+"""
+
+import os
+import re
+import hashlib
+
+import requests
+
+from common.metrics import IMAGE_BYTES
+
+CHUNK_SIZE = 64 * 1024
+
+CONTENT_RANGE_PATTERN = re.compile(r"bytes (\d+)-(\d+)/(\d+|\*)")
+
+
+class IncompleteDownload(Exception):
+    """Body lebih pendek dari yang dijanjikan server; `.part` disimpan untuk resume."""
+
+
+def part_path(dest_path):
+    return f"{dest_path}.part"
+
+
+def _validator_path(dest_path):
+    return f"{part_path(dest_path)}.validator"
+
+
+def _read_validator(dest_path):
+    try:
+        with open(_validator_path(dest_path), encoding="utf-8") as f:
+            return f.read().strip() or None
+    except OSError:
+        return None
+
+
+def _write_validator(dest_path, response):
+    validator = response.headers.get("ETag") or response.headers.get("Last-Modified")
+    path = _validator_path(dest_path)
+    if validator:
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(validator)
+    elif os.path.exists(path):
+        os.remove(path)
+
+
+def discard_partial(dest_path):
+    for path in (part_path(dest_path), _validator_path(dest_path)):
+        if os.path.exists(path):
+            os.remove(path)
+
+
+def _fsync_dir(path):
+    # Supaya rename juga tahan crash; tidak semua OS mendukung open() pada direktori
+    try:
+        fd = os.open(os.path.dirname(os.path.abspath(path)) or ".", os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
+def _hash_existing(path, digest):
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(CHUNK_SIZE), b""):
+            digest.update(chunk)
+
+
+def _expected_total(response, offset):
+    """Total ukuran file akhir menurut header, atau None jika tidak bisa dipastikan."""
+    if response.status_code == 206:
+        match = CONTENT_RANGE_PATTERN.match(response.headers.get("Content-Range", ""))
+        if match and match.group(3) != "*":
+            return int(match.group(3))
+    if response.headers.get("Content-Encoding"):
+        return None
+    try:
+        return offset + int(response.headers["Content-Length"])
+    except (KeyError, ValueError):
+        return None
+
+
+def stream_download(url, dest_path, session=None, timeout=30, headers=None, resume=True, file_mode=None, **request_kwargs):
+    """
+    Download url ke dest_path (streaming, resumable, atomik).
+
+    Return dict {status_code, size, sha256, etag, last_modified, resumed}; status_code 304
+    berarti server menjawab Not Modified (dest_path tidak disentuh). Error HTTP dilempar
+    sebagai requests.HTTPError, body terpotong sebagai IncompleteDownload.
+    """
+    http = session or requests
+    dest_path = str(dest_path)
+    part = part_path(dest_path)
+    os.makedirs(os.path.dirname(dest_path) or ".", exist_ok=True)
+
+    request_headers = dict(headers or {})
+    offset = 0
+    if resume and os.path.exists(part):
+        validator = _read_validator(dest_path)
+        existing = os.path.getsize(part)
+        if validator and existing > 0:
+            offset = existing
+            request_headers["Range"] = f"bytes={offset}-"
+            request_headers["If-Range"] = validator
+        else:
+            # Tanpa validator tidak aman menyambung: bisa jadi isi file di server sudah beda
+            discard_partial(dest_path)
+
+    with http.get(url, timeout=timeout, stream=True, headers=request_headers or None, **request_kwargs) as response:
+        if response.status_code == 304:
+            return {
+                "status_code": 304,
+                "size": None,
+                "sha256": None,
+                "etag": response.headers.get("ETag"),
+                "last_modified": response.headers.get("Last-Modified"),
+                "resumed": False,
+            }
+        if response.status_code == 416:
+            # Range tidak valid (mis. .part sudah >= ukuran file); mulai ulang di percobaan berikutnya
+            discard_partial(dest_path)
+            raise IncompleteDownload(f"Range {offset}- ditolak server (416)")
+        response.raise_for_status()
+
+        digest = hashlib.sha256()
+        resumed = False
+        if offset and response.status_code == 206:
+            match = CONTENT_RANGE_PATTERN.match(response.headers.get("Content-Range", ""))
+            if not match or int(match.group(1)) != offset:
+                discard_partial(dest_path)
+                raise IncompleteDownload(f"Content-Range tidak sesuai offset {offset}")
+            _hash_existing(part, digest)
+            mode = "ab"
+            resumed = True
+        else:
+            # 200 = server kirim file penuh (tidak support Range / file sudah berubah)
+            offset = 0
+            mode = "wb"
+            _write_validator(dest_path, response)
+
+        expected_total = _expected_total(response, offset)
+        size = offset
+        with open(part, mode) as f:
+            for chunk in response.iter_content(chunk_size=CHUNK_SIZE):
+                if chunk:
+                    f.write(chunk)
+                    digest.update(chunk)
+                    size += len(chunk)
+            f.flush()
+            os.fsync(f.fileno())
+        IMAGE_BYTES.inc(size - offset)
+
+        if size == 0 or (expected_total is not None and size != expected_total):
+            raise IncompleteDownload(f"file terpotong ({size}/{expected_total} byte), .part disimpan untuk resume")
+
+        if file_mode is not None:
+            os.chmod(part, file_mode)
+        os.replace(part, dest_path)
+        _fsync_dir(dest_path)
+        discard_partial(dest_path)
+
+        return {
+            "status_code": response.status_code,
+            "size": size,
+            "sha256": digest.hexdigest(),
+            "etag": response.headers.get("ETag"),
+            "last_modified": response.headers.get("Last-Modified"),
+            "resumed": resumed,
+        }
@@ -0,0 +1,222 @@
+"""
+Content-addressed blob store untuk gambar listing.
+
+Setiap gambar disimpan sekali di <root>/<aa>/<bb>/<sha256><ext>. Folder lama
+(brand/model/variant/year/id/) tetap ada, tapi isinya hardlink ke blob sehingga
+foto yang sama dari listing relist / dealer lain tidak memakan disk lagi.
+Index SQLite menyimpan url -> sha256 (supaya URL yang sudah dikenal tidak didownload
+ulang) dan path -> sha256 (manifest materialisasi, dipakai untuk laporan dedup).
+"""
+
+import os
+import shutil
+import sqlite3
+import hashlib
+import logging
+import tempfile
+import threading
+from datetime import datetime
+from pathlib import Path
+
+from common.atomic_download import stream_download
+
+CHUNK_SIZE = 64 * 1024
+
+
+def default_blob_root(image_root):
+    """Blob root di samping folder gambar (satu filesystem -> hardlink bisa dipakai)."""
+    image_root = Path(image_root)
+    return Path(os.getenv("IMAGE_BLOB_ROOT", str(image_root.parent / f"{image_root.name}.blobs")))
+
+
+class BlobStore:
+    def __init__(self, root):
+        self.root = Path(root)
+        self.tmp_dir = self.root / "tmp"
+        self.tmp_dir.mkdir(parents=True, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self.conn = sqlite3.connect(str(self.root / "index.sqlite"), check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS blobs (
+                sha256 TEXT PRIMARY KEY,
+                size INTEGER NOT NULL,
+                ext TEXT NOT NULL,
+                created_at TEXT NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS urls (
+                url TEXT PRIMARY KEY,
+                sha256 TEXT NOT NULL,
+                fetched_at TEXT NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS links (
+                path TEXT PRIMARY KEY,
+                sha256 TEXT NOT NULL,
+                linked_at TEXT NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS idx_links_sha256 ON links (sha256);
+            """
+        )
+        self.conn.commit()
+
+        # Statistik run ini (bukan keseluruhan store)
+        self.downloaded = 0
+        self.url_hits = 0
+        self.content_hits = 0
+
+    @classmethod
+    def for_image_root(cls, image_root):
+        return cls(default_blob_root(image_root))
+
+    # ------------------------------------------------------------------ internals
+
+    def blob_path(self, sha256, ext):
+        return self.root / sha256[:2] / sha256[2:4] / f"{sha256}{ext}"
+
+    def _lookup_url(self, url):
+        with self._lock:
+            row = self.conn.execute(
+                "SELECT b.sha256, b.ext FROM urls u JOIN blobs b ON b.sha256 = u.sha256 WHERE u.url = ?",
+                (url,),
+            ).fetchone()
+        if row is None:
+            return None
+        blob = self.blob_path(*row)
+        return (row[0], blob) if blob.exists() else None
+
+    def _materialize(self, blob, dest_path):
+        dest_path = Path(dest_path)
+        dest_path.parent.mkdir(parents=True, exist_ok=True)
+        if dest_path.exists():
+            dest_path.unlink()
+        try:
+            os.link(blob, dest_path)
+        except OSError:
+            # Beda filesystem / FS tanpa hardlink: fallback copy (manifest tetap mencatat sha256)
+            shutil.copy2(blob, dest_path)
+
+    def _record_link(self, dest_path, sha256, url=None):
+        now = datetime.now().isoformat(timespec="seconds")
+        with self._lock, self.conn:
+            if url:
+                self.conn.execute(
+                    "INSERT OR REPLACE INTO urls (url, sha256, fetched_at) VALUES (?, ?, ?)",
+                    (url, sha256, now),
+                )
+            self.conn.execute(
+                "INSERT OR REPLACE INTO links (path, sha256, linked_at) VALUES (?, ?, ?)",
+                (str(dest_path), sha256, now),
+            )
+
+    def _store_tmp(self, tmp_path, sha256, size, ext):
+        """Pindahkan file tmp ke blob path jika hash belum ada. Return (blob_path, sudah_ada)."""
+        blob = self.blob_path(sha256, ext)
+        with self._lock:
+            row = self.conn.execute("SELECT ext FROM blobs WHERE sha256 = ?", (sha256,)).fetchone()
+            if row is not None and self.blob_path(sha256, row[0]).exists():
+                os.remove(tmp_path)
+                return self.blob_path(sha256, row[0]), True
+
+            blob.parent.mkdir(parents=True, exist_ok=True)
+            os.replace(tmp_path, blob)
+            with self.conn:
+                self.conn.execute(
+                    "INSERT OR REPLACE INTO blobs (sha256, size, ext, created_at) VALUES (?, ?, ?, ?)",
+                    (sha256, size, ext, datetime.now().isoformat(timespec="seconds")),
+                )
+            return blob, False
+
+    # ------------------------------------------------------------------ public API
+
+    def put_file(self, src_path, dest_path=None, url=None):
+        """Masukkan file lokal ke store (dan hardlink ke dest_path jika diberikan). Return sha256."""
+        digest = hashlib.sha256()
+        fd, tmp_path = tempfile.mkstemp(dir=self.tmp_dir)
+        size = 0
+        with os.fdopen(fd, "wb") as out, open(src_path, "rb") as src:
+            for chunk in iter(lambda: src.read(CHUNK_SIZE), b""):
+                digest.update(chunk)
+                out.write(chunk)
+                size += len(chunk)
+            out.flush()
+            os.fsync(out.fileno())
+        sha256 = digest.hexdigest()
+        blob, _ = self._store_tmp(tmp_path, sha256, size, Path(src_path).suffix.lower() or ".jpg")
+        if dest_path is not None:
+            self._materialize(blob, dest_path)
+            self._record_link(dest_path, sha256, url)
+        return sha256
+
+    def fetch(self, url, dest_path, session=None, timeout=30, **request_kwargs):
+        """
+        Pastikan dest_path berisi gambar dari url.
+        - dest_path sudah ada          -> tidak melakukan apa-apa
+        - url sudah pernah didownload  -> hardlink dari blob, tanpa request HTTP
+        - selain itu                   -> download, hash, simpan blob (dedup by content), hardlink
+        Return True jika dest_path tersedia, False jika gagal.
+        """
+        dest_path = Path(dest_path)
+        if dest_path.exists():
+            return True
+
+        known = self._lookup_url(url)
+        if known is not None:
+            sha256, blob = known
+            self._materialize(blob, dest_path)
+            self._record_link(dest_path, sha256)
+            with self._lock:
+                self.url_hits += 1
+            return True
+
+        # Nama tmp deterministik per URL supaya `.part` bisa di-resume setelah crash / putus
+        tmp_path = self.tmp_dir / hashlib.sha1(url.encode("utf-8")).hexdigest()
+        result = stream_download(url, tmp_path, session=session, timeout=timeout, **request_kwargs)
+
+        sha256 = result["sha256"]
+        blob, existed = self._store_tmp(tmp_path, sha256, result["size"], dest_path.suffix.lower() or ".jpg")
+        self._materialize(blob, dest_path)
+        self._record_link(dest_path, sha256, url)
+        with self._lock:
+            self.downloaded += 1
+            if existed:
+                self.content_hits += 1
+        return True
+
+    def dedup_report(self):
+        """Ringkasan dedup keseluruhan store: file logis vs blob unik, byte logis vs fisik."""
+        with self._lock:
+            unique_blobs, physical_bytes = self.conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM blobs"
+            ).fetchone()
+            logical_files, logical_bytes = self.conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(b.size), 0) FROM links l JOIN blobs b ON b.sha256 = l.sha256"
+            ).fetchone()
+            known_urls = self.conn.execute("SELECT COUNT(*) FROM urls").fetchone()[0]
+        return {
+            "logical_files": logical_files,
+            "unique_blobs": unique_blobs,
+            "known_urls": known_urls,
+            "logical_bytes": logical_bytes,
+            "physical_bytes": physical_bytes,
+            "dedup_ratio": round(logical_bytes / physical_bytes, 3) if physical_bytes else 1.0,
+            "saved_bytes": logical_bytes - physical_bytes,
+            "run_downloaded": self.downloaded,
+            "run_url_hits": self.url_hits,
+            "run_content_hits": self.content_hits,
+        }
+
+    def log_report(self):
+        report = self.dedup_report()
+        logging.info(
+            f"📊 Blob store {self.root}: {report['logical_files']} file -> {report['unique_blobs']} blob unik "
+            f"(dedup ratio {report['dedup_ratio']}x, hemat {report['saved_bytes'] / (1024 * 1024):.1f} MB). "
+            f"Run ini: {report['run_downloaded']} download, {report['run_url_hits']} skip by URL, "
+            f"{report['run_content_hits']} duplikat konten"
+        )
+        return report
+
+    def close(self):
+        with self._lock:
+            self.conn.close()
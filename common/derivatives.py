@@ -0,0 +1,253 @@
+"""
+Generate derivative gambar (thumbnail + copy resolusi dataset) dari images_carlist / images_mudah.
+
+- Render jalan di ProcessPoolExecutor (semua core), satu decode per source untuk semua spec
+- Incremental: manifest SQLite menyimpan (mtime_ns, size, sha256) source per spec; source yang
+  tidak berubah dilewati, mtime berubah tapi hash sama cukup update manifest
+- Output di <image_root>.derivatives/<spec>/<path relatif>, ditulis atomik (tmp + os.replace)
+- Bisa dipakai batch (run) atau sebagai hook pipeline download (submit per listing)
+"""
+
+import os
+import sqlite3
+import hashlib
+import logging
+import threading
+import multiprocessing
+from datetime import datetime
+from pathlib import Path
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+IMAGE_EXTS = (".jpg", ".jpeg", ".png", ".webp", ".bmp")
+
+# nama spec -> (max sisi panjang, kualitas JPEG)
+DEFAULT_SPECS = {
+    "thumb": (256, 80),
+    "dataset": (640, 90),
+}
+
+CHUNK_SIZE = 64 * 1024
+
+
+def default_derivative_root(image_root):
+    image_root = Path(image_root)
+    return Path(os.getenv("IMAGE_DERIVATIVE_ROOT", str(image_root.parent / f"{image_root.name}.derivatives")))
+
+
+def parse_specs(value):
+    """Parse "thumb=256:80,dataset=640:90" menjadi dict spec."""
+    specs = {}
+    for item in filter(None, (part.strip() for part in value.split(","))):
+        name, _, size_quality = item.partition("=")
+        size, _, quality = size_quality.partition(":")
+        specs[name] = (int(size), int(quality or 85))
+    return specs
+
+
+def file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def render_derivatives(source, outputs):
+    """
+    Dijalankan di worker process. outputs = [(spec, max_side, quality, output_path), ...].
+    Return list (spec, output_path, width, height) atau raise jika source tidak bisa dibaca.
+    """
+    from PIL import Image, ImageOps
+
+    results = []
+    with Image.open(source) as img:
+        largest = max(max_side for _, max_side, _, _ in outputs)
+        # JPEG: decode langsung di skala kecil (DCT scaling), jauh lebih cepat dari decode penuh
+        img.draft("RGB", (largest, largest))
+        img = ImageOps.exif_transpose(img)
+        if img.mode != "RGB":
+            img = img.convert("RGB")
+
+        # Spec terbesar dulu, lalu spec lebih kecil diturunkan dari hasil sebelumnya
+        current = img
+        for spec, max_side, quality, output_path in sorted(outputs, key=lambda o: -o[1]):
+            derived = current.copy()
+            derived.thumbnail((max_side, max_side), Image.LANCZOS, reducing_gap=3.0)
+            os.makedirs(os.path.dirname(output_path), exist_ok=True)
+            tmp_path = f"{output_path}.tmp{os.getpid()}"
+            derived.save(tmp_path, "JPEG", quality=quality, optimize=True)
+            os.replace(tmp_path, output_path)
+            results.append((spec, output_path, derived.width, derived.height))
+            current = derived
+    return results
+
+
+class DerivativeGenerator:
+    def __init__(self, image_root, specs=None, workers=None, output_root=None):
+        self.image_root = Path(image_root).resolve()
+        self.specs = specs or DEFAULT_SPECS
+        self.output_root = Path(output_root or default_derivative_root(self.image_root))
+        self.output_root.mkdir(parents=True, exist_ok=True)
+        self.workers = workers or os.cpu_count() or 1
+
+        self._lock = threading.Lock()
+        self.conn = sqlite3.connect(str(self.output_root / "manifest.sqlite"), check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS derivatives (
+                source TEXT NOT NULL,
+                spec TEXT NOT NULL,
+                src_mtime_ns INTEGER NOT NULL,
+                src_size INTEGER NOT NULL,
+                src_sha256 TEXT NOT NULL,
+                output TEXT NOT NULL,
+                width INTEGER,
+                height INTEGER,
+                generated_at TEXT NOT NULL,
+                PRIMARY KEY (source, spec)
+            )
+            """
+        )
+        self.conn.commit()
+
+        self._executor = None
+        self._futures = []
+        self.generated = 0
+        self.skipped = 0
+        self.failed = 0
+
+    # ------------------------------------------------------------------ internals
+
+    def _executor_or_start(self):
+        if self._executor is None:
+            # spawn, bukan fork: hook ini dipanggil saat thread downloader masih jalan
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers, mp_context=multiprocessing.get_context("spawn")
+            )
+        return self._executor
+
+    def output_path(self, spec, source):
+        rel = Path(source).resolve().relative_to(self.image_root)
+        return str((self.output_root / spec / rel).with_suffix(".jpg"))
+
+    def _plan(self, source):
+        """Return (source absolut, stat, sha256 atau None, outputs yang perlu dirender)."""
+        source = str(Path(source).resolve())
+        st = os.stat(source)
+        with self._lock:
+            rows = {
+                spec: (mtime_ns, size, sha256, output)
+                for spec, mtime_ns, size, sha256, output in self.conn.execute(
+                    "SELECT spec, src_mtime_ns, src_size, src_sha256, output FROM derivatives WHERE source = ?",
+                    (source,),
+                )
+            }
+
+        sha256 = None
+        todo = []
+        unchanged_specs = []
+        for spec, (max_side, quality) in self.specs.items():
+            output = self.output_path(spec, source)
+            row = rows.get(spec)
+            if row and os.path.exists(output):
+                mtime_ns, size, recorded_sha, _ = row
+                if mtime_ns == st.st_mtime_ns and size == st.st_size:
+                    continue
+                # mtime berubah (mis. file di-touch / di-hardlink ulang): cek hash sebelum render ulang
+                sha256 = sha256 or file_sha256(source)
+                if sha256 == recorded_sha:
+                    unchanged_specs.append(spec)
+                    continue
+            todo.append((spec, max_side, quality, output))
+
+        if unchanged_specs:
+            with self._lock, self.conn:
+                self.conn.executemany(
+                    "UPDATE derivatives SET src_mtime_ns = ?, src_size = ? WHERE source = ? AND spec = ?",
+                    [(st.st_mtime_ns, st.st_size, source, spec) for spec in unchanged_specs],
+                )
+        return source, st, sha256, todo
+
+    def _record(self, source, st, sha256, results):
+        now = datetime.now().isoformat(timespec="seconds")
+        sha256 = sha256 or file_sha256(source)
+        with self._lock, self.conn:
+            self.conn.executemany(
+                """
+                INSERT OR REPLACE INTO derivatives
+                    (source, spec, src_mtime_ns, src_size, src_sha256, output, width, height, generated_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+                """,
+                [
+                    (source, spec, st.st_mtime_ns, st.st_size, sha256, output, width, height, now)
+                    for spec, output, width, height in results
+                ],
+            )
+            self.generated += len(results)
+
+    def _on_done(self, source, st, sha256, future):
+        try:
+            self._record(source, st, sha256, future.result())
+        except Exception as e:
+            with self._lock:
+                self.failed += 1
+            logging.warning(f"Gagal membuat derivative untuk {source}: {e}")
+
+    # ------------------------------------------------------------------ public API
+
+    def submit(self, sources):
+        """Hook pipeline: jadwalkan derivative untuk file yang baru didownload (non-blocking)."""
+        for source in sources:
+            if not str(source).lower().endswith(IMAGE_EXTS) or not os.path.exists(source):
+                continue
+            try:
+                source, st, sha256, todo = self._plan(source)
+            except OSError as e:
+                logging.warning(f"Lewati derivative {source}: {e}")
+                continue
+            if not todo:
+                with self._lock:
+                    self.skipped += 1
+                continue
+            future = self._executor_or_start().submit(render_derivatives, source, todo)
+            future.add_done_callback(lambda f, s=source, st=st, h=sha256: self._on_done(s, st, h, f))
+            self._futures.append(future)
+
+        # Backpressure: jangan antrikan lebih dari workers * 16 render sekaligus
+        self._futures = [f for f in self._futures if not f.done()]
+        while len(self._futures) > self.workers * 16:
+            _, pending = wait(self._futures, return_when=FIRST_COMPLETED)
+            self._futures = list(pending)
+
+    def iter_sources(self):
+        for dirpath, _, filenames in os.walk(self.image_root):
+            for name in filenames:
+                if name.lower().endswith(IMAGE_EXTS):
+                    yield os.path.join(dirpath, name)
+
+    def run(self, sources=None, progress_every=1000):
+        """Batch mode: proses semua source (atau daftar tertentu), tunggu selesai lalu tutup manifest."""
+        for idx, source in enumerate(sources if sources is not None else self.iter_sources(), start=1):
+            self.submit([source])
+            if progress_every and idx % progress_every == 0:
+                logging.info(f"📐 {idx} source diperiksa, {self.generated} derivative dibuat, {self.skipped} dilewati")
+        return self.close()
+
+    def stats(self):
+        with self._lock:
+            return {"generated": self.generated, "skipped": self.skipped, "failed": self.failed}
+
+    def close(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+        self._futures = []
+        stats = self.stats()
+        logging.info(
+            f"📐 Derivative selesai: {stats['generated']} dibuat, {stats['skipped']} source dilewati, "
+            f"{stats['failed']} gagal ({self.output_root})"
+        )
+        with self._lock:
+            self.conn.close()
+        return stats
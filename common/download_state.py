@@ -0,0 +1,215 @@
+"""
+State store download gambar per listing (SQLite), pengganti scan / rewrite file log.
+
+Satu baris per listing_id (primary key) berisi status terakhir, jumlah gambar yang
+berhasil / gagal, expected count dan timestamp. Lookup memakai index primary key,
+update ditampung di memori lalu di-flush per batch dengan executemany (satu transaksi).
+File log teks lama tetap ditulis untuk dibaca manusia, dan bisa di-import sekali ke store.
+
+Tabel image_files menyimpan hasil verifikasi per file gambar (size, sha256, ETag,
+Last-Modified) supaya file terpotong terdeteksi dan refresh cukup pakai conditional request.
+"""
+
+import os
+import re
+import sqlite3
+from datetime import datetime
+
+STATUSES = ("SUCCESS", "PARTIAL", "FAILED")
+
+DEFAULT_FLUSH_EVERY = 500
+
+LOG_LINE_PATTERN = re.compile(
+    r"\[ID (\d+)\].*?\b(SUCCESS|PARTIAL|FAILED|ERROR)\b(?::\s*(\d+) downloaded, (\d+) failed)?"
+)
+
+
+def _now():
+    return datetime.now().isoformat(timespec="seconds")
+
+
+class DownloadStateStore:
+    def __init__(self, db_path, flush_every=DEFAULT_FLUSH_EVERY):
+        os.makedirs(os.path.dirname(db_path) or ".", exist_ok=True)
+        self.db_path = db_path
+        self.flush_every = flush_every
+        self.conn = sqlite3.connect(db_path)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS download_state (
+                listing_id INTEGER PRIMARY KEY,
+                status TEXT NOT NULL,
+                downloaded INTEGER NOT NULL DEFAULT 0,
+                failed INTEGER NOT NULL DEFAULT 0,
+                expected INTEGER,
+                first_seen_at TEXT NOT NULL,
+                updated_at TEXT NOT NULL
+            )
+            """
+        )
+        self.conn.execute("CREATE INDEX IF NOT EXISTS idx_download_state_status ON download_state (status)")
+        self.conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS image_files (
+                path TEXT PRIMARY KEY,
+                url TEXT,
+                size INTEGER NOT NULL,
+                sha256 TEXT,
+                etag TEXT,
+                last_modified TEXT,
+                verified_at TEXT NOT NULL
+            )
+            """
+        )
+        self.conn.commit()
+        self._pending = {}
+        self._pending_images = {}
+
+    def is_empty(self):
+        return self.conn.execute("SELECT 1 FROM download_state LIMIT 1").fetchone() is None
+
+    def get(self, listing_id):
+        """Return dict state untuk listing_id, atau None jika belum pernah diproses."""
+        if listing_id in self._pending:
+            status, downloaded, failed, expected, updated_at = self._pending[listing_id]
+            return {
+                "status": status,
+                "downloaded": downloaded,
+                "failed": failed,
+                "expected": expected,
+                "updated_at": updated_at,
+            }
+        row = self.conn.execute(
+            "SELECT status, downloaded, failed, expected, updated_at FROM download_state WHERE listing_id = ?",
+            (listing_id,),
+        ).fetchone()
+        if row is None:
+            return None
+        return dict(zip(("status", "downloaded", "failed", "expected", "updated_at"), row))
+
+    def get_status(self, listing_id):
+        state = self.get(listing_id)
+        return state["status"] if state else None
+
+    def record(self, listing_id, status, downloaded=0, failed=0, expected=None, updated_at=None):
+        """Catat status listing; ditulis ke SQLite saat flush (otomatis tiap flush_every update)."""
+        if status not in STATUSES:
+            raise ValueError(f"status tidak valid: {status}")
+        self._pending[listing_id] = (status, downloaded, failed, expected, updated_at or _now())
+        if len(self._pending) >= self.flush_every:
+            self.flush()
+
+    def get_image(self, path):
+        """Return dict verifikasi terakhir untuk file gambar, atau None."""
+        path = str(path)
+        if path in self._pending_images:
+            return dict(self._pending_images[path])
+        row = self.conn.execute(
+            "SELECT url, size, sha256, etag, last_modified, verified_at FROM image_files WHERE path = ?",
+            (path,),
+        ).fetchone()
+        if row is None:
+            return None
+        return dict(zip(("url", "size", "sha256", "etag", "last_modified", "verified_at"), row))
+
+    def is_image_verified(self, path):
+        """True jika file ada, tidak kosong, dan ukurannya sama dengan yang tercatat saat verifikasi."""
+        info = self.get_image(path)
+        if not info or not info["size"]:
+            return False
+        try:
+            return os.path.getsize(path) == info["size"]
+        except OSError:
+            return False
+
+    def record_image(self, path, url, size, sha256=None, etag=None, last_modified=None):
+        self._pending_images[str(path)] = {
+            "url": url,
+            "size": size,
+            "sha256": sha256,
+            "etag": etag,
+            "last_modified": last_modified,
+            "verified_at": _now(),
+        }
+        if len(self._pending_images) >= self.flush_every:
+            self.flush()
+
+    def flush(self):
+        if self._pending_images:
+            with self.conn:
+                self.conn.executemany(
+                    """
+                    INSERT OR REPLACE INTO image_files
+                        (path, url, size, sha256, etag, last_modified, verified_at)
+                    VALUES (?, ?, ?, ?, ?, ?, ?)
+                    """,
+                    [
+                        (path, i["url"], i["size"], i["sha256"], i["etag"], i["last_modified"], i["verified_at"])
+                        for path, i in self._pending_images.items()
+                    ],
+                )
+            self._pending_images.clear()
+
+        if not self._pending:
+            return
+        rows = [
+            (listing_id, status, downloaded, failed, expected, updated_at, updated_at)
+            for listing_id, (status, downloaded, failed, expected, updated_at) in self._pending.items()
+        ]
+        with self.conn:
+            self.conn.executemany(
+                """
+                INSERT INTO download_state
+                    (listing_id, status, downloaded, failed, expected, first_seen_at, updated_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT(listing_id) DO UPDATE SET
+                    status = excluded.status,
+                    downloaded = excluded.downloaded,
+                    failed = excluded.failed,
+                    expected = COALESCE(excluded.expected, download_state.expected),
+                    updated_at = excluded.updated_at
+                """,
+                rows,
+            )
+        self._pending.clear()
+
+    def summary(self):
+        self.flush()
+        return dict(self.conn.execute("SELECT status, COUNT(*) FROM download_state GROUP BY status").fetchall())
+
+    def import_log(self, log_path):
+        """
+        Import file log teks lama (format "[ID x] ... STATUS: a downloaded, b failed").
+        Baris terakhir untuk setiap ID yang dipakai. Return jumlah listing yang di-import.
+        """
+        if not os.path.exists(log_path):
+            return 0
+
+        latest = {}
+        with open(log_path, encoding="utf-8", errors="replace") as f:
+            for line in f:
+                match = LOG_LINE_PATTERN.search(line)
+                if not match:
+                    continue
+                listing_id, status, downloaded, failed = match.groups()
+                if status == "ERROR":
+                    status = "FAILED"
+                latest[int(listing_id)] = (status, int(downloaded or 0), int(failed or 0))
+
+        imported_at = _now()
+        for listing_id, (status, downloaded, failed) in latest.items():
+            self.record(listing_id, status, downloaded, failed, updated_at=imported_at)
+        self.flush()
+        return len(latest)
+
+    def close(self):
+        self.flush()
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
@@ -0,0 +1,178 @@
+"""
+Ekstraksi field halaman detail dalam satu page.evaluate dari spec deklaratif.
+
+    data = extract_fields(page, MUDAH_DETAIL_FIELDS)
+
+Dulu safe_extract memanggil locator(selector).count() lalu .first.inner_text() untuk setiap
+kandidat selector setiap field: dua round-trip IPC per percobaan, puluhan per listing.
+Spec: {field: {"selectors": [...], "fallback": "N/A", "post": fungsi}}
+- selectors dicoba berurutan, nilai pertama yang ditemukan dipakai (seperti safe_extract)
+- selector berupa CSS, XPath (diawali // atau xpath=), atau bentuk Playwright
+  "<css>:has-text('Label') + <css>" yang ditiru di JS (teks case-insensitive, spasi
+  dinormalisasi): elemen sibling pertama dalam urutan dokumen yang elemen sebelumnya
+  cocok dengan <css> dan memuat label
+- entry selector boleh tuple (selector, reader): "text" (default, innerText.strip()) atau
+  "highlight" (aturan get_highlight_info lama: anak div kedua / satu-satunya / parent;
+  kosong dianggap tidak ketemu)
+- post(value) dijalankan di Python pada nilai akhir (termasuk fallback)
+"""
+
+_EXTRACT_JS = """
+(spec) => {
+    const norm = (text) => (text || "").replace(/\\s+/g, " ").trim().toLowerCase();
+    const hasText = /^(.*?):has-text\\((["'])(.*?)\\2\\)\\s*(?:\\+\\s*(.+))?$/;
+    const query = (selector) => {
+        if (selector.startsWith("//") || selector.startsWith("xpath=")) {
+            const xpath = selector.replace(/^xpath=/, "");
+            return document.evaluate(xpath, document, null, XPathResult.FIRST_ORDERED_NODE_TYPE, null).singleNodeValue;
+        }
+        const match = selector.match(hasText);
+        if (!match) return document.querySelector(selector);
+        const [, base, , text, sibling] = match;
+        const needle = norm(text);
+        const labelled = (el) => el && (!base || el.matches(base)) && norm(el.textContent).includes(needle);
+        if (!sibling) {
+            for (const el of document.querySelectorAll(base || "*")) {
+                if (labelled(el)) return el;
+            }
+            return null;
+        }
+        // Urutan dokumen kandidat sibling: wrapper luar yang juga memuat label tidak menang
+        for (const el of document.querySelectorAll(sibling)) {
+            if (labelled(el.previousElementSibling)) return el;
+        }
+        return null;
+    };
+    const innerText = (el) => (el.innerText ?? el.textContent ?? "").trim();
+    const readers = {
+        text: innerText,
+        highlight: (parent) => {
+            const children = parent.querySelectorAll("div");
+            const el = children.length === 2 ? children[1] : children.length === 1 ? children[0] : parent;
+            return innerText(el) || null;
+        },
+    };
+
+    const result = {};
+    for (const [field, selectors] of Object.entries(spec)) {
+        result[field] = null;
+        for (const [selector, reader] of selectors) {
+            try {
+                const el = query(selector);
+                if (!el) continue;
+                const value = (readers[reader] || readers.text)(el);
+                if (value === null) continue;
+                result[field] = value;
+                break;
+            } catch (e) {
+                continue;
+            }
+        }
+    }
+    return result;
+}
+"""
+
+
+def compile_spec(spec):
+    """Spec -> argumen JSON untuk _EXTRACT_JS: {field: [[selector, reader], ...]}."""
+    return {
+        field: [[entry, "text"] if isinstance(entry, str) else list(entry) for entry in rule["selectors"]]
+        for field, rule in spec.items()
+    }
+
+
+def extract_fields(page, spec):
+    """Semua field spec dalam satu page.evaluate; field yang tidak ketemu diisi fallback."""
+    raw = page.evaluate(_EXTRACT_JS, compile_spec(spec))
+    data = {}
+    for field, rule in spec.items():
+        value = raw.get(field)
+        if value is None:
+            value = rule.get("fallback", "N/A")
+        post = rule.get("post")
+        data[field] = post(value) if post else value
+    return data
+
+
+def highlight_condition(full_info):
+    """Teks highlight "Used, Posted 3 days ago" -> "Used"."""
+    if not full_info or full_info == "N/A":
+        return "N/A"
+    return full_info.split(",", 1)[0].strip()
+
+
+def highlight_information_ads(full_info):
+    """Teks highlight "Used, Posted 3 days ago" -> "Posted 3 days ago"."""
+    if not full_info or full_info == "N/A":
+        return ""
+    parts = full_info.split(",", 1)
+    return parts[1].strip() if len(parts) > 1 else ""
+
+
+_MUDAH_HIGHLIGHT = [
+    ("#ad_view_ad_highlights > div > div > div:nth-child(1) > div > div", "highlight"),
+    "#ad_view_ad_highlights > div > div > div:nth-child(1) > div > div > div",
+    "div.text-\\[\\#666666\\].text-xs.lg\\:text-base",
+    "//*[@id='ad_view_ad_highlights']/div/div/div[1]/div/div/div",
+]
+
+# Halaman detail mudah.my: dipakai scraper, null scraper dan tracker
+MUDAH_DETAIL_FIELDS = {
+    "brand": {"selectors": [
+        "#ad_view_car_specifications div:nth-child(1) > div:nth-child(3)",
+        "div:has-text('Brand') + div",
+    ]},
+    "model": {"selectors": [
+        "#ad_view_car_specifications div:nth-child(2) > div:nth-child(3)",
+        "div:has-text('Model') + div",
+    ]},
+    "variant": {"selectors": [
+        "#ad_view_car_specifications div:nth-child(4) > div:nth-child(3)",
+        "div:has-text('Variant') + div",
+    ]},
+    "engine_cc": {"selectors": [
+        "#ad_view_car_specifications > div > div > div:nth-child(2) > div > div > div:nth-child(1) > div:nth-child(1) > div:nth-child(2)",
+        "div:has-text('Engine CC') + div",
+    ]},
+    "condition": {"selectors": _MUDAH_HIGHLIGHT, "post": highlight_condition},
+    "information_ads": {"selectors": _MUDAH_HIGHLIGHT, "post": highlight_information_ads},
+    "location": {"selectors": [
+        "#ad_view_ad_highlights > div > div > div.flex.flex-wrap.lg\\:flex-nowrap.gap-3\\.5 > div:nth-child(4) > div",
+        "div.font-bold.truncate.text-sm.md\\:text-base",
+        "//*[@id='ad_view_ad_highlights']/div/div/div[3]/div[4]/div",
+        "#ad_view_ad_highlights div.font-bold.truncate",
+    ]},
+    "price": {"selectors": [
+        "div.flex.gap-1.md\\:items-end > div",
+    ]},
+    "year": {"selectors": [
+        "#ad_view_car_specifications div:nth-child(3) > div:nth-child(3)",
+        "div:has-text('Year') + div",
+    ]},
+    "mileage": {"selectors": [
+        "#ad_view_ad_highlights > div > div > div.flex.flex-wrap.lg\\:flex-nowrap.gap-3\\.5 > div:nth-child(3) > div",
+        "div:has-text('Mileage') + div",
+    ]},
+    "transmission": {"selectors": [
+        "#ad_view_ad_highlights > div > div > div.flex.flex-wrap.lg\\:flex-nowrap.gap-3\\.5 > div:nth-child(2) > div",
+        "div:has-text('Transmission') + div",
+    ]},
+    "seat_capacity": {"selectors": [
+        "#ad_view_car_specifications > div > div > div > div > div > div:nth-child(2) > div:nth-child(3) > div:nth-child(3)",
+        "div:has-text('Seat Capacity') + div",
+    ]},
+    "series": {"selectors": [
+        "#ad_view_car_specifications div.flex.flex-col.gap-4 div:has-text('Series') + div",
+        "div:has-text('Series') + div",
+    ]},
+    "type": {"selectors": [
+        "#ad_view_car_specifications div.flex.flex-col.gap-4 div:has-text('Type') + div",
+        "div:has-text('Type') + div",
+    ]},
+    "fuel_type": {"selectors": [
+        "#ad_view_car_specifications > div > div > div:nth-child(1) > div > div > div:nth-child(2) > div:nth-child(4) > div:nth-child(3)",
+        "#ad_view_car_specifications div.flex.flex-col.gap-4 div:has-text('Fuel Type') + div",
+        "div:has-text('Fuel Type') + div",
+    ]},
+}
@@ -0,0 +1,263 @@
+"""
+Index inventaris file gambar (SQLite) untuk tool di scripts/.
+
+rglob penuh di tree berisi jutaan file lambat dan diulang setiap kali script jalan.
+Index ini menyimpan path, listing id, size dan mtime setiap file gambar di bawah root,
+plus mtime setiap folder:
+
+- Refresh incremental: folder yang mtime-nya sama dengan catatan tidak di-list ulang
+  (mtime folder berubah jika ada entry ditambah, dihapus atau di-rename), cukup satu
+  stat per folder lalu turun ke subfolder yang tercatat
+- Folder di-scan paralel dengan os.scandir di thread pool (scandir/stat melepas GIL)
+- Query (jumlah file per folder, folder per listing id, daftar file) jadi lookup SQLite
+
+Index disimpan di samping root: <root>.inventory.sqlite. File yang ditimpa di tempat
+(nama sama) tidak mengubah mtime folder; pakai refresh(full=True) jika size/mtime file
+harus benar-benar baru.
+"""
+
+import os
+import time
+import sqlite3
+from collections import defaultdict
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from pathlib import Path
+
+IMAGE_EXTS = (".jpg", ".jpeg", ".png", ".webp", ".bmp", ".tif", ".tiff")
+
+REFRESH_MODES = ("incremental", "full", "none")
+
+DEFAULT_WORKERS = min(32, (os.cpu_count() or 1) * 4)
+
+# Folder yang berubah sesaat sebelum di-scan bisa berubah lagi di "tick" mtime yang sama;
+# catat mtime 0 supaya folder itu pasti di-scan ulang pada refresh berikutnya
+RACY_WINDOW_NS = 2 * 10**9
+
+
+def default_inventory_path(root):
+    root = Path(os.path.abspath(root))
+    return root.parent / f"{root.name}.inventory.sqlite"
+
+
+def listing_id_of(rel_dir):
+    name = rel_dir.rsplit("/", 1)[-1]
+    return int(name) if name.isdigit() else None
+
+
+def scan_dir(abs_path, recorded_mtime, full=False):
+    """
+    Dijalankan di thread pool. Return (mtime_ns, files, subdirs); files/subdirs None jika
+    folder tidak berubah sejak scan terakhir, mtime_ns None jika folder sudah tidak ada.
+    """
+    try:
+        # stat sebelum scandir: perubahan selama listing menaikkan mtime -> di-scan ulang nanti
+        mtime_ns = os.stat(abs_path).st_mtime_ns
+    except FileNotFoundError:
+        return None, None, None
+    if not full and mtime_ns == recorded_mtime:
+        return mtime_ns, None, None
+
+    files = []
+    subdirs = []
+    try:
+        with os.scandir(abs_path) as entries:
+            for entry in entries:
+                try:
+                    if entry.is_dir(follow_symlinks=False):
+                        subdirs.append(entry.name)
+                    elif entry.name.lower().endswith(IMAGE_EXTS) and entry.is_file():
+                        st = entry.stat()
+                        files.append((entry.name, st.st_size, st.st_mtime_ns))
+                except FileNotFoundError:
+                    continue
+    except FileNotFoundError:
+        return None, None, None
+    return mtime_ns, files, subdirs
+
+
+class FileInventory:
+    def __init__(self, root, db_path=None, workers=DEFAULT_WORKERS):
+        self.root = Path(os.path.abspath(root))
+        self.workers = workers
+        self.db_path = Path(db_path or default_inventory_path(self.root))
+        self.last_refresh = None
+
+        self.conn = sqlite3.connect(str(self.db_path))
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS dirs (
+                path TEXT PRIMARY KEY,
+                parent TEXT,
+                listing_id INTEGER,
+                mtime_ns INTEGER NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS idx_dirs_parent ON dirs (parent);
+            CREATE INDEX IF NOT EXISTS idx_dirs_listing ON dirs (listing_id);
+            CREATE TABLE IF NOT EXISTS files (
+                path TEXT PRIMARY KEY,
+                dir TEXT NOT NULL,
+                listing_id INTEGER,
+                size INTEGER NOT NULL,
+                mtime_ns INTEGER NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS idx_files_dir ON files (dir);
+            CREATE INDEX IF NOT EXISTS idx_files_listing ON files (listing_id);
+            """
+        )
+        self.conn.commit()
+
+    # ------------------------------------------------------------------ path helpers
+
+    @staticmethod
+    def _join(parent, name):
+        return f"{parent}/{name}" if parent else name
+
+    def path(self, rel):
+        """Path absolut dari path relatif index ("" = root)."""
+        return self.root / rel if rel else self.root
+
+    def relative(self, path):
+        """Path relatif (posix) terhadap root, tanpa syscall. None jika di luar root."""
+        rel = os.path.relpath(os.path.abspath(path), self.root)
+        if rel == ".":
+            return ""
+        if rel == ".." or rel.startswith(".." + os.sep):
+            return None
+        return rel.replace(os.sep, "/")
+
+    # ------------------------------------------------------------------ refresh
+
+    def _replace_dir(self, rel, parent, mtime_ns, files, stats):
+        old = {
+            path: (size, mtime)
+            for path, size, mtime in self.conn.execute(
+                "SELECT path, size, mtime_ns FROM files WHERE dir = ?", (rel,)
+            )
+        }
+        listing_id = listing_id_of(rel)
+        current = {self._join(rel, name): (size, mtime) for name, size, mtime in files}
+
+        removed = [(path,) for path in old if path not in current]
+        changed = [
+            (path, rel, listing_id, size, mtime)
+            for path, (size, mtime) in current.items()
+            if old.get(path) != (size, mtime)
+        ]
+        if removed:
+            self.conn.executemany("DELETE FROM files WHERE path = ?", removed)
+        if changed:
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO files (path, dir, listing_id, size, mtime_ns) VALUES (?, ?, ?, ?, ?)",
+                changed,
+            )
+        stats["files_added"] += sum(1 for path in current if path not in old)
+        stats["files_removed"] += len(removed)
+
+        if time.time_ns() - mtime_ns < RACY_WINDOW_NS:
+            mtime_ns = 0
+        self.conn.execute(
+            "INSERT OR REPLACE INTO dirs (path, parent, listing_id, mtime_ns) VALUES (?, ?, ?, ?)",
+            (rel, parent, listing_id, mtime_ns),
+        )
+
+    def _drop_dirs(self, gone, stats):
+        for rel in gone:
+            cursor = self.conn.execute("DELETE FROM files WHERE dir = ?", (rel,))
+            stats["files_removed"] += cursor.rowcount
+            self.conn.execute("DELETE FROM dirs WHERE path = ?", (rel,))
+
+    def refresh(self, full=False):
+        """
+        Sinkronkan index dengan filesystem. full=True me-list ulang semua folder.
+        Return statistik {dirs, dirs_scanned, files_added, files_removed, elapsed_sec}.
+        """
+        started = time.perf_counter()
+        known = dict(self.conn.execute("SELECT path, mtime_ns FROM dirs"))
+        children = defaultdict(list)
+        for parent, path in self.conn.execute("SELECT parent, path FROM dirs WHERE parent IS NOT NULL"):
+            children[parent].append(path)
+
+        seen = set()
+        stats = {"dirs": 0, "dirs_scanned": 0, "files_added": 0, "files_removed": 0}
+        with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="inventory") as pool, self.conn:
+            def schedule(rel, parent):
+                future = pool.submit(scan_dir, str(self.path(rel)), known.get(rel), full)
+                pending[future] = (rel, parent)
+
+            pending = {}
+            schedule("", None)
+            while pending:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    rel, parent = pending.pop(future)
+                    mtime_ns, files, subdirs = future.result()
+                    if mtime_ns is None:
+                        # Folder hilang saat scan: dibersihkan bersama folder lain yang tidak terlihat
+                        continue
+                    seen.add(rel)
+                    stats["dirs"] += 1
+                    if files is None:
+                        subdir_paths = children.get(rel, [])
+                    else:
+                        stats["dirs_scanned"] += 1
+                        self._replace_dir(rel, parent, mtime_ns, files, stats)
+                        subdir_paths = [self._join(rel, name) for name in subdirs]
+                    for sub in subdir_paths:
+                        schedule(sub, rel)
+
+            self._drop_dirs([rel for rel in known if rel not in seen], stats)
+
+        stats["elapsed_sec"] = round(time.perf_counter() - started, 2)
+        self.last_refresh = stats
+        return stats
+
+    # ------------------------------------------------------------------ queries
+
+    def dir_paths(self):
+        """Set path relatif semua folder yang tercatat."""
+        return {path for (path,) in self.conn.execute("SELECT path FROM dirs")}
+
+    def listing_dirs(self):
+        """Mapping listing id (nama folder numerik) -> path relatif folder."""
+        return dict(
+            self.conn.execute("SELECT listing_id, path FROM dirs WHERE listing_id IS NOT NULL ORDER BY path")
+        )
+
+    def file_counts(self):
+        """Mapping path relatif folder -> jumlah file gambar langsung di dalamnya."""
+        return dict(self.conn.execute("SELECT dir, COUNT(*) FROM files GROUP BY dir"))
+
+    def iter_files(self, under=None):
+        """Iterasi (path relatif, size, mtime_ns) semua file, opsional hanya di bawah folder relatif `under`."""
+        if under:
+            # Rentang string: semua path yang diawali "under/" ('0' = karakter setelah '/')
+            return self.conn.execute(
+                "SELECT path, size, mtime_ns FROM files WHERE path >= ? AND path < ? ORDER BY path",
+                (f"{under}/", f"{under}0"),
+            )
+        return self.conn.execute("SELECT path, size, mtime_ns FROM files ORDER BY path")
+
+    def summary(self):
+        files, total_bytes = self.conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM files").fetchone()
+        dirs, listings = self.conn.execute(
+            "SELECT COUNT(*), COUNT(DISTINCT listing_id) FROM dirs"
+        ).fetchone()
+        return {"files": files, "bytes": total_bytes, "dirs": dirs, "listings": listings}
+
+    def close(self):
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+def open_inventory(root, refresh="incremental", db_path=None, workers=DEFAULT_WORKERS):
+    """Buka index untuk root dan refresh sesuai mode (incremental / full / none)."""
+    inventory = FileInventory(root, db_path=db_path, workers=workers)
+    if refresh != "none":
+        inventory.refresh(full=refresh == "full")
+    return inventory
@@ -0,0 +1,189 @@
+"""
+Ambil URL gambar galeri listing tanpa membuka modal "Show All".
+
+Dulu: klik Show All (3 metode fallback), tunggu 6-9 detik per percobaan, lalu
+query_selector_all("div[data-index]") dan get_attribute("src") satu per satu (puluhan
+round-trip Playwright per listing). harvest_gallery() cukup satu page.evaluate yang
+mengumpulkan kandidat dari:
+- ld_json   : <script type="application/ld+json"> (field image schema.org listing)
+- next_data : state halaman yang di-embed (#__NEXT_DATA__), hanya dari object yang memuat
+              ad id listing (id dari URL ...-<id>.htm) supaya "iklan serupa" tidak ikut
+- dom       : <img>/<source> di galeri: src, data-src, data-original, kandidat terbesar srcset
+- network   : resource gambar yang sudah dimuat browser (performance entries); hanya diterima
+              jika nama filenya memuat ad id (thumbnail "iklan serupa" satu folder tidak ikut)
+
+Evaluate yang sama membaca jumlah foto menurut galeri itu sendiri (angka di tombol
+"Show All", counter "1/12" di galeri, atau jumlah div[data-index] jika modal terbuka).
+Caller membuka modal sebagai fallback jika hasil tanpa klik kurang dari jumlah itu,
+bukan hanya jika kosong.
+
+Kandidat dibersihkan seperti sebelumnya (query string dibuang, // -> https:), hanya host
+yang juga dipakai gambar galeri di DOM (atau ld+json) yang diterima supaya logo / iklan
+tidak ikut, lalu di-dedupe per nama file (varian ukuran foto yang sama). Urutan foto
+mengikuti prioritas sumber di atas; dari beberapa varian satu foto dipilih yang ukuran
+penuh (bukan folder thumbs/small/..., dimensi di path terbesar), sama dengan src
+div[data-index] di modal lama.
+"""
+
+import re
+import logging
+from urllib.parse import urlsplit
+
+SOURCES = ("ld_json", "next_data", "dom", "network")
+
+_AD_ID = re.compile(r"-(\d+)\.htm")
+_THUMB_PART = re.compile(r"(^|[/_.-])(thumbs?|thumbnails?|small|mini|preview|tn)([/_.-]|$)", re.I)
+_DIMENSION = re.compile(r"(\d{2,4})x(\d{2,4})|(?:^|[/_,-])w[_-]?(\d{2,4})(?=[/_,.-]|$)", re.I)
+
+logger = logging.getLogger(__name__)
+
+_HARVEST_JS = """
+({root, adId}) => {
+    const found = [];
+    const add = (source, value) => {
+        if (typeof value === "string" && value.trim()) found.push([source, value.trim()]);
+    };
+    const isImage = (value) => typeof value === "string" && /\\.(jpe?g|png|webp|avif)(\\?|$)/i.test(value);
+    const largest = (srcset) => {
+        let best = null;
+        let bestWidth = -1;
+        for (const part of (srcset || "").split(",")) {
+            const [url, size] = part.trim().split(/\\s+/);
+            const width = parseFloat(size) || 0;
+            if (url && width >= bestWidth) {
+                best = url;
+                bestWidth = width;
+            }
+        }
+        return best;
+    };
+    // needAnchor: gambar baru dikumpulkan di bawah object yang salah satu nilainya == adId
+    const walk = (source, node, depth, needAnchor) => {
+        if (!node || depth > 40) return;
+        if (typeof node === "string") {
+            if (isImage(node) && !needAnchor) add(source, node);
+        } else if (Array.isArray(node)) {
+            node.forEach(item => walk(source, item, depth + 1, needAnchor));
+        } else if (typeof node === "object") {
+            const values = Object.values(node);
+            const inAd = needAnchor && values.some(value => String(value) === adId);
+            values.forEach(item => walk(source, item, depth + 1, needAnchor && !inAd));
+        }
+    };
+
+    for (const script of document.querySelectorAll('script[type="application/ld+json"]')) {
+        try { walk("ld_json", JSON.parse(script.textContent), 0, false); } catch (e) {}
+    }
+    const nextData = document.querySelector("#__NEXT_DATA__");
+    if (adId && nextData && nextData.textContent) {
+        try { walk("next_data", JSON.parse(nextData.textContent), 0, true); } catch (e) {}
+    }
+    for (const el of document.querySelectorAll(`${root} img, ${root} source, div[data-index] img`)) {
+        add("dom", el.getAttribute("src"));
+        add("dom", el.getAttribute("data-src"));
+        add("dom", el.getAttribute("data-original"));
+        add("dom", largest(el.getAttribute("srcset")));
+        add("dom", largest(el.getAttribute("data-srcset")));
+    }
+    for (const entry of performance.getEntriesByType("resource")) {
+        if (entry.initiatorType === "img" || isImage(entry.name)) add("network", entry.name);
+    }
+
+    let total = document.querySelectorAll("div[data-index]").length;
+    const gallery = document.querySelector(root);
+    if (gallery) {
+        for (const el of gallery.querySelectorAll("a, button, div[data-action-step]")) {
+            const text = el.innerText || el.textContent || "";
+            const match = /show all|lihat semua/i.test(text) && text.match(/(\d+)/);
+            if (match) total = Math.max(total, parseInt(match[1], 10));
+        }
+        const counter = (gallery.innerText || gallery.textContent || "").match(/\d+\s*\/\s*(\d+)/);
+        if (counter) total = Math.max(total, parseInt(counter[1], 10));
+    }
+    return {found, total};
+}
+"""
+
+
+def clean_image_url(src):
+    """Sama dengan pembersihan lama: hanya http(s) / protocol-relative, tanpa query string."""
+    if not src or not src.startswith(("http", "//")):
+        return None
+    clean_url = src.split("?")[0]
+    if not clean_url.startswith("http"):
+        clean_url = f"https:{clean_url}"
+    return clean_url
+
+
+def listing_ad_id(listing_url):
+    match = _AD_ID.search(listing_url or "")
+    return match.group(1) if match else None
+
+
+def variant_rank(url):
+    """Kunci urut varian foto yang sama: ukuran penuh dulu, lalu dimensi di path terbesar."""
+    path = urlsplit(url).path
+    width = 0
+    for match in _DIMENSION.finditer(path):
+        width = max(width, int(match.group(1) or match.group(3)))
+    return (bool(_THUMB_PART.search(path)), -width)
+
+
+def select_gallery_urls(candidates, ad_id=None):
+    """
+    Saring [(source, raw_url), ...] hasil _HARVEST_JS jadi list URL gambar listing
+    (urutan sesuai prioritas sumber) + jumlah URL terpilih per sumber.
+    """
+    cleaned = []
+    for source, raw in candidates:
+        url = clean_image_url(raw)
+        if url:
+            cleaned.append((source, url))
+
+    hosts = {urlsplit(url).netloc for source, url in cleaned if source == "dom"}
+    if not hosts:
+        hosts = {urlsplit(url).netloc for source, url in cleaned if source == "ld_json"}
+
+    priority = {source: index for index, source in enumerate(SOURCES)}
+    cleaned.sort(key=lambda item: priority.get(item[0], len(SOURCES)))
+
+    # nama file -> [url terbaik, sumber yang pertama menyumbang foto ini]
+    photos = {}
+    for source, url in cleaned:
+        if urlsplit(url).netloc not in hosts:
+            continue
+        name = url.rstrip("/").rpartition("/")[2]
+        if source == "network" and not (ad_id and ad_id in name):
+            continue
+        photo = photos.get(name)
+        if photo is None:
+            photos[name] = [url, source]
+        elif variant_rank(url) < variant_rank(photo[0]):
+            photo[0] = url
+
+    per_source = dict.fromkeys(SOURCES, 0)
+    for _, source in photos.values():
+        per_source[source] = per_source.get(source, 0) + 1
+    return [url for url, _ in photos.values()], per_source
+
+
+def harvest_gallery(page, listing_url=None, root="#ad_view_gallery"):
+    """
+    Satu page.evaluate; kembalikan (list URL gambar galeri, jumlah foto menurut galeri).
+    Jumlah 0 berarti galeri tidak menampilkan angka.
+    """
+    ad_id = listing_ad_id(listing_url or page.url)
+    harvested = page.evaluate(_HARVEST_JS, {"root": root, "adId": ad_id})
+    candidates = harvested["found"]
+    expected = int(harvested.get("total") or 0)
+    urls, per_source = select_gallery_urls(candidates, ad_id)
+    logger.info(
+        f"🖼️ {len(urls)}/{expected or '?'} gambar galeri dari {len(candidates)} kandidat "
+        f"({', '.join(f'{source}={count}' for source, count in per_source.items() if count) or '-'})"
+    )
+    return urls, expected
+
+
+def gallery_incomplete(urls, expected):
+    """True jika perlu fallback buka modal: tidak ada gambar atau kurang dari jumlah galeri."""
+    return not urls or len(urls) < expected
@@ -0,0 +1,27 @@
+"""
+Decode gambar untuk input model (dipakai worker process scripts/filter_interior_yolo.py).
+
+Sengaja hanya bergantung pada PIL / numpy: ProcessPoolExecutor spawn mem-pickle fungsi
+worker berdasarkan modulnya, jadi kalau fungsi ini tinggal di script, setiap worker ikut
+mengimport ultralytics + torch hanya untuk decode JPEG.
+"""
+
+import numpy as np
+from PIL import Image, ImageOps
+
+
+def decode_image(path: str, imgsz: int):
+    """
+    Baca + decode + perkecil satu gambar. JPEG didecode langsung di skala kecil (draft mode),
+    lalu di-resize sehingga sisi terpanjang maksimal imgsz. Return array BGR uint8 (input
+    numpy yang diharapkan Ultralytics) atau None jika file tidak bisa dibaca.
+    """
+    try:
+        with Image.open(path) as img:
+            img.draft("RGB", (imgsz, imgsz))
+            img = ImageOps.exif_transpose(img).convert("RGB")
+        if max(img.size) > imgsz:
+            img.thumbnail((imgsz, imgsz), Image.BILINEAR)
+        return np.ascontiguousarray(np.asarray(img)[:, :, ::-1])
+    except Exception:
+        return None
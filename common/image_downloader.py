@@ -0,0 +1,275 @@
+"""
+Engine download gambar concurrent untuk image_scrap_* (dan tool lain yang butuh).
+
+- ThreadPoolExecutor dengan satu requests.Session per thread (keep-alive + connection pool)
+- Batas koneksi bersamaan per host (semaphore per hostname)
+- Rotasi proxy round-robin; setiap retry otomatis pindah ke proxy berikutnya
+- Retry dengan exponential backoff + jitter untuk error koneksi, timeout, 429 dan 5xx
+- Verifikasi: Content-Length dicek terhadap byte yang diterima (file terpotong = retry),
+  sha256 dihitung saat streaming, dan file yang sudah ada divalidasi dengan conditional
+  GET (If-None-Match / If-Modified-Since) atau HEAD sebelum didownload ulang
+- Penulisan lewat common.atomic_download: `.part` + resume Range, fsync, rename atomik
+
+Hasil download berupa dict {status, size, sha256, etag, last_modified} (status:
+downloaded / unchanged / adopted) atau False jika gagal.
+"""
+
+import os
+import time
+import hashlib
+import random
+import threading
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from common.atomic_download import IncompleteDownload, stream_download
+from common.metrics import IMAGES
+
+DEFAULT_WORKERS = int(os.getenv("IMAGE_DOWNLOAD_WORKERS", "16"))
+DEFAULT_PER_HOST = int(os.getenv("IMAGE_DOWNLOAD_PER_HOST", "8"))
+DEFAULT_RETRIES = int(os.getenv("IMAGE_DOWNLOAD_RETRIES", "3"))
+DEFAULT_TIMEOUT = 20
+DEFAULT_BACKOFF = 1.0
+CHUNK_SIZE = 64 * 1024
+
+RETRY_STATUS = {429, 500, 502, 503, 504}
+
+
+class RetryableError(Exception):
+    pass
+
+
+class ImageDownloader:
+    def __init__(
+        self,
+        workers=DEFAULT_WORKERS,
+        per_host=DEFAULT_PER_HOST,
+        retries=DEFAULT_RETRIES,
+        timeout=DEFAULT_TIMEOUT,
+        backoff=DEFAULT_BACKOFF,
+        proxies=None,
+        headers=None,
+        name="image_downloader",
+    ):
+        self.name = name
+        self.workers = workers
+        self.per_host = per_host
+        self.retries = retries
+        self.timeout = timeout
+        self.backoff = backoff
+        self.proxies = list(proxies or [])
+        self.headers = headers or {}
+
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="imgdl")
+        self._local = threading.local()
+        self._host_limits = defaultdict(lambda: threading.BoundedSemaphore(per_host))
+        self._host_lock = threading.Lock()
+        self._proxy_lock = threading.Lock()
+        self._proxy_index = random.randrange(len(self.proxies)) if self.proxies else 0
+
+        self._stats_lock = threading.Lock()
+        self.images_ok = 0
+        self.images_failed = 0
+        self.images_skipped = 0
+        self.bytes_downloaded = 0
+        self.started_at = time.perf_counter()
+
+    # ------------------------------------------------------------------ internals
+
+    def _session(self):
+        session = getattr(self._local, "session", None)
+        if session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=self.per_host, pool_maxsize=self.per_host, max_retries=0)
+            session.mount("http://", adapter)
+            session.mount("https://", adapter)
+            session.headers.update(self.headers)
+            self._local.session = session
+        return session
+
+    def _host_semaphore(self, url):
+        host = urlparse(url).netloc
+        with self._host_lock:
+            return self._host_limits[host]
+
+    def _next_proxy(self):
+        if not self.proxies:
+            return None
+        with self._proxy_lock:
+            proxy = self.proxies[self._proxy_index % len(self.proxies)]
+            self._proxy_index += 1
+        return {"http": proxy, "https": proxy}
+
+    @staticmethod
+    def _validators(response):
+        return response.headers.get("ETag"), response.headers.get("Last-Modified")
+
+    @staticmethod
+    def _expected_length(response):
+        # Content-Length tidak bisa dibandingkan jika body dikompres oleh server
+        if response.headers.get("Content-Encoding"):
+            return None
+        try:
+            return int(response.headers["Content-Length"])
+        except (KeyError, ValueError):
+            return None
+
+    @staticmethod
+    def _hash_file(path):
+        digest = hashlib.sha256()
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(CHUNK_SIZE), b""):
+                digest.update(chunk)
+        return digest.hexdigest()
+
+    def _adopt_existing(self, url, save_path, local_size):
+        """
+        File sudah ada tapi belum pernah diverifikasi: cek HEAD, kalau Content-Length sama
+        file dianggap utuh dan dicatat tanpa download ulang. Return dict hasil atau None.
+        """
+        with self._host_semaphore(url):
+            response = self._session().head(url, timeout=self.timeout, proxies=self._next_proxy(), allow_redirects=True)
+        if response.status_code != 200 or self._expected_length(response) != local_size:
+            return None
+        etag, last_modified = self._validators(response)
+        return {
+            "status": "adopted",
+            "size": local_size,
+            "sha256": self._hash_file(save_path),
+            "etag": etag,
+            "last_modified": last_modified,
+        }
+
+    def _fetch_once(self, url, save_path, known=None):
+        headers = {}
+        local_size = os.path.getsize(save_path) if os.path.exists(save_path) else None
+
+        if local_size:
+            if known and known.get("size") == local_size:
+                # File utuh menurut catatan terakhir: cukup tanya server apakah berubah
+                if known.get("etag"):
+                    headers["If-None-Match"] = known["etag"]
+                if known.get("last_modified"):
+                    headers["If-Modified-Since"] = known["last_modified"]
+                if not headers:
+                    # Server tidak memberi validator: bandingkan Content-Length lewat HEAD saja
+                    checked = self._adopt_existing(url, save_path, local_size)
+                    if checked:
+                        return {**checked, "status": "unchanged"}
+            elif not known:
+                adopted = self._adopt_existing(url, save_path, local_size)
+                if adopted:
+                    return adopted
+            # Ukuran beda dari catatan = file terpotong / berubah -> download ulang penuh
+
+        with self._host_semaphore(url):
+            try:
+                result = stream_download(
+                    url,
+                    save_path,
+                    session=self._session(),
+                    timeout=self.timeout,
+                    headers=headers,
+                    proxies=self._next_proxy(),
+                )
+            except requests.HTTPError as e:
+                status = e.response.status_code if e.response is not None else None
+                if status in RETRY_STATUS:
+                    raise RetryableError(f"HTTP {status}", e.response.headers.get("Retry-After"))
+                raise
+
+        if result["status_code"] == 304:
+            if known:
+                return {**known, "status": "unchanged"}
+            raise RetryableError("HTTP 304 tanpa catatan verifikasi")
+        return {
+            "status": "downloaded",
+            "size": result["size"],
+            "sha256": result["sha256"],
+            "etag": result["etag"],
+            "last_modified": result["last_modified"],
+        }
+
+    def _retry_delay(self, attempt, retry_after=None):
+        if retry_after:
+            try:
+                return float(retry_after)
+            except (TypeError, ValueError):
+                pass
+        return self.backoff * (2 ** attempt) + random.uniform(0, self.backoff)
+
+    def _download(self, url, save_path, known=None):
+        last_error = None
+        for attempt in range(self.retries + 1):
+            try:
+                result = self._fetch_once(url, save_path, known)
+                with self._stats_lock:
+                    self.images_ok += 1
+                    if result["status"] == "downloaded":
+                        self.bytes_downloaded += result["size"]
+                    else:
+                        self.images_skipped += 1
+                IMAGES.labels(self.name, result["status"]).inc()
+                return result
+            except RetryableError as e:
+                last_error = e
+                retry_after = e.args[1] if len(e.args) > 1 else None
+            except (requests.ConnectionError, requests.Timeout, IncompleteDownload) as e:
+                # IncompleteDownload: .part disimpan, percobaan berikutnya resume lewat Range
+                last_error = e
+                retry_after = None
+            except Exception as e:
+                # 4xx selain 429, path tidak valid, dll: tidak ada gunanya di-retry
+                last_error = e
+                break
+
+            if attempt < self.retries:
+                time.sleep(self._retry_delay(attempt, retry_after))
+
+        print(f"❌ Gagal download {url} -> {last_error}")
+        with self._stats_lock:
+            self.images_failed += 1
+        IMAGES.labels(self.name, "failed").inc()
+        return False
+
+    # ------------------------------------------------------------------ public API
+
+    def submit(self, url, save_path, known=None):
+        """
+        Jadwalkan satu download, return Future berisi dict hasil atau False.
+        `known` = catatan verifikasi sebelumnya (size/etag/last_modified) untuk conditional request.
+        """
+        return self._executor.submit(self._download, url, save_path, known)
+
+    def download_all(self, jobs):
+        """Download list (url, save_path) secara paralel, return list hasil (dict / False) sesuai urutan."""
+        futures = [self.submit(url, path) for url, path in jobs]
+        return [f.result() for f in futures]
+
+    def stats(self):
+        elapsed = max(time.perf_counter() - self.started_at, 1e-9)
+        with self._stats_lock:
+            ok, failed, skipped = self.images_ok, self.images_failed, self.images_skipped
+            total_bytes = self.bytes_downloaded
+        return {
+            "images_ok": ok,
+            "images_failed": failed,
+            "images_unchanged": skipped,
+            "bytes": total_bytes,
+            "elapsed_sec": round(elapsed, 2),
+            "images_per_sec": round(ok / elapsed, 2),
+            "mb_per_sec": round(total_bytes / elapsed / (1024 * 1024), 2),
+        }
+
+    def close(self):
+        self._executor.shutdown(wait=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
@@ -0,0 +1,153 @@
+"""
+Stage download gambar di background untuk scraper.
+
+Scraper cukup enqueue (listing_id, [(url, dest_path), ...]) lalu lanjut ke listing
+berikutnya; worker thread terpisah yang mengosongkan antrian lewat BlobStore.fetch.
+Antrian dibatasi (max_pending) supaya memori tetap aman: kalau worker tertinggal jauh,
+enqueue akan menunggu (backpressure) alih-alih menumpuk tanpa batas.
+"""
+
+import os
+import time
+import queue
+import logging
+import threading
+
+import requests
+
+from common.metrics import IMAGES, QUEUE_DEPTH
+
+DEFAULT_QUEUE_WORKERS = int(os.getenv("IMAGE_QUEUE_WORKERS", "4"))
+DEFAULT_MAX_PENDING = int(os.getenv("IMAGE_QUEUE_MAX_PENDING", "500"))
+DEFAULT_LOG_EVERY = 25
+
+
+class ImageDownloadQueue:
+    def __init__(
+        self,
+        blob_store,
+        workers=DEFAULT_QUEUE_WORKERS,
+        max_pending=DEFAULT_MAX_PENDING,
+        headers=None,
+        timeout=30,
+        file_mode=None,
+        name="images",
+        log_every=DEFAULT_LOG_EVERY,
+    ):
+        self.blob_store = blob_store
+        self.headers = headers or {}
+        self.timeout = timeout
+        self.file_mode = file_mode
+        self.name = name
+        self.log_every = log_every
+
+        self._queue = queue.Queue(maxsize=max_pending)
+        QUEUE_DEPTH.labels(name).set_function(self._queue.qsize)
+        self._local = threading.local()
+        self._stats_lock = threading.Lock()
+        self.listings_enqueued = 0
+        self.listings_done = 0
+        self.images_ok = 0
+        self.images_failed = 0
+        self.started_at = time.perf_counter()
+        self._closed = False
+
+        self._threads = [
+            threading.Thread(target=self._worker, name=f"{name}-dl-{i}", daemon=True)
+            for i in range(workers)
+        ]
+        for thread in self._threads:
+            thread.start()
+        logging.info(f"🧵 Image queue '{name}' aktif dengan {workers} worker")
+
+    def _session(self):
+        session = getattr(self._local, "session", None)
+        if session is None:
+            session = requests.Session()
+            session.headers.update(self.headers)
+            self._local.session = session
+        return session
+
+    def _process(self, listing_id, items, referer):
+        headers = {"Referer": referer} if referer else None
+        ok, failed = 0, 0
+        for url, dest_path in items:
+            try:
+                self.blob_store.fetch(url, dest_path, session=self._session(), timeout=self.timeout, headers=headers)
+                if self.file_mode is not None:
+                    os.chmod(dest_path, self.file_mode)
+                ok += 1
+            except Exception as e:
+                failed += 1
+                logging.warning(f"Gagal download gambar {url} (listing {listing_id}): {e}")
+
+        IMAGES.labels(self.name, "ok").inc(ok)
+        IMAGES.labels(self.name, "failed").inc(failed)
+        with self._stats_lock:
+            self.listings_done += 1
+            self.images_ok += ok
+            self.images_failed += failed
+            done = self.listings_done
+        if failed:
+            logging.warning(f"⚠️ Listing {listing_id}: {ok} gambar OK, {failed} gagal")
+        if self.log_every and done % self.log_every == 0:
+            self.log_progress()
+
+    def _worker(self):
+        while True:
+            job = self._queue.get()
+            try:
+                if job is None:
+                    return
+                self._process(*job)
+            except Exception as e:
+                logging.error(f"❌ Error di worker image queue: {e}")
+            finally:
+                self._queue.task_done()
+
+    def enqueue(self, listing_id, items, referer=None):
+        """Jadwalkan download gambar satu listing. Return langsung (kecuali antrian penuh)."""
+        items = [(url, dest_path) for url, dest_path in items if url]
+        if not items:
+            return
+        if self._closed:
+            raise RuntimeError("Image queue sudah ditutup")
+        self._queue.put((listing_id, items, referer))
+        with self._stats_lock:
+            self.listings_enqueued += 1
+
+    def progress(self):
+        elapsed = max(time.perf_counter() - self.started_at, 1e-9)
+        with self._stats_lock:
+            return {
+                "listings_enqueued": self.listings_enqueued,
+                "listings_done": self.listings_done,
+                "backlog": self.listings_enqueued - self.listings_done,
+                "images_ok": self.images_ok,
+                "images_failed": self.images_failed,
+                "images_per_sec": round(self.images_ok / elapsed, 2),
+            }
+
+    def log_progress(self):
+        p = self.progress()
+        logging.info(
+            f"📥 Image queue '{self.name}': {p['listings_done']}/{p['listings_enqueued']} listing selesai "
+            f"(backlog {p['backlog']}), {p['images_ok']} gambar OK, {p['images_failed']} gagal, "
+            f"{p['images_per_sec']} img/s"
+        )
+
+    def close(self, wait=True):
+        """Hentikan worker setelah antrian habis (wait=True) lalu log ringkasan."""
+        if self._closed:
+            return
+        self._closed = True
+        if wait:
+            backlog = self._queue.qsize()
+            if backlog:
+                logging.info(f"⏳ Menunggu {backlog} listing di image queue '{self.name}' selesai...")
+        for _ in self._threads:
+            self._queue.put(None)
+        if wait:
+            for thread in self._threads:
+                thread.join()
+        self.log_progress()
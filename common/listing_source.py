@@ -0,0 +1,193 @@
+"""
+Read layer gabungan untuk tabel live (cars_scrap_*) dan arsip (cars_scrap_*_archive).
+
+Filter id / tanggal / brand / model / variant dimasukkan ke setiap cabang UNION ALL
+sehingga Postgres bisa memakai index di masing-masing tabel, dan hasil diambil per
+batch dengan keyset pagination (id > last_id) supaya tidak ada full scan + fetchall.
+"""
+
+SOURCES = ("live", "archive", "all")
+
+DEFAULT_COLUMNS = ("id", "brand", "model", "variant", "year", "images")
+
+DEFAULT_BATCH_SIZE = 5000
+
+
+def archive_table_for(live_table: str) -> str:
+    return f"{live_table}_archive"
+
+
+def tables_for_source(live_table: str, source: str = "all"):
+    """Kembalikan list (nama_tabel, label_source) sesuai pilihan source."""
+    if source not in SOURCES:
+        raise ValueError(f"source tidak valid: {source} (pilih salah satu dari {SOURCES})")
+    tables = []
+    if source in ("live", "all"):
+        tables.append((live_table, "live"))
+    if source in ("archive", "all"):
+        tables.append((archive_table_for(live_table), "archive"))
+    return tables
+
+
+def build_filters(
+    start_id=None,
+    end_id=None,
+    date_from=None,
+    date_to=None,
+    brand=None,
+    model=None,
+    variant=None,
+    require_images=True,
+):
+    """Bangun kondisi WHERE (list) dan parameternya untuk satu cabang query."""
+    conditions = []
+    params = []
+
+    if require_images:
+        conditions.append("images IS NOT NULL AND images != ''")
+    if start_id is not None:
+        conditions.append("id >= %s")
+        params.append(start_id)
+    if end_id is not None:
+        conditions.append("id <= %s")
+        params.append(end_id)
+    if date_from is not None:
+        conditions.append("information_ads_date >= %s")
+        params.append(date_from)
+    if date_to is not None:
+        conditions.append("information_ads_date <= %s")
+        params.append(date_to)
+    if brand:
+        conditions.append("LOWER(brand) = LOWER(%s)")
+        params.append(brand)
+    if model:
+        conditions.append("LOWER(model) = LOWER(%s)")
+        params.append(model)
+    if variant:
+        conditions.append("LOWER(variant) = LOWER(%s)")
+        params.append(variant)
+
+    return conditions, params
+
+
+def index_definitions(live_table: str, source: str = "all"):
+    """(nama index, tabel, ekspresi) untuk index yang dipakai filter di atas (id sudah primary key)."""
+    definitions = []
+    for table, _ in tables_for_source(live_table, source):
+        definitions.append((f"idx_{table}_ads_date", table, "information_ads_date"))
+        definitions.append((f"idx_{table}_lower_brand", table, "LOWER(brand)"))
+        definitions.append((f"idx_{table}_lower_model", table, "LOWER(model)"))
+    return definitions
+
+
+def ensure_indexes(conn, live_table: str, source: str = "all"):
+    """
+    Buat index filter dengan CREATE INDEX CONCURRENTLY supaya INSERT / UPDATE dari scraper
+    dan tracker tidak terblokir selama build. CONCURRENTLY tidak boleh di dalam transaksi,
+    jadi koneksi dipindah ke autocommit sementara. Build CONCURRENTLY yang gagal
+    meninggalkan index INVALID (yang akan dilewati IF NOT EXISTS): index seperti itu
+    di-drop dulu lalu dibuat ulang. Dijalankan hanya atas permintaan (--create-indexes),
+    bukan di setiap start downloader.
+    """
+    conn.rollback()
+    autocommit = conn.autocommit
+    conn.autocommit = True
+    cursor = conn.cursor()
+    try:
+        for name, table, expression in index_definitions(live_table, source):
+            cursor.execute(
+                "SELECT i.indisvalid FROM pg_index i JOIN pg_class c ON c.oid = i.indexrelid WHERE c.relname = %s",
+                (name,),
+            )
+            row = cursor.fetchone()
+            if row and row[0]:
+                continue
+            if row:
+                cursor.execute(f"DROP INDEX CONCURRENTLY IF EXISTS {name}")
+            cursor.execute(f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {name} ON {table} ({expression})")
+    finally:
+        cursor.close()
+        conn.autocommit = autocommit
+
+
+def count_listings(conn, live_table: str, source: str = "all", **filters) -> int:
+    """Hitung jumlah baris yang cocok dengan filter di semua tabel source."""
+    conditions, params = build_filters(**filters)
+    where_sql = " AND ".join(conditions) if conditions else "TRUE"
+    branches = [f"SELECT COUNT(*) AS n FROM {table} WHERE {where_sql}" for table, _ in tables_for_source(live_table, source)]
+
+    cursor = conn.cursor()
+    try:
+        cursor.execute(
+            f"SELECT COALESCE(SUM(n), 0) FROM ({' UNION ALL '.join(branches)}) counts",
+            params * len(branches),
+        )
+        return int(cursor.fetchone()[0])
+    finally:
+        cursor.close()
+
+
+def iter_listings(
+    conn,
+    live_table: str,
+    source: str = "all",
+    columns=DEFAULT_COLUMNS,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    limit: int = None,
+    **filters,
+):
+    """
+    Generator baris listing (tuple sesuai `columns` + kolom terakhir berisi 'live'/'archive'),
+    urut berdasarkan id. Setiap batch mengambil `batch_size` baris dengan kondisi id > last_id
+    yang juga di-push ke setiap cabang, jadi query tetap index-friendly sampai batch terakhir.
+    """
+    if "id" not in columns:
+        raise ValueError("columns harus mengandung 'id' untuk keyset pagination")
+
+    conditions, params = build_filters(**filters)
+    id_index = list(columns).index("id")
+    select_cols = ", ".join(columns)
+    tables = tables_for_source(live_table, source)
+
+    last_id = None
+    yielded = 0
+    cursor = conn.cursor()
+    try:
+        while True:
+            page_size = batch_size if limit is None else min(batch_size, limit - yielded)
+            if page_size <= 0:
+                break
+
+            branches = []
+            query_params = []
+            for table, label in tables:
+                branch_conditions = list(conditions)
+                branch_params = list(params)
+                if last_id is not None:
+                    branch_conditions.append("id > %s")
+                    branch_params.append(last_id)
+                where_sql = " AND ".join(branch_conditions) if branch_conditions else "TRUE"
+                branches.append(
+                    f"(SELECT {select_cols}, '{label}' AS source FROM {table} "
+                    f"WHERE {where_sql} ORDER BY id LIMIT %s)"
+                )
+                query_params.extend(branch_params + [page_size])
+
+            cursor.execute(
+                f"SELECT * FROM ({' UNION ALL '.join(branches)}) listings ORDER BY id LIMIT %s",
+                query_params + [page_size],
+            )
+            rows = cursor.fetchall()
+            if not rows:
+                break
+
+            for row in rows:
+                yield row
+            yielded += len(rows)
+            last_id = rows[-1][id_index]
+
+            if len(rows) < page_size:
+                break
+    finally:
+        cursor.close()
+
@@ -0,0 +1,250 @@
+"""
+Setup logging bersama untuk service scraper / tracker / tool.
+
+- Non-blocking: root logger hanya punya QueueHandler; format + tulis file + console
+  dikerjakan QueueListener di thread terpisah, jadi thread scraping tidak menunggu I/O
+- File log JSON per baris (ts, level, logger, category, msg, exc) untuk dianalisis,
+  console tetap format teks biasa
+- Sampling per kategori pesan: pesan INFO/DEBUG yang sering (normalisasi, klik UI, dll)
+  hanya dicatat 1 dari N. WARNING ke atas selalu lolos
+- File harian <prefix>_<YYYYMMDD>.log yang benar-benar pindah file saat ganti hari
+  (dulu START_DATE dihitung sekali saat import sehingga proses yang jalan berhari-hari
+  tetap menulis ke file tanggal mulai). File hari sebelumnya dikompres ke .gz
+
+Env:
+- LOG_LEVEL          level root (default INFO)
+- LOG_FILE_FORMAT    json / text (default json)
+- LOG_SAMPLE         "kategori=N,..." (default DEFAULT_SAMPLE; "none" = tanpa sampling)
+"""
+
+import os
+import sys
+import copy
+import gzip
+import json
+import queue
+import atexit
+import shutil
+import logging
+import threading
+from datetime import datetime
+from pathlib import Path
+from logging.handlers import QueueHandler, QueueListener
+
+ROOT = Path(__file__).resolve().parents[1]
+DEFAULT_LOG_DIR = ROOT / "logs"
+
+TEXT_FORMAT = "%(asctime)s - %(levelname)s - %(message)s"
+
+# Prefix pesan -> kategori, untuk pesan yang tidak memberi extra={"category": ...}
+CATEGORY_PREFIXES = (
+    ("Brand normalized", "normalize"),
+    ("Brand dinormalisasi", "normalize"),
+    ("Converting year", "normalize"),
+    ("Normalized fuel type", "normalize"),
+    ("Inferred ", "normalize"),
+    ("Parsed date", "normalize"),
+    ("Span ", "normalize"),
+    ("Tombol ", "ui"),
+    ("Metode ", "ui"),
+    ("Semua metode", "ui"),
+    ("Gambar utama", "ui"),
+    ("Galeri ", "ui"),
+    ("Specifications diperluas", "ui"),
+    ("Menunggu ", "wait"),
+    ("⏭", "skip"),
+    ("✅ Data untuk", "save"),
+    ("✅ Listing baru", "save"),
+    ("✅ URL gambar", "save"),
+)
+
+DEFAULT_SAMPLE = "normalize=100,ui=20"
+
+# File log hari sebelumnya baru dikompres jika tidak ditulis lagi selama ini (proses lain
+# dengan prefix sama mungkin belum pindah hari) -- mirip delaycompress logrotate
+COMPRESS_GRACE_SEC = 600
+
+_STANDARD_ATTRS = set(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime"}
+
+_lock = threading.Lock()
+_listener = None
+
+
+def parse_sample_rules(value):
+    """ "normalize=100,ui=20" -> {"normalize": 100, "ui": 20} """
+    if not value or value.strip().lower() == "none":
+        return {}
+    rules = {}
+    for item in filter(None, (part.strip() for part in value.split(","))):
+        category, _, every = item.partition("=")
+        rules[category.strip()] = max(1, int(every or 1))
+    return rules
+
+
+def record_category(record):
+    category = getattr(record, "category", None)
+    if category:
+        return category
+    msg = record.msg if isinstance(record.msg, str) else ""
+    for prefix, category in CATEGORY_PREFIXES:
+        if msg.startswith(prefix):
+            return category
+    return None
+
+
+class CategorySampler(logging.Filter):
+    """Loloskan 1 dari N record per kategori (level < WARNING). Dipasang sebelum antrian."""
+
+    def __init__(self, rules):
+        super().__init__()
+        self.rules = rules
+        self.counters = {}
+        self._lock = threading.Lock()
+
+    def filter(self, record):
+        category = record_category(record)
+        record.category = category
+        every = self.rules.get(category)
+        if not every or record.levelno >= logging.WARNING:
+            return True
+        with self._lock:
+            count = self.counters.get(category, 0)
+            self.counters[category] = count + 1
+        if count % every:
+            return False
+        record.sample_every = every
+        return True
+
+
+class LazyQueueHandler(QueueHandler):
+    """
+    QueueHandler bawaan memformat record lengkap di thread pemanggil; di sini hanya pesan
+    (msg % args) dan traceback yang dirender, formatting sisanya di thread listener.
+    """
+
+    def prepare(self, record):
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record):
+        payload = {
+            "ts": datetime.fromtimestamp(record.created).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+        }
+        for key, value in vars(record).items():
+            if key not in _STANDARD_ATTRS and key != "exc_text" and value is not None:
+                payload[key] = value if isinstance(value, (str, int, float, bool)) else str(value)
+        if record.exc_text:
+            payload["exc"] = record.exc_text
+        return json.dumps(payload, ensure_ascii=False)
+
+
+def compress_file(path):
+    gz_path = f"{path}.gz"
+    tmp_path = f"{gz_path}.tmp"
+    with open(path, "rb") as src, gzip.open(tmp_path, "wb") as dst:
+        shutil.copyfileobj(src, dst)
+    os.replace(tmp_path, gz_path)
+    os.remove(path)
+
+
+class DailyFileHandler(logging.FileHandler):
+    """
+    Tulis ke <log_dir>/<prefix>_<YYYYMMDD>.log sesuai tanggal record; saat tanggal berganti
+    file lama ditutup dan file baru dibuka. File tanggal lampau dikompres (.gz).
+    Hanya dipanggil dari thread QueueListener, jadi tidak perlu lock tambahan.
+    """
+
+    def __init__(self, log_dir, prefix, encoding="utf-8"):
+        self.log_dir = Path(log_dir)
+        self.prefix = prefix
+        self.log_dir.mkdir(parents=True, exist_ok=True)
+        self.current_date = datetime.now().strftime("%Y%m%d")
+        super().__init__(self.path_for(self.current_date), encoding=encoding, delay=True)
+        self._compress_pending = True
+
+    def path_for(self, date_str):
+        return str(self.log_dir / f"{self.prefix}_{date_str}.log")
+
+    def compress_old_files(self):
+        now = datetime.now().timestamp()
+        for path in self.log_dir.glob(f"{self.prefix}_*.log"):
+            date_str = path.stem[len(self.prefix) + 1:]
+            if not date_str.isdigit() or date_str >= self.current_date:
+                continue
+            try:
+                if now - path.stat().st_mtime < COMPRESS_GRACE_SEC:
+                    continue
+                compress_file(path)
+            except OSError:
+                continue
+
+    def emit(self, record):
+        date_str = datetime.fromtimestamp(record.created).strftime("%Y%m%d")
+        if date_str > self.current_date:
+            self.close()
+            self.current_date = date_str
+            self.baseFilename = os.path.abspath(self.path_for(date_str))
+            self._compress_pending = True
+        if self._compress_pending:
+            self._compress_pending = False
+            self.compress_old_files()
+        super().emit(record)
+
+
+def setup_logging(prefix, log_dir=None, level=None, stream=None, file_format=None, sample=None):
+    """
+    Pasang logging non-blocking untuk proses ini. Seperti logging.basicConfig: panggilan
+    pertama yang menang, panggilan berikutnya (service lain di proses yang sama) no-op.
+    prefix = nama file log, mis. "scrape_mudahmy" -> logs/scrape_mudahmy_YYYYMMDD.log
+    """
+    global _listener
+    with _lock:
+        if _listener is not None:
+            return _listener
+
+        level = level or os.getenv("LOG_LEVEL", "INFO").upper()
+        file_format = (file_format or os.getenv("LOG_FILE_FORMAT", "json")).lower()
+        rules = parse_sample_rules(sample if sample is not None else os.getenv("LOG_SAMPLE", DEFAULT_SAMPLE))
+
+        file_handler = DailyFileHandler(log_dir or DEFAULT_LOG_DIR, prefix)
+        file_handler.setFormatter(JsonFormatter() if file_format == "json" else logging.Formatter(TEXT_FORMAT))
+        console_handler = logging.StreamHandler(stream or sys.stderr)
+        console_handler.setFormatter(logging.Formatter(TEXT_FORMAT))
+
+        log_queue = queue.SimpleQueue()
+        queue_handler = LazyQueueHandler(log_queue)
+        if rules:
+            queue_handler.addFilter(CategorySampler(rules))
+
+        root = logging.getLogger()
+        for handler in list(root.handlers):
+            root.removeHandler(handler)
+        root.addHandler(queue_handler)
+        root.setLevel(level)
+
+        _listener = QueueListener(log_queue, file_handler, console_handler, respect_handler_level=True)
+        _listener.start()
+        atexit.register(shutdown_logging)
+        return _listener
+
+
+def shutdown_logging():
+    """Kosongkan antrian dan tutup file (dipanggil otomatis saat proses selesai)."""
+    global _listener
+    with _lock:
+        if _listener is None:
+            return
+        _listener.stop()
+        for handler in _listener.handlers:
+            handler.close()
+        _listener = None
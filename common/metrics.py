@@ -0,0 +1,124 @@
+"""
+Metrik Prometheus bersama untuk scraper, null scraper, tracker dan image downloader.
+
+Semua metrik didefinisikan di sini (registry default prometheus_client) supaya nama dan
+label konsisten antar service. Label `service` membedakan proses yang berbagi registry
+(mis. Flask app yang menjalankan scraper + sync).
+
+Ekspos:
+- Flask app : add_metrics_route(app) -> GET /metrics
+- CLI runner: start_metrics_server(port) -> HTTP server di thread background; port dari
+  argumen --metrics-port atau env METRICS_PORT (kosong / 0 = tidak diekspos)
+
+Throughput (img/s, byte/s, listing/menit) dihitung di Prometheus dengan rate() atas
+counter di bawah, bukan di proses.
+"""
+
+import os
+import logging
+import threading
+from urllib.parse import urlparse
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+    start_http_server,
+)
+
+PAGE_LOAD_BUCKETS = (0.5, 1, 2, 5, 10, 20, 30, 60, 90, 120)
+DB_WRITE_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5)
+
+# event: discovered (muncul di halaman list), scraped (detail berhasil), skipped (tidak
+# perlu di-scrape ulang), failed (detail gagal setelah retry), checked (tracker)
+LISTINGS = Counter(
+    "scraper_listings",
+    "Listing yang diproses per event",
+    ["service", "event"],
+)
+PAGE_LOAD = Histogram(
+    "scraper_page_load_seconds",
+    "Durasi page.goto sampai halaman siap",
+    ["service", "page"],
+    buckets=PAGE_LOAD_BUCKETS,
+)
+# kind: captcha / cloudflare / access_denied / proxy_error
+BLOCKS = Counter(
+    "scraper_blocks",
+    "Halaman yang diblokir anti-bot atau gagal karena proxy",
+    ["service", "kind", "proxy"],
+)
+DB_WRITE = Histogram(
+    "scraper_db_write_seconds",
+    "Durasi tulis ke database (sampai commit)",
+    ["service", "op"],
+    buckets=DB_WRITE_BUCKETS,
+)
+LISTING_STATUS = Counter(
+    "tracker_listing_status",
+    "Hasil cek status listing oleh tracker",
+    ["service", "status"],
+)
+
+IMAGE_BYTES = Counter(
+    "image_download_bytes",
+    "Byte gambar yang diterima dari jaringan (semua downloader)",
+)
+IMAGES = Counter(
+    "image_downloads",
+    "Gambar yang diproses downloader",
+    ["downloader", "result"],
+)
+QUEUE_DEPTH = Gauge(
+    "image_queue_depth",
+    "Listing yang menunggu di antrian download gambar",
+    ["queue"],
+)
+
+_server_lock = threading.Lock()
+_server_port = None
+
+
+def proxy_label(proxy):
+    """Proxy (dict Playwright / URL / None) -> 'host:port' tanpa kredensial, 'none' jika tanpa proxy."""
+    if not proxy:
+        return "none"
+    server = proxy.get("server") if isinstance(proxy, dict) else str(proxy)
+    if not server:
+        return "none"
+    parsed = urlparse(server if "://" in server else f"http://{server}")
+    return f"{parsed.hostname}:{parsed.port}" if parsed.port else (parsed.hostname or "unknown")
+
+
+def record_block(service, kind, proxy=None):
+    BLOCKS.labels(service, kind, proxy_label(proxy)).inc()
+
+
+def start_metrics_server(port=None, addr="0.0.0.0"):
+    """
+    Jalankan endpoint /metrics untuk proses CLI. Return port yang dipakai, atau None jika
+    port tidak di-set. Aman dipanggil berkali-kali (server hanya dibuat sekali).
+    """
+    global _server_port
+    port = int(port or os.getenv("METRICS_PORT") or 0)
+    if not port:
+        return None
+    with _server_lock:
+        if _server_port is None:
+            start_http_server(port, addr=addr)
+            _server_port = port
+            logging.info(f"📈 Metrics Prometheus tersedia di http://{addr}:{port}/metrics")
+        return _server_port
+
+
+def add_metrics_route(app, path="/metrics"):
+    """Tambahkan endpoint metrics ke Flask app."""
+    from flask import Response
+
+    def metrics():
+        return Response(generate_latest(), mimetype=CONTENT_TYPE_LATEST)
+
+    app.add_url_rule(path, "metrics", metrics, methods=["GET"])
+    return app
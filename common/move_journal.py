@@ -0,0 +1,207 @@
+"""
+Journal append-only untuk pemindahan file ke folder blacklist (filter YOLO, dedup pHash).
+
+Setiap move/copy dicatat satu baris JSON di <blacklist>.journal.jsonl sebelum file
+dipindah (write-ahead): id, run id, alasan, path asal, path tujuan (setelah rename
+__dupN), sha256 dan size. Restore cukup me-replay entry yang belum di-restore
+(O(jumlah file yang dipindah), tanpa scan tree atau menebak nama), bisa difilter per
+run atau per alasan, dan dicatat lagi sebagai entry "restore" di journal yang sama.
+"""
+
+import os
+import json
+import uuid
+import shutil
+import hashlib
+from datetime import datetime
+from pathlib import Path
+
+CHUNK_SIZE = 64 * 1024
+
+# fsync journal setiap N entry (dan saat close); flush tetap dilakukan per entry
+FSYNC_EVERY = 100
+
+CONFLICT_MODES = ("rename", "skip", "overwrite")
+
+
+def default_journal_path(blacklist_dir):
+    blacklist_dir = Path(os.path.abspath(blacklist_dir))
+    return blacklist_dir.parent / f"{blacklist_dir.name}.journal.jsonl"
+
+
+def new_run_id():
+    return f"{datetime.now().strftime('%Y%m%d-%H%M%S')}-{uuid.uuid4().hex[:6]}"
+
+
+def file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def unique_path(path):
+    """Path yang belum ada: path itu sendiri atau varian name__dupN."""
+    path = Path(path)
+    if not path.exists():
+        return path
+    suffix = "".join(path.suffixes)
+    base = path.name[: -len(suffix)] if suffix else path.name
+    for i in range(1, 10_000):
+        candidate = path.with_name(f"{base}__dup{i}{suffix}")
+        if not candidate.exists():
+            return candidate
+    raise RuntimeError(f"too many name collisions for {path}")
+
+
+class MoveJournal:
+    def __init__(self, path):
+        self.path = Path(path)
+        self._file = None
+        self._unsynced = 0
+
+    @classmethod
+    def for_blacklist(cls, blacklist_dir):
+        return cls(default_journal_path(blacklist_dir))
+
+    # ------------------------------------------------------------------ tulis
+
+    def _append(self, record):
+        if self._file is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._file = open(self.path, "a", encoding="utf-8")
+        record = {"ts": datetime.now().isoformat(timespec="seconds"), **record}
+        self._file.write(json.dumps(record, ensure_ascii=False) + "\n")
+        self._file.flush()
+        self._unsynced += 1
+        if self._unsynced >= FSYNC_EVERY:
+            os.fsync(self._file.fileno())
+            self._unsynced = 0
+        return record
+
+    def move(self, src, dest, run_id, reason, sha256=None, copy=False):
+        """
+        Pindahkan (atau copy) src ke dest (di-rename __dupN jika sudah ada) dan catat di journal.
+        Return path tujuan sebenarnya.
+        """
+        src = Path(src)
+        dest = unique_path(dest)
+        self._append(
+            {
+                "op": "copy" if copy else "move",
+                "id": uuid.uuid4().hex,
+                "run_id": run_id,
+                "reason": reason,
+                "src": str(src.resolve()),
+                "dest": str(dest.resolve()),
+                "sha256": sha256 or file_sha256(src),
+                "size": src.stat().st_size,
+            }
+        )
+        dest.parent.mkdir(parents=True, exist_ok=True)
+        if copy:
+            shutil.copy2(src, dest)
+        else:
+            shutil.move(src, dest)
+        return dest
+
+    # ------------------------------------------------------------------ baca
+
+    def entries(self):
+        """Iterasi semua record journal; baris terakhir yang terpotong (crash saat menulis) dilewati."""
+        if not self.path.exists():
+            return
+        with open(self.path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    yield json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+
+    def pending(self, run_id=None, reason=None):
+        """Entry move/copy yang belum di-restore, urut sesuai journal, opsional filter run / alasan."""
+        outstanding = {}
+        for record in self.entries():
+            if record["op"] in ("move", "copy"):
+                outstanding[record["id"]] = record
+            elif record["op"] == "restore":
+                outstanding.pop(record["ref"], None)
+        return [
+            record
+            for record in outstanding.values()
+            if (run_id is None or record["run_id"] == run_id) and (reason is None or record["reason"] == reason)
+        ]
+
+    def runs(self):
+        """Ringkasan per run: alasan, waktu mulai, jumlah file dipindah dan yang masih di blacklist."""
+        summary = {}
+        pending_ids = {record["id"] for record in self.pending()}
+        for record in self.entries():
+            if record["op"] not in ("move", "copy"):
+                continue
+            run = summary.setdefault(
+                record["run_id"],
+                {"run_id": record["run_id"], "started": record["ts"], "reasons": set(), "moved": 0, "pending": 0},
+            )
+            run["reasons"].add(record["reason"])
+            run["moved"] += 1
+            run["pending"] += record["id"] in pending_ids
+        return list(summary.values())
+
+    # ------------------------------------------------------------------ restore
+
+    def restore(self, record, on_conflict="rename", copy=False, dry_run=False):
+        """
+        Kembalikan satu entry ke path asalnya. Return (status, path tujuan) dengan status:
+        restored / identical (asal sudah berisi file yang sama) / skipped / missing.
+        """
+        blacklisted = Path(record["dest"])
+        target = Path(record["src"])
+        if not blacklisted.exists():
+            status, target = "missing", None
+        elif target.exists() and file_sha256(target) == record["sha256"]:
+            status = "identical"
+        elif target.exists() and on_conflict == "skip":
+            status, target = "skipped", None
+        else:
+            if target.exists() and on_conflict == "rename":
+                target = unique_path(target)
+            status = "restored"
+
+        if dry_run or status == "skipped":
+            return status, target
+
+        if status == "restored":
+            target.parent.mkdir(parents=True, exist_ok=True)
+            if copy:
+                shutil.copy2(blacklisted, target)
+            else:
+                # os.replace lewat shutil.move juga menimpa target untuk mode overwrite
+                shutil.move(blacklisted, target)
+        elif status == "identical" and not copy:
+            blacklisted.unlink()
+
+        self._append(
+            {
+                "op": "restore",
+                "ref": record["id"],
+                "run_id": record["run_id"],
+                "status": status,
+                "path": str(target) if target else None,
+            }
+        )
+        return status, target
+
+    def close(self):
+        if self._file is not None:
+            self._file.flush()
+            os.fsync(self._file.fileno())
+            self._file.close()
+            self._file = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
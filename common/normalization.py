@@ -0,0 +1,156 @@
+"""
+Aturan normalisasi field listing yang dipakai bersama oleh scraper, null scraper dan tracker.
+
+- Pola regex dikompilasi sekali di level modul
+- Lookup kanonik brand/model/variant/year di-memoize dengan LRU cache: nilai yang sama
+  (brand/model populer) muncul di ribuan baris, jadi hampir semua panggilan cukup hit cache
+- Log per panggilan (dulu INFO di setiap baris) diganti debug log yang di-sample: hanya
+  1 dari NORMALIZE_LOG_SAMPLE panggilan yang dicatat, dan hanya jika level DEBUG aktif
+
+Versi vectorized untuk backfill massal ada di common.vectorized_rules.
+"""
+
+import os
+import re
+import logging
+import itertools
+from functools import lru_cache
+
+logger = logging.getLogger(__name__)
+
+CACHE_SIZE = int(os.getenv("NORMALIZE_CACHE_SIZE", "65536"))
+LOG_SAMPLE_EVERY = max(1, int(os.getenv("NORMALIZE_LOG_SAMPLE", "1000")))
+
+EMPTY_VALUES = ("-", "N/A", "")
+
+PUNCT_TO_SPACE = re.compile(r"[\-\(\)_]")
+NON_WORD = re.compile(r"[^\w\s]")
+BRAND_SEPARATORS = re.compile(r"[-_]")
+YEAR = re.compile(r"\d{4}")
+NON_DIGIT = re.compile(r"[^\d]")
+KM_SUFFIX = re.compile(r"km", re.IGNORECASE)
+
+_log_counter = itertools.count()
+
+
+def sampled_debug(message, *args):
+    """Debug log untuk 1 dari LOG_SAMPLE_EVERY panggilan (format lazy, murah jika DEBUG mati)."""
+    if next(_log_counter) % LOG_SAMPLE_EVERY == 0 and logger.isEnabledFor(logging.DEBUG):
+        logger.debug(message, *args)
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def normalize_field(text, default_value):
+    """
+    Bersihkan model_group/model/variant: '-', '(', ')', '_' jadi spasi, buang karakter
+    non-word, rapikan spasi, UPPERCASE. Kosong / '-' / 'N/A' -> default_value.
+    """
+    if not text or str(text).strip() in EMPTY_VALUES:
+        return default_value
+    cleaned = NON_WORD.sub("", PUNCT_TO_SPACE.sub(" ", text))
+    cleaned = " ".join(cleaned.split()).upper()
+    if cleaned != text:
+        sampled_debug("Field normalized: %r -> %r", text, cleaned)
+    return cleaned if cleaned else default_value
+
+
+def normalize_model_variant(text):
+    """Seperti normalize_field dengan default "NO VARIANT" (dipakai untuk model dan variant mudah)."""
+    return normalize_field(text, "NO VARIANT")
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def normalize_brand_name(brand_str):
+    """'-' dan '_' jadi spasi, rapikan spasi, UPPERCASE. None / 'N/A' dikembalikan apa adanya."""
+    if not brand_str or brand_str == "N/A":
+        return brand_str
+    normalized = " ".join(BRAND_SEPARATORS.sub(" ", brand_str).split()).upper()
+    if normalized != brand_str:
+        sampled_debug("Brand normalized: %r -> %r", brand_str, normalized)
+    return normalized
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def convert_year_to_int(year_str):
+    """Ambil 4 digit pertama sebagai tahun ('1995 or older' -> 1995). None jika tidak ada."""
+    if not year_str or year_str == "N/A":
+        return None
+    match = YEAR.search(year_str)
+    if not match:
+        return None
+    year_int = int(match.group(0))
+    sampled_debug("Converting year from %r to %s", year_str, year_int)
+    return year_int
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def convert_mileage(mileage_str):
+    """Mileage mudah ('<4k', '10k - 20k', '>500k', '85,000 km') ke km. None jika tidak valid."""
+    if not mileage_str or mileage_str == "N/A":
+        return None
+    try:
+        if mileage_str.startswith("<"):
+            return int(mileage_str[1:-1]) * 1000 if "k" in mileage_str else int(mileage_str[1:])
+        if " - " in mileage_str:
+            max_part = mileage_str.split(" - ")[-1]
+            if "k" in max_part:
+                return int(float(max_part.replace("k", "")) * 1000)
+            return int(max_part)
+        if mileage_str.startswith(">"):
+            return int(mileage_str[1:-1]) * 1000 if "k" in mileage_str else int(mileage_str[1:])
+        if "k" in mileage_str:
+            return int(float(mileage_str.replace("k", "")) * 1000)
+        return int(mileage_str.replace(",", "").replace("km", "").strip())
+    except Exception as e:
+        logger.warning(f"Gagal mengkonversi mileage '{mileage_str}': {e}")
+        return None
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def parse_mileage(mileage_str):
+    """Mileage carlist ('10K - 15K km', '85,000 km'): ambil nilai kanan rentang, K = ribuan. 0 jika gagal."""
+    if not mileage_str or mileage_str.strip() == "- km":
+        return 0
+    try:
+        right = mileage_str.split("-")[-1].strip() if "-" in mileage_str else mileage_str.strip()
+        right = KM_SUFFIX.sub("", right).strip()
+        right = right.replace("K", "000").replace("k", "000").replace(" ", "")
+        return int(NON_DIGIT.sub("", right))
+    except Exception:
+        return 0
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def parse_mileage_mudah(mileage_str):
+    """Mileage mudah versi null scraper: nilai kanan rentang, tanpa '<>'/km/spasi, k = ribuan. 0 jika gagal."""
+    if not mileage_str:
+        return 0
+    try:
+        right = mileage_str.split("-")[-1].strip() if "-" in mileage_str else mileage_str.strip("<> ").strip()
+        right = right.lower().replace("km", "").replace(" ", "").replace("k", "000")
+        return int(NON_DIGIT.sub("", right))
+    except Exception:
+        return 0
+
+
+CACHED_FUNCTIONS = (
+    normalize_field,
+    normalize_brand_name,
+    convert_year_to_int,
+    convert_mileage,
+    parse_mileage,
+    parse_mileage_mudah,
+)
+
+
+def cache_stats():
+    """Statistik LRU per fungsi: {nama: {hits, misses, size}}."""
+    return {
+        func.__name__: {"hits": info.hits, "misses": info.misses, "size": info.currsize}
+        for func, info in ((func, func.cache_info()) for func in CACHED_FUNCTIONS)
+    }
+
+
+def clear_caches():
+    for func in CACHED_FUNCTIONS:
+        func.cache_clear()
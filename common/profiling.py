@@ -0,0 +1,227 @@
+"""
+Profiling opsional untuk entry point (run_scraper, run_tracker, run_sync, data_archiver,
+image main.py) tanpa edit kode.
+
+    parser = argparse.ArgumentParser(...)
+    add_profile_arguments(parser)
+    args = parser.parse_args()
+    with profile_run("scrape_mudahmy", args):
+        scraper.scrape_all_from_main()
+
+Mode (--profile atau env PROFILE):
+- cprofile : profiler deterministik, hanya thread utama. Hasil <nama>.pstats (buka dengan
+             pstats / snakeviz) + top fungsi (cumulative) dalam teks
+- sample   : sampling semua thread lewat sys._current_frames() tiap PROFILE_INTERVAL_MS
+             (default 10 ms). Overhead kecil dan ikut menangkap thread downloader / logging.
+             Hasil stacks.collapsed (format flamegraph.pl / speedscope) + top fungsi self time
+- all      : cprofile + sample sekaligus
+
+tracemalloc (--tracemalloc DETIK atau env PROFILE_TRACEMALLOC): snapshot alokasi tiap N
+detik dan sekali di akhir run; top lokasi alokasi + selisih terhadap snapshot sebelumnya.
+
+Semua artefak ditulis ke <PROFILE_DIR>/<nama>_<YYYYMMDD_HHMMSS>_<pid>/ (default
+logs/profiles), satu folder per run. Artefak tetap ditulis walau run berhenti karena
+exception / Ctrl+C.
+"""
+
+import os
+import sys
+import time
+import pstats
+import cProfile
+import logging
+import threading
+import tracemalloc
+import contextlib
+from collections import Counter
+from datetime import datetime
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+DEFAULT_PROFILE_DIR = ROOT / "logs" / "profiles"
+
+MODES = ("off", "cprofile", "sample", "all")
+DEFAULT_INTERVAL_MS = 10
+TOP_FUNCTIONS = 40
+TOP_ALLOCATIONS = 25
+TRACEMALLOC_FRAMES = 10
+
+logger = logging.getLogger(__name__)
+
+
+def add_profile_arguments(parser):
+    parser.add_argument(
+        "--profile",
+        choices=MODES,
+        help="Profiling run ini: cprofile, sample, all, atau off (default: env PROFILE, kosong = off)",
+    )
+    parser.add_argument(
+        "--profile-dir",
+        help="Folder artefak profiling (default: env PROFILE_DIR atau logs/profiles)",
+    )
+    parser.add_argument(
+        "--tracemalloc",
+        type=float,
+        metavar="DETIK",
+        help="Snapshot alokasi memori tiap N detik (default: env PROFILE_TRACEMALLOC, kosong / 0 = mati)",
+    )
+    return parser
+
+
+def _frame_label(code):
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+class StackSampler(threading.Thread):
+    """Ambil stack semua thread secara berkala dan hitung per stack (collapsed stacks)."""
+
+    def __init__(self, interval):
+        super().__init__(name="profile-sampler", daemon=True)
+        self.interval = interval
+        self.stacks = Counter()
+        self.samples = 0
+        self._stop_event = threading.Event()
+
+    def run(self):
+        while not self._stop_event.wait(self.interval):
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            for thread_id, frame in sys._current_frames().items():
+                # Thread profiler sendiri (sampler, tracemalloc) tidak ikut dihitung
+                if names.get(thread_id, "").startswith("profile-"):
+                    continue
+                labels = []
+                while frame is not None:
+                    labels.append(_frame_label(frame.f_code))
+                    frame = frame.f_back
+                labels.append(names.get(thread_id, f"thread-{thread_id}"))
+                self.stacks[";".join(reversed(labels))] += 1
+            self.samples += 1
+
+    def stop(self):
+        self._stop_event.set()
+        self.join()
+
+    def write(self, run_dir):
+        with open(run_dir / "stacks.collapsed", "w", encoding="utf-8") as f:
+            for stack, count in self.stacks.most_common():
+                f.write(f"{stack} {count}\n")
+
+        own = Counter()
+        for stack, count in self.stacks.items():
+            own[stack.rsplit(";", 1)[-1]] += count
+        total = sum(own.values()) or 1
+        with open(run_dir / "sample_top.txt", "w", encoding="utf-8") as f:
+            f.write(f"samples={self.samples} interval={self.interval * 1000:.0f}ms (semua thread)\n")
+            f.write(f"{'self%':>6} {'samples':>8}  function\n")
+            for label, count in own.most_common(TOP_FUNCTIONS):
+                f.write(f"{count * 100 / total:>5.1f}% {count:>8}  {label}\n")
+
+
+class AllocationSnapshots(threading.Thread):
+    """Snapshot tracemalloc tiap `interval` detik; hasil ditulis per snapshot."""
+
+    def __init__(self, run_dir, interval):
+        super().__init__(name="profile-tracemalloc", daemon=True)
+        self.run_dir = run_dir
+        self.interval = interval
+        self.started = time.perf_counter()
+        self.sequence = 0
+        self.previous = None
+        self._stop_event = threading.Event()
+        self._lock = threading.Lock()
+
+    def run(self):
+        while not self._stop_event.wait(self.interval):
+            self.snapshot()
+
+    def snapshot(self, label=None):
+        with self._lock:
+            snapshot = tracemalloc.take_snapshot().filter_traces((
+                tracemalloc.Filter(False, tracemalloc.__file__),
+                tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+                tracemalloc.Filter(False, "<frozen importlib._bootstrap_external>"),
+            ))
+            self.sequence += 1
+            elapsed = time.perf_counter() - self.started
+            current, peak = tracemalloc.get_traced_memory()
+            path = self.run_dir / f"tracemalloc_{self.sequence:03d}_{label or f'{elapsed:.0f}s'}.txt"
+            with open(path, "w", encoding="utf-8") as f:
+                f.write(f"elapsed={elapsed:.1f}s current={current / 1e6:.1f}MB peak={peak / 1e6:.1f}MB\n\n")
+                f.write(f"Top {TOP_ALLOCATIONS} lokasi alokasi:\n")
+                for stat in snapshot.statistics("lineno")[:TOP_ALLOCATIONS]:
+                    f.write(f"{stat}\n")
+                if self.previous is not None:
+                    f.write(f"\nTop {TOP_ALLOCATIONS} perubahan sejak snapshot sebelumnya:\n")
+                    for stat in snapshot.compare_to(self.previous, "lineno")[:TOP_ALLOCATIONS]:
+                        f.write(f"{stat}\n")
+            self.previous = snapshot
+
+    def stop(self):
+        self._stop_event.set()
+        self.join()
+        self.snapshot("final")
+
+
+def _setting(args, attr, env, cast=str):
+    value = getattr(args, attr, None) if args is not None else None
+    if value is None:
+        value = os.getenv(env) or None
+    return cast(value) if value is not None else None
+
+
+@contextlib.contextmanager
+def profile_run(name, args=None):
+    """
+    Jalankan blok di dalam profiler sesuai --profile / --tracemalloc (atau env). Tanpa
+    keduanya context manager ini tidak melakukan apa-apa.
+    """
+    mode = (_setting(args, "profile", "PROFILE") or "off").lower()
+    if mode not in MODES:
+        logger.warning(f"⚠️ Mode profiling '{mode}' tidak dikenal, profiling dimatikan")
+        mode = "off"
+    alloc_interval = _setting(args, "tracemalloc", "PROFILE_TRACEMALLOC", float) or 0
+    if mode == "off" and alloc_interval <= 0:
+        yield None
+        return
+
+    base_dir = Path(_setting(args, "profile_dir", "PROFILE_DIR") or DEFAULT_PROFILE_DIR)
+    run_dir = base_dir / f"{name}_{datetime.now().strftime('%Y%m%d_%H%M%S')}_{os.getpid()}"
+    run_dir.mkdir(parents=True, exist_ok=True)
+    logger.info(f"🔬 Profiling aktif (mode={mode}, tracemalloc={alloc_interval or 'off'}) -> {run_dir}")
+
+    profiler = cProfile.Profile() if mode in ("cprofile", "all") else None
+    sampler = None
+    if mode in ("sample", "all"):
+        interval_ms = float(os.getenv("PROFILE_INTERVAL_MS") or DEFAULT_INTERVAL_MS)
+        sampler = StackSampler(interval_ms / 1000)
+    allocations = None
+    if alloc_interval > 0:
+        tracemalloc.start(TRACEMALLOC_FRAMES)
+        allocations = AllocationSnapshots(run_dir, alloc_interval)
+        allocations.start()
+
+    started = time.perf_counter()
+    if sampler:
+        sampler.start()
+    if profiler:
+        profiler.enable()
+    try:
+        yield run_dir
+    finally:
+        if profiler:
+            profiler.disable()
+        if sampler:
+            sampler.stop()
+        if allocations:
+            allocations.stop()
+            tracemalloc.stop()
+
+        if profiler:
+            profiler.dump_stats(str(run_dir / f"{name}.pstats"))
+            with open(run_dir / "cprofile_top.txt", "w", encoding="utf-8") as f:
+                stats = pstats.Stats(profiler, stream=f)
+                stats.sort_stats("cumulative").print_stats(TOP_FUNCTIONS)
+                stats.sort_stats("tottime").print_stats(TOP_FUNCTIONS)
+        if sampler:
+            sampler.write(run_dir)
+        logger.info(f"🔬 Artefak profiling ({time.perf_counter() - started:.1f}s) tersimpan di {run_dir}")
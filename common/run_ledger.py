@@ -0,0 +1,284 @@
+"""
+Run ledger: satu baris ringkasan per run scraper / tracker / null scrape / sync / archive /
+image download di tabel RUN_LEDGER_TABLE (default run_ledger), supaya throughput antar run
+bisa dibandingkan (scripts/run_ledger_report.py) tanpa membongkar file log.
+
+    @recorded_run("scrape", METRICS_SERVICE, get_connection, proxy_env="PROXY_MODE_MUDAH")
+    def scrape_all_from_main(self): ...
+
+    with RunLedger("image", "image_download_mudah", get_connection, downloader="mudah"):
+        main(...)
+
+- Angka listing / blokir / latency page load / byte gambar diambil dari selisih counter
+  Prometheus (common.metrics) antara awal dan akhir run, jadi service yang sudah
+  diinstrumentasi tidak perlu menghitung ulang. Karena registry per proses, run lain yang
+  berjalan bersamaan di proses yang sama (mis. Flask app) dengan label service sama ikut
+  terhitung; IMAGE_BYTES tidak berlabel sehingga dihitung untuk seluruh proses
+- Proses tanpa metrik (sync, archive) menambah angka sendiri lewat count(...)
+- exit_reason: completed / stopped (stop_flag service) / interrupted (Ctrl+C) /
+  error: <Exception>; set_exit_reason() untuk error yang ditangkap di dalam service
+- Gagal menulis ledger hanya di-log (warning), tidak pernah menggagalkan run
+"""
+
+import os
+import json
+import socket
+import logging
+import threading
+import functools
+from datetime import datetime
+
+from common.metrics import BLOCKS, IMAGE_BYTES, IMAGES, LISTING_STATUS, LISTINGS, PAGE_LOAD
+
+RUN_LEDGER_TABLE = os.getenv("RUN_LEDGER_TABLE", "run_ledger")
+
+KINDS = ("scrape", "null_scrape", "tracker", "sync", "archive", "image")
+COUNT_FIELDS = ("processed", "succeeded", "failed", "blocks", "bytes")
+
+_local = threading.local()
+
+logger = logging.getLogger(__name__)
+
+
+def _stack():
+    stack = getattr(_local, "stack", None)
+    if stack is None:
+        stack = _local.stack = []
+    return stack
+
+
+def ensure_table(conn, table=RUN_LEDGER_TABLE):
+    cursor = conn.cursor()
+    cursor.execute(f"""
+        CREATE TABLE IF NOT EXISTS {table} (
+            id SERIAL PRIMARY KEY,
+            kind VARCHAR(20) NOT NULL,
+            service VARCHAR(64) NOT NULL,
+            host VARCHAR(255),
+            pid INTEGER,
+            proxy_mode VARCHAR(32),
+            started_at TIMESTAMP NOT NULL,
+            ended_at TIMESTAMP NOT NULL,
+            duration_sec DOUBLE PRECISION,
+            processed INTEGER NOT NULL DEFAULT 0,
+            succeeded INTEGER NOT NULL DEFAULT 0,
+            failed INTEGER NOT NULL DEFAULT 0,
+            blocks INTEGER NOT NULL DEFAULT 0,
+            bytes BIGINT NOT NULL DEFAULT 0,
+            avg_latency_sec DOUBLE PRECISION,
+            exit_reason TEXT,
+            details JSONB
+        )
+    """)
+    cursor.execute(f"CREATE INDEX IF NOT EXISTS {table}_service_started_idx ON {table} (service, started_at)")
+    cursor.close()
+    conn.commit()
+
+
+def _by_label(metric, suffix, label, **match):
+    """Jumlah nilai sample metric (nama berakhiran `suffix`) per nilai `label`, disaring `match`."""
+    values = {}
+    for family in metric.collect():
+        for sample in family.samples:
+            if not sample.name.endswith(suffix):
+                continue
+            if any(sample.labels.get(key) != value for key, value in match.items()):
+                continue
+            key = sample.labels.get(label, "") if label else ""
+            values[key] = values.get(key, 0.0) + sample.value
+    return values
+
+
+def _snapshot(service, downloader):
+    return {
+        "listings": _by_label(LISTINGS, "_total", "event", service=service),
+        "status": _by_label(LISTING_STATUS, "_total", "status", service=service),
+        "images": _by_label(IMAGES, "_total", "result", downloader=downloader or service),
+        "blocks": _by_label(BLOCKS, "_total", "kind", service=service),
+        "page_load_sum": sum(_by_label(PAGE_LOAD, "_sum", None, service=service).values()),
+        "page_load_count": sum(_by_label(PAGE_LOAD, "_count", None, service=service).values()),
+        "bytes": sum(_by_label(IMAGE_BYTES, "_total", None).values()),
+    }
+
+
+def _delta(before, after):
+    if isinstance(after, dict):
+        keys = set(before) | set(after)
+        result = {key: after.get(key, 0) - before.get(key, 0) for key in keys}
+        return {key: int(value) for key, value in result.items() if value}
+    return after - before
+
+
+class RunLedger:
+    def __init__(self, kind, service, connect, proxy_mode=None, downloader=None, table=RUN_LEDGER_TABLE):
+        self.kind = kind
+        self.service = service
+        self.connect = connect
+        self.proxy_mode = proxy_mode
+        self.downloader = downloader
+        self.table = table
+        self.counts = dict.fromkeys(COUNT_FIELDS, 0)
+        self.explicit_succeeded = False
+        self.extra = {}
+        self.exit_reason = None
+        self.started_at = None
+        self._before = None
+
+    def count(self, **values):
+        """Tambah angka run (processed, succeeded, failed, blocks, bytes); key lain masuk details."""
+        for key, value in values.items():
+            if key in self.counts:
+                self.counts[key] += value or 0
+                self.explicit_succeeded |= key == "succeeded"
+            else:
+                self.extra[key] = self.extra.get(key, 0) + (value or 0)
+
+    def set_exit_reason(self, reason):
+        self.exit_reason = reason
+
+    def __enter__(self):
+        self.started_at = datetime.now()
+        try:
+            self._before = _snapshot(self.service, self.downloader)
+        except Exception as e:
+            logger.warning(f"⚠️ Snapshot metrics run ledger gagal: {e}")
+        _stack().append(self)
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        stack = _stack()
+        if stack and stack[-1] is self:
+            stack.pop()
+        if exc_type is KeyboardInterrupt:
+            self.exit_reason = "interrupted"
+        elif exc is not None:
+            self.exit_reason = f"error: {exc_type.__name__}: {exc}"[:500]
+        self.write(datetime.now())
+        return False
+
+    def summary(self):
+        details = {}
+        processed = failed = blocks = byte_count = 0
+        avg_latency = None
+        if self._before is not None:
+            try:
+                after = _snapshot(self.service, self.downloader)
+                delta = {key: _delta(self._before[key], after[key]) for key in after}
+            except Exception as e:
+                logger.warning(f"⚠️ Snapshot metrics run ledger gagal: {e}")
+                delta = None
+            if delta:
+                listings, images = delta["listings"], delta["images"]
+                if listings:
+                    # Tracker mencatat "checked" per listing; scraper per hasil detail
+                    processed = listings.get("checked") or sum(
+                        listings.get(event, 0) for event in ("scraped", "failed", "skipped")
+                    )
+                    failed = listings.get("failed", 0)
+                elif images:
+                    processed = sum(images.values())
+                    failed = images.get("failed", 0)
+                blocks = sum(delta["blocks"].values())
+                byte_count = int(delta["bytes"])
+                if delta["page_load_count"]:
+                    avg_latency = delta["page_load_sum"] / delta["page_load_count"]
+                details = {key: delta[key] for key in ("listings", "status", "images", "blocks") if delta[key]}
+
+        explicit = self.counts
+        explicit_succeeded = (
+            explicit["succeeded"] if self.explicit_succeeded else explicit["processed"] - explicit["failed"]
+        )
+        if self.extra:
+            details["extra"] = self.extra
+        return {
+            "processed": processed + explicit["processed"],
+            "succeeded": processed - failed + explicit_succeeded,
+            "failed": failed + explicit["failed"],
+            "blocks": blocks + explicit["blocks"],
+            "bytes": byte_count + explicit["bytes"],
+            "avg_latency_sec": avg_latency,
+            "details": details,
+        }
+
+    def write(self, ended_at):
+        summary = self.summary()
+        duration = (ended_at - self.started_at).total_seconds()
+        exit_reason = self.exit_reason or "completed"
+        logger.info(
+            f"🧾 Run ledger {self.service}: {summary['processed']} diproses, {summary['succeeded']} sukses, "
+            f"{summary['failed']} gagal, {summary['blocks']} blokir dalam {duration:.0f}s ({exit_reason})"
+        )
+        conn = None
+        try:
+            conn = self.connect()
+            ensure_table(conn, self.table)
+            cursor = conn.cursor()
+            cursor.execute(f"""
+                INSERT INTO {self.table} (
+                    kind, service, host, pid, proxy_mode, started_at, ended_at, duration_sec,
+                    processed, succeeded, failed, blocks, bytes, avg_latency_sec, exit_reason, details
+                ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s::jsonb)
+            """, (
+                self.kind,
+                self.service,
+                socket.gethostname(),
+                os.getpid(),
+                self.proxy_mode,
+                self.started_at,
+                ended_at,
+                duration,
+                summary["processed"],
+                summary["succeeded"],
+                summary["failed"],
+                summary["blocks"],
+                summary["bytes"],
+                summary["avg_latency_sec"],
+                exit_reason,
+                json.dumps(summary["details"]),
+            ))
+            cursor.close()
+            conn.commit()
+        except Exception as e:
+            logger.warning(f"⚠️ Gagal menulis run ledger {self.service}: {e}")
+        finally:
+            if conn is not None:
+                conn.close()
+
+
+def current_run():
+    stack = _stack()
+    return stack[-1] if stack else None
+
+
+def count(**values):
+    """Tambah angka ke run aktif di thread ini (no-op jika tidak ada run)."""
+    run = current_run()
+    if run is not None:
+        run.count(**values)
+
+
+def set_exit_reason(reason):
+    run = current_run()
+    if run is not None:
+        run.set_exit_reason(reason)
+
+
+def recorded_run(kind, service, connect, proxy_env=None, downloader=None):
+    """
+    Decorator untuk method entry point service: satu baris ledger per pemanggilan.
+    Jika setelah selesai self.stop_flag True, exit_reason dicatat sebagai "stopped".
+    """
+
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(self, *args, **kwargs):
+            proxy_mode = os.getenv(proxy_env, "none").lower() if proxy_env else None
+            with RunLedger(kind, service, connect, proxy_mode=proxy_mode, downloader=downloader) as run:
+                result = func(self, *args, **kwargs)
+                if getattr(self, "stop_flag", False) and run.exit_reason is None:
+                    run.set_exit_reason("stopped")
+                return result
+
+        return wrapper
+
+    return decorator
@@ -0,0 +1,247 @@
+"""
+Snapshot halaman saat error (pengganti take_screenshot PNG full-page per error).
+
+Saat block storm setiap error dulu menulis PNG full-page secara sinkron: disk penuh dan
+tiap kegagalan bertambah beberapa detik. SnapshotManager:
+- Rate limit per jenis error: nama snapshot tanpa suffix angka (scrape_error_3_2 ->
+  scrape_error, timeout_fallback_123 -> timeout_fallback) maksimal sekali per
+  SNAPSHOT_MIN_INTERVAL detik; jumlah yang dilewati ikut dicatat di snapshot berikutnya.
+  Hanya snapshot yang benar-benar disimpan yang memakai jatah rate limit
+- Format ringkas: JPEG viewport (SNAPSHOT_JPEG_QUALITY) dan/atau HTML yang sudah dibuang
+  script/style/svg-nya (SNAPSHOT_MODE = jpeg / html / both / off, default both)
+- Dedupe: halaman blokir yang sama (hash HTML ter-normalisasi, angka/token acak diabaikan)
+  hanya disimpan sekali per SNAPSHOT_DEDUPE_TTL detik; hash yang diingat dibatasi
+  DEDUPE_MAX_ENTRIES (terlama dibuang) supaya proses panjang tidak menumpuk memori
+- Tulis file di thread background; yang tetap di thread pemanggil hanya page.content() /
+  page.screenshot() karena Playwright sync API tidak thread-safe. Thread-nya daemon, jadi
+  saat worker dimulai flush() didaftarkan ke atexit (maks SNAPSHOT_FLUSH_TIMEOUT detik)
+  supaya snapshot terakhir sebelum proses keluar tetap tertulis
+- Retensi: total ukuran semua folder <YYYYMMDD>_error_* di log_dir dibatasi
+  SNAPSHOT_MAX_MB; file terlama dihapus lebih dulu
+
+Layout folder tetap sama seperti take_screenshot lama: <log_dir>/<YYYYMMDD>_error_<suffix>/.
+"""
+
+import os
+import re
+import gzip
+import atexit
+import time
+import queue
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from datetime import datetime
+from pathlib import Path
+
+MODES = ("off", "jpeg", "html", "both")
+DEFAULT_MODE = "both"
+DEFAULT_MIN_INTERVAL = 60
+DEFAULT_JPEG_QUALITY = 55
+DEFAULT_MAX_MB = 200
+HTML_MAX_CHARS = 300_000
+QUEUE_SIZE = 64
+DEFAULT_FLUSH_TIMEOUT = 10
+DEFAULT_DEDUPE_TTL = 3600
+DEDUPE_MAX_ENTRIES = 512
+
+_KIND_SUFFIX = re.compile(r"[_\d]+$")
+_STRIP_BLOCKS = re.compile(r"<(script|style|svg|noscript)\b.*?</\1\s*>", re.IGNORECASE | re.DOTALL)
+_COMMENTS = re.compile(r"<!--.*?-->", re.DOTALL)
+_WHITESPACE = re.compile(r"\s+")
+# Ray ID Cloudflare, nonce, timestamp, id listing: beda di tiap halaman blokir yang sama
+_VOLATILE = re.compile(r"[0-9a-f]{8,}|\d+", re.IGNORECASE)
+
+logger = logging.getLogger(__name__)
+
+
+def error_kind(name):
+    return _KIND_SUFFIX.sub("", name) or name
+
+
+def trim_html(html):
+    html = _STRIP_BLOCKS.sub("", html)
+    html = _COMMENTS.sub("", html)
+    html = _WHITESPACE.sub(" ", html)
+    return html[:HTML_MAX_CHARS]
+
+
+def content_hash(trimmed_html):
+    return hashlib.sha1(_VOLATILE.sub("#", trimmed_html).encode("utf-8", "ignore")).hexdigest()
+
+
+class SnapshotManager:
+    def __init__(self, suffix, log_dir, mode=None, min_interval=None, jpeg_quality=None, max_mb=None):
+        self.suffix = suffix
+        self.log_dir = Path(log_dir)
+        self.mode = (mode or os.getenv("SNAPSHOT_MODE", DEFAULT_MODE)).lower()
+        if self.mode not in MODES:
+            logger.warning(f"⚠️ SNAPSHOT_MODE '{self.mode}' tidak dikenal, pakai {DEFAULT_MODE}")
+            self.mode = DEFAULT_MODE
+        self.min_interval = float(
+            min_interval if min_interval is not None else os.getenv("SNAPSHOT_MIN_INTERVAL", DEFAULT_MIN_INTERVAL)
+        )
+        self.jpeg_quality = int(jpeg_quality or os.getenv("SNAPSHOT_JPEG_QUALITY", DEFAULT_JPEG_QUALITY))
+        self.max_bytes = int(float(max_mb or os.getenv("SNAPSHOT_MAX_MB", DEFAULT_MAX_MB)) * 1024 * 1024)
+        self.dedupe_ttl = float(os.getenv("SNAPSHOT_DEDUPE_TTL", DEFAULT_DEDUPE_TTL))
+
+        self._lock = threading.Lock()
+        self._last_taken = {}
+        self._suppressed = {}
+        # digest -> (nama snapshot, waktu monotonic disimpan), urut dari yang terlama
+        self._seen = OrderedDict()
+        self._queue = queue.Queue(maxsize=QUEUE_SIZE)
+        self._worker = None
+        self._total_bytes = None
+
+    def capture(self, page, name):
+        """Ambil snapshot `name` dari page jika lolos rate limit dan bukan duplikat."""
+        if self.mode == "off":
+            return None
+        kind = error_kind(name)
+        with self._lock:
+            if self._rate_limited(kind, time.monotonic()):
+                return None
+
+        try:
+            html = trim_html(page.content())
+            digest = content_hash(html)
+            with self._lock:
+                duplicate_of = self._duplicate_of(digest, time.monotonic())
+            if duplicate_of is not None:
+                logger.info(f"📸 Snapshot {name} dilewati: halaman sama dengan snapshot {duplicate_of}")
+                return None
+            image = None
+            if self.mode in ("jpeg", "both"):
+                image = page.screenshot(type="jpeg", quality=self.jpeg_quality)
+        except Exception as e:
+            logger.warning(f"❌ Gagal mengambil snapshot {name}: {e}")
+            return None
+
+        # Baru di sini snapshot pasti disimpan: cek ulang (thread lain bisa mendahului) lalu
+        # pakai jatah rate limit dan ingat hash-nya
+        with self._lock:
+            now = time.monotonic()
+            if self._rate_limited(kind, now) or self._duplicate_of(digest, now) is not None:
+                return None
+            self._last_taken[kind] = now
+            self._seen[digest] = (name, now)
+            while len(self._seen) > DEDUPE_MAX_ENTRIES:
+                self._seen.popitem(last=False)
+            suppressed = self._suppressed.pop(kind, 0)
+
+        folder = self.log_dir / f"{datetime.now().strftime('%Y%m%d')}_error_{self.suffix}"
+        stem = f"{name}_{datetime.now().strftime('%H%M%S')}"
+        header = f"<!-- url: {getattr(page, 'url', '')} | kind: {kind} | dilewati sebelumnya: {suppressed} -->\n"
+        files = []
+        if image is not None:
+            files.append((folder / f"{stem}.jpg", image))
+        if self.mode in ("html", "both"):
+            files.append((folder / f"{stem}.html.gz", gzip.compress((header + html).encode("utf-8"))))
+        self._submit(files)
+        skipped = f" ({suppressed} snapshot {kind} sebelumnya dilewati rate limit)" if suppressed else ""
+        logger.info(f"📸 Snapshot disimpan: {folder / stem}.*{skipped}")
+        return folder / stem
+
+    def _rate_limited(self, kind, now):
+        """Dipanggil dengan _lock: True (dan hitung sebagai dilewati) jika kind masih dalam interval."""
+        last = self._last_taken.get(kind)
+        if last is not None and now - last < self.min_interval:
+            self._suppressed[kind] = self._suppressed.get(kind, 0) + 1
+            return True
+        return False
+
+    def _duplicate_of(self, digest, now):
+        """Dipanggil dengan _lock: nama snapshot dengan hash sama yang belum kedaluwarsa, atau None."""
+        while self._seen:
+            oldest, (_, taken) = next(iter(self._seen.items()))
+            if now - taken <= self.dedupe_ttl:
+                break
+            del self._seen[oldest]
+        seen = self._seen.get(digest)
+        return seen[0] if seen else None
+
+    def _submit(self, files):
+        with self._lock:
+            if self._worker is None:
+                self._worker = threading.Thread(target=self._run, name=f"snapshots-{self.suffix}", daemon=True)
+                self._worker.start()
+                atexit.register(self.flush, float(os.getenv("SNAPSHOT_FLUSH_TIMEOUT", DEFAULT_FLUSH_TIMEOUT)))
+        try:
+            self._queue.put_nowait(files)
+        except queue.Full:
+            logger.warning("⚠️ Antrian snapshot penuh, snapshot dibuang")
+
+    def _run(self):
+        while True:
+            files = self._queue.get()
+            try:
+                for path, data in files:
+                    path.parent.mkdir(parents=True, exist_ok=True)
+                    tmp_path = path.with_name(path.name + ".tmp")
+                    with open(tmp_path, "wb") as f:
+                        f.write(data)
+                    os.replace(tmp_path, path)
+                    self._add_bytes(len(data))
+            except Exception as e:
+                logger.warning(f"❌ Gagal menulis snapshot: {e}")
+            finally:
+                self._queue.task_done()
+
+    def _snapshot_files(self):
+        for folder in self.log_dir.glob("*_error_*"):
+            if folder.is_dir():
+                for path in folder.iterdir():
+                    if path.is_file():
+                        yield path
+
+    def _add_bytes(self, size):
+        if self._total_bytes is None:
+            self._total_bytes = sum(path.stat().st_size for path in self._snapshot_files())
+        else:
+            self._total_bytes += size
+        if self._total_bytes > self.max_bytes:
+            self.enforce_retention()
+
+    def enforce_retention(self):
+        """Hapus snapshot terlama (semua service) sampai total di bawah batas."""
+        files = []
+        for path in self._snapshot_files():
+            try:
+                stat = path.stat()
+            except OSError:
+                continue
+            files.append((stat.st_mtime, stat.st_size, path))
+        files.sort()
+        total = sum(size for _, size, _ in files)
+        removed = 0
+        # Turun sampai 90% batas supaya tidak menghapus lagi di setiap tulis berikutnya
+        target = self.max_bytes * 0.9
+        for _, size, path in files:
+            if total <= target:
+                break
+            try:
+                path.unlink()
+            except OSError:
+                continue
+            total -= size
+            removed += 1
+        for folder in self.log_dir.glob("*_error_*"):
+            try:
+                if folder.is_dir() and not any(folder.iterdir()):
+                    folder.rmdir()
+            except OSError:
+                continue
+        self._total_bytes = total
+        if removed:
+            logger.info(f"🧹 {removed} snapshot lama dihapus (batas {self.max_bytes / 1024 / 1024:.0f} MB)")
+
+    def flush(self, timeout=None):
+        """Tunggu sampai semua snapshot di antrian selesai ditulis (untuk shutdown / test)."""
+        deadline = time.monotonic() + timeout if timeout else None
+        while self._queue.unfinished_tasks:
+            if deadline and time.monotonic() > deadline:
+                return False
+            time.sleep(0.05)
+        return True
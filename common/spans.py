@@ -0,0 +1,206 @@
+"""
+Span timing ringan untuk tahap-tahap scraping detail (goto, cek blokir, SHOW MORE, galeri,
+download gambar, simpan DB).
+
+    @traced("mudah.detail")
+    def scrape_listing_detail(self, context, url):
+        stage("goto")
+        page.goto(url)
+        stage("block_check")
+        ...
+
+- span() adalah context manager; span di dalam span lain otomatis jadi child (stack per thread)
+- @traced(nama) membungkus satu fungsi dalam span
+- stage(nama) menutup stage sebelumnya dari span aktif dan membuka child baru, supaya kode
+  linear tidak perlu di-indent ulang; stage terakhir ditutup saat span keluar (termasuk
+  karena exception). Tanpa span aktif stage() tidak melakukan apa-apa
+- Durasi dikumpulkan per nama (mis. "mudah.detail.goto") untuk laporan per run:
+  count, p50, p95, total dan porsi dari wall time run (log_report)
+- Opsional: setiap span ditulis ke file JSONL berformat mirip OpenTelemetry (traceId,
+  spanId, parentSpanId, startTimeUnixNano, ...) jika env SPAN_EXPORT_FILE di-set atau
+  configure_export(path) dipanggil
+"""
+
+import os
+import json
+import math
+import time
+import logging
+import secrets
+import threading
+import functools
+
+_lock = threading.Lock()
+_local = threading.local()
+_durations = {}
+_run_started = time.perf_counter()
+_export_path = os.getenv("SPAN_EXPORT_FILE") or None
+_export_file = None
+
+
+def _stack():
+    stack = getattr(_local, "stack", None)
+    if stack is None:
+        stack = _local.stack = []
+    return stack
+
+
+class Span:
+    def __init__(self, name, attributes=None):
+        parent = _stack()[-1] if _stack() else None
+        self.key = f"{parent.key}.{name}" if parent else name
+        self.trace_id = parent.trace_id if parent else secrets.token_hex(16)
+        self.span_id = secrets.token_hex(8)
+        self.parent_id = parent.span_id if parent else None
+        self.attributes = dict(attributes or {})
+        self.error = None
+        self.owner = None
+        self._stage = None
+        self._start_ns = time.time_ns()
+        self._start = time.perf_counter()
+
+    def stage(self, name, **attributes):
+        """Tutup stage aktif (jika ada) lalu buka stage child baru bernama `name`."""
+        self.end_stage()
+        self._stage = Span(name, attributes).__enter__()
+        self._stage.owner = self
+        return self._stage
+
+    def end_stage(self):
+        if self._stage is not None:
+            stage, self._stage = self._stage, None
+            stage.__exit__(None, None, None)
+
+    def set(self, **attributes):
+        self.attributes.update(attributes)
+
+    def __enter__(self):
+        _stack().append(self)
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if self._stage is not None:
+            stage, self._stage = self._stage, None
+            stage.__exit__(exc_type, exc, tb)
+        elapsed = time.perf_counter() - self._start
+        stack = _stack()
+        if stack and stack[-1] is self:
+            stack.pop()
+        if exc is not None:
+            self.error = f"{exc_type.__name__}: {exc}"
+        _record(self, elapsed)
+        return False
+
+
+def span(name, **attributes):
+    return Span(name, attributes)
+
+
+def stage(name, **attributes):
+    """Pindah ke stage `name` pada span aktif di thread ini (no-op jika tidak ada)."""
+    stack = _stack()
+    if not stack:
+        return None
+    current = stack[-1]
+    return (current.owner or current).stage(name, **attributes)
+
+
+def traced(name=None):
+    """Decorator: jalankan fungsi di dalam span (default nama = nama fungsi)."""
+
+    def decorator(func):
+        span_name = name or func.__name__
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with Span(span_name):
+                return func(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+def configure_export(path):
+    """Tulis setiap span ke `path` (JSONL, append). None = matikan export."""
+    global _export_path, _export_file
+    with _lock:
+        if _export_file is not None:
+            _export_file.close()
+            _export_file = None
+        _export_path = str(path) if path else None
+
+
+def _record(sp, elapsed):
+    global _export_file
+    with _lock:
+        _durations.setdefault(sp.key, []).append(elapsed)
+        if not _export_path:
+            return
+        if _export_file is None:
+            os.makedirs(os.path.dirname(os.path.abspath(_export_path)), exist_ok=True)
+            _export_file = open(_export_path, "a", encoding="utf-8")
+        record = {
+            "traceId": sp.trace_id,
+            "spanId": sp.span_id,
+            "parentSpanId": sp.parent_id or "",
+            "name": sp.key,
+            "kind": "SPAN_KIND_INTERNAL",
+            "startTimeUnixNano": sp._start_ns,
+            "endTimeUnixNano": sp._start_ns + int(elapsed * 1e9),
+            "attributes": {k: v if isinstance(v, (str, int, float, bool)) else str(v) for k, v in sp.attributes.items()},
+            "status": {"code": "STATUS_CODE_ERROR", "message": sp.error} if sp.error else {"code": "STATUS_CODE_OK"},
+        }
+        _export_file.write(json.dumps(record, ensure_ascii=False) + "\n")
+        _export_file.flush()
+
+
+def _percentile(sorted_values, pct):
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, math.ceil(pct / 100 * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+def report():
+    """Ringkasan per nama span sejak reset(): list dict diurutkan dari total terbesar."""
+    with _lock:
+        snapshot = {key: sorted(values) for key, values in _durations.items()}
+        wall = max(time.perf_counter() - _run_started, 1e-9)
+    rows = []
+    for key, values in snapshot.items():
+        total = sum(values)
+        rows.append({
+            "name": key,
+            "count": len(values),
+            "p50": _percentile(values, 50),
+            "p95": _percentile(values, 95),
+            "total": total,
+            "wall_share": total / wall,
+        })
+    rows.sort(key=lambda row: row["total"], reverse=True)
+    return rows
+
+
+def log_report(title="Span report", logger=None):
+    log = logger or logging.getLogger(__name__)
+    rows = report()
+    if not rows:
+        return rows
+    lines = [f"⏱️ {title} (wall {time.perf_counter() - _run_started:.1f}s)"]
+    lines.append(f"{'stage':<40} {'count':>6} {'p50':>8} {'p95':>8} {'total':>9} {'wall%':>6}")
+    for row in rows:
+        lines.append(
+            f"{row['name']:<40} {row['count']:>6} {row['p50']:>7.2f}s {row['p95']:>7.2f}s "
+            f"{row['total']:>8.1f}s {row['wall_share'] * 100:>5.1f}%"
+        )
+    log.info("\n".join(lines))
+    return rows
+
+
+def reset():
+    """Mulai run baru: kosongkan statistik dan set ulang awal wall time."""
+    global _run_started
+    with _lock:
+        _durations.clear()
+        _run_started = time.perf_counter()
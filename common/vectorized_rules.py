@@ -0,0 +1,204 @@
+"""
+Versi vectorized (pandas) dari aturan normalisasi listing, untuk backfill massal.
+
+Setiap fungsi menerima pandas.Series (satu chunk kolom mentah dari DB) dan mengembalikan
+Series hasil dengan index yang sama. Logika mengikuti versi per-baris:
+- normalize_brand_name / normalize_model_variant  (common.normalization)
+- convert_year_to_int                             (common.normalization)
+- convert_mileage                                 (common.normalization, parser scraper dan
+                                                   tracker mudah; nilai yang membuat versi
+                                                   per-baris return None jadi <NA>)
+- convert_information_ads_to_date                 (tracker mudah), relatif terhadap waktu
+  scrape baris tersebut (last_scraped_at), bukan waktu backfill dijalankan
+
+check_parity() membandingkan versi vectorized dengan versi per-baris pada PARITY_SAMPLES;
+backfill menolak jalan jika ada yang berbeda (apply_rules menulis setiap nilai yang beda).
+"""
+
+import numpy as np
+import pandas as pd
+
+from common import normalization
+
+MONTHS = {
+    "jan": 1, "feb": 2, "mar": 3, "apr": 4, "may": 5, "jun": 6,
+    "jul": 7, "aug": 8, "sep": 9, "oct": 10, "nov": 11, "dec": 12,
+}
+
+
+def _text(series):
+    return series.astype("string")
+
+
+def normalize_brand_name(series):
+    text = _text(series)
+    keep = text.isna() | (text == "N/A").fillna(False)
+    normalized = (
+        text.str.replace(r"[-_]", " ", regex=True)
+        .str.upper()
+        .str.replace(r"\s+", " ", regex=True)
+        .str.strip()
+    )
+    return normalized.mask(keep, text)
+
+
+def normalize_model_variant(series):
+    text = _text(series)
+    blank = text.isna() | text.str.strip().isin(["N/A", "-", ""])
+    cleaned = (
+        text.str.replace(r"[\-\(\)_]", " ", regex=True)
+        .str.replace(r"[^\w\s]", "", regex=True)
+        .str.replace(r"\s+", " ", regex=True)
+        .str.strip()
+        .str.upper()
+    )
+    return cleaned.mask(blank | (cleaned == "").fillna(False), "NO VARIANT")
+
+
+def convert_year_to_int(series):
+    text = _text(series)
+    year = text.mask((text == "N/A").fillna(False)).str.extract(r"(\d{4})", expand=False)
+    return pd.to_numeric(year, errors="coerce").astype("Int64")
+
+
+# Bentuk yang diterima int() / float() Python untuk string (spasi di tepi boleh)
+_INT_TEXT = r"^\s*[+-]?\d+\s*$"
+_FLOAT_TEXT = r"^\s*[+-]?(?:\d+\.?\d*|\.\d+)(?:[eE][+-]?\d+)?\s*$"
+
+
+def _as_int(text):
+    return pd.to_numeric(text.where(text.str.match(_INT_TEXT).fillna(False)), errors="coerce")
+
+
+def _as_thousands(text):
+    """int(float(text) * 1000) per baris: dipotong ke arah nol, <NA> jika bukan float."""
+    value = pd.to_numeric(text.where(text.str.match(_FLOAT_TEXT).fillna(False)), errors="coerce")
+    return np.trunc(value.astype("float64") * 1000)
+
+
+def convert_mileage(series):
+    """
+    Sama dengan normalization.convert_mileage, cabang diperiksa dengan urutan yang sama:
+    '<..', '.. - ..' (nilai kanan), '>..', lalu sisanya. 'k' = ribuan (float, '5.5k' -> 5500),
+    selain itu int setelah ',' dan 'km' dibuang. Gagal / kosong / N/A -> <NA>.
+    """
+    text = _text(series)
+    blank = text.isna() | text.isin(["", "N/A"])
+    has_k = text.str.contains("k", regex=False).fillna(False)
+
+    lower = text.str.startswith("<").fillna(False)
+    ranged = ~lower & text.str.contains(" - ", regex=False).fillna(False)
+    upper = ~lower & ~ranged & text.str.startswith(">").fillna(False)
+    rest = ~lower & ~ranged & ~upper
+
+    bounded = lower | upper
+    max_part = text.str.split(" - ").str[-1].astype("string")
+    max_k = max_part.str.contains("k", regex=False).fillna(False)
+
+    result = pd.Series(np.nan, index=series.index, dtype="float64")
+    result = result.mask(bounded & has_k, _as_int(text.str[1:-1]) * 1000)
+    result = result.mask(bounded & ~has_k, _as_int(text.str[1:]))
+    result = result.mask(ranged & max_k, _as_thousands(max_part.str.replace("k", "", regex=False)))
+    result = result.mask(ranged & ~max_k, _as_int(max_part))
+    result = result.mask(rest & has_k, _as_thousands(text.str.replace("k", "", regex=False)))
+    result = result.mask(
+        rest & ~has_k,
+        _as_int(text.str.replace(",", "", regex=False).str.replace("km", "", regex=False).str.strip()),
+    )
+    return result.mask(blank).astype("Int64")
+
+
+def convert_information_ads_to_date(series, reference):
+    """
+    series = teks information_ads, reference = timestamp scrape per baris.
+    Teks yang tidak dikenali menghasilkan NaT (caller mempertahankan nilai lama),
+    berbeda dari versi per-baris yang jatuh ke tanggal hari ini.
+    """
+    text = _text(series).str.lower().str.strip()
+    ref = pd.to_datetime(reference).dt.normalize()
+    result = pd.Series(pd.NaT, index=series.index, dtype="datetime64[ns]")
+
+    today = text.str.contains("mins? ago|hours? ago", regex=True, na=False)
+    result = result.mask(today, ref)
+
+    days = pd.to_numeric(text.str.extract(r"(\d+)\s+days?\s+ago", expand=False), errors="coerce")
+    plural = text.str.contains("days ago", regex=False, na=False) & ~today
+    result = result.mask(plural, ref - pd.to_timedelta(days.fillna(0).astype("float64"), unit="D"))
+    single = text.str.contains("day ago", regex=False, na=False) & ~today & ~plural
+    result = result.mask(single, ref - pd.Timedelta(days=1))
+
+    parts = text.str.extract(r"(\d+)\s+(jan|feb|mar|apr|may|jun|jul|aug|sep|oct|nov|dec)")
+    day = pd.to_numeric(parts[0], errors="coerce")
+    month = pd.to_numeric(parts[1].map(MONTHS), errors="coerce")
+    posted = day.notna() & month.notna() & ~today & ~plural & ~single
+    if posted.any():
+        ref_posted = ref[posted]
+        month_posted = month[posted].astype("int64")
+        # Bulan setelah bulan scrape berarti tahun sebelumnya
+        year = ref_posted.dt.year - (month_posted > ref_posted.dt.month).astype("int64")
+        dated = pd.to_datetime(
+            pd.DataFrame({"year": year, "month": month_posted, "day": day[posted].astype("int64")}),
+            errors="coerce",
+        )
+        result = result.mask(posted, dated.reindex(result.index))
+
+    # Teks kosong / N/A: tanggal scrape (sama seperti versi per-baris terhadap hari ini)
+    blank = text.isna() | text.isin(["n/a", ""])
+    result = result.mask(blank, ref)
+    return result.dt.date.where(result.notna(), None)
+
+
+# nama rule -> (kolom target, kolom sumber, fungsi). text_only: sumber == target dan hanya
+# bisa di-backfill jika kolom masih menyimpan teks mentah (bukan angka hasil parse)
+RULES = {
+    "brand": ("brand", ("brand",), normalize_brand_name),
+    "model": ("model", ("model",), normalize_model_variant),
+    "variant": ("variant", ("variant",), normalize_model_variant),
+    "year": ("year", ("year",), convert_year_to_int),
+    "mileage": ("mileage", ("mileage",), convert_mileage),
+    "information_ads_date": (
+        "information_ads_date",
+        ("information_ads", "last_scraped_at"),
+        convert_information_ads_to_date,
+    ),
+}
+
+TEXT_ONLY_RULES = {"year", "mileage"}
+
+SITE_RULES = {
+    "mudah": ("brand", "model", "variant", "year", "mileage", "information_ads_date"),
+    "carlist": ("brand", "year"),
+}
+
+# rule -> (fungsi per-baris, contoh nilai mentah) untuk check_parity
+PARITY_SAMPLES = {
+    "brand": (normalization.normalize_brand_name, [
+        "Toyota", "mercedes-benz", "land_rover", "  alfa  romeo ", "N/A", "", None,
+    ]),
+    "model": (normalization.normalize_model_variant, [
+        "Vios", "CR-V", "3 Series (F30)", "x_trail", "-", "N/A", "", "(!)", None,
+    ]),
+    "year": (normalization.convert_year_to_int, [
+        "2019", "1995 or older", "Year 2008", "N/A", "", "abc", None,
+    ]),
+    "mileage": (normalization.convert_mileage, [
+        "<4k", "<500", ">500k", ">1000", "10k - 20k", "5.5k", "5.5k - 7.5k", "15000 - 20000",
+        "85,000", "85000km", "85,000 km", "1,500k", "<4.5k", "abc", "N/A", "", " 1200 ", None,
+    ]),
+}
+
+
+def check_parity():
+    """
+    Bandingkan rule vectorized dengan versi per-baris pada PARITY_SAMPLES.
+    Return list (rule, nilai mentah, per-baris, vectorized) yang berbeda (kosong = sama).
+    """
+    mismatches = []
+    for name, (row_func, samples) in PARITY_SAMPLES.items():
+        vectorized = RULES[name][2](pd.Series(samples, dtype="object"))
+        for raw, got in zip(samples, vectorized.astype(object)):
+            expected = row_func(raw)
+            got = None if pd.isna(got) else got
+            if expected != got:
+                mismatches.append((name, raw, expected, got))
+    return mismatches
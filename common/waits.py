@@ -0,0 +1,277 @@
+"""
+Wait berbasis event untuk alur halaman, pengganti time.sleep tetap setelah goto / klik.
+
+    @budgeted("mudah.detail")
+    def scrape_listing_detail(self, context, url):
+        page.goto(url, wait_until="domcontentloaded")
+        wait_until(page, root="#ad_view_car_specifications", quiet_ms=400, legacy=3, label="specs")
+        ...
+        wait_until(page, texts=[("#ad_view_car_specifications button", "SHOW LESS")], legacy=3)
+
+- wait_until() menjalankan satu page.evaluate yang me-race: selector muncul, teks muncul di
+  elemen (MutationObserver), response jaringan yang URL-nya cocok regex (PerformanceObserver
+  resource) dan deadline. quiet_ms = setelah target terpenuhi (atau langsung jika tanpa
+  target) tunggu sampai DOM di `root` tidak berubah selama quiet_ms
+- Deadline tiap wait dibatasi sisa budget tunggu per listing (WAIT_BUDGET_SEC, default 45):
+  listing yang lambat tidak bisa menghabiskan lebih dari budget hanya untuk menunggu
+- `legacy` = durasi sleep tetap yang diganti; selisihnya dengan waktu tunggu sebenarnya
+  dicatat sebagai detik yang dihemat per listing (log saat @budgeted selesai) dan per run
+  (log_report). Wait yang tidak menggantikan sleep (mis. pengganti networkidle) pakai
+  legacy=None: waktunya tetap tercatat, tanpa klaim penghematan
+- pace() = jeda acak ala manusia, hanya untuk titik yang memang butuh pacing anti-bot
+  (sebelum klik yang terlihat user), bukan untuk menunggu halaman selesai render
+"""
+
+import os
+import time
+import random
+import logging
+import threading
+import functools
+
+DEFAULT_BUDGET_SEC = 45
+DEFAULT_TIMEOUT_MS = 10000
+MIN_TIMEOUT_MS = 250
+
+_lock = threading.Lock()
+_local = threading.local()
+_totals = {}
+_listings = {}
+
+logger = logging.getLogger(__name__)
+
+_RACE_JS = """
+({selectors, texts, pattern, quietMs, root, timeoutMs}) => new Promise(resolve => {
+    const scope = (root && document.querySelector(root)) || document.documentElement;
+    const regex = pattern ? new RegExp(pattern) : null;
+    let hit = (selectors.length || texts.length || regex) ? null : "dom_quiet";
+    let done = false;
+    let quietTimer = null;
+    let perf = null;
+    const find = () => {
+        for (const s of selectors) {
+            if (document.querySelector(s)) return "selector:" + s;
+        }
+        for (const [s, t] of texts) {
+            for (const el of document.querySelectorAll(s)) {
+                if ((el.innerText || el.textContent || "").includes(t)) return "text:" + t;
+            }
+        }
+        return null;
+    };
+    const finish = (result) => {
+        if (done) return;
+        done = true;
+        observer.disconnect();
+        if (perf) perf.disconnect();
+        clearTimeout(quietTimer);
+        clearTimeout(deadline);
+        resolve(result);
+    };
+    const armQuiet = () => {
+        clearTimeout(quietTimer);
+        quietTimer = setTimeout(() => finish(hit), quietMs);
+    };
+    const onHit = (result) => {
+        hit = result;
+        if (quietMs) armQuiet(); else finish(hit);
+    };
+    const observer = new MutationObserver(() => {
+        if (hit === null) {
+            const found = find();
+            if (found) onHit(found);
+        } else if (quietMs) {
+            armQuiet();
+        }
+    });
+    observer.observe(scope, {childList: true, subtree: true, attributes: true, characterData: true});
+    if (regex && typeof PerformanceObserver !== "undefined") {
+        perf = new PerformanceObserver(list => {
+            if (hit === null && list.getEntries().some(e => regex.test(e.name))) onHit("response:" + pattern);
+        });
+        perf.observe({type: "resource"});
+    }
+    const deadline = setTimeout(() => finish(hit || "timeout"), timeoutMs);
+    if (hit === null) {
+        const found = find();
+        if (found) onHit(found);
+    } else {
+        armQuiet();
+    }
+})
+"""
+
+
+def _stack():
+    stack = getattr(_local, "stack", None)
+    if stack is None:
+        stack = _local.stack = []
+    return stack
+
+
+class WaitBudget:
+    """Budget waktu tunggu satu listing + catatan waktu yang dihemat dibanding sleep lama."""
+
+    def __init__(self, name, seconds=None):
+        self.name = name
+        self.seconds = float(seconds if seconds is not None else os.getenv("WAIT_BUDGET_SEC", DEFAULT_BUDGET_SEC))
+        self.waited = 0.0
+        self.legacy = 0.0
+        self.waits = 0
+        self.timeouts = 0
+
+    def remaining_ms(self):
+        return max(0.0, (self.seconds - self.waited) * 1000)
+
+    @property
+    def saved(self):
+        return self.legacy - self.waited
+
+    def __enter__(self):
+        _stack().append(self)
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        stack = _stack()
+        if stack and stack[-1] is self:
+            stack.pop()
+        if self.waits:
+            with _lock:
+                listing = _listings.setdefault(self.name, [0, 0.0, 0.0])
+                listing[0] += 1
+                listing[1] += self.waited
+                listing[2] += self.legacy
+            exhausted = " (budget habis)" if self.remaining_ms() <= 0 else ""
+            logger.info(
+                f"⏱️ Wait {self.name}: {self.waits} tunggu {self.waited:.1f}s vs sleep tetap {self.legacy:.1f}s, "
+                f"hemat {self.saved:.1f}s{exhausted}"
+            )
+        return False
+
+
+def current_budget():
+    stack = _stack()
+    return stack[-1] if stack else None
+
+
+def budgeted(name=None, seconds=None):
+    """Decorator: satu WaitBudget per pemanggilan fungsi (satu listing)."""
+
+    def decorator(func):
+        budget_name = name or func.__name__
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with WaitBudget(budget_name, seconds):
+                return func(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+def _record(label, waited, legacy, timed_out):
+    budget = current_budget()
+    if budget is not None:
+        budget.waits += 1
+        budget.waited += waited
+        budget.legacy += legacy
+        budget.timeouts += timed_out
+    with _lock:
+        row = _totals.setdefault(label, [0, 0.0, 0.0, 0])
+        row[0] += 1
+        row[1] += waited
+        row[2] += legacy
+        row[3] += timed_out
+
+
+def wait_until(page, selectors=(), texts=(), response=None, quiet_ms=None, root=None,
+               timeout_ms=DEFAULT_TIMEOUT_MS, legacy=None, label="wait"):
+    """
+    Tunggu sampai salah satu target terpenuhi (selector CSS, (selector, teks), regex URL
+    response) lalu, jika quiet_ms di-set, sampai DOM di `root` tenang. Tanpa target hanya
+    menunggu DOM tenang. Kembalikan "selector:..", "text:..", "response:..", "dom_quiet",
+    "timeout" atau "error: .." (error halaman tidak di-raise).
+    """
+    selectors = [selectors] if isinstance(selectors, str) else list(selectors)
+    texts = [list(pair) for pair in texts]
+    if not (selectors or texts or response) and not quiet_ms:
+        raise ValueError("wait_until butuh selector, teks, response atau quiet_ms")
+
+    budget = current_budget()
+    if budget is not None:
+        timeout_ms = min(timeout_ms, budget.remaining_ms())
+    timeout_ms = int(max(timeout_ms, MIN_TIMEOUT_MS))
+
+    started = time.perf_counter()
+    try:
+        result = page.evaluate(_RACE_JS, {
+            "selectors": selectors,
+            "texts": texts,
+            "pattern": response,
+            "quietMs": quiet_ms or 0,
+            "root": root,
+            "timeoutMs": timeout_ms,
+        })
+    except Exception as e:
+        # Navigasi / page ditutup di tengah wait: biarkan langkah berikutnya yang menangani
+        result = f"error: {e}"
+    waited = time.perf_counter() - started
+    _record(label, waited, waited if legacy is None else legacy, result == "timeout")
+    logger.debug(f"⏱️ wait {label}: {result} dalam {waited:.2f}s (sleep lama {legacy}s)")
+    return result
+
+
+def pace(low, high, label="pace"):
+    """Jeda acak ala manusia untuk pacing anti-bot; tidak dihitung sebagai penghematan."""
+    delay = random.uniform(low, high)
+    time.sleep(delay)
+    _record(label, delay, delay, False)
+    return delay
+
+
+def report():
+    """Ringkasan per label wait sejak reset(): list dict diurutkan dari penghematan terbesar."""
+    with _lock:
+        rows = [
+            {
+                "label": label,
+                "count": count,
+                "waited": waited,
+                "legacy": legacy,
+                "saved": legacy - waited,
+                "timeouts": timeouts,
+            }
+            for label, (count, waited, legacy, timeouts) in _totals.items()
+        ]
+        listings = {name: tuple(values) for name, values in _listings.items()}
+    rows.sort(key=lambda row: row["saved"], reverse=True)
+    return rows, listings
+
+
+def log_report(title="Wait report", logger=None):
+    log = logger or logging.getLogger(__name__)
+    rows, listings = report()
+    if not rows:
+        return rows
+    lines = [f"⏱️ {title}"]
+    for name, (count, waited, legacy) in sorted(listings.items()):
+        lines.append(
+            f"{name}: {count} listing, hemat {legacy - waited:.1f}s total, "
+            f"rata-rata {(legacy - waited) / count:.1f}s per listing"
+        )
+    lines.append(f"{'wait':<28} {'count':>6} {'avg':>7} {'legacy':>7} {'saved':>9} {'timeout':>7}")
+    for row in rows:
+        lines.append(
+            f"{row['label']:<28} {row['count']:>6} {row['waited'] / row['count']:>6.2f}s "
+            f"{row['legacy'] / row['count']:>6.2f}s {row['saved']:>8.1f}s {row['timeouts']:>7}"
+        )
+    log.info("\n".join(lines))
+    return rows
+
+
+def reset():
+    """Mulai run baru: kosongkan statistik wait."""
+    with _lock:
+        _totals.clear()
+        _listings.clear()
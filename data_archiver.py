@@ -1,11 +1,124 @@
 import os
+import json
+import hashlib
+import argparse
 import psycopg2
+import pyarrow as pa
+import pyarrow.parquet as pq
 from datetime import datetime, timedelta
+from pathlib import Path
 from dotenv import load_dotenv
 import logging
 
+from common.logging_setup import setup_logging
+from common.profiling import add_profile_arguments, profile_run
+from common.run_ledger import count as ledger_count, recorded_run, set_exit_reason
+
 load_dotenv(override=True)
 
+ARCHIVE_TABLES = {
+    'cars_scrap_carlistmy': 'cars_scrap_carlistmy_archive',
+    'cars_scrap_mudahmy': 'cars_scrap_mudahmy_archive',
+    'price_history_scrap_carlistmy': 'price_history_scrap_carlistmy_archive',
+    'price_history_scrap_mudahmy': 'price_history_scrap_mudahmy_archive'
+}
+
+# Kolom tanggal utama per jenis tabel, dipakai untuk date range di manifest
+ARCHIVE_DATE_COLUMNS = {
+    'cars_scrap': 'information_ads_date',
+    'price_history_scrap': 'changed_at',
+}
+
+EXPORT_DIR = os.getenv("ARCHIVE_EXPORT_DIR", "archive_exports")
+EXPORT_BATCH_SIZE = int(os.getenv("ARCHIVE_EXPORT_BATCH_SIZE", "50000"))
+
+# Mapping tipe kolom Postgres -> tipe Arrow. Tipe yang tidak dikenal (numeric, json, text, dll)
+# disimpan sebagai string agar nilainya utuh saat di-COPY balik.
+PG_TO_ARROW_TYPES = {
+    'smallint': pa.int16(),
+    'integer': pa.int32(),
+    'bigint': pa.int64(),
+    'real': pa.float32(),
+    'double precision': pa.float64(),
+    'boolean': pa.bool_(),
+    'date': pa.date32(),
+    'timestamp without time zone': pa.timestamp('us'),
+    'timestamp with time zone': pa.timestamp('us', tz='UTC'),
+}
+
+
+def file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def copy_text_value(value):
+    """Format satu nilai ke format text COPY Postgres (NULL = \\N, escape tab/newline/backslash)."""
+    if value is None:
+        return "\\N"
+    if isinstance(value, datetime):
+        text = value.isoformat(sep=" ")
+    elif isinstance(value, (dict, list)):
+        text = json.dumps(value)
+    else:
+        text = str(value)
+    return (
+        text.replace("\\", "\\\\")
+        .replace("\t", "\\t")
+        .replace("\n", "\\n")
+        .replace("\r", "\\r")
+    )
+
+
+class ParquetCopyStream:
+    """
+    File-like object untuk cursor.copy_expert: membaca file parquet per batch dan
+    mengubahnya menjadi baris format text COPY secara lazy, jadi memori tetap konstan.
+    """
+
+    def __init__(self, parquet_file, columns, batch_size=EXPORT_BATCH_SIZE):
+        self.batches = parquet_file.iter_batches(batch_size=batch_size, columns=columns)
+        self.columns = columns
+        self.buffer = ""
+        self.rows = 0
+
+    def _next_chunk(self):
+        batch = next(self.batches, None)
+        if batch is None:
+            return None
+        data = batch.to_pydict()
+        lines = []
+        for values in zip(*(data[col] for col in self.columns)):
+            lines.append("\t".join(copy_text_value(v) for v in values))
+        self.rows += batch.num_rows
+        return "\n".join(lines) + "\n" if lines else ""
+
+    def read(self, size=-1):
+        while size < 0 or len(self.buffer) < size:
+            chunk = self._next_chunk()
+            if chunk is None:
+                break
+            self.buffer += chunk
+        if size < 0:
+            data, self.buffer = self.buffer, ""
+        else:
+            data, self.buffer = self.buffer[:size], self.buffer[size:]
+        return data
+
+
+def connect_db():
+    return psycopg2.connect(
+        dbname=os.getenv("DB_NAME_CARLIST"),
+        user=os.getenv("DB_USER"),
+        password=os.getenv("DB_PASSWORD"),
+        host=os.getenv("DB_HOST"),
+        port=os.getenv("DB_PORT")
+    )
+
+
 class DataArchiver:
     def __init__(self):
         self.conn = None
@@ -13,24 +126,11 @@ class DataArchiver:
         self.setup_logging()
         
     def setup_logging(self):
-        logging.basicConfig(
-            level=logging.INFO,
-            format="%(asctime)s - %(levelname)s - %(message)s",
-            handlers=[
-                logging.FileHandler(f"logs/data_archiver_{datetime.now().strftime('%Y%m%d')}.log"),
-                logging.StreamHandler()
-            ]
-        )
+        setup_logging("data_archiver")
     
     def get_connection(self):
         try:
-            self.conn = psycopg2.connect(
-                dbname=os.getenv("DB_NAME_CARLIST"),
-                user=os.getenv("DB_USER"),
-                password=os.getenv("DB_PASSWORD"),
-                host=os.getenv("DB_HOST"),
-                port=os.getenv("DB_PORT")
-            )
+            self.conn = connect_db()
             self.cursor = self.conn.cursor()
             logging.info("✅ Koneksi ke database berhasil")
         except Exception as e:
@@ -45,14 +145,7 @@ class DataArchiver:
     
     def create_archive_tables(self):
         """Membuat tabel arsip untuk semua tabel utama"""
-        archive_tables = {
-            'cars_scrap_carlistmy': 'cars_scrap_carlistmy_archive',
-            'cars_scrap_mudahmy': 'cars_scrap_mudahmy_archive', 
-            'price_history_scrap_carlistmy': 'price_history_scrap_carlistmy_archive',
-            'price_history_scrap_mudahmy': 'price_history_scrap_mudahmy_archive'
-        }
-        
-        for original_table, archive_table in archive_tables.items():
+        for original_table, archive_table in ARCHIVE_TABLES.items():
             try:
                 # Membuat tabel arsip dengan struktur yang sama
                 self.cursor.execute(f"""
@@ -156,6 +249,7 @@ class DataArchiver:
             deleted_count = self.cursor.rowcount
             
             self.conn.commit()
+            ledger_count(processed=len(old_records), succeeded=inserted_count, deleted=deleted_count)
             logging.info(f"✅ {inserted_count} record berhasil diarsipkan dari {cars_table}")
             logging.info(f"   - Inserted: {inserted_count}, Deleted: {deleted_count}")
             
@@ -163,6 +257,7 @@ class DataArchiver:
             
         except Exception as e:
             self.conn.rollback()
+            set_exit_reason(f"error: {cars_table}: {e}")
             logging.error(f"❌ Error archiving {cars_table}: {e}")
             return []
     
@@ -246,6 +341,7 @@ class DataArchiver:
             self.conn.rollback()
             logging.error(f"❌ Error mencatat perubahan harga ke arsip {price_history_archive_table}: {e}")
     
+    @recorded_run("archive", "data_archiver", connect_db)
     def run_archive_process(self, months=6):
         """Menjalankan proses archiving lengkap"""
         try:
@@ -358,6 +454,7 @@ class DataArchiver:
             logging.info("✅ Proses archiving selesai!")
             
         except Exception as e:
+            set_exit_reason(f"error: {e}")
             logging.error(f"❌ Error dalam proses archiving: {e}")
         finally:
             self.close_connection()
@@ -450,16 +547,284 @@ class DataArchiver:
         finally:
             self.close_connection()
 
+
+    def get_table_column_types(self, table_name):
+        """Mengambil pasangan (nama kolom, tipe data) dari tabel"""
+        self.cursor.execute("""
+            SELECT column_name, data_type
+            FROM information_schema.columns
+            WHERE table_name = %s
+            ORDER BY ordinal_position
+        """, (table_name,))
+
+        return self.cursor.fetchall()
+
+    def build_export_filter(self, archived_before=None, id_min=None, id_max=None):
+        """Bangun klausa WHERE untuk range data arsip yang akan diekspor"""
+        conditions = []
+        params = []
+        if archived_before:
+            conditions.append("archived_at < %s")
+            params.append(archived_before)
+        if id_min is not None:
+            conditions.append("id >= %s")
+            params.append(id_min)
+        if id_max is not None:
+            conditions.append("id <= %s")
+            params.append(id_max)
+        where_sql = " AND ".join(conditions) if conditions else "TRUE"
+        return where_sql, params
+
+    def export_archive_table(self, archive_table, export_dir=EXPORT_DIR, archived_before=None,
+                             id_min=None, id_max=None, delete_after=True):
+        """
+        Ekspor range data dari tabel arsip ke file parquet (zstd) + manifest JSON,
+        lalu hapus baris yang sudah diekspor dari database.
+        """
+        where_sql, params = self.build_export_filter(archived_before, id_min, id_max)
+        column_types = self.get_table_column_types(archive_table)
+        if not column_types:
+            logging.warning(f"⚠️  Tabel {archive_table} tidak ditemukan, dilewati")
+            return None
+
+        columns = [name for name, _ in column_types]
+        schema = pa.schema([
+            (name, PG_TO_ARROW_TYPES.get(data_type, pa.string()))
+            for name, data_type in column_types
+        ])
+        string_columns = {name for name, data_type in column_types if data_type not in PG_TO_ARROW_TYPES}
+        order_sql = "ORDER BY id" if "id" in columns else ""
+        date_column = next(
+            (col for prefix, col in ARCHIVE_DATE_COLUMNS.items() if archive_table.startswith(prefix)),
+            None
+        )
+
+        try:
+            if delete_after:
+                # Kunci tabel supaya tidak ada insert/delete lain selama ekspor -> delete
+                self.cursor.execute(f"LOCK TABLE {archive_table} IN SHARE ROW EXCLUSIVE MODE")
+
+            self.cursor.execute(f"SELECT COUNT(*) FROM {archive_table} WHERE {where_sql}", params)
+            expected_rows = self.cursor.fetchone()[0]
+            if expected_rows == 0:
+                self.conn.rollback()
+                logging.info(f"ℹ️  Tidak ada data arsip untuk diekspor di {archive_table}")
+                return None
+
+            stamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+            table_dir = Path(export_dir) / archive_table
+            table_dir.mkdir(parents=True, exist_ok=True)
+            data_path = table_dir / f"{archive_table}_{stamp}.parquet"
+            manifest_path = table_dir / f"{archive_table}_{stamp}.manifest.json"
+
+            ranges = {col: [None, None] for col in ("id", date_column, "archived_at") if col in columns}
+            exported_rows = 0
+
+            logging.info(f"📤 Ekspor {expected_rows} baris dari {archive_table} ke {data_path}")
+            export_cursor = self.conn.cursor(name=f"export_{archive_table}")
+            export_cursor.itersize = EXPORT_BATCH_SIZE
+            export_cursor.execute(
+                f"SELECT {', '.join(columns)} FROM {archive_table} WHERE {where_sql} {order_sql}",
+                params
+            )
+            with pq.ParquetWriter(str(data_path), schema, compression="zstd") as writer:
+                while True:
+                    rows = export_cursor.fetchmany(EXPORT_BATCH_SIZE)
+                    if not rows:
+                        break
+                    data = {col: [row[i] for row in rows] for i, col in enumerate(columns)}
+                    for col in string_columns:
+                        data[col] = [
+                            None if v is None else json.dumps(v) if isinstance(v, (dict, list)) else str(v)
+                            for v in data[col]
+                        ]
+                    for col, bounds in ranges.items():
+                        values = [v for v in data[col] if v is not None]
+                        if values:
+                            low, high = min(values), max(values)
+                            bounds[0] = low if bounds[0] is None else min(bounds[0], low)
+                            bounds[1] = high if bounds[1] is None else max(bounds[1], high)
+                    writer.write_table(pa.Table.from_pydict(data, schema=schema))
+                    exported_rows += len(rows)
+            export_cursor.close()
+
+            written_rows = pq.ParquetFile(str(data_path)).metadata.num_rows
+            if written_rows != expected_rows or exported_rows != expected_rows:
+                raise Exception(
+                    f"Jumlah baris tidak cocok (expected={expected_rows}, exported={exported_rows}, file={written_rows})"
+                )
+
+            manifest = {
+                "table": archive_table,
+                "file": data_path.name,
+                "format": "parquet",
+                "compression": "zstd",
+                "rows": expected_rows,
+                "bytes": data_path.stat().st_size,
+                "sha256": file_sha256(data_path),
+                "columns": [{"name": name, "type": data_type} for name, data_type in column_types],
+                "filter": {
+                    "archived_before": str(archived_before) if archived_before else None,
+                    "id_min": id_min,
+                    "id_max": id_max,
+                },
+                "ranges": {col: [str(v) if v is not None else None for v in bounds] for col, bounds in ranges.items()},
+                "exported_at": datetime.now().isoformat(),
+                "deleted_from_db": False,
+            }
+            with open(manifest_path, "w") as f:
+                json.dump(manifest, f, indent=2)
+
+            if delete_after:
+                self.cursor.execute(f"DELETE FROM {archive_table} WHERE {where_sql}", params)
+                deleted_rows = self.cursor.rowcount
+                if deleted_rows != expected_rows:
+                    raise Exception(f"Jumlah baris terhapus ({deleted_rows}) tidak sama dengan yang diekspor ({expected_rows})")
+                self.conn.commit()
+                manifest["deleted_from_db"] = True
+                with open(manifest_path, "w") as f:
+                    json.dump(manifest, f, indent=2)
+                logging.info(f"🗑️  {deleted_rows} baris dihapus dari {archive_table}")
+            else:
+                self.conn.rollback()
+
+            ledger_count(processed=expected_rows, succeeded=expected_rows, bytes=manifest["bytes"])
+            logging.info(f"✅ Ekspor {archive_table} selesai: {expected_rows} baris, {manifest['bytes']} bytes, manifest {manifest_path}")
+            return str(manifest_path)
+
+        except Exception as e:
+            self.conn.rollback()
+            set_exit_reason(f"error: {archive_table}: {e}")
+            logging.error(f"❌ Error ekspor {archive_table}: {e}")
+            return None
+
+    @recorded_run("archive", "data_archiver_export", connect_db)
+    def run_export_process(self, export_dir=EXPORT_DIR, archived_before=None, id_min=None,
+                           id_max=None, tables=None, delete_after=True):
+        """Ekspor semua (atau sebagian) tabel arsip ke cold storage"""
+        manifests = []
+        try:
+            self.get_connection()
+            for archive_table in tables or ARCHIVE_TABLES.values():
+                manifest_path = self.export_archive_table(
+                    archive_table,
+                    export_dir=export_dir,
+                    archived_before=archived_before,
+                    id_min=id_min,
+                    id_max=id_max,
+                    delete_after=delete_after
+                )
+                if manifest_path:
+                    manifests.append(manifest_path)
+            logging.info(f"✅ Proses ekspor selesai, {len(manifests)} manifest dibuat")
+        except Exception as e:
+            set_exit_reason(f"error: {e}")
+            logging.error(f"❌ Error dalam proses ekspor: {e}")
+        finally:
+            self.close_connection()
+        return manifests
+
+    @recorded_run("archive", "data_archiver_restore", connect_db)
+    def restore_archive_export(self, manifest_path, target_table=None):
+        """
+        Restore file hasil ekspor kembali ke tabel arsip via COPY FROM STDIN.
+        Checksum dan jumlah baris diverifikasi berdasarkan manifest.
+        """
+        try:
+            manifest_path = Path(manifest_path)
+            with open(manifest_path) as f:
+                manifest = json.load(f)
+
+            data_path = manifest_path.parent / manifest["file"]
+            checksum = file_sha256(data_path)
+            if checksum != manifest["sha256"]:
+                raise Exception(f"Checksum {data_path} tidak cocok dengan manifest")
+
+            table = target_table or manifest["table"]
+            columns = [col["name"] for col in manifest["columns"]]
+
+            self.get_connection()
+            table_columns = set(self.get_table_columns(table))
+            missing = [col for col in columns if col not in table_columns]
+            if missing:
+                raise Exception(f"Kolom {missing} tidak ada di tabel {table}")
+
+            logging.info(f"📥 Restore {manifest['rows']} baris dari {data_path} ke {table}")
+            stream = ParquetCopyStream(pq.ParquetFile(str(data_path)), columns)
+            self.cursor.copy_expert(f"COPY {table} ({', '.join(columns)}) FROM STDIN", stream)
+
+            if stream.rows != manifest["rows"]:
+                raise Exception(f"Jumlah baris restore ({stream.rows}) tidak sama dengan manifest ({manifest['rows']})")
+
+            self.conn.commit()
+            ledger_count(processed=stream.rows, succeeded=stream.rows)
+            logging.info(f"✅ Restore selesai: {stream.rows} baris masuk ke {table}")
+            return stream.rows
+
+        except Exception as e:
+            if self.conn:
+                self.conn.rollback()
+            set_exit_reason(f"error: {e}")
+            logging.error(f"❌ Error restore {manifest_path}: {e}")
+            return 0
+        finally:
+            self.close_connection()
+
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Archiving data scrap carlistmy/mudahmy")
+    parser.add_argument(
+        "--mode",
+        choices=["archive", "dry-run", "stats", "export", "restore"],
+        default="archive",
+        help="archive (default), dry-run, stats, export ke cold storage, atau restore dari manifest"
+    )
+    parser.add_argument("--months", type=int, default=3, help="Umur data (bulan) yang diarsipkan (default: 3)")
+    parser.add_argument("--export-dir", default=EXPORT_DIR, help="Folder output ekspor cold storage")
+    parser.add_argument("--archived-before", help="Ekspor hanya baris dengan archived_at < tanggal ini (YYYY-MM-DD)")
+    parser.add_argument("--id-min", type=int, help="Ekspor mulai dari id ini (inclusive)")
+    parser.add_argument("--id-max", type=int, help="Ekspor sampai id ini (inclusive)")
+    parser.add_argument(
+        "--table",
+        action="append",
+        choices=list(ARCHIVE_TABLES.values()),
+        help="Batasi ekspor ke tabel arsip tertentu (boleh diulang). Saat restore: tabel tujuan"
+    )
+    parser.add_argument("--keep-rows", action="store_true", help="Jangan hapus baris dari DB setelah ekspor")
+    parser.add_argument("--manifest", action="append", help="File manifest yang akan di-restore (boleh diulang)")
+    add_profile_arguments(parser)
+    args = parser.parse_args()
+
     archiver = DataArchiver()
-    
-    # Tampilkan statistik sebelum archiving
-    logging.info("📊 Statistik sebelum archiving:")
-    archiver.get_archive_statistics()
-    
-    # Jalankan proses archiving untuk data > 3 bulan
-    archiver.run_archive_process(months=3)
-    
-    # Tampilkan statistik setelah archiving
-    logging.info("📊 Statistik setelah archiving:")
-    archiver.get_archive_statistics()
+
+    with profile_run("data_archiver", args):
+        if args.mode == "archive":
+            # Tampilkan statistik sebelum archiving
+            logging.info("📊 Statistik sebelum archiving:")
+            archiver.get_archive_statistics()
+
+            # Jalankan proses archiving
+            archiver.run_archive_process(months=args.months)
+
+            # Tampilkan statistik setelah archiving
+            logging.info("📊 Statistik setelah archiving:")
+            archiver.get_archive_statistics()
+        elif args.mode == "dry-run":
+            archiver.dry_run_archive(months=args.months)
+        elif args.mode == "stats":
+            archiver.get_archive_statistics()
+        elif args.mode == "export":
+            archived_before = datetime.strptime(args.archived_before, "%Y-%m-%d") if args.archived_before else None
+            archiver.run_export_process(
+                export_dir=args.export_dir,
+                archived_before=archived_before,
+                id_min=args.id_min,
+                id_max=args.id_max,
+                tables=args.table,
+                delete_after=not args.keep_rows
+            )
+        elif args.mode == "restore":
+            if not args.manifest:
+                parser.error("--manifest wajib diisi untuk mode restore")
+            target_table = args.table[0] if args.table else None
+            for manifest_path in args.manifest:
+                archiver.restore_archive_export(manifest_path, target_table=target_table)
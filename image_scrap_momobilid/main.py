@@ -3,17 +3,25 @@ import logging
 import os
 import random
 import re
+import sys
 import time
 from pathlib import Path
 from typing import Dict, List, Optional, Set
 from urllib.parse import parse_qs, unquote, urljoin, urlparse
 
-import requests
 from dotenv import load_dotenv
 from playwright.sync_api import TimeoutError as PlaywrightTimeoutError
 from playwright.sync_api import sync_playwright
 from playwright_stealth import stealth_sync
 
+# Pastikan root repo ada di sys.path supaya modul common bisa diimport dari folder ini
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from common.atomic_download import stream_download
+from common.profiling import add_profile_arguments, profile_run
+
 load_dotenv(override=True)
 
 BASE_URL = "https://momobil.id"
@@ -414,9 +422,7 @@ class MomobilImageScraper:
 
         headers = {"User-Agent": USER_AGENT, "Referer": BASE_URL}
         try:
-            resp = requests.get(image_url, headers=headers, timeout=30, proxies=self.requests_proxy)
-            resp.raise_for_status()
-            save_path.write_bytes(resp.content)
+            stream_download(image_url, save_path, headers=headers, timeout=30, proxies=self.requests_proxy)
             logging.info("💾 Simpan: %s", save_path)
             return True
         except Exception as exc:
@@ -472,6 +478,7 @@ def parse_args() -> argparse.Namespace:
     parser.add_argument("--max-load-clicks", type=int, default=None, help="Batas klik 'Muat Lainnya'.")
     parser.add_argument("--no-proxy", action="store_true", help="Jalankan tanpa proxy meskipun PROXY_SCRAP ada.")
     parser.add_argument("--verbose", action="store_true", help="Aktifkan logging debug.")
+    add_profile_arguments(parser)
     return parser.parse_args()
 
 
@@ -492,4 +499,5 @@ if __name__ == "__main__":
         max_load_clicks=args.max_load_clicks,
         use_proxy=not args.no_proxy,
     )
-    scraper.run()
+    with profile_run("image_scrap_momobilid", args):
+        scraper.run()
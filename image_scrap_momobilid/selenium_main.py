@@ -9,7 +9,6 @@ from pathlib import Path
 from typing import Dict, List, Optional, Set
 from urllib.parse import parse_qs, unquote, urljoin, urlparse
 
-import requests
 import undetected_chromedriver as uc
 from dotenv import load_dotenv
 from selenium.webdriver.common.by import By
@@ -17,6 +16,13 @@ from selenium.webdriver.support import expected_conditions as EC
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.common.exceptions import TimeoutException, WebDriverException
 
+# Pastikan root repo ada di sys.path supaya modul common bisa diimport dari folder ini
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from common.atomic_download import stream_download
+
 load_dotenv(override=True)
 
 BASE_URL = "https://momobil.id"
@@ -346,9 +352,7 @@ class MomobilSeleniumScraper:
 
         headers = {"User-Agent": USER_AGENT, "Referer": BASE_URL}
         try:
-            resp = requests.get(image_url, headers=headers, timeout=30, proxies=self.requests_proxy)
-            resp.raise_for_status()
-            save_path.write_bytes(resp.content)
+            stream_download(image_url, save_path, headers=headers, timeout=30, proxies=self.requests_proxy)
             logging.info("💾 Simpan: %s", save_path)
             return True
         except Exception as exc:
@@ -1,22 +1,35 @@
 import os
+import sys
 import json
 import re
-import requests
 import argparse
-import random
+from collections import deque
 from pathlib import Path
 from database import get_connection
 from tqdm import tqdm
 from dotenv import load_dotenv
 from urllib.parse import urlparse
 
+# Pastikan root repo ada di sys.path supaya modul common bisa diimport dari folder ini
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from common.listing_source import SOURCES, count_listings, ensure_indexes, iter_listings
+from common.image_downloader import DEFAULT_PER_HOST, DEFAULT_WORKERS, ImageDownloader
+from common.download_state import DownloadStateStore
+from common.derivatives import DerivativeGenerator
+from common.metrics import QUEUE_DEPTH, start_metrics_server
+from common.profiling import add_profile_arguments, profile_run
+from common.run_ledger import RunLedger
+
 load_dotenv(override=True)
 
 BASE_FOLDER = "images_mudah"
 LOG_DIR = "logs"
 LOG_FILE = os.path.join(LOG_DIR, "image_download_mudah.log")
+STATE_DB = os.path.join(LOG_DIR, "image_download_mudah.sqlite")
 DEFAULT_TABLE = "cars_scrap_mudahmy"
-ARCHIVE_TABLE = "cars_scrap_mudahmy_archive"
 
 raw_proxies = os.getenv("CUSTOM_PROXIES_MUDAH", "")
 proxies_list = []
@@ -34,56 +47,15 @@ def log_text(message):
     with open(LOG_FILE, "a") as f:
         f.write(message + "\n")
 
-def get_status_for_id(id_):
-    if not os.path.exists(LOG_FILE):
-        return None 
-    with open(LOG_FILE) as f:
-        for line in f:
-            if f"[ID {id_}]" in line:
-                if "FAILED" in line:
-                    return "FAILED"
-                elif "PARTIAL" in line:
-                    return "PARTIAL"
-                elif "SUCCESS" in line:
-                    return "SUCCESS"
-    return None  # ID belum diproses
-
-def update_status_in_log(id_, status, downloaded, failed):
-    """
-    Fungsi untuk memperbarui status ID pada log setelah proses download.
-    """
-    with open(LOG_FILE, "r") as f:
-        lines = f.readlines()
-
-    with open(LOG_FILE, "w") as f:
-        for line in lines:
-            if f"[ID {id_}]" in line:
-                # Hapus baris lama jika ID sudah ada
-                continue
-            f.write(line)
-        
-        # Tambahkan baris baru dengan status yang diperbarui
-        f.write(f"[ID {id_}] {status}: {downloaded} downloaded, {failed} failed\n")
-
-def get_random_proxy():
-    if not proxies_list:
-        return None
-    return random.choice(proxies_list)
-
-proxy = get_random_proxy()
-proxies = {"http": proxy, "https": proxy} if proxy else None
-
 def create_folder(path):
     Path(path).mkdir(parents=True, exist_ok=True)
 
-def has_complete_download(folder_path: Path, expected_count: int) -> bool:
+def has_complete_download(state: DownloadStateStore, save_paths) -> bool:
     """
-    Cek apakah folder sudah berisi minimal expected_count file.
+    Cek apakah semua file gambar listing sudah terverifikasi (ada, tidak kosong, ukuran sama
+    dengan catatan terakhir). File terpotong / 0 byte tidak lagi dihitung lengkap.
     """
-    if not folder_path.exists():
-        return False
-    files = [p for p in folder_path.iterdir() if p.is_file()]
-    return len(files) >= expected_count if expected_count else True
+    return all(state.is_image_verified(path) for path in save_paths)
 
 def is_valid_url(url):
     """
@@ -93,21 +65,21 @@ def is_valid_url(url):
         return False
     return url.startswith("http")
 
-def download_image(url, save_path):
-    try:
-        if not is_valid_url(url):
-            print(f"❌ URL tidak valid: {url}")
-            return
+# Berapa listing yang boleh "in flight" sekaligus sebelum hasil listing terlama ditunggu
+MAX_PENDING_LISTINGS = 32
 
 
-        response = requests.get(url, timeout=20, proxies=proxies)
-        response.raise_for_status() 
-        with open(save_path, "wb") as f:
-            f.write(response.content)
-        return True
-    except Exception as e:
-        print(f"❌ Gagal download {url} -> {e}")
-        return False
+def open_state_store():
+    """
+    Buka state store SQLite. Jika masih kosong dan log lama ada, import dulu
+    supaya listing yang sudah pernah diproses tidak diulang.
+    """
+    store = DownloadStateStore(STATE_DB)
+    if store.is_empty() and os.path.exists(LOG_FILE):
+        imported = store.import_log(LOG_FILE)
+        print(f"ℹ️ Import {imported} status listing dari {LOG_FILE} ke {STATE_DB}")
+    return store
+
 
 def main(
     start_id=None,
@@ -115,43 +87,72 @@ def main(
     brand_filter=None,
     model_filter=None,
     variant_filter=None,
-    table_source=DEFAULT_TABLE,
+    date_from=None,
+    date_to=None,
+    source="live",
+    workers=DEFAULT_WORKERS,
+    per_host=DEFAULT_PER_HOST,
+    refresh=False,
+    derivatives=False,
 ):
     conn = get_connection()
-    cursor = conn.cursor()
+    state = open_state_store()
+
+    filters = dict(
+        start_id=start_id,
+        end_id=end_id,
+        date_from=date_from,
+        date_to=date_to,
+        brand=brand_filter,
+        model=model_filter,
+        variant=variant_filter,
+    )
+    total = count_listings(conn, DEFAULT_TABLE, source=source, **filters)
+    rows = iter_listings(conn, DEFAULT_TABLE, source=source, **filters)
+
+    print(f"Total data ditemukan: {total} (source: {source})")
+
+    downloader = ImageDownloader(workers=workers, per_host=per_host, proxies=proxies_list, name="mudah")
+    pending = deque()
+    QUEUE_DEPTH.labels("mudah_listings").set_function(lambda: len(pending))
+    # Hook derivative: thumbnail / copy dataset dibuat di process pool begitu gambar listing selesai
+    derivative_gen = DerivativeGenerator(BASE_FOLDER) if derivatives else None
+
+    def finalize_listing(id_, sukses, gagal, expected_count, futures):
+        changed_paths = []
+        for img_url, save_path, future in futures:
+            result = future.result()
+            if result:
+                sukses += 1
+                if result["status"] != "unchanged":
+                    changed_paths.append(save_path)
+                state.record_image(
+                    save_path,
+                    img_url,
+                    result["size"],
+                    result["sha256"],
+                    result["etag"],
+                    result["last_modified"],
+                )
+            else:
+                gagal += 1
 
-    table_name = DEFAULT_TABLE if table_source == DEFAULT_TABLE else ARCHIVE_TABLE
+        if derivative_gen and changed_paths:
+            derivative_gen.submit(changed_paths)
 
-    query = f"""
-        SELECT id, brand, model, variant, year, images
-        FROM {table_name}
-        WHERE images IS NOT NULL AND images != ''
-    """
-    params = []
-
-    if start_id is not None:
-        query += " AND id >= %s"
-        params.append(start_id)
-    if end_id is not None:
-        query += " AND id <= %s"
-        params.append(end_id)
-    if brand_filter:
-        query += " AND LOWER(brand) = LOWER(%s)"
-        params.append(brand_filter)
-    if model_filter:
-        query += " AND LOWER(model) = LOWER(%s)"
-        params.append(model_filter)
-    if variant_filter:
-        query += " AND LOWER(variant) = LOWER(%s)"
-        params.append(variant_filter)
-
-    cursor.execute(query, params)
-    rows = cursor.fetchall()
-
-    print(f"Total data ditemukan: {len(rows)}")
-
-    for row in tqdm(rows):
-        id_, brand, model, variant, year, images_str = row
+        # Jika ada download yang gagal, ubah status menjadi FAILED
+        if gagal == 0:
+            log_text(f"[ID {id_}] ✅ SUCCESS: {sukses} downloaded, {gagal} failed")
+            state.record(id_, "SUCCESS", sukses, gagal, expected_count)
+        elif sukses > 0:
+            log_text(f"[ID {id_}] ⚠️ PARTIAL: {sukses} downloaded, {gagal} failed")
+            state.record(id_, "PARTIAL", sukses, gagal, expected_count)
+        else:
+            log_text(f"[ID {id_}] ❌ FAILED: {sukses} downloaded, {gagal} failed")
+            state.record(id_, "FAILED", sukses, gagal, expected_count)
+
+    for row in tqdm(rows, total=total):
+        id_, brand, model, variant, year, images_str, _ = row
 
         brand = brand or "UNKNOWN"
         model = model or "UNKNOWN"
@@ -173,47 +174,66 @@ def main(
         try:
             images_list = json.loads(images_str)
             expected_count = len(images_list)
+            targets = [
+                (img_url, os.path.join(folder_path, os.path.basename(urlparse(img_url).path) or "image.jpg"))
+                for img_url in images_list
+            ]
 
-            status = get_status_for_id(id_)
+            status = state.get_status(id_)
 
-            # Skip hanya jika sudah lengkap di filesystem dan tercatat sukses
-            if status == "SUCCESS" and has_complete_download(Path(folder_path), expected_count):
+            # Skip hanya jika semua file sudah terverifikasi dan tercatat sukses
+            if not refresh and status == "SUCCESS" and has_complete_download(state, [path for _, path in targets]):
                 print(f"✅ Melewati ID {id_} (folder sudah lengkap dan status SUCCESS)")
                 continue
 
             print(f"🔁 Memulai download untuk ID {id_}")
 
-            for img_url in images_list:
-                filename = os.path.basename(urlparse(img_url).path) or "image.jpg"
-                save_path = os.path.join(folder_path, filename)
-
-                if os.path.exists(save_path):
+            futures = []
+            queued = set()
+            for img_url, save_path in targets:
+                # Nama file sama dalam satu listing cukup didownload sekali
+                if save_path in queued:
                     sukses += 1
                     continue
+                queued.add(save_path)
 
-                if download_image(img_url, save_path):
+                if not refresh and state.is_image_verified(save_path):
                     sukses += 1
-                else:
+                    continue
+
+                if not is_valid_url(img_url):
+                    print(f"❌ URL tidak valid: {img_url}")
                     gagal += 1
+                    continue
 
-            # Jika ada download yang gagal, ubah status menjadi FAILED
-            if gagal == 0:
-                log_text(f"[ID {id_}] ✅ SUCCESS: {sukses} downloaded, {gagal} failed")
-                update_status_in_log(id_, "SUCCESS", sukses, gagal)  # Update status ke SUCCESS
-            elif sukses > 0:
-                log_text(f"[ID {id_}] ⚠️ PARTIAL: {sukses} downloaded, {gagal} failed")
-                update_status_in_log(id_, "PARTIAL", sukses, gagal)
-            else:
-                log_text(f"[ID {id_}] ❌ FAILED: {sukses} downloaded, {gagal} failed")
-                update_status_in_log(id_, "FAILED", sukses, gagal)  # Update status ke FAILED
+                # File lama / terpotong divalidasi ulang oleh downloader (conditional GET / HEAD)
+                futures.append((img_url, save_path, downloader.submit(img_url, save_path, state.get_image(save_path))))
+
+            pending.append((id_, sukses, gagal, expected_count, futures))
 
         except Exception as e:
             print(f"❌ Error parsing images id={id_}: {e}")
             log_text(f"[ID {id_}] ❌ ERROR: Failed to parse images")
-            update_status_in_log(id_, "FAILED", 0, 0)
+            state.record(id_, "FAILED", 0, 0)
+
+        # Tunggu listing terlama jika antrian sudah penuh, supaya memori tetap terbatas
+        while len(pending) > MAX_PENDING_LISTINGS:
+            finalize_listing(*pending.popleft())
 
-    cursor.close()
+    while pending:
+        finalize_listing(*pending.popleft())
+
+    downloader.close()
+    if derivative_gen:
+        derivative_gen.close()
+    state.close()
     conn.close()
+    stats = downloader.stats()
+    print(
+        f"📊 {stats['images_ok']} gambar ({stats['images_unchanged']} tidak berubah, {stats['images_failed']} gagal) "
+        f"dalam {stats['elapsed_sec']}s "
+        f"- {stats['images_per_sec']} img/s, {stats['mb_per_sec']} MB/s"
+    )
     print("✅ Proses download selesai")
 
 if __name__ == "__main__":
@@ -223,19 +243,76 @@ if __name__ == "__main__":
     parser.add_argument("--brand", dest="brand_filter", help="Hanya unduh brand tertentu (exact match, case-insensitive)")
     parser.add_argument("--model", dest="model_filter", help="Hanya unduh model tertentu (exact match, case-insensitive)")
     parser.add_argument("--variant", dest="variant_filter", help="Hanya unduh variant tertentu (exact match, case-insensitive)")
+    parser.add_argument("--date-from", help="Hanya listing dengan information_ads_date >= tanggal ini (YYYY-MM-DD)")
+    parser.add_argument("--date-to", help="Hanya listing dengan information_ads_date <= tanggal ini (YYYY-MM-DD)")
+    parser.add_argument(
+        "--source",
+        choices=SOURCES,
+        default="live",
+        help="Sumber data: live, archive, atau all (live + archive sekaligus)",
+    )
+    parser.add_argument(
+        "--import-log",
+        action="store_true",
+        help="Import ulang status dari file log lama ke state store SQLite lalu keluar",
+    )
+    parser.add_argument(
+        "--create-indexes",
+        action="store_true",
+        help="Buat index filter listing (CREATE INDEX CONCURRENTLY, tidak memblokir scraper) untuk --source lalu keluar",
+    )
+    parser.add_argument(
+        "--refresh",
+        action="store_true",
+        help="Validasi ulang semua file dengan conditional request (If-None-Match / HEAD), hanya yang berubah yang didownload",
+    )
     parser.add_argument(
-        "--table",
-        choices=[DEFAULT_TABLE, ARCHIVE_TABLE],
-        default=DEFAULT_TABLE,
-        help="Pilih tabel sumber data (normal atau archive)",
+        "--derivatives",
+        action="store_true",
+        help="Buat thumbnail / copy resolusi dataset untuk gambar yang baru didownload (process pool)",
     )
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS, help="Jumlah thread download paralel")
+    parser.add_argument("--per-host", type=int, default=DEFAULT_PER_HOST, help="Maksimal koneksi bersamaan per host")
+    parser.add_argument(
+        "--metrics-port",
+        type=int,
+        help="Ekspos metrics Prometheus di port ini (default: env METRICS_PORT, kosong = tidak diekspos)",
+    )
+    add_profile_arguments(parser)
     args = parser.parse_args()
 
-    main(
-        start_id=args.start_id,
-        end_id=args.end_id,
-        brand_filter=args.brand_filter,
-        model_filter=args.model_filter,
-        variant_filter=args.variant_filter,
-        table_source=args.table,
-    )
+    if args.import_log:
+        with DownloadStateStore(STATE_DB) as store:
+            imported = store.import_log(LOG_FILE)
+            print(f"✅ {imported} listing di-import dari {LOG_FILE}. Ringkasan: {store.summary()}")
+        sys.exit(0)
+
+    if args.create_indexes:
+        conn = get_connection()
+        try:
+            ensure_indexes(conn, DEFAULT_TABLE, source=args.source)
+        finally:
+            conn.close()
+        print(f"✅ Index listing {DEFAULT_TABLE} (source: {args.source}) siap")
+        sys.exit(0)
+
+    start_metrics_server(args.metrics_port)
+    # Script ini memakai print, bukan logging: lokasi artefak profiling dicetak di akhir
+    ledger = RunLedger("image", "image_download_mudah", get_connection, proxy_mode="custom" if proxies_list else "none", downloader="mudah")
+    with profile_run("image_download_mudah", args) as profile_dir, ledger:
+        main(
+            start_id=args.start_id,
+            end_id=args.end_id,
+            brand_filter=args.brand_filter,
+            model_filter=args.model_filter,
+            variant_filter=args.variant_filter,
+            date_from=args.date_from,
+            date_to=args.date_to,
+            source=args.source,
+            workers=args.workers,
+            per_host=args.per_host,
+            refresh=args.refresh,
+            derivatives=args.derivatives,
+        )
+    if profile_dir:
+        print(f"🔬 Artefak profiling tersimpan di {profile_dir}")
@@ -1,7 +1,9 @@
 from flask import Flask, jsonify, request
 from carlistmy_null_service import CarlistMyNullService
+from common.metrics import add_metrics_route
 
 app = Flask(__name__)
+add_metrics_route(app)
 null_scraper = CarlistMyNullService()
 
 @app.route('/scrape_null', methods=['POST'])
@@ -4,7 +4,6 @@ import random
 import time
 import logging
 import json
-import requests
 from pathlib import Path
 from bs4 import BeautifulSoup
 from datetime import datetime
@@ -12,6 +11,13 @@ from playwright.sync_api import sync_playwright
 from playwright_stealth import stealth_sync
 
 from .database import get_connection
+from common.atomic_download import stream_download
+from common.normalization import normalize_field, parse_mileage
+from common.logging_setup import setup_logging
+from common.metrics import DB_WRITE, IMAGES, LISTINGS, PAGE_LOAD, record_block
+from common.run_ledger import recorded_run
+from common.snapshots import SnapshotManager
+from common.waits import WaitBudget, log_report as log_wait_report, reset as reset_waits, wait_until
 
 # Load ENV
 DB_TABLE_SCRAP = os.getenv("DB_TABLE_SCRAP_CARLIST", "cars_scrap_new")
@@ -23,25 +29,15 @@ PROXY_SERVER = os.getenv("PROXY_SERVER")
 PROXY_USERNAME = os.getenv("PROXY_USERNAME")
 PROXY_PASSWORD = os.getenv("PROXY_PASSWORD")
 
+METRICS_SERVICE = "scrape_carlistmy_null"
+
 log_dir = Path(__file__).resolve().parents[1] / "logs"
 log_dir.mkdir(parents=True, exist_ok=True)
-log_file = log_dir / f"scrape_carlistmy_null_{datetime.now().strftime('%Y%m%d')}.log"
-
-logging.basicConfig(
-    level=logging.INFO,
-    format="%(asctime)s - %(levelname)s - %(message)s",
-    handlers=[logging.FileHandler(log_file), logging.StreamHandler()]
-)
+snapshots = SnapshotManager("carlistmy_null", log_dir)
+setup_logging("scrape_carlistmy_null", log_dir=log_dir)
 
 def take_screenshot(page, name: str):
-    try:
-        err_dir = log_dir / f"{datetime.now().strftime('%Y%m%d')}_error_carlistmy_null"
-        err_dir.mkdir(parents=True, exist_ok=True)
-        screenshot_path = err_dir / f"{name}_{datetime.now().strftime('%H%M%S')}.png"
-        page.screenshot(path=str(screenshot_path))
-        logging.info(f"📸 Screenshot saved: {screenshot_path}")
-    except Exception as e:
-        logging.warning(f"Failed saving screenshot: {e}")
+    snapshots.capture(page, name)
 
 def parse_custom_proxies():
     proxies = []
@@ -55,27 +51,6 @@ def parse_custom_proxies():
                 logging.warning(f"Invalid proxy format: {p}")
     return proxies
 
-def parse_mileage(mileage_str):
-    if not mileage_str or mileage_str.strip() == "- km":
-        return 0
-    try:
-        # Cek rentang, ambil nilai kanan
-        if "-" in mileage_str:
-            right = mileage_str.split("-")[-1].strip()
-        else:
-            right = mileage_str.strip()
-        # Hilangkan 'km' dan spasi
-        right = right.replace("km", "").replace("KM", "").replace("Km", "").strip()
-        # Ganti K/k dengan ribuan
-        right = right.replace("K", "000").replace("k", "000")
-        # Hilangkan spasi sisa
-        right = right.replace(" ", "")
-        # Ambil angka saja
-        mileage_int = int(re.sub(r"[^\d]", "", right))
-        return mileage_int
-    except Exception:
-        return 0
-
 class CarlistMyNullService:
     def __init__(self, download_images_locally=True):
         self.conn = get_connection()
@@ -83,6 +58,7 @@ class CarlistMyNullService:
         self.playwright = None
         self.browser = None
         self.page = None
+        self.current_proxy = None
         self.custom_proxies = parse_custom_proxies()
         self.session_id = self.generate_session_id()
         self.download_images_locally = download_images_locally
@@ -106,6 +82,7 @@ class CarlistMyNullService:
         args = {"headless": True, "args": ["--disable-blink-features=AutomationControlled", "--no-sandbox"]}
         if proxy_cfg:
             args["proxy"] = proxy_cfg
+        self.current_proxy = proxy_cfg
 
         self.browser = self.playwright.chromium.launch(**args)
         self.page = self.browser.new_page(
@@ -121,15 +98,7 @@ class CarlistMyNullService:
         except:
             pass
     
-    def normalize_field(self, text, default_value):
-        if not text or str(text).strip() in ["-", "N/A", ""]:
-            return default_value
-        cleaned = re.sub(r'[\-\(\)_]', ' ', text)
-        cleaned = re.sub(r'[^\w\s]', '', cleaned)
-        cleaned = ' '.join(cleaned.split())
-        cleaned = cleaned.upper()
-        return cleaned if cleaned else default_value
-
+    @recorded_run("null_scrape", METRICS_SERVICE, get_connection, proxy_env="PROXY_MODE_CARLIST")
     def scrape_null_entries(self, id_min=None, id_max=None):
         query = f"""
             SELECT id, listing_url FROM {DB_TABLE_SCRAP}
@@ -148,35 +117,55 @@ class CarlistMyNullService:
         rows = self.cursor.fetchall()
         urls = [(r[0], r[1]) for r in rows if r[1]]
         logging.info(f"Total null listings found: {len(urls)}")
+        LISTINGS.labels(METRICS_SERVICE, "discovered").inc(len(urls))
+        reset_waits()
 
         for idx, (row_id, url) in enumerate(urls):
             attempt = 0
             success = False
             last_error = None
-            while attempt < 3 and not success:
-                try:
-                    self.init_browser()
-                    self.page.goto(url, wait_until="networkidle", timeout=60000)
-                    time.sleep(7)
-                    self.open_specification_tab()
-                    self.load_gallery_images()
-                    detail = self.extract_detail(url)
-                    if detail:
-                        self.save_to_db(detail)
-                        success = True
-                    self.quit_browser()
-                except Exception as e:
-                    last_error = e
-                    logging.error(f"Failed scraping {url} (Attempt {attempt+1}/3): {e}")
-                    take_screenshot(self.page, f"scrape_error_{idx}_{attempt+1}")
-                    self.quit_browser()
-                    attempt += 1
-                    if attempt < 3:
-                        self.session_id = self.generate_session_id()
-                        time.sleep(random.uniform(5, 15))
-                time.sleep(random.uniform(15, 25))
+            with WaitBudget("carlist_null.detail"):
+                while attempt < 3 and not success:
+                    try:
+                        self.init_browser()
+                        with PAGE_LOAD.labels(METRICS_SERVICE, "detail").time():
+                            self.page.goto(url, wait_until="domcontentloaded", timeout=60000)
+                        # Tanpa networkidle: tunggu konten detail (atau halaman challenge) lalu DOM tenang
+                        wait_until(
+                            self.page,
+                            selectors="#listing-detail",
+                            texts=[("title", "Just a moment")],
+                            quiet_ms=500,
+                            root="#listing-detail",
+                            timeout_ms=20000,
+                            legacy=7,
+                            label="detail_ready",
+                        )
+                        if "Just a moment..." in self.page.title():
+                            record_block(METRICS_SERVICE, "cloudflare", self.current_proxy)
+                            raise Exception("Cloudflare block detected")
+                        self.open_specification_tab()
+                        self.load_gallery_images()
+                        detail = self.extract_detail(url)
+                        if detail:
+                            LISTINGS.labels(METRICS_SERVICE, "scraped").inc()
+                            self.save_to_db(detail)
+                            success = True
+                        self.quit_browser()
+                    except Exception as e:
+                        last_error = e
+                        logging.error(f"Failed scraping {url} (Attempt {attempt+1}/3): {e}")
+                        take_screenshot(self.page, f"scrape_error_{idx}_{attempt+1}")
+                        self.quit_browser()
+                        attempt += 1
+                        if attempt < 3:
+                            self.session_id = self.generate_session_id()
+                            time.sleep(random.uniform(5, 15))
+                    time.sleep(random.uniform(15, 25))
             if not success:
+                LISTINGS.labels(METRICS_SERVICE, "failed").inc()
                 logging.error(f"❌ Gagal scraping {url} setelah 3 percobaan. Error terakhir: {last_error}")
+        log_wait_report("Wait report carlist null")
 
     def open_specification_tab(self):
         try:
@@ -512,12 +501,12 @@ class CarlistMyNullService:
                 ext = os.path.splitext(url)[1].split("?")[0] or ".jpg"
                 file_name = f"image_{idx+1}{ext}"
                 file_path = base_dir / file_name
-                resp = requests.get(url, timeout=30)
-                if resp.status_code == 200:
-                    with open(file_path, "wb") as f:
-                        f.write(resp.content)
-                    local_paths.append(str(file_path))
+                # Streaming ke .part (resume Range) lalu rename atomik, file final selalu utuh
+                stream_download(url, file_path, timeout=30)
+                IMAGES.labels(METRICS_SERVICE, "downloaded").inc()
+                local_paths.append(str(file_path))
             except Exception as e:
+                IMAGES.labels(METRICS_SERVICE, "failed").inc()
                 logging.warning(f"Failed downloading image {url}: {e}")
         return local_paths
 
@@ -530,9 +519,9 @@ class CarlistMyNullService:
 
             # LOGIKA PENYESUAIAN FIELD
             brand = (car.get("brand") or "UNKNOWN").upper().replace("-", " ")
-            model_group = self.normalize_field(car.get("model_group"), "NO MODEL GROUP").upper()
-            model = self.normalize_field(car.get("model"), "NO MODEL").upper()
-            variant = self.normalize_field(car.get("variant"), "NO VARIANT").upper()
+            model_group = normalize_field(car.get("model_group"), "NO MODEL GROUP").upper()
+            model = normalize_field(car.get("model"), "NO MODEL").upper()
+            variant = normalize_field(car.get("variant"), "NO VARIANT").upper()
 
             if row:
                 car_id, old_price, version = row
@@ -541,6 +530,8 @@ class CarlistMyNullService:
                 if self.download_images_locally:
                     self.download_images(car.get("image"), brand, model, variant, car.get("year"), car_id)
 
+                # Durasi DB diukur setelah download gambar supaya histogram tidak tercampur I/O jaringan
+                started = time.perf_counter()
                 self.cursor.execute(f"""
                     UPDATE {DB_TABLE_SCRAP}
                     SET brand=%s, model_group=%s, model=%s, variant=%s, information_ads=%s,
@@ -562,6 +553,7 @@ class CarlistMyNullService:
                     """, (car["listing_url"], old_price, car["price"]))
 
             else:
+                started = time.perf_counter()
                 self.cursor.execute(f"""
                     INSERT INTO {DB_TABLE_SCRAP} (
                         listing_url, brand, model_group, model, variant, information_ads, location, condition,
@@ -574,6 +566,7 @@ class CarlistMyNullService:
                     car.get("seat_capacity"), car.get("engine_cc"), car.get("fuel_type"), image_str, now, now
                 ))
             self.conn.commit()
+            DB_WRITE.labels(METRICS_SERVICE, "save_listing").observe(time.perf_counter() - started)
             logging.info(f"✅ DB updated: {car['listing_url']}")
         except Exception as e:
             self.conn.rollback()
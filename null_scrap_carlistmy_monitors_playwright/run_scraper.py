@@ -1,5 +1,7 @@
 import argparse
 from null_scrap_carlistmy_monitors_playwright.carlist_null_service import CarlistMyNullService
+from common.metrics import start_metrics_server
+from common.profiling import add_profile_arguments, profile_run
 from dotenv import load_dotenv
 
 load_dotenv(override=True)
@@ -9,8 +11,11 @@ def main():
     parser.add_argument('--image-download', choices=['yes', 'no'], default='yes', help="Download images locally or not")
     parser.add_argument('--id-min', type=int, help="Mulai dari id berapa")
     parser.add_argument('--id-max', type=int, help="Sampai id berapa")
+    parser.add_argument('--metrics-port', type=int, help="Ekspos metrics Prometheus di port ini (default: env METRICS_PORT, kosong = tidak diekspos)")
+    add_profile_arguments(parser)
 
     args = parser.parse_args()
+    start_metrics_server(args.metrics_port)
 
     download_images_locally = args.image_download == 'yes'
     id_min = args.id_min
@@ -18,7 +23,8 @@ def main():
 
     scraper = CarlistMyNullService(download_images_locally=download_images_locally)
     try:
-        scraper.scrape_null_entries(id_min=id_min, id_max=id_max)
+        with profile_run("null_scrape_carlistmy", args):
+            scraper.scrape_null_entries(id_min=id_min, id_max=id_max)
     finally:
         scraper.quit_browser()
         scraper.conn.close()
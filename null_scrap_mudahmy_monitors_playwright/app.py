@@ -3,10 +3,12 @@
 from flask import Flask, jsonify, request
 from scrap_mudahmy_monitors_playwright.mudahmy_service import MudahMyService
 from scrap_mudahmy_monitors_playwright.database import get_connection
+from common.metrics import add_metrics_route
 import os
 import psycopg2
 
 app = Flask(__name__)
+add_metrics_route(app)
 
 # Inisialisasi instance service
 mudahmy_scraper = MudahMyService()
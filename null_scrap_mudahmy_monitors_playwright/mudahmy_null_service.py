@@ -10,14 +10,21 @@ from dotenv import load_dotenv
 from playwright.sync_api import sync_playwright
 from playwright_stealth import stealth_sync
 from .database import get_connection
+from common.atomic_download import stream_download
+from common.normalization import convert_year_to_int, normalize_brand_name, normalize_model_variant, parse_mileage_mudah
+from common.logging_setup import setup_logging
+from common.metrics import DB_WRITE, IMAGES, LISTING_STATUS, LISTINGS, PAGE_LOAD, record_block
+from common.run_ledger import count as ledger_count, recorded_run, set_exit_reason
+from common.snapshots import SnapshotManager
+from common.waits import budgeted, log_report as log_wait_report, pace, reset as reset_waits, wait_until
+from common.gallery import gallery_incomplete, harvest_gallery
+from common.field_spec import MUDAH_DETAIL_FIELDS, extract_fields
 from pathlib import Path
 import requests
 import json
 
 load_dotenv(override=True)
 
-START_DATE = datetime.now().strftime('%Y%m%d')
-
 
 # ================== Konfigurasi ENV
 DB_TABLE_SCRAP = os.getenv("DB_TABLE_SCRAP_MUDAH", "url")
@@ -25,39 +32,20 @@ DB_TABLE_PRIMARY = os.getenv("DB_TABLE_PRIMARY_MUDAH", "cars")
 DB_TABLE_HISTORY_PRICE = os.getenv("DB_TABLE_HISTORY_PRICE_MUDAH", "price_history_scrap")
 DB_TABLE_HISTORY_PRICE_COMBINED = os.getenv("DB_TABLE_HISTORY_PRICE_COMBINED_MUDAH", "price_history_combined")
 MUDAHMY_LISTING_URL = os.getenv("MUDAHMY_LISTING_URL", "https://www.mudah.my/malaysia/cars-for-sale")
+METRICS_SERVICE = "null_scrape_mudahmy"
 
 
 # ================== Konfigurasi PATH Logging
 base_dir = Path(__file__).resolve().parents[1]
 log_dir = base_dir / "logs"
 log_dir.mkdir(parents=True, exist_ok=True)
-
-log_file = log_dir / f"null_scrape_mudahmy_{START_DATE}.log"
+snapshots = SnapshotManager("mudahmy", log_dir)
 
 # ================== Setup Logging
-logging.basicConfig(
-    level=logging.INFO,
-    format="%(asctime)s - %(levelname)s - %(message)s",
-    handlers=[
-        logging.FileHandler(log_file),
-        logging.StreamHandler()
-    ]
-)
+setup_logging("null_scrape_mudahmy", log_dir=log_dir)
 
 def take_screenshot(page, name):
-    try:
-        # Folder error sesuai TANGGAL sekarang (bisa beda dari START_DATE)
-        error_folder_name = datetime.now().strftime('%Y%m%d') + "_error_mudahmy"
-        screenshot_dir = log_dir / error_folder_name
-        screenshot_dir.mkdir(parents=True, exist_ok=True)
-
-        timestamp = datetime.now().strftime('%H%M%S')
-        screenshot_path = screenshot_dir / f"{name}_{timestamp}.png"
-
-        page.screenshot(path=str(screenshot_path))
-        logging.info(f"📸 Screenshot disimpan: {screenshot_path}")
-    except Exception as e:
-        logging.warning(f"❌ Gagal menyimpan screenshot: {e}")
+    snapshots.capture(page, name)
 
 
 def should_use_proxy():
@@ -97,6 +85,7 @@ class MudahMyNullService:
 
         self.custom_proxies = get_custom_proxy_list()
         self.proxy_index = 0
+        self.current_proxy = None
         
         # Setup image storage path
         self.image_base_path = os.path.join(base_dir, "images_mudah")
@@ -128,6 +117,7 @@ class MudahMyNullService:
             logging.info(f"🌐 Proxy custom digunakan (random): {proxy['server']}")
         else:
             logging.info("⚡ Menjalankan browser tanpa proxy")
+        self.current_proxy = launch_kwargs.get("proxy")
 
         self.browser = self.playwright.chromium.launch(**launch_kwargs)
         self.context = self.browser.new_context(
@@ -168,29 +158,6 @@ class MudahMyNullService:
                 else:
                     time.sleep(7)
 
-    def normalize_model_variant(self, text):
-        """
-        Membersihkan string model/variant:
-        - Menghilangkan karakter aneh: -, (, ), _
-        - Mengganti underscore menjadi spasi
-        - Merapikan spasi
-        - Ubah ke UPPERCASE
-        - Jika kosong atau "-" atau "N/A", return "NO VARIANT"
-        """
-        if not text or str(text).strip() in ["N/A", "-", ""]:
-            return "NO VARIANT"
-
-        cleaned = re.sub(r'[\-\(\)_]', ' ', text)
-        cleaned = re.sub(r'[^\w\s]', '', cleaned)
-        cleaned = ' '.join(cleaned.split())
-        cleaned = cleaned.upper()
-
-        # Jika hasil akhirnya kosong, return NO VARIANT
-        if not cleaned:
-            return "NO VARIANT"
-        return cleaned
-
-
     def insert_new_listing(self, listing_url, price):
         """Insert listing_url baru ke database dengan status active dan price dari halaman utama."""
         try:
@@ -213,6 +180,7 @@ class MudahMyNullService:
             logging.error(f"❌ Error saat menambahkan listing baru: {e}")
             return False
         
+    @recorded_run("null_scrape", METRICS_SERVICE, get_connection, proxy_env="PROXY_MODE_MUDAH")
     def scrape_null_entries(self, id_min=None, id_max=None, include_urgent=False):
         """
         Scrape ulang listing yang kolom brand/model/variant/information_ads/location masih NULL
@@ -238,9 +206,12 @@ class MudahMyNullService:
         rows = self.cursor.fetchall()
         urls = [(r[0], r[1], r[2]) for r in rows if r[1]]  # Tambahkan status listing
         logging.info(f"Total filtered listings found: {len(urls)} (filters: id_min={id_min}, id_max={id_max}, urgent={include_urgent})")
+        LISTINGS.labels(METRICS_SERVICE, "discovered").inc(len(urls))
+        reset_waits()
 
         for idx, (listing_id, url, status) in enumerate(urls):  # Mengambil status di sini
             if status == "sold":  # Jika sudah sold, skip
+                LISTINGS.labels(METRICS_SERVICE, "skipped").inc()
                 logging.info(f"✅ Listing ID={listing_id} sudah SOLD, melewatkan pengecekan.")
                 continue 
 
@@ -250,7 +221,8 @@ class MudahMyNullService:
             while attempt < 3 and not success:
                 try:
                     self.init_browser()
-                    self.page.goto(url, wait_until="domcontentloaded", timeout=30000)  # Navigasi ke halaman
+                    with PAGE_LOAD.labels(METRICS_SERVICE, "status").time():
+                        self.page.goto(url, wait_until="domcontentloaded", timeout=30000)  # Navigasi ke halaman
                     # Cek apakah URL di-redirect ke halaman daftar kendaraan (sold)
                     current_url = self.page.url
                     if "/malaysia/cars-for-sale" in current_url:
@@ -262,13 +234,16 @@ class MudahMyNullService:
                             WHERE id = %s
                         """, (listing_id,))
                         self.conn.commit()
+                        LISTING_STATUS.labels(METRICS_SERVICE, "sold").inc()
                         self.quit_browser()
                         break  # Skip ke listing berikutnya``
 
                     # Jika halaman valid, lanjutkan scraping
                     detail_data = self.scrape_listing_detail(self.context, url)
                     if detail_data:
-                        _, car_id = self.save_to_db(detail_data)
+                        LISTINGS.labels(METRICS_SERVICE, "scraped").inc()
+                        with DB_WRITE.labels(METRICS_SERVICE, "save_listing").time():
+                            _, car_id = self.save_to_db(detail_data)
                         if self.download_images_locally and car_id is not None:
                             self.download_listing_images(url, detail_data.get('images', []), car_id)
                         success = True
@@ -281,25 +256,27 @@ class MudahMyNullService:
                     attempt += 1
                     time.sleep(random.uniform(5, 15))
             if not success:
+                LISTINGS.labels(METRICS_SERVICE, "failed").inc()
                 logging.error(f"❌ Gagal scraping {url} setelah 3 percobaan. Error terakhir: {last_error}")
             time.sleep(random.uniform(15, 25))
+        log_wait_report("Wait report mudah null")
 
     def download_image(self, url, file_path):
         """Download single image to file_path."""
         try:
             os.makedirs(os.path.dirname(file_path), exist_ok=True, mode=0o755)
-            resp = requests.get(url, timeout=30)
-            if resp.status_code == 200:
-                with open(file_path, "wb") as f:
-                    f.write(resp.content)
-                # Set file permissions
-                os.chmod(file_path, 0o644)
-                logging.info(f"Downloaded: {file_path}")
-            else:
-                logging.warning(f"Gagal download: {url} - Status: {resp.status_code}")
+            # Streaming ke .part (resume Range) lalu rename atomik, permission di-set sebelum rename
+            stream_download(url, file_path, timeout=30, file_mode=0o644)
+            IMAGES.labels(METRICS_SERVICE, "downloaded").inc()
+            logging.info(f"Downloaded: {file_path}")
+        except requests.HTTPError as e:
+            IMAGES.labels(METRICS_SERVICE, "failed").inc()
+            logging.warning(f"Gagal download: {url} - Status: {e.response.status_code if e.response is not None else '-'}")
         except PermissionError as e:
+            IMAGES.labels(METRICS_SERVICE, "failed").inc()
             logging.error(f"Permission error saat menyimpan file: {e}")
         except Exception as e:
+            IMAGES.labels(METRICS_SERVICE, "failed").inc()
             logging.error(f"Error download {url}: {str(e)}")
 
     def download_listing_images(self, listing_url, image_urls, car_id):
@@ -313,7 +290,7 @@ class MudahMyNullService:
             brand = clean_filename(self.last_scraped_data.get("brand", "unknown"))
             model = clean_filename(self.last_scraped_data.get("model", "unknown"))
             variant = clean_filename(self.last_scraped_data.get("variant", "unknown"))
-            year_value = self.convert_year_to_int(self.last_scraped_data.get("year"))
+            year_value = convert_year_to_int(self.last_scraped_data.get("year"))
             year_segment = str(year_value) if year_value else "UNKNOWN_YEAR"
             
             # Gunakan path absolut dari self.image_base_path
@@ -333,22 +310,7 @@ class MudahMyNullService:
         except Exception as e:
             logging.error(f"Error download images for listing ID {car_id}: {str(e)}")
             
-    def get_highlight_info(self, page):
-        try:
-            parent = page.query_selector('#ad_view_ad_highlights > div > div > div:nth-child(1) > div > div')
-            if not parent:
-                return None
-            children = parent.query_selector_all('div')
-            if len(children) == 2:
-                return children[1].inner_text().strip()
-            elif len(children) == 1:
-                return children[0].inner_text().strip()
-            else:
-                return parent.inner_text().strip()
-        except Exception as e:
-            logging.warning(f"❌ Gagal ekstrak highlight info: {e}")
-            return None
-
+    @budgeted("mudah_null.detail")
     def scrape_listing_detail(self, context, url):
         """Scrape detail listing di tab baru. Kembalikan dict data, atau None kalau gagal."""
         max_retries = 3
@@ -357,15 +319,22 @@ class MudahMyNullService:
             page = context.new_page()
             try:
                 logging.info(f"Navigating to detail page: {url} (Attempt {attempt+1})")
-                page.goto(url, wait_until="domcontentloaded", timeout=60000)
+                with PAGE_LOAD.labels(METRICS_SERVICE, "detail").time():
+                    page.goto(url, wait_until="domcontentloaded", timeout=60000)
                 
                 # Check for blocks/captcha
-                if (
+                if page.locator("text='verify you are human'").count() > 0:
+                    blocked = "captcha"
+                elif (
                     "Access Denied" in page.title() or
                     "block" in page.url or
-                    page.locator("text='Access Denied'").count() > 0 or
-                    page.locator("text='verify you are human'").count() > 0
+                    page.locator("text='Access Denied'").count() > 0
                 ):
+                    blocked = "access_denied"
+                else:
+                    blocked = None
+                if blocked:
+                    record_block(METRICS_SERVICE, blocked, self.current_proxy)
                     logging.warning("Blokir atau captcha terdeteksi di halaman detail!")
                     attempt += 1
                     page.close()
@@ -373,7 +342,7 @@ class MudahMyNullService:
 
                 try:
                     page.wait_for_selector('#ad_view_car_specifications', timeout=15000)
-                    time.sleep(3)  # Wait for animations
+                    wait_until(page, root="#ad_view_car_specifications", quiet_ms=400, timeout_ms=3000, legacy=3, label="specs_settle")
                 except Exception as e:
                     logging.warning(f"Specifications section tidak ditemukan: {e}")
                     attempt += 1
@@ -390,13 +359,14 @@ class MudahMyNullService:
                     )
                     if show_more_btn:
                         show_more_btn.scroll_into_view_if_needed()
+                        pace(0.4, 1.2)
                         show_more_btn.click()
-                        time.sleep(3)  
-                        
+                        wait_until(page, texts=[("button", "SHOW LESS")], timeout_ms=3000, legacy=3, label="show_more")
+
                         if page.locator("button:has-text('SHOW LESS')").count() > 0:
                             show_more_clicked = True
                             logging.info("Tombol 'SHOW MORE' specifications diklik (metode 1)")
-                            time.sleep(2)
+                            wait_until(page, root="#ad_view_car_specifications", quiet_ms=300, timeout_ms=2000, legacy=2, label="show_more_settle")
                 except Exception as e:
                     logging.info("Metode 1 gagal: mencoba metode berikutnya")
 
@@ -408,7 +378,7 @@ class MudahMyNullService:
                                 btn.click();
                             }
                         """)
-                        time.sleep(3)
+                        wait_until(page, texts=[("button", "SHOW LESS")], timeout_ms=3000, legacy=3, label="show_more")
                         if page.locator("button:has-text('SHOW LESS')").count() > 0:
                             show_more_clicked = True
                             logging.info("Tombol 'SHOW MORE' specifications diklik via JavaScript")
@@ -423,7 +393,7 @@ class MudahMyNullService:
                                 btn.click();
                             }
                         """)
-                        time.sleep(3)
+                        wait_until(page, texts=[("button", "SHOW LESS")], timeout_ms=3000, legacy=3, label="show_more")
                         if page.locator("button:has-text('SHOW LESS')").count() > 0:
                             show_more_clicked = True
                             logging.info("Tombol 'SHOW MORE' specifications diklik via JavaScript")
@@ -449,96 +419,10 @@ class MudahMyNullService:
                     except Exception as e:
                         logging.info("Semua metode gagal expand specifications")
 
-                def safe_extract(selectors, selector_type="css", fallback="N/A"):
-                    for selector in selectors:
-                        try:
-                            if selector_type == "css":
-                                if page.locator(selector).count() > 0:
-                                    return page.locator(selector).first.inner_text().strip()
-                            elif selector_type == "xpath":
-                                xp = f"xpath={selector}"
-                                if page.locator(xp).count() > 0:
-                                    return page.locator(xp).first.inner_text().strip()
-                        except Exception as e:
-                            logging.error(f"Error extracting selector: {e}")
-                    return fallback
-
-                data = {}
-                data["listing_url"] = url
-                data["brand"] = safe_extract([
-                    "#ad_view_car_specifications div:nth-child(1) > div:nth-child(3)",
-                    "div:has-text('Brand') + div",
-                ])
-                data["model"] = safe_extract([
-                    "#ad_view_car_specifications div:nth-child(2) > div:nth-child(3)",
-                    "div:has-text('Model') + div",
-                ])
-                data["variant"] = safe_extract([
-                    "#ad_view_car_specifications div:nth-child(4) > div:nth-child(3)",
-                    "div:has-text('Variant') + div",
-                ])
-                data["engine_cc"] = safe_extract([
-                    "#ad_view_car_specifications > div > div > div:nth-child(2) > div > div > div:nth-child(1) > div:nth-child(1) > div:nth-child(2)",
-                    "div:has-text('Engine CC') + div",
-                ])
-                # Ambil informasi lengkap dari highlight (hanya dari elemen yang benar)
-                full_info = self.get_highlight_info(page)
-                if not full_info:
-                    full_info = safe_extract([
-                        "#ad_view_ad_highlights > div > div > div:nth-child(1) > div > div > div",
-                        "div.text-\[\#666666\].text-xs.lg\\:text-base",
-                        "//*[@id='ad_view_ad_highlights']/div/div/div[1]/div/div/div"
-                    ])
-                if full_info and full_info != "N/A":
-                    parts = full_info.split(",", 1)
-                    data["condition"] = parts[0].strip()
-                    data["information_ads"] = parts[1].strip() if len(parts) > 1 else ""
-                else:
-                    data["condition"] = "N/A"
-                    data["information_ads"] = ""
-                
+                data = {"listing_url": url, **extract_fields(page, MUDAH_DETAIL_FIELDS)}
                 logging.info(f"Extracted condition: {data['condition']}")
                 logging.info(f"Extracted information_ads: {data['information_ads']}")
 
-                data["location"] = safe_extract([
-                    "#ad_view_ad_highlights > div > div > div.flex.flex-wrap.lg\\:flex-nowrap.gap-3\\.5 > div:nth-child(4) > div",
-                    "div.font-bold.truncate.text-sm.md\\:text-base",
-                    "//*[@id='ad_view_ad_highlights']/div/div/div[3]/div[4]/div",
-                    "#ad_view_ad_highlights div.font-bold.truncate",
-                ], selector_type="css")
-                data["price"] = safe_extract([
-                    "div.flex.gap-1.md\\:items-end > div"
-                ])
-                data["year"] = safe_extract([
-                    "#ad_view_car_specifications div:nth-child(3) > div:nth-child(3)",
-                    "div:has-text('Year') + div",
-                ])
-                data["mileage"] = safe_extract([
-                    "#ad_view_ad_highlights > div > div > div.flex.flex-wrap.lg\\:flex-nowrap.gap-3\\.5 > div:nth-child(3) > div",
-                    "div:has-text('Mileage') + div",
-                ])
-                data["transmission"] = safe_extract([
-                    "#ad_view_ad_highlights > div > div > div.flex.flex-wrap.lg\\:flex-nowrap.gap-3\\.5 > div:nth-child(2) > div",
-                    "div:has-text('Transmission') + div",
-                ])
-                data["seat_capacity"] = safe_extract([
-                    "#ad_view_car_specifications > div > div > div > div > div > div:nth-child(2) > div:nth-child(3) > div:nth-child(3)",
-                    "div:has-text('Seat Capacity') + div",
-                ])
-                data["series"] = safe_extract([
-                    "#ad_view_car_specifications div.flex.flex-col.gap-4 div:has-text('Series') + div",
-                    "div:has-text('Series') + div",
-                ])
-                data["type"] = safe_extract([
-                    "#ad_view_car_specifications div.flex.flex-col.gap-4 div:has-text('Type') + div",
-                    "div:has-text('Type') + div",
-                ])
-                data["fuel_type"] = safe_extract([
-                    "#ad_view_car_specifications > div > div > div:nth-child(1) > div > div > div:nth-child(2) > div:nth-child(4) > div:nth-child(3)",
-                    "#ad_view_car_specifications div.flex.flex-col.gap-4 div:has-text('Fuel Type') + div",
-                    "div:has-text('Fuel Type') + div",
-                ])
-
                 data["scraped_at"] = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
 
                 # Simpan ke last_scraped_data untuk digunakan saat download gambar
@@ -554,60 +438,19 @@ class MudahMyNullService:
                     page.wait_for_selector('#ad_view_gallery', timeout=15000)
                     logging.info("Galeri ditemukan, siap proses gambar")
 
-                    # Proses Show All gallery
-                    show_all_clicked = False
-                    try:
-                        show_all_button = page.wait_for_selector(
-                            "#ad_view_gallery a[data-action-step='17']",
-                            timeout=5000
+                    # URL galeri diambil tanpa membuka modal (ld+json, state halaman, srcset, network)
+                    image_urls, expected = harvest_gallery(page, url)
+                    if gallery_incomplete(image_urls, expected):
+                        # Fallback: buka galeri sekali lalu ambil ulang dari modal (kosong / kurang dari jumlah galeri)
+                        gallery_opener = page.query_selector(
+                            "#ad_view_gallery a[data-action-step='17'], #ad_view_gallery div[data-action-step='1']"
                         )
-                        if show_all_button:
-                            show_all_button.click()
-                            logging.info("Tombol 'Show All' gallery diklik (metode 1)")
-                            show_all_clicked = True
-                            time.sleep(random.uniform(6, 9))
-                    except Exception as e:
-                        logging.info(f"Gagal klik tombol 'Show All' gallery metode 1: {e}")
-
-                    if not show_all_clicked:
-                        try:
-                            show_all_button = page.query_selector("button:has-text('Show All'), a:has-text('Show All')")
-                            if show_all_button:
-                                show_all_button.scroll_into_view_if_needed()
-                                show_all_button.click()
-                                logging.info("Tombol 'Show All' gallery diklik (metode 2)")
-                                show_all_clicked = True
-                                time.sleep(random.uniform(6, 9))
-                        except Exception as e:
-                            logging.info(f"Gagal klik tombol 'Show All' gallery metode 2: {e}")
-
-                    if not show_all_clicked:
-                        try:
-                            main_image_div = page.query_selector("#ad_view_gallery div[data-action-step='1']")
-                            if main_image_div:
-                                main_image_div.click()
-                                logging.info("Gambar utama galeri diklik (metode 3)")
-                                time.sleep(random.uniform(6, 9))
-                        except Exception as e:
-                            logging.info(f"Tidak bisa klik gambar utama sebagai fallback: {e}")
-
-                    # Proses ambil URL gambar
-                    image_urls = set()
-                    image_divs = page.query_selector_all("div[data-index]")
-                    logging.info(f"Ditemukan {len(image_divs)} div dengan data-index")
-
-                    for div in image_divs:
-                        try:
-                            img = div.query_selector("img")
-                            if img:
-                                src = img.get_attribute("src")
-                                if src and src.startswith(('http', '//')):
-                                    clean_url = src.split('?')[0]
-                                    if not clean_url.startswith('http'):
-                                        clean_url = f"https:{clean_url}"
-                                    image_urls.add(clean_url)
-                        except Exception:
-                            continue
+                        if gallery_opener:
+                            pace(0.8, 2.0)
+                            gallery_opener.click()
+                            logging.info(f"Galeri dibuka karena hanya {len(image_urls)}/{expected or '?'} gambar tanpa klik (fallback)")
+                            wait_until(page, selectors="div[data-index] img[src]", quiet_ms=500, timeout_ms=9000, legacy=7.5, label="gallery")
+                            image_urls = max(image_urls, harvest_gallery(page, url)[0], key=len)
 
                     if image_urls:
                         # Update data dengan URL gambar dan download
@@ -652,29 +495,13 @@ class MudahMyNullService:
         self.listing_count = 0
         logging.info("Scraping direset.")
 
-    def normalize_brand_name(self, brand_str):
-        """
-        Normalisasi nama brand dengan mengganti tanda '-' menjadi spasi
-        dan membersihkan format lainnya.
-        """
-        if not brand_str or brand_str == "N/A":
-            return brand_str
-        
-        # Ganti tanda '-' dengan spasi
-        normalized = brand_str.replace('-', ' ')
-        
-        # Bersihkan spasi berlebih dan uppercase
-        normalized = ' '.join(normalized.split()).upper()
-        
-        return normalized
-
     def save_to_db(self, car_data):
         try:
             # Normalisasi brand name sebelum menyimpan
             original_brand = car_data.get("brand")
-            normalized_brand = self.normalize_brand_name(original_brand)
-            normalized_model = self.normalize_model_variant(car_data.get("model"))
-            normalized_variant = self.normalize_model_variant(car_data.get("variant"))
+            normalized_brand = normalize_brand_name(original_brand)
+            normalized_model = normalize_model_variant(car_data.get("model"))
+            normalized_variant = normalize_model_variant(car_data.get("variant"))
             
             if original_brand != normalized_brand:
                 logging.info(f"Brand dinormalisasi dari '{original_brand}' menjadi '{normalized_brand}'")
@@ -731,7 +558,7 @@ class MudahMyNullService:
                     car_data.get("information_ads"),
                     car_data.get("location"),
                     price_int,
-                    self.convert_year_to_int(car_data.get("year")),
+                    convert_year_to_int(car_data.get("year")),
                     parse_mileage_mudah(car_data.get("mileage")),
                     car_data.get("transmission"),
                     car_data.get("seat_capacity"),
@@ -773,7 +600,7 @@ class MudahMyNullService:
                     car_data.get("information_ads"),
                     car_data.get("location"),
                     price_int,
-                    self.convert_year_to_int(car_data.get("year")),
+                    convert_year_to_int(car_data.get("year")),
                     parse_mileage_mudah(car_data.get("mileage")),
                     car_data.get("transmission"),
                     car_data.get("seat_capacity"),
@@ -795,6 +622,7 @@ class MudahMyNullService:
             logging.error(f"❌ Error menyimpan atau memperbarui data ke database: {e}")
             return False, None
 
+    @recorded_run("sync", "null_sync_mudahmy", get_connection)
     def sync_to_cars(self):
         """
         Sinkronisasi data dari {DB_TABLE_SCRAP} ke {DB_TABLE_PRIMARY}, dan sinkronisasi data perubahan harga dari price_history_scrap ke price_history_combined.
@@ -877,10 +705,12 @@ class MudahMyNullService:
 
             # Commit perubahan ke database
             self.conn.commit()
+            ledger_count(processed=len(rows))
             logging.info(f"Sinkronisasi data dari {DB_TABLE_SCRAP} ke {DB_TABLE_PRIMARY} selesai.")
             logging.info("Sinkronisasi perubahan harga dari price_history_scrap ke price_history_combined selesai.")
         except Exception as e:
             self.conn.rollback()
+            set_exit_reason(f"error: {e}")
             logging.error(f"Error saat sinkronisasi data: {e}")
 
     def export_data(self):
@@ -946,35 +776,3 @@ class MudahMyNullService:
         except Exception as e:
             logging.warning(f"Error extracting price from card: {e}")
             return 0
-
-    def convert_year_to_int(self, year_str):
-        """Convert year string to integer, handling special cases like '1995 or older'"""
-        if not year_str or year_str == "N/A":
-            return None
-            
-        # Extract first number from string
-        year_match = re.search(r'\d{4}', year_str)
-        if year_match:
-            year_int = int(year_match.group(0))
-            logging.info(f"Converting year from '{year_str}' to {year_int}")
-            return year_int
-        return None
-
-def parse_mileage_mudah(mileage_str):
-    if not mileage_str:
-        return 0
-    try:
-        # Ambil angka terbesar dari rentang, atau satu angka
-        if "-" in mileage_str:
-            right = mileage_str.split("-")[-1].strip()
-        else:
-            right = mileage_str.strip("<> ").strip()
-        # Hilangkan 'km', spasi, dan lowercase
-        right = right.lower().replace("km", "").replace(" ", "")
-        # Ganti k dengan 000
-        right = right.replace("k", "000")
-        # Ambil angka saja
-        mileage_int = int(re.sub(r"[^\d]", "", right))
-        return mileage_int
-    except Exception:
-        return 0
@@ -1,5 +1,7 @@
 import argparse
 from null_scrap_mudahmy_monitors_playwright.mudahmy_null_service import MudahMyNullService
+from common.metrics import start_metrics_server
+from common.profiling import add_profile_arguments, profile_run
 from dotenv import load_dotenv
 
 load_dotenv(override=True)
@@ -10,17 +12,21 @@ def main():
     parser.add_argument('--id-min', type=int, default=None, help="Filter: mulai dari id ini")
     parser.add_argument('--id-max', type=int, default=None, help="Filter: sampai id ini")
     parser.add_argument('--urgent', action='store_true', help="Juga scrape jika field condition='URGENT' (meskipun tidak null)")
+    parser.add_argument('--metrics-port', type=int, help="Ekspos metrics Prometheus di port ini (default: env METRICS_PORT, kosong = tidak diekspos)")
+    add_profile_arguments(parser)
     args = parser.parse_args()
+    start_metrics_server(args.metrics_port)
 
     download_images_locally = args.image_download == 'yes'
 
     scraper = MudahMyNullService(download_images_locally=download_images_locally)
     try:
-        scraper.scrape_null_entries(
-            id_min=args.id_min,
-            id_max=args.id_max,
-            include_urgent=args.urgent
-        )
+        with profile_run("null_scrape_mudahmy", args):
+            scraper.scrape_null_entries(
+                id_min=args.id_min,
+                id_max=args.id_max,
+                include_urgent=args.urgent
+            )
     finally:
         scraper.close()
 
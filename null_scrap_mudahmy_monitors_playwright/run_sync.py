@@ -1,12 +1,19 @@
+import argparse
 from null_scrap_mudahmy_monitors_playwright.mudahmy_null_service import MudahMyNullService
+from common.profiling import add_profile_arguments, profile_run
 from dotenv import load_dotenv
 
 load_dotenv()
 
 def main():
+    parser = argparse.ArgumentParser(description="Sinkronisasi data mudah.my (null scraper) ke tabel cars")
+    add_profile_arguments(parser)
+    args = parser.parse_args()
+
     scraper = MudahMyNullService()
     try:
-        scraper.sync_to_cars()
+        with profile_run("null_sync_mudahmy", args):
+            scraper.sync_to_cars()
     finally:
         scraper.close()
 
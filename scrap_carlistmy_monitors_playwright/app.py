@@ -1,10 +1,15 @@
 from flask import Flask, jsonify, request
 from scrap_carlistmy_monitors_playwright.carlistmy_service import CarlistMyService
+from common.metrics import add_metrics_route
 import psycopg2
 import os
+import atexit
 
 app = Flask(__name__)
+add_metrics_route(app)
 carlistmy_scraper = CarlistMyService()
+# Service dibuat sekali saat import: antrian gambar / blob store dikuras saat proses keluar
+atexit.register(carlistmy_scraper.close)
 
 DB_TABLE_SCRAP = os.getenv("DB_TABLE_SCRAP", "cars_scrap")
 
@@ -4,7 +4,6 @@ import random
 import time
 import logging
 import pandas as pd
-import requests
 import json
 from datetime import datetime
 from bs4 import BeautifulSoup
@@ -15,11 +14,18 @@ from playwright.sync_api import sync_playwright
 from playwright_stealth import stealth_sync
 
 from .database import get_connection
+from common.blob_store import BlobStore
+from common.image_queue import ImageDownloadQueue
+from common.normalization import normalize_field, parse_mileage
+from common.logging_setup import setup_logging
+from common.metrics import DB_WRITE, LISTINGS, PAGE_LOAD, record_block
+from common.spans import log_report, reset as reset_spans, span, stage, traced
+from common.run_ledger import recorded_run
+from common.snapshots import SnapshotManager
+from common.waits import budgeted, log_report as log_wait_report, pace, reset as reset_waits, wait_until
 
 load_dotenv(override=True)
 
-START_DATE = datetime.now().strftime('%Y%m%d')
-
 # ===== Konfigurasi Env
 DB_TABLE_SCRAP = os.getenv("DB_TABLE_SCRAP_CARLIST", "cars_scrap_new")
 DB_TABLE_HISTORY_PRICE = os.getenv("DB_TABLE_HISTORY_PRICE_CARLIST", "price_history")
@@ -29,39 +35,22 @@ PROXY_SERVER = os.getenv("PROXY_SERVER")
 PROXY_USERNAME = os.getenv("PROXY_USERNAME")
 PROXY_PASSWORD = os.getenv("PROXY_PASSWORD")
 
+METRICS_SERVICE = "scrape_carlistmy"
+
 # ===== Konfigurasi Logging
 log_dir = Path(__file__).resolve().parents[1] /  "logs"
 log_dir.mkdir(parents=True, exist_ok=True)
+snapshots = SnapshotManager("carlistmy", log_dir)
 
-# Nama file log menggunakan tanggal saat *pertama kali program dijalankan*
-log_file = log_dir / f"scrape_carlistmy_{START_DATE}.log"
-
-logging.basicConfig(
-    level=logging.INFO,
-    format="%(asctime)s - %(levelname)s - %(message)s",
-    handlers=[
-        logging.FileHandler(log_file),
-        logging.StreamHandler()
-    ]
-)
+# File log harian: pindah ke file tanggal baru saat ganti hari (lihat common.logging_setup)
+setup_logging("scrape_carlistmy", log_dir=log_dir)
 
 def take_screenshot(page, name: str):
     """
-    Simpan screenshot ke dalam folder "scraping/logs/<YYYYMMDD>_error/"
-    Di mana <YYYYMMDD> adalah tanggal screenshot diambil (bukan START_DATE).
+    Simpan snapshot error ke dalam folder "scraping/logs/<YYYYMMDD>_error_carlistmy/"
+    (JPEG / HTML ringkas, dengan rate limit dan dedupe; lihat common.snapshots).
     """
-    try:
-        error_folder_name = datetime.now().strftime('%Y%m%d') + "_error_carlistmy"
-        screenshot_dir = log_dir / error_folder_name
-        screenshot_dir.mkdir(parents=True, exist_ok=True)
-
-        timestamp = datetime.now().strftime('%H%M%S')
-        screenshot_path = screenshot_dir / f"{name}_{timestamp}.png"
-
-        page.screenshot(path=str(screenshot_path))
-        logging.info(f"📸 Screenshot disimpan: {screenshot_path}")
-    except Exception as e:
-        logging.warning(f"❌ Gagal menyimpan screenshot: {e}")
+    snapshots.capture(page, name)
 
 def get_custom_proxy_list():
     raw = os.getenv("CUSTOM_PROXIES_CARLIST", "")
@@ -79,27 +68,6 @@ def get_custom_proxy_list():
             logging.warning(f"Format proxy tidak valid: {p}")
     return parsed
 
-def parse_mileage(mileage_str):
-    if not mileage_str or mileage_str.strip() == "- km":
-        return 0
-    try:
-        # Cek rentang, ambil nilai kanan
-        if "-" in mileage_str:
-            right = mileage_str.split("-")[-1].strip()
-        else:
-            right = mileage_str.strip()
-        # Hilangkan 'km' dan spasi
-        right = right.replace("km", "").replace("KM", "").replace("Km", "").strip()
-        # Ganti K/k dengan ribuan
-        right = right.replace("K", "000").replace("k", "000")
-        # Hilangkan spasi sisa
-        right = right.replace(" ", "")
-        # Ambil angka saja
-        mileage_int = int(re.sub(r"[^\d]", "", right))
-        return mileage_int
-    except Exception:
-        return 0
-
 class CarlistMyService:
     def __init__(self, download_images_locally=True):
         self.download_images_locally = download_images_locally
@@ -110,7 +78,19 @@ class CarlistMyService:
         self.cursor = self.conn.cursor()
         self.custom_proxies = get_custom_proxy_list()
         self.proxy_index = 0
+        self.current_proxy = None
         self.session_id = self.generate_session_id()
+        self.blob_store = None
+        self.image_queue = None
+        if download_images_locally:
+            self.blob_store = BlobStore.for_image_root("images_carlist")
+            self.image_queue = ImageDownloadQueue(
+                self.blob_store,
+                headers={
+                    "User-Agent": "Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/136.0.0.0 Safari/537.36",
+                },
+                name="carlist",
+            )
 
     def generate_session_id(self):
         return ''.join(random.choices('abcdefghijklmnopqrstuvwxyz0123456789', k=8))
@@ -152,6 +132,7 @@ class CarlistMyService:
         proxy_config = self.build_proxy_config()
         if proxy_config:
             launch_kwargs["proxy"] = proxy_config
+        self.current_proxy = proxy_config
 
         self.browser = self.playwright.chromium.launch(**launch_kwargs)
 
@@ -173,6 +154,7 @@ class CarlistMyService:
     def detect_anti_bot(self):
         content = self.page.content()
         if "Checking your browser before accessing" in content or "cf-browser-verification" in content:
+            record_block(METRICS_SERVICE, "cloudflare", self.current_proxy)
             take_screenshot(self.page, "cloudflare_block")
             logging.warning("⚠️ Terkena anti-bot Cloudflare. Akan ganti proxy dan retry...")
             return True
@@ -209,39 +191,38 @@ class CarlistMyService:
                     time.sleep(7)
         raise Exception("Gagal mengambil IP setelah beberapa retry.")
     
-    def normalize_field(self, text, default_value):
-        if not text or str(text).strip() in ["-", "N/A", ""]:
-            return default_value
-        cleaned = re.sub(r'[\-\(\)_]', ' ', text)
-        cleaned = re.sub(r'[^\w\s]', '', cleaned)
-        cleaned = ' '.join(cleaned.split())
-        cleaned = cleaned.upper()
-        return cleaned if cleaned else default_value
-
+    @traced("carlist.detail")
+    @budgeted("carlist.detail")
     def scrape_detail(self, url):
         max_retries = 3
         retry_count = 0
 
         while retry_count < max_retries:
             try:
-                self.page.goto(url, wait_until="domcontentloaded", timeout=90000)
-                try:
-                    # Hindari menunggu network idle yang tidak selesai karena widget/chat, cukup pastikan konten utama muncul
-                    self.page.wait_for_selector("#listing-detail", timeout=20000)
-                except Exception as e:
-                    logging.warning(f"Selector listing detail tidak muncul tepat waktu: {e}")
-                time.sleep(5)
+                stage("goto")
+                with PAGE_LOAD.labels(METRICS_SERVICE, "detail").time():
+                    self.page.goto(url, wait_until="domcontentloaded", timeout=90000)
+                    try:
+                        # Hindari menunggu network idle yang tidak selesai karena widget/chat, cukup pastikan konten utama muncul
+                        self.page.wait_for_selector("#listing-detail", timeout=20000)
+                    except Exception as e:
+                        logging.warning(f"Selector listing detail tidak muncul tepat waktu: {e}")
+                wait_until(self.page, root="#listing-detail", quiet_ms=500, timeout_ms=5000, legacy=5, label="detail_settle")
 
                 # Deteksi Cloudflare
+                stage("block_check")
                 page_title = self.page.title()
                 if page_title.strip() == "Just a moment...":
+                    record_block(METRICS_SERVICE, "cloudflare", self.current_proxy)
                     logging.warning("🛑 Halaman diblokir Cloudflare saat detail. Mengganti proxy dan retry...")
                     take_screenshot(self.page, "cloudflare_detected_detail")
+                    stage("proxy_reinit")
                     self.retry_with_new_proxy()
                     retry_count += 1
                     continue  # retry ulang
 
                 # Proses klik tab specification (aman jika gagal)
+                stage("spec_tab")
                 try:
                     spec_tab_selector = (
                         "#listing-detail > section:nth-child(2) > div > div > "
@@ -249,15 +230,17 @@ class CarlistMyService:
                         "> div:nth-child(1) > div > div.c-tabs--overflow > div > a:nth-child(2)"
                     )
                     if self.page.is_visible(spec_tab_selector):
+                        pace(0.3, 0.9)
                         self.page.click(spec_tab_selector)
                         self.page.wait_for_selector(
                             '#tab-specifications span.u-text-bold.u-width-1\\/2.u-align-right',
                             timeout=7000
                         )
-                        time.sleep(1)
+                        wait_until(self.page, root="#tab-specifications", quiet_ms=300, timeout_ms=1000, legacy=1, label="spec_tab_settle")
                 except Exception as e:
                     logging.warning(f"Gagal klik tab specifications: {e}")
 
+                stage("specs")
                 engine_cc, fuel_type = None, None
                 try:
                     if self.page.is_visible('div#tab-specifications'):
@@ -376,6 +359,7 @@ class CarlistMyService:
                     logging.warning(f"Gagal ambil spesifikasi: {e}")
 
                 # Ambil gambar
+                stage("meta_images")
                 meta_imgs = self.page.query_selector_all("head > meta[name='prerender']")
                 meta_img_urls = set()
                 try:
@@ -387,6 +371,7 @@ class CarlistMyService:
                     logging.warning(f"Gagal ambil meta image: {e}")
 
                 # Parse page content with BeautifulSoup
+                stage("parse")
                 soup = BeautifulSoup(self.page.content(), "html.parser")
                 
                 # Backup method: extract specs using BeautifulSoup - search all specification sections
@@ -509,11 +494,11 @@ class CarlistMyService:
                         logging.warning(f"Gagal ekstraksi spesifikasi dengan BeautifulSoup: {e}")
 
                 spans = soup.select("#listing-detail li > a > span")
-                valid_spans = [span for span in spans if span.text.strip()]
+                valid_spans = [span_el for span_el in spans if span_el.text.strip()]
                 num_spans = len(valid_spans)
 
-                for i, span in enumerate(valid_spans):
-                    logging.info(f"Span {i}: {span.text.strip()}")
+                for i, span_el in enumerate(valid_spans):
+                    logging.info(f"Span {i}: {span_el.text.strip()}")
 
                 relevant_spans = valid_spans[2:] if len(valid_spans) > 2 else []
                 brand = model = variant = model_group = None
@@ -542,7 +527,7 @@ class CarlistMyService:
 
                 def get_location_parts(soup):
                     spans = soup.select("div.c-card__body > div.u-flex.u-align-items-center > div > div > span")
-                    valid_spans = [span.text.strip() for span in spans if span.text.strip()]
+                    valid_spans = [span_el.text.strip() for span_el in spans if span_el.text.strip()]
                     if len(valid_spans) >= 2:
                         return " - ".join(valid_spans[-2:])
                     elif len(valid_spans) == 1:
@@ -692,7 +677,10 @@ class CarlistMyService:
 
             except Exception as e:
                 logging.error(f"Gagal scraping detail {url}: {e}")
+                if "net::" in str(e):
+                    record_block(METRICS_SERVICE, "proxy_error", self.current_proxy)
                 take_screenshot(self.page, "scrape_detail_error")
+                stage("proxy_reinit")
                 self.retry_with_new_proxy()
                 retry_count += 1
 
@@ -711,8 +699,9 @@ class CarlistMyService:
 
     def download_images(self, image_urls, brand, model, variant, year, car_id, referer=None):
         """
-        Download semua gambar ke folder images_carlist/brand/model/variant/year/id/
-        Menggunakan requests Session dengan UA + referer agar tidak mudah di-block.
+        Jadwalkan download semua gambar ke folder images_carlist/brand/model/variant/year/id/
+        lewat image queue (background worker, UA + referer agar tidak mudah di-block).
+        Return list path tujuan; file muncul setelah worker selesai memprosesnya.
         """
         if not image_urls:
             return []
@@ -728,39 +717,15 @@ class CarlistMyService:
         )
         base_dir.mkdir(parents=True, exist_ok=True)
 
-        session = requests.Session()
-        session.headers.update(
-            {
-                "User-Agent": "Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/136.0.0.0 Safari/537.36",
-            }
-        )
-        if referer:
-            session.headers["Referer"] = referer
-
-        local_paths = []
+        items = []
         for idx, url in enumerate(image_urls):
             if not url:
                 continue
-
             file_name = self.sanitize_image_filename(url, f"image_{idx+1}.jpg")
-            file_path = base_dir / file_name
-
-            if file_path.exists():
-                local_paths.append(str(file_path))
-                continue
-
-            try:
-                resp = session.get(url, timeout=30, stream=True)
-                resp.raise_for_status()
-                with open(file_path, "wb") as f:
-                    for chunk in resp.iter_content(chunk_size=8192):
-                        if chunk:
-                            f.write(chunk)
-                local_paths.append(str(file_path))
-            except Exception as e:
-                logging.warning(f"Gagal download gambar {url}: {e}")
+            items.append((url, base_dir / file_name))
 
-        return local_paths
+        self.image_queue.enqueue(car_id, items, referer=referer)
+        return [str(path) for _, path in items]
 
     def save_to_db(self, car):
         try:
@@ -770,15 +735,13 @@ class CarlistMyService:
             image_urls = car.get("image") or []
             image_urls_str = json.dumps(image_urls)
             brand = (car.get("brand") or "UNKNOWN").upper().replace("-", " ")
-            model_group = self.normalize_field(car.get("model_group"), "NO MODEL GROUP").upper()
-            model = self.normalize_field(car.get("model"), "NO MODEL").upper()
-            variant = self.normalize_field(car.get("variant"), "NO VARIANT").upper()
+            model_group = normalize_field(car.get("model_group"), "NO MODEL GROUP").upper()
+            model = normalize_field(car.get("model"), "NO MODEL").upper()
+            variant = normalize_field(car.get("variant"), "NO VARIANT").upper()
             car_id = None
 
             if row:
                 car_id, old_price, version, existing_ads_date = row
-                if self.download_images_locally:
-                    self.download_images(image_urls, brand, model, variant, car.get("year"), car_id, car.get("listing_url"))
                 ads_date_to_use = existing_ads_date or now.strftime("%Y-%m-%d")
                 self.cursor.execute(f"""
                     UPDATE {DB_TABLE_SCRAP}
@@ -808,15 +771,19 @@ class CarlistMyService:
                     car.get("seat_capacity"), car.get("engine_cc"), car.get("fuel_type"), 1, image_urls_str, current_date, now, now
                 ))
                 car_id = self.cursor.fetchone()[0]
-                if self.download_images_locally:
-                    self.download_images(image_urls, brand, model, variant, car.get("year"), car_id, car.get("listing_url"))
 
             self.conn.commit()
             logging.info(f"✅ Data untuk {car['listing_url']} berhasil disimpan/diupdate.")
+
+            # Download gambar di-enqueue setelah commit, transaksi tidak lagi menunggu I/O gambar
+            if self.download_images_locally:
+                with span("images"):
+                    self.download_images(image_urls, brand, model, variant, car.get("year"), car_id, car.get("listing_url"))
         except Exception as e:
             self.conn.rollback()
             logging.error(f"❌ Error menyimpan ke database: {e}")
 
+    @recorded_run("scrape", METRICS_SERVICE, get_connection, proxy_env="PROXY_MODE_CARLIST")
     def scrape_all_brands(self, start_page=1, pages=None, max_main_page_retries=3):
         self.reset_scraping()
         base_url = os.getenv("CARLISTMY_LISTING_URL")
@@ -835,8 +802,9 @@ class CarlistMyService:
             paginated_url = base_url
             logging.info(f"📄 Scraping halaman utama: {paginated_url}")
             try:
-                self.page.goto(paginated_url, timeout=60000)
-                time.sleep(7)
+                with PAGE_LOAD.labels(METRICS_SERVICE, "listing").time():
+                    self.page.goto(paginated_url, timeout=60000)
+                wait_until(self.page, selectors='[id^="listing_"]', quiet_ms=500, timeout_ms=7000, legacy=7, label="listing_page")
             except Exception as e:
                 logging.warning(f"❌ Gagal memuat halaman {paginated_url}: {e}")
                 take_screenshot(self.page, f"page_load_error_retry_{retries+1}")
@@ -882,6 +850,7 @@ class CarlistMyService:
                     url_tag_price_list.append((href, tag_text, price_int))
 
         url_tag_price_list = list(set(url_tag_price_list))
+        LISTINGS.labels(METRICS_SERVICE, "discovered").inc(len(url_tag_price_list))
         logging.info(f"📄 Ditemukan {len(url_tag_price_list)} listing URL di halaman utama.")
 
         logging.info("⏳ Menunggu selama 5-7 detik sebelum melanjutkan...")
@@ -947,6 +916,7 @@ class CarlistMyService:
         logging.info(f"Total ditemukan: {total_listing}")
         logging.info(f"Insert/update: {insert_update_count}")
         logging.info(f"Skip: {skip_count}")
+        LISTINGS.labels(METRICS_SERVICE, "skipped").inc(skip_count)
 
         logging.info(f"Akan scrape detail {len(urls_to_scrape)} listing (baru atau harga berubah) di halaman utama.")
 
@@ -962,12 +932,18 @@ class CarlistMyService:
             logging.info(f"🔍 Scraping detail: {url}")
             detail = self.scrape_detail(url)
             if detail:
-                self.save_to_db(detail)
+                LISTINGS.labels(METRICS_SERVICE, "scraped").inc()
+                with DB_WRITE.labels(METRICS_SERVICE, "save_listing").time(), span("carlist.save"):
+                    self.save_to_db(detail)
                 self.listing_count += 1
                 total_scraped += 1
                 time.sleep(random.uniform(20, 40))
+            else:
+                LISTINGS.labels(METRICS_SERVICE, "failed").inc()
 
         self.quit_browser()
+        log_report("Span report carlist")
+        log_wait_report("Wait report carlist")
         logging.info("✅ Proses scraping selesai.")
 
     def export_data(self):
@@ -987,6 +963,8 @@ class CarlistMyService:
     def reset_scraping(self):
         self.stop_flag = False
         self.listing_count = 0
+        reset_spans()
+        reset_waits()
         logging.info("🔄 Scraping direset dan siap dimulai kembali.")
 
     def close(self):
@@ -994,6 +972,17 @@ class CarlistMyService:
             self.quit_browser()
         except:
             pass
+        if self.image_queue:
+            try:
+                self.image_queue.close()
+            except Exception as e:
+                logging.warning(f"Gagal menutup image queue: {e}")
+        if self.blob_store:
+            try:
+                self.blob_store.log_report()
+                self.blob_store.close()
+            except Exception as e:
+                logging.warning(f"Gagal menutup blob store: {e}")
         try:
             self.cursor.close()
             self.conn.close()
@@ -1,5 +1,7 @@
 import argparse
 from scrap_carlistmy_monitors_playwright.carlistmy_service import CarlistMyService
+from common.metrics import start_metrics_server
+from common.profiling import add_profile_arguments, profile_run
 from dotenv import load_dotenv
 
 load_dotenv(override=True)
@@ -7,14 +9,18 @@ load_dotenv(override=True)
 def main():
     parser = argparse.ArgumentParser(description="Scrape data dari carlist.my")
     parser.add_argument('--image-download', choices=['yes', 'no'], default='yes', help="Download images locally or not")
+    parser.add_argument('--metrics-port', type=int, help="Ekspos metrics Prometheus di port ini (default: env METRICS_PORT, kosong = tidak diekspos)")
+    add_profile_arguments(parser)
 
     args = parser.parse_args()
+    start_metrics_server(args.metrics_port)
 
     download_images_locally = args.image_download == 'yes'
 
     scraper = CarlistMyService(download_images_locally=download_images_locally)
     try:
-        scraper.scrape_all_brands()
+        with profile_run("scrape_carlistmy", args):
+            scraper.scrape_all_brands()
     finally:
         scraper.close()
 
@@ -1,12 +1,19 @@
+import argparse
 from scrap_carlistmy_monitors_playwright.carlistmy_service import CarlistMyService
+from common.profiling import add_profile_arguments, profile_run
 from dotenv import load_dotenv
 
 load_dotenv()
 
 def main():
+    parser = argparse.ArgumentParser(description="Sinkronisasi data carlist.my ke tabel cars")
+    add_profile_arguments(parser)
+    args = parser.parse_args()
+
     scraper = CarlistMyService()
     try:
-        scraper.sync_to_cars()
+        with profile_run("sync_carlistmy", args):
+            scraper.sync_to_cars()
     finally:
         scraper.close()
 
@@ -4,7 +4,6 @@ import random
 import time
 import logging
 import pandas as pd
-import requests
 import json
 from datetime import datetime
 from bs4 import BeautifulSoup
@@ -14,11 +13,13 @@ from playwright.sync_api import sync_playwright
 from playwright_stealth import stealth_sync
 
 from .database import get_connection
+from common.atomic_download import stream_download
+from common.logging_setup import setup_logging
+from common.run_ledger import count as ledger_count, recorded_run, set_exit_reason
+from common.snapshots import SnapshotManager
 
 load_dotenv()
 
-START_DATE = datetime.now().strftime('%Y%m%d')
-
 # ===== Konfigurasi Env
 DB_TABLE_SCRAP = os.getenv("DB_TABLE_SCRAP_CARLIST", "cars_scrap_new")
 DB_TABLE_PRIMARY = os.getenv("DB_TABLE_PRIMARY_CARLIST", "cars")
@@ -33,36 +34,17 @@ PROXY_PASSWORD = os.getenv("PROXY_PASSWORD")
 # ===== Konfigurasi Logging
 log_dir = Path(__file__).resolve().parents[1] /  "logs"
 log_dir.mkdir(parents=True, exist_ok=True)
+snapshots = SnapshotManager("carlistmy", log_dir)
 
-# Nama file log menggunakan tanggal saat *pertama kali program dijalankan*
-log_file = log_dir / f"scrape_carlistmy_{START_DATE}.log"
-
-logging.basicConfig(
-    level=logging.INFO,
-    format="%(asctime)s - %(levelname)s - %(message)s",
-    handlers=[
-        logging.FileHandler(log_file),
-        logging.StreamHandler()
-    ]
-)
+# File log harian: pindah ke file tanggal baru saat ganti hari (lihat common.logging_setup)
+setup_logging("scrape_carlistmy", log_dir=log_dir)
 
 def take_screenshot(page, name: str):
     """
-    Simpan screenshot ke dalam folder "scraping/logs/<YYYYMMDD>_error/"
-    Di mana <YYYYMMDD> adalah tanggal screenshot diambil (bukan START_DATE).
+    Simpan snapshot error ke dalam folder "scraping/logs/<YYYYMMDD>_error_carlistmy/"
+    (JPEG / HTML ringkas, dengan rate limit dan dedupe; lihat common.snapshots).
     """
-    try:
-        error_folder_name = datetime.now().strftime('%Y%m%d') + "_error_carlistmy"
-        screenshot_dir = log_dir / error_folder_name
-        screenshot_dir.mkdir(parents=True, exist_ok=True)
-
-        timestamp = datetime.now().strftime('%H%M%S')
-        screenshot_path = screenshot_dir / f"{name}_{timestamp}.png"
-
-        page.screenshot(path=str(screenshot_path))
-        logging.info(f"📸 Screenshot disimpan: {screenshot_path}")
-    except Exception as e:
-        logging.warning(f"❌ Gagal menyimpan screenshot: {e}")
+    snapshots.capture(page, name)
 
 def get_custom_proxy_list():
     raw = os.getenv("CUSTOM_PROXIES_CARLIST", "")
@@ -371,11 +353,9 @@ class CarlistMyService:
                 ext = os.path.splitext(url)[1].split("?")[0] or ".jpg"
                 file_name = f"image_{idx+1}{ext}"
                 file_path = base_dir / file_name
-                resp = requests.get(url, timeout=30)
-                if resp.status_code == 200:
-                    with open(file_path, "wb") as f:
-                        f.write(resp.content)
-                    local_paths.append(str(file_path))
+                # Streaming ke .part (resume Range) lalu rename atomik, file final selalu utuh
+                stream_download(url, file_path, timeout=30)
+                local_paths.append(str(file_path))
             except Exception as e:
                 logging.warning(f"Gagal download gambar {url}: {e}")
         return local_paths
@@ -558,6 +538,7 @@ class CarlistMyService:
         self.quit_browser()
         logging.info("✅ Proses scraping selesai.")
 
+    @recorded_run("sync", "sync_carlistmy", get_connection)
     def sync_to_cars(self):
         """
         Sinkronisasi data dari {DB_TABLE_SCRAP} ke {DB_TABLE_PRIMARY}, d
@@ -638,10 +619,12 @@ class CarlistMyService:
             self.cursor.execute(sync_price_history_query)
 
             self.conn.commit()
+            ledger_count(processed=len(rows))
             logging.info(f"Sinkronisasi data dari {DB_TABLE_SCRAP} ke {DB_TABLE_PRIMARY} selesai.")
             logging.info("Sinkronisasi perubahan harga dari price_history ke price_history_combined selesai.")
         except Exception as e:
             self.conn.rollback()
+            set_exit_reason(f"error: {e}")
             logging.error(f"Error saat sinkronisasi data: {e}")
 
     def export_data(self):
@@ -1,5 +1,6 @@
 import argparse
 from scrap_carlistmy_playwright.carlistmy_service import CarlistMyService
+from common.profiling import add_profile_arguments, profile_run
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -10,6 +11,7 @@ def main():
     parser.add_argument("--max-pages", type=int, default=None, help="Jumlah halaman yang ingin diambil (opsional)")
     parser.add_argument("--end-page", type=int, default=None, help="Halaman akhir jika ingin descending")
     parser.add_argument("--desc", action="store_true", help="Scrape secara menurun dari halaman besar ke kecil")
+    add_profile_arguments(parser)
 
     args = parser.parse_args()
 
@@ -22,7 +24,8 @@ def main():
 
     scraper = CarlistMyService()
     try:
-        scraper.scrape_all_brands(start_page=args.page, pages=pages)
+        with profile_run("legacy_scrape_carlistmy", args):
+            scraper.scrape_all_brands(start_page=args.page, pages=pages)
     finally:
         scraper.close()
 
@@ -3,13 +3,18 @@
 from flask import Flask, jsonify, request
 from scrap_mudahmy_monitors_playwright.mudahmy_service import MudahMyService
 from scrap_mudahmy_monitors_playwright.database import get_connection
+from common.metrics import add_metrics_route
 import os
+import atexit
 import psycopg2
 
 app = Flask(__name__)
+add_metrics_route(app)
 
 # Inisialisasi instance service
 mudahmy_scraper = MudahMyService()
+# Service dibuat sekali saat import: antrian gambar / blob store dikuras saat proses keluar
+atexit.register(mudahmy_scraper.close)
 
 DB_TABLE_SCRAP = os.getenv("DB_TABLE_SCRAP", "url")
 
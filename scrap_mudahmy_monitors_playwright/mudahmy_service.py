@@ -8,52 +8,41 @@ from dotenv import load_dotenv
 from playwright.sync_api import sync_playwright
 from playwright_stealth import stealth_sync
 from .database import get_connection
+from common.blob_store import BlobStore
+from common.image_queue import ImageDownloadQueue
+from common.normalization import convert_mileage, convert_year_to_int, normalize_brand_name, normalize_model_variant
+from common.logging_setup import setup_logging
+from common.metrics import DB_WRITE, LISTINGS, PAGE_LOAD, record_block
+from common.spans import log_report, reset as reset_spans, span, stage, traced
+from common.run_ledger import recorded_run
+from common.snapshots import SnapshotManager
+from common.waits import budgeted, log_report as log_wait_report, pace, reset as reset_waits, wait_until
+from common.gallery import gallery_incomplete, harvest_gallery
+from common.field_spec import MUDAH_DETAIL_FIELDS, extract_fields
 from pathlib import Path
-import requests
 import json
 
 load_dotenv(override=True)
 
-START_DATE = datetime.now().strftime('%Y%m%d')
-
 
 # ================== Konfigurasi ENV
 DB_TABLE_SCRAP = os.getenv("DB_TABLE_SCRAP_MUDAH", "url")
 DB_TABLE_HISTORY_PRICE = os.getenv("DB_TABLE_HISTORY_PRICE_MUDAH", "price_history_scrap")
 MUDAHMY_LISTING_URL = os.getenv("MUDAHMY_LISTING_URL", "https://www.mudah.my/malaysia/cars-for-sale")
+METRICS_SERVICE = "scrape_mudahmy"
 
 
 # ================== Konfigurasi PATH Logging
 base_dir = Path(__file__).resolve().parents[1]
 log_dir = base_dir / "logs"
 log_dir.mkdir(parents=True, exist_ok=True)
-
-log_file = log_dir / f"scrape_mudahmy_{START_DATE}.log"
+snapshots = SnapshotManager("mudahmy", log_dir)
 
 # ================== Setup Logging
-logging.basicConfig(
-    level=logging.INFO,
-    format="%(asctime)s - %(levelname)s - %(message)s",
-    handlers=[
-        logging.FileHandler(log_file),
-        logging.StreamHandler()
-    ]
-)
+setup_logging("scrape_mudahmy", log_dir=log_dir)
 
 def take_screenshot(page, name):
-    try:
-        # Folder error sesuai TANGGAL sekarang (bisa beda dari START_DATE)
-        error_folder_name = datetime.now().strftime('%Y%m%d') + "_error_mudahmy"
-        screenshot_dir = log_dir / error_folder_name
-        screenshot_dir.mkdir(parents=True, exist_ok=True)
-
-        timestamp = datetime.now().strftime('%H%M%S')
-        screenshot_path = screenshot_dir / f"{name}_{timestamp}.png"
-
-        page.screenshot(path=str(screenshot_path))
-        logging.info(f"📸 Screenshot disimpan: {screenshot_path}")
-    except Exception as e:
-        logging.warning(f"❌ Gagal menyimpan screenshot: {e}")
+    snapshots.capture(page, name)
 
 
 def should_use_proxy():
@@ -96,6 +85,11 @@ class MudahMyService:
         self.image_base_path = os.path.join(base_dir, "images_mudah")
         os.makedirs(self.image_base_path, exist_ok=True)
         logging.info(f"Image base path: {self.image_base_path}")
+        self.blob_store = None
+        self.image_queue = None
+        if download_images_locally:
+            self.blob_store = BlobStore.for_image_root(self.image_base_path)
+            self.image_queue = ImageDownloadQueue(self.blob_store, file_mode=0o644, name="mudah")
 
     def init_browser(self):
         self.playwright = sync_playwright().start()
@@ -143,22 +137,6 @@ class MudahMyService:
         stealth_sync(self.page)
         logging.info("✅ Browser Playwright berhasil diinisialisasi.")
 
-    def get_highlight_info(self, page):
-        try:
-            parent = page.query_selector('#ad_view_ad_highlights > div > div > div:nth-child(1) > div > div')
-            if not parent:
-                return None
-            children = parent.query_selector_all('div')
-            if len(children) == 2:
-                return children[1].inner_text().strip()
-            elif len(children) == 1:
-                return children[0].inner_text().strip()
-            else:
-                return parent.inner_text().strip()
-        except Exception as e:
-            logging.warning(f"❌ Gagal ekstrak highlight info: {e}")
-            return None
-
     def quit_browser(self):
         try:
             if hasattr(self, "browser"):
@@ -169,29 +147,6 @@ class MudahMyService:
             self.playwright.stop()
         logging.info("🛑 Browser Playwright ditutup.")
 
-    def normalize_model_variant(self, text):
-        """
-        Membersihkan string model/variant:
-        - Menghilangkan karakter aneh: -, (, ), _
-        - Mengganti underscore menjadi spasi
-        - Merapikan spasi
-        - Ubah ke UPPERCASE
-        - Jika kosong atau "-" atau "N/A", return "NO VARIANT"
-        """
-        if not text or str(text).strip() in ["N/A", "-", ""]:
-            return "NO VARIANT"
-
-        cleaned = re.sub(r'[\-\(\)_]', ' ', text)
-        cleaned = re.sub(r'[^\w\s]', '', cleaned)
-        cleaned = ' '.join(cleaned.split())
-        cleaned = cleaned.upper()
-
-        # Jika hasil akhirnya kosong, return NO VARIANT
-        if not cleaned:
-            return "NO VARIANT"
-        return cleaned
-
-
     def insert_new_listing(self, listing_url, price):
         """Insert listing_url baru ke database dengan status active dan price dari halaman utama."""
         try:
@@ -233,18 +188,20 @@ class MudahMyService:
             delay = random.uniform(5, 10)
             logging.info(f"Menuju {url} (delay {delay:.1f}s)")
             time.sleep(delay)
-            page.goto(url, timeout=60000)
+            with PAGE_LOAD.labels(METRICS_SERVICE, "listing").time():
+                page.goto(url, timeout=60000)
 
             # Check for blocks
             if page.locator("text='Access Denied'").is_visible(timeout=3000):
+                record_block(METRICS_SERVICE, "access_denied", self.last_used_proxy)
                 raise Exception("Akses ditolak")
             if page.locator("text='Please verify you are human'").is_visible(timeout=3000):
+                record_block(METRICS_SERVICE, "captcha", self.last_used_proxy)
                 raise Exception("Deteksi CAPTCHA")
 
-            page.wait_for_load_state('networkidle', timeout=15000)
-
             # Get all card containers ordered from top to bottom
             card_selector = "div[data-testid^='listing-ad-item-']"
+            wait_until(page, selectors=card_selector, quiet_ms=500, timeout_ms=15000, label="listing_cards")
             cards = page.query_selector_all(card_selector)
 
             urls_to_scrape = []
@@ -254,6 +211,7 @@ class MudahMyService:
                     if a_tag:
                         href = a_tag.get_attribute('href')
                         if href:
+                            LISTINGS.labels(METRICS_SERVICE, "discovered").inc()
                             # Dapatkan harga dari card
                             current_price = self.get_price_from_listing(card)
                             
@@ -274,7 +232,9 @@ class MudahMyService:
                             
                             if not existing:
                                 # Listing baru, masukkan ke database dengan status active dan price
-                                if self.insert_new_listing(href, current_price):
+                                with DB_WRITE.labels(METRICS_SERVICE, "insert_listing").time():
+                                    inserted = self.insert_new_listing(href, current_price)
+                                if inserted:
                                     urls_to_scrape.append(href)
                                     logging.info(f"Listing baru ditemukan dan ditambahkan: {href} dengan price {current_price}")
                             else:
@@ -303,6 +263,7 @@ class MudahMyService:
                                     else:
                                         logging.info(f"Harga berubah untuk {href}: {db_price} -> {current_price}")
                                 else:
+                                    LISTINGS.labels(METRICS_SERVICE, "skipped").inc()
                                     logging.info(f"Skip listing {href}: harga sama ({current_price}), data lengkap, dan images sudah ada")
                 except Exception as e:
                     logging.warning(f"❌ Error memproses card: {e}")
@@ -316,24 +277,6 @@ class MudahMyService:
             logging.error(f"Error saat scraping halaman: {e}")
             return []
 
-    def download_image(self, url, file_path):
-        """Download single image to file_path."""
-        try:
-            os.makedirs(os.path.dirname(file_path), exist_ok=True, mode=0o755)
-            resp = requests.get(url, timeout=30)
-            if resp.status_code == 200:
-                with open(file_path, "wb") as f:
-                    f.write(resp.content)
-                # Set file permissions
-                os.chmod(file_path, 0o644)
-                logging.info(f"Downloaded: {file_path}")
-            else:
-                logging.warning(f"Gagal download: {url} - Status: {resp.status_code}")
-        except PermissionError as e:
-            logging.error(f"Permission error saat menyimpan file: {e}")
-        except Exception as e:
-            logging.error(f"Error download {url}: {str(e)}")
-
     def download_listing_images(self, listing_url, image_urls, car_id):
         if not self.download_images_locally:
             logging.info("Lewati download gambar sesuai parameter --image-download=no")
@@ -347,24 +290,28 @@ class MudahMyService:
             brand = clean_filename(self.last_scraped_data.get("brand", "unknown"))
             model = clean_filename(self.last_scraped_data.get("model", "unknown"))
             variant = clean_filename(self.last_scraped_data.get("variant", "unknown"))
-            year_value = self.convert_year_to_int(self.last_scraped_data.get("year"))
+            year_value = convert_year_to_int(self.last_scraped_data.get("year"))
             year_segment = str(year_value) if year_value else "UNKNOWN_YEAR"
 
             # Path penyimpanan gambar
             folder_path = os.path.join(self.image_base_path, brand, model, variant, year_segment, str(car_id))
             os.makedirs(folder_path, exist_ok=True, mode=0o755)
 
+            items = []
             for idx, img_url in enumerate(image_urls):
                 clean_url = img_url.split('?')[0]
                 if not clean_url.startswith('http'):
                     clean_url = f"https:{clean_url}"
-                file_path = os.path.join(folder_path, f"image_{idx+1}.jpg")
-                self.download_image(clean_url, file_path)
+                items.append((clean_url, os.path.join(folder_path, f"image_{idx+1}.jpg")))
 
-            logging.info(f"Gambar disimpan di folder: {folder_path}")
+            # Download jalan di background worker, halaman browser tidak perlu menunggu
+            self.image_queue.enqueue(car_id, items, referer=listing_url)
+            logging.info(f"{len(items)} gambar dijadwalkan ke folder: {folder_path}")
         except Exception as e:
             logging.error(f"Error download images for listing ID {car_id}: {str(e)}")
 
+    @traced("mudah.detail")
+    @budgeted("mudah.detail")
     def scrape_listing_detail(self, context, url):
         """Scrape detail listing di tab baru. Kembalikan dict data, atau None kalau gagal."""
         max_retries = 3
@@ -373,23 +320,33 @@ class MudahMyService:
             page = context.new_page()
             try:
                 logging.info(f"Navigating to detail page: {url} (Attempt {attempt+1})")
-                page.goto(url, wait_until="domcontentloaded", timeout=60000)
+                stage("goto")
+                with PAGE_LOAD.labels(METRICS_SERVICE, "detail").time():
+                    page.goto(url, wait_until="domcontentloaded", timeout=60000)
 
                 # Check if blocked
-                if (
+                stage("block_check")
+                if page.locator("text='verify you are human'").count() > 0:
+                    blocked = "captcha"
+                elif (
                     "Access Denied" in page.title() or
                     "block" in page.url or
-                    page.locator("text='Access Denied'").count() > 0 or
-                    page.locator("text='verify you are human'").count() > 0
+                    page.locator("text='Access Denied'").count() > 0
                 ):
+                    blocked = "access_denied"
+                else:
+                    blocked = None
+                if blocked:
+                    record_block(METRICS_SERVICE, blocked, self.last_used_proxy)
                     logging.warning("Blokir atau captcha terdeteksi di halaman detail!")
                     attempt += 1
                     page.close()
                     return None
 
+                stage("wait_specs")
                 try:
                     page.wait_for_selector('#ad_view_car_specifications', timeout=15000)
-                    time.sleep(3)
+                    wait_until(page, root="#ad_view_car_specifications", quiet_ms=400, timeout_ms=3000, legacy=3, label="specs_settle")
                 except Exception as e:
                     logging.warning(f"Specifications section tidak ditemukan: {e}")
                     attempt += 1
@@ -398,6 +355,7 @@ class MudahMyService:
 
                 show_more_clicked = False
                 
+                stage("show_more_click")
                 try:
                     show_more_btn = page.wait_for_selector(
                         "#ad_view_car_specifications button:has-text('SHOW MORE')", 
@@ -406,17 +364,19 @@ class MudahMyService:
                     )
                     if show_more_btn:
                         show_more_btn.scroll_into_view_if_needed()
+                        pace(0.4, 1.2)
                         show_more_btn.click()
-                        time.sleep(3)  
-                        
+                        wait_until(page, texts=[("button", "SHOW LESS")], timeout_ms=3000, legacy=3, label="show_more")
+
                         if page.locator("button:has-text('SHOW LESS')").count() > 0:
                             show_more_clicked = True
                             logging.info("Tombol 'SHOW MORE' specifications diklik (metode 1)")
-                            time.sleep(2)
+                            wait_until(page, root="#ad_view_car_specifications", quiet_ms=300, timeout_ms=2000, legacy=2, label="show_more_settle")
                 except Exception as e:
                     logging.info("Metode 1 gagal: mencoba metode berikutnya")
 
                 if not show_more_clicked:
+                    stage("show_more_js")
                     try:
                         page.evaluate("""
                             const btn = document.querySelector('#ad_view_car_specifications button');
@@ -424,7 +384,7 @@ class MudahMyService:
                                 btn.click();
                             }
                         """)
-                        time.sleep(3)
+                        wait_until(page, texts=[("button", "SHOW LESS")], timeout_ms=3000, legacy=3, label="show_more")
                         if page.locator("button:has-text('SHOW LESS')").count() > 0:
                             show_more_clicked = True
                             logging.info("Tombol 'SHOW MORE' specifications diklik via JavaScript")
@@ -432,6 +392,7 @@ class MudahMyService:
                         logging.info("Metode 2 gagal: mencoba metode final")
 
                 if not show_more_clicked:
+                    stage("show_more_js_retry")
                     try:
                         page.evaluate("""
                             const specDiv = document.querySelector('#ad_view_car_specifications');
@@ -439,7 +400,7 @@ class MudahMyService:
                                 btn.click();
                             }
                         """)
-                        time.sleep(3)
+                        wait_until(page, texts=[("button", "SHOW LESS")], timeout_ms=3000, legacy=3, label="show_more")
                         if page.locator("button:has-text('SHOW LESS')").count() > 0:
                             show_more_clicked = True
                             logging.info("Tombol 'SHOW MORE' specifications diklik via JavaScript")
@@ -447,6 +408,7 @@ class MudahMyService:
                         logging.info("Metode 2 gagal: mencoba metode final")
 
                 if not show_more_clicked:
+                    stage("show_more_dom")
                     try:
                         page.evaluate("""
                             const specDiv = document.querySelector('#ad_view_car_specifications');
@@ -465,167 +427,44 @@ class MudahMyService:
                     except Exception as e:
                         logging.info("Semua metode gagal expand specifications")
 
-                def safe_extract(selectors, selector_type="css", fallback="N/A"):
-                    for selector in selectors:
-                        try:
-                            if selector_type == "css":
-                                if page.locator(selector).count() > 0:
-                                    return page.locator(selector).first.inner_text().strip()
-                            elif selector_type == "xpath":
-                                xp = f"xpath={selector}"
-                                if page.locator(xp).count() > 0:
-                                    return page.locator(xp).first.inner_text().strip()
-                        except Exception as e:
-                            logging.error(f"Error extracting selector: {e}")
-                    return fallback
-
-                data = {}
-                data["listing_url"] = url
-                data["brand"] = safe_extract([
-                    "#ad_view_car_specifications div:nth-child(1) > div:nth-child(3)",
-                    "div:has-text('Brand') + div",
-                ])
-                data["model"] = safe_extract([
-                    "#ad_view_car_specifications div:nth-child(2) > div:nth-child(3)",
-                    "div:has-text('Model') + div",
-                ])
-                data["variant"] = safe_extract([
-                    "#ad_view_car_specifications div:nth-child(4) > div:nth-child(3)",
-                    "div:has-text('Variant') + div",
-                ])
-                data["engine_cc"] = safe_extract([
-                    "#ad_view_car_specifications > div > div > div:nth-child(2) > div > div > div:nth-child(1) > div:nth-child(1) > div:nth-child(2)",
-                    "div:has-text('Engine CC') + div",
-                ])
-                full_info = self.get_highlight_info(page)
-                if not full_info:
-                    full_info = safe_extract([
-                        "#ad_view_ad_highlights > div > div > div:nth-child(1) > div > div > div",
-                        "div.text-\[\#666666\].text-xs.lg\\:text-base",
-                        "//*[@id='ad_view_ad_highlights']/div/div/div[1]/div/div/div"
-                    ])
-                if full_info and full_info != "N/A":
-                    parts = full_info.split(",", 1)
-                    data["condition"] = parts[0].strip()
-                    data["information_ads"] = parts[1].strip() if len(parts) > 1 else ""
-                else:
-                    data["condition"] = "N/A"
-                    data["information_ads"] = ""
-                
+                stage("extract")
+                data = {"listing_url": url, **extract_fields(page, MUDAH_DETAIL_FIELDS)}
                 logging.info(f"Extracted condition: {data['condition']}")
                 logging.info(f"Extracted information_ads: {data['information_ads']}")
 
-                # Perbaiki selector location agar lebih robust
-                data["location"] = safe_extract([
-                    "#ad_view_ad_highlights > div > div > div.flex.flex-wrap.lg\\:flex-nowrap.gap-3\\.5 > div:nth-child(4) > div",
-                    "div.font-bold.truncate.text-sm.md\\:text-base",
-                    "//*[@id='ad_view_ad_highlights']/div/div/div[3]/div[4]/div",
-                    "#ad_view_ad_highlights div.font-bold.truncate",
-                ], selector_type="css")
-                data["price"] = safe_extract([
-                    "div.flex.gap-1.md\\:items-end > div"
-                ])
-                data["year"] = safe_extract([
-                    "#ad_view_car_specifications div:nth-child(3) > div:nth-child(3)",
-                    "div:has-text('Year') + div",
-                ])
-                data["mileage"] = safe_extract([
-                    "#ad_view_ad_highlights > div > div > div.flex.flex-wrap.lg\\:flex-nowrap.gap-3\\.5 > div:nth-child(3) > div",
-                    "div:has-text('Mileage') + div",
-                ])
-                data["transmission"] = safe_extract([
-                    "#ad_view_ad_highlights > div > div > div.flex.flex-wrap.lg\\:flex-nowrap.gap-3\\.5 > div:nth-child(2) > div",
-                    "div:has-text('Transmission') + div",
-                ])
-                data["seat_capacity"] = safe_extract([
-                    "#ad_view_car_specifications > div > div > div > div > div > div:nth-child(2) > div:nth-child(3) > div:nth-child(3)",
-                    "div:has-text('Seat Capacity') + div",
-                ])
-                data["series"] = safe_extract([
-                    "#ad_view_car_specifications div.flex.flex-col.gap-4 div:has-text('Series') + div",
-                    "div:has-text('Series') + div",
-                ])
-                data["type"] = safe_extract([
-                    "#ad_view_car_specifications div.flex.flex-col.gap-4 div:has-text('Type') + div",
-                    "div:has-text('Type') + div",
-                ])
-                data["fuel_type"] = safe_extract([
-                    "#ad_view_car_specifications > div > div > div:nth-child(1) > div > div > div:nth-child(2) > div:nth-child(4) > div:nth-child(3)",
-                    "#ad_view_car_specifications div.flex.flex-col.gap-4 div:has-text('Fuel Type') + div",
-                    "div:has-text('Fuel Type') + div",
-                ])
-
                 data["scraped_at"] = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
 
                 # Simpan ke last_scraped_data untuk digunakan saat download gambar
                 self.last_scraped_data = data
 
+                stage("db_save")
                 success, car_id = self.save_to_db(data)
                 if car_id is None:
                     logging.error("Gagal menyimpan data ke database")
                     page.close()
                     return None
 
+                stage("gallery")
                 try:
                     page.wait_for_selector('#ad_view_gallery', timeout=15000)
                     logging.info("Galeri ditemukan, siap proses gambar")
 
-                    # Proses Show All gallery
-                    show_all_clicked = False
-                    try:
-                        show_all_button = page.wait_for_selector(
-                            "#ad_view_gallery a[data-action-step='17']",
-                            timeout=5000
+                    # URL galeri diambil tanpa membuka modal (ld+json, state halaman, srcset, network)
+                    image_urls, expected = harvest_gallery(page, url)
+                    if gallery_incomplete(image_urls, expected):
+                        # Fallback: buka galeri sekali lalu ambil ulang dari modal (kosong / kurang dari jumlah galeri)
+                        gallery_opener = page.query_selector(
+                            "#ad_view_gallery a[data-action-step='17'], #ad_view_gallery div[data-action-step='1']"
                         )
-                        if show_all_button:
-                            show_all_button.click()
-                            logging.info("Tombol 'Show All' gallery diklik (metode 1)")
-                            show_all_clicked = True
-                            time.sleep(random.uniform(6, 9))
-                    except Exception as e:
-                        logging.info(f"Gagal klik tombol 'Show All' gallery metode 1: {e}")
-
-                    if not show_all_clicked:
-                        try:
-                            show_all_button = page.query_selector("button:has-text('Show All'), a:has-text('Show All')")
-                            if show_all_button:
-                                show_all_button.scroll_into_view_if_needed()
-                                show_all_button.click()
-                                logging.info("Tombol 'Show All' gallery diklik (metode 2)")
-                                show_all_clicked = True
-                                time.sleep(random.uniform(6, 9))
-                        except Exception as e:
-                            logging.info(f"Gagal klik tombol 'Show All' gallery metode 2: {e}")
-
-                    if not show_all_clicked:
-                        try:
-                            main_image_div = page.query_selector("#ad_view_gallery div[data-action-step='1']")
-                            if main_image_div:
-                                main_image_div.click()
-                                logging.info("Gambar utama galeri diklik (metode 3)")
-                                time.sleep(random.uniform(6, 9))
-                        except Exception as e:
-                            logging.info(f"Tidak bisa klik gambar utama sebagai fallback: {e}")
-
-                    # Proses ambil URL gambar
-                    image_urls = set()
-                    image_divs = page.query_selector_all("div[data-index]")
-                    logging.info(f"Ditemukan {len(image_divs)} div dengan data-index")
-
-                    for div in image_divs:
-                        try:
-                            img = div.query_selector("img")
-                            if img:
-                                src = img.get_attribute("src")
-                                if src and src.startswith(('http', '//')):
-                                    clean_url = src.split('?')[0]
-                                    if not clean_url.startswith('http'):
-                                        clean_url = f"https:{clean_url}"
-                                    image_urls.add(clean_url)
-                        except Exception:
-                            continue
+                        if gallery_opener:
+                            pace(0.8, 2.0)
+                            gallery_opener.click()
+                            logging.info(f"Galeri dibuka karena hanya {len(image_urls)}/{expected or '?'} gambar tanpa klik (fallback)")
+                            wait_until(page, selectors="div[data-index] img[src]", quiet_ms=500, timeout_ms=9000, legacy=7.5, label="gallery")
+                            image_urls = max(image_urls, harvest_gallery(page, url)[0], key=len)
 
                     if image_urls:
+                        stage("images")
                         # Update data dengan URL gambar dan download
                         data["images"] = list(image_urls)
                         self.download_listing_images(url, image_urls, car_id)
@@ -654,7 +493,9 @@ class MudahMyService:
                 page.close()
 
                 if "ERR_TUNNEL_CONNECTION_FAILED" in str(e) or "net::" in str(e):
+                    record_block(METRICS_SERVICE, "proxy_error", self.last_used_proxy)
                     logging.warning("🚨 Proxy mungkin gagal/tidak stabil. Re-inisialisasi browser dengan proxy baru...")
+                    stage("proxy_reinit")
                     self.quit_browser()
                     time.sleep(random.uniform(5, 10))
                     self.init_browser()
@@ -664,6 +505,7 @@ class MudahMyService:
                 attempt += 1
                 if attempt < max_retries:
                     logging.warning(f"Mencoba ulang detail scraping untuk {url} (Attempt {attempt+1})...")
+                    stage("retry_wait")
                     time.sleep(random.uniform(15, 20))
                 else:
                     logging.warning(f"Gagal mengambil detail untuk URL: {url}")
@@ -694,10 +536,12 @@ class MudahMyService:
                     # Ganti: kirim self.context, bukan self.page
                     detail_data = self.scrape_listing_detail(self.context, url)
                     if detail_data:
+                        LISTINGS.labels(METRICS_SERVICE, "scraped").inc()
                         max_db_retries = 3
                         for attempt in range(1, max_db_retries + 1):
                             try:
-                                self.save_to_db(detail_data)
+                                with DB_WRITE.labels(METRICS_SERVICE, "save_listing").time(), span("mudah.save"):
+                                    self.save_to_db(detail_data)
                                 break
                             except Exception as e:
                                 logging.warning(f"⚠️ Attempt {attempt} gagal simpan data untuk {url}: {e}")
@@ -707,6 +551,7 @@ class MudahMyService:
                                     time.sleep(20)
                         total_scraped += 1
                     else:
+                        LISTINGS.labels(METRICS_SERVICE, "failed").inc()
                         logging.warning(f"Gagal mengambil detail untuk URL: {url}")
 
                     delay = random.uniform(15, 35)
@@ -731,8 +576,11 @@ class MudahMyService:
             logging.info(f"Selesai scraping {brand_name} {model_name}. Total data: {total_scraped}")
         finally:
             self.quit_browser()
+            log_report(f"Span report mudah {brand_name} {model_name}")
+            log_wait_report(f"Wait report mudah {brand_name} {model_name}")
         return total_scraped, False
 
+    @recorded_run("scrape", METRICS_SERVICE, get_connection, proxy_env="PROXY_MODE_MUDAH")
     def scrape_all_from_main(self):
         self.reset_scraping()
         self.init_browser()
@@ -745,10 +593,12 @@ class MudahMyService:
                     break
                 detail_data = self.scrape_listing_detail(self.context, href)
                 if detail_data:
+                    LISTINGS.labels(METRICS_SERVICE, "scraped").inc()
                     max_db_retries = 3
                     for attempt in range(1, max_db_retries + 1):
                         try:
-                            self.save_to_db(detail_data)
+                            with DB_WRITE.labels(METRICS_SERVICE, "save_listing").time(), span("mudah.save"):
+                                self.save_to_db(detail_data)
                             break
                         except Exception as e:
                             logging.warning(f"⚠️ Attempt {attempt} gagal simpan data untuk {href}: {e}")
@@ -757,45 +607,16 @@ class MudahMyService:
                             else:
                                 time.sleep(20)
                 else:
+                    LISTINGS.labels(METRICS_SERVICE, "failed").inc()
                     logging.warning(f"Gagal mengambil detail untuk URL: {href}")
                 delay = random.uniform(15, 35)
                 logging.info(f"Menunggu {delay:.1f} detik sebelum listing berikutnya...")
                 time.sleep(delay)
         finally:
             self.quit_browser()
+            log_report("Span report mudah")
+            log_wait_report("Wait report mudah")
 
-    def convert_mileage(self, mileage_str):
-        """Convert mileage string to integer in km"""
-        if not mileage_str or mileage_str == "N/A":
-            return None
-        try:
-            # Handle cases like "<4k"
-            if mileage_str.startswith("<"):
-                return int(mileage_str[1:-1]) * 1000 if "k" in mileage_str else int(mileage_str[1:])
-            
-            # Handle ranges like "10k - 20k"
-            if " - " in mileage_str:
-                parts = mileage_str.split(" - ")
-                max_part = parts[-1]
-                if "k" in max_part:
-                    return int(float(max_part.replace("k", "")) * 1000)
-                return int(max_part)
-                    
-            # Handle ">500k"
-            if mileage_str.startswith(">"):
-                return int(mileage_str[1:-1]) * 1000 if "k" in mileage_str else int(mileage_str[1:])
-                    
-            # Handle normal cases with "k"
-            if "k" in mileage_str:
-                return int(float(mileage_str.replace("k", "")) * 1000)
-                    
-            # Handle pure numbers
-            return int(mileage_str.replace(",", "").replace("km", "").strip())
-            
-        except Exception as e:
-            logging.warning(f"Gagal mengkonversi mileage '{mileage_str}': {e}")
-            return None
-    
     def stop_scraping(self):
         logging.info("Permintaan untuk menghentikan scraping diterima.")
         self.stop_flag = True
@@ -803,32 +624,10 @@ class MudahMyService:
     def reset_scraping(self):
         self.stop_flag = False
         self.listing_count = 0
+        reset_spans()
+        reset_waits()
         logging.info("Scraping direset.")
 
-    def normalize_brand_name(self, brand_str):
-        """Normalize brand name by replacing dashes with spaces and cleaning up format."""
-        if not brand_str or brand_str == "N/A":
-            return brand_str
-        
-        try:
-            # Replace dash with space and clean up
-            normalized = (
-                brand_str.replace('-', ' ')  # Replace dash with space
-                .replace('_', ' ')           # Replace underscore with space (jika ada)
-                .strip()                     # Remove leading/trailing spaces
-                .upper()                     # Convert to uppercase for consistency
-            )
-            
-            # Remove multiple spaces and replace with single space
-            normalized = ' '.join(normalized.split())
-            
-            logging.info(f"Brand normalized: '{brand_str}' -> '{normalized}'")
-            return normalized
-            
-        except Exception as e:
-            logging.warning(f"Error normalizing brand '{brand_str}': {e}")
-            return brand_str
-
     def save_to_db(self, car_data):
         try:
             # Cek apakah listing_url sudah ada di database
@@ -853,7 +652,7 @@ class MudahMyService:
 
             # Konversi mileage sebelum menyimpan
             mileage_str = car_data.get("mileage", "")
-            mileage_conv = self.convert_mileage(mileage_str)
+            mileage_conv = convert_mileage(mileage_str)
 
             # Pastikan mileage telah terkonversi dengan benar sebelum disimpan
             if mileage_conv is None:
@@ -861,9 +660,9 @@ class MudahMyService:
                 mileage_conv = 0  # Jika mileage tidak valid, set ke 0
 
             # ===== TAMBAHAN: Normalize brand name =====
-            normalized_brand = self.normalize_brand_name(car_data.get("brand"))
-            normalized_model = self.normalize_model_variant(car_data.get("model"))
-            normalized_variant = self.normalize_model_variant(car_data.get("variant"))
+            normalized_brand = normalize_brand_name(car_data.get("brand"))
+            normalized_model = normalize_model_variant(car_data.get("model"))
+            normalized_variant = normalize_model_variant(car_data.get("variant"))
             
             if row:
                 car_id, old_price, *null_fields = row
@@ -889,7 +688,7 @@ class MudahMyService:
                     car_data.get("information_ads"),
                     car_data.get("location"),
                     price_int,
-                    self.convert_year_to_int(car_data.get("year")),
+                    convert_year_to_int(car_data.get("year")),
                     mileage_conv,
                     car_data.get("transmission"),
                     car_data.get("seat_capacity"),
@@ -944,7 +743,7 @@ class MudahMyService:
                     car_data.get("information_ads"),
                     car_data.get("location"),
                     price_int,
-                    self.convert_year_to_int(car_data.get("year")),
+                    convert_year_to_int(car_data.get("year")),
                     mileage_conv,
                     car_data.get("transmission"),
                     car_data.get("seat_capacity"),
@@ -1005,6 +804,17 @@ class MudahMyService:
             self.quit_browser()
         except Exception:
             pass
+        if self.image_queue:
+            try:
+                self.image_queue.close()
+            except Exception as e:
+                logging.warning(f"Gagal menutup image queue: {e}")
+        if self.blob_store:
+            try:
+                self.blob_store.log_report()
+                self.blob_store.close()
+            except Exception as e:
+                logging.warning(f"Gagal menutup blob store: {e}")
         try:
             self.cursor.close()
             self.conn.close()
@@ -1047,16 +857,3 @@ class MudahMyService:
         except Exception as e:
             logging.warning(f"Error extracting price from card: {e}")
             return 0
-
-    def convert_year_to_int(self, year_str):
-        """Convert year string to integer, handling special cases like '1995 or older'"""
-        if not year_str or year_str == "N/A":
-            return None
-            
-        # Extract first number from string
-        year_match = re.search(r'\d{4}', year_str)
-        if year_match:
-            year_int = int(year_match.group(0))
-            logging.info(f"Converting year from '{year_str}' to {year_int}")
-            return year_int
-        return None
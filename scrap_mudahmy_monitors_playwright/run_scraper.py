@@ -1,5 +1,7 @@
 import argparse
 from scrap_mudahmy_monitors_playwright.mudahmy_service import MudahMyService
+from common.metrics import start_metrics_server
+from common.profiling import add_profile_arguments, profile_run
 from dotenv import load_dotenv
 
 load_dotenv(override=True)
@@ -7,13 +9,17 @@ load_dotenv(override=True)
 def main():
     parser = argparse.ArgumentParser(description="Scrape data dari mudah.my")
     parser.add_argument('--image-download', choices=['yes', 'no'], default='yes', help="Download images locally atau tidak")
+    parser.add_argument('--metrics-port', type=int, help="Ekspos metrics Prometheus di port ini (default: env METRICS_PORT, kosong = tidak diekspos)")
+    add_profile_arguments(parser)
     args = parser.parse_args()
+    start_metrics_server(args.metrics_port)
 
     download_images_locally = args.image_download == 'yes'
 
     scraper = MudahMyService(download_images_locally=download_images_locally)
     try:
-        scraper.scrape_all_from_main()
+        with profile_run("scrape_mudahmy", args):
+            scraper.scrape_all_from_main()
     finally:
         scraper.close()
 
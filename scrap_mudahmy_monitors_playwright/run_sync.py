@@ -1,12 +1,19 @@
+import argparse
 from scrap_mudahmy_monitors_playwright.mudahmy_service import MudahMyService
+from common.profiling import add_profile_arguments, profile_run
 from dotenv import load_dotenv
 
 load_dotenv()
 
 def main():
+    parser = argparse.ArgumentParser(description="Sinkronisasi data mudah.my ke tabel cars")
+    add_profile_arguments(parser)
+    args = parser.parse_args()
+
     scraper = MudahMyService()
     try:
-        scraper.sync_to_cars()
+        with profile_run("sync_mudahmy", args):
+            scraper.sync_to_cars()
     finally:
         scraper.close()
 
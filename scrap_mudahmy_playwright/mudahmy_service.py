@@ -10,6 +10,10 @@ from dotenv import load_dotenv
 from playwright.sync_api import sync_playwright
 from playwright_stealth import stealth_sync
 from .database import get_connection
+from common.atomic_download import stream_download
+from common.logging_setup import setup_logging
+from common.run_ledger import count as ledger_count, recorded_run, set_exit_reason
+from common.snapshots import SnapshotManager
 from pathlib import Path
 import requests
 import json
@@ -17,8 +21,6 @@ import json
 load_dotenv()
 
 
-START_DATE = datetime.now().strftime('%Y%m%d')
-
 
 # ================== Konfigurasi ENV
 DB_TABLE_SCRAP = os.getenv("DB_TABLE_SCRAP_MUDAH", "url")
@@ -32,33 +34,13 @@ MUDAHMY_LISTING_URL = os.getenv("MUDAHMY_LISTING_URL", "https://www.mudah.my/mal
 base_dir = Path(__file__).resolve().parents[1]
 log_dir = base_dir / "logs"
 log_dir.mkdir(parents=True, exist_ok=True)
-
-log_file = log_dir / f"scrape_mudahmy_{START_DATE}.log"
+snapshots = SnapshotManager("mudahmy", log_dir)
 
 # ================== Setup Logging
-logging.basicConfig(
-    level=logging.INFO,
-    format="%(asctime)s - %(levelname)s - %(message)s",
-    handlers=[
-        logging.FileHandler(log_file),
-        logging.StreamHandler()
-    ]
-)
+setup_logging("scrape_mudahmy", log_dir=log_dir)
 
 def take_screenshot(page, name):
-    try:
-        # Folder error sesuai TANGGAL sekarang (bisa beda dari START_DATE)
-        error_folder_name = datetime.now().strftime('%Y%m%d') + "_error_mudahmy"
-        screenshot_dir = log_dir / error_folder_name
-        screenshot_dir.mkdir(parents=True, exist_ok=True)
-
-        timestamp = datetime.now().strftime('%H%M%S')
-        screenshot_path = screenshot_dir / f"{name}_{timestamp}.png"
-
-        page.screenshot(path=str(screenshot_path))
-        logging.info(f"📸 Screenshot disimpan: {screenshot_path}")
-    except Exception as e:
-        logging.warning(f"❌ Gagal menyimpan screenshot: {e}")
+    snapshots.capture(page, name)
 
 
 def should_use_proxy():
@@ -207,13 +189,11 @@ class MudahMyService:
         """Download single image to file_path."""
         try:
             os.makedirs(os.path.dirname(file_path), exist_ok=True)
-            resp = requests.get(url, timeout=30)
-            if resp.status_code == 200:
-                with open(file_path, "wb") as f:
-                    f.write(resp.content)
-                logging.info(f"Downloaded: {file_path}")
-            else:
-                logging.warning(f"Gagal download: {url} - Status: {resp.status_code}")
+            # Streaming ke .part (resume Range) lalu rename atomik
+            stream_download(url, file_path, timeout=30)
+            logging.info(f"Downloaded: {file_path}")
+        except requests.HTTPError as e:
+            logging.warning(f"Gagal download: {url} - Status: {e.response.status_code if e.response is not None else '-'}")
         except Exception as e:
             logging.error(f"Error download {url}: {str(e)}")
 
@@ -773,6 +753,7 @@ class MudahMyService:
             logging.error(f"❌ Error menyimpan atau memperbarui data ke database: {e}")
             return False, None
 
+    @recorded_run("sync", "sync_mudahmy", get_connection)
     def sync_to_cars(self):
         """
         Sinkronisasi data dari {DB_TABLE_SCRAP} ke {DB_TABLE_PRIMARY}, dan sinkronisasi data perubahan harga dari price_history_scrap ke price_history_combined.
@@ -855,10 +836,12 @@ class MudahMyService:
 
             # Commit perubahan ke database
             self.conn.commit()
+            ledger_count(processed=len(rows))
             logging.info(f"Sinkronisasi data dari {DB_TABLE_SCRAP} ke {DB_TABLE_PRIMARY} selesai.")
             logging.info("Sinkronisasi perubahan harga dari price_history_scrap ke price_history_combined selesai.")
         except Exception as e:
             self.conn.rollback()
+            set_exit_reason(f"error: {e}")
             logging.error(f"Error saat sinkronisasi data: {e}")
 
     def export_data(self):
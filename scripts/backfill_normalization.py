@@ -0,0 +1,266 @@
+#!/usr/bin/env python3
+import argparse
+import io
+import os
+import sys
+import time
+from pathlib import Path
+
+import pandas as pd
+
+# Ensure repository root is on sys.path so module imports work when run from anywhere
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from scrap_carlistmy_monitors_playwright.database import get_connection as get_carlist_conn
+from scrap_mudahmy_monitors_playwright.database import get_connection as get_mudah_conn
+from common.listing_source import SOURCES, tables_for_source
+from common.vectorized_rules import RULES, SITE_RULES, TEXT_ONLY_RULES, check_parity
+
+
+SITES = {
+    "carlist": (get_carlist_conn, "DB_TABLE_SCRAP_CARLIST", "cars_scrap_new"),
+    "mudah": (get_mudah_conn, "DB_TABLE_SCRAP_MUDAH", "cars_scrap_mudahmy"),
+}
+
+TEXT_TYPES = {"text", "character varying", "character"}
+
+EXAMPLES_PER_RULE = 3
+
+
+def column_types(conn, table: str):
+    cursor = conn.cursor()
+    cursor.execute(
+        "SELECT column_name, data_type FROM information_schema.columns WHERE table_name = %s",
+        (table,),
+    )
+    types = dict(cursor.fetchall())
+    cursor.close()
+    return types
+
+
+def select_rules(names, types):
+    """Split requested rules into (runnable, {name: reason skipped}) for one table."""
+    active = []
+    skipped = {}
+    for name in names:
+        target, sources, _ = RULES[name]
+        missing = [col for col in (target, *sources) if col not in types]
+        if missing:
+            skipped[name] = f"missing column(s) {', '.join(missing)}"
+        elif name in TEXT_ONLY_RULES and types[target] not in TEXT_TYPES:
+            skipped[name] = f"{target} is stored as {types[target]}; the raw text is not kept"
+        else:
+            active.append(name)
+    return active, skipped
+
+
+def iter_chunks(conn, table: str, columns, chunk_size: int, start_id=None, end_id=None):
+    """Stream rows with a server-side cursor, one DataFrame per chunk."""
+    conditions = []
+    params = []
+    if start_id is not None:
+        conditions.append("id >= %s")
+        params.append(start_id)
+    if end_id is not None:
+        conditions.append("id <= %s")
+        params.append(end_id)
+    where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+
+    cursor = conn.cursor(name=f"backfill_{table}")
+    cursor.itersize = chunk_size
+    cursor.execute(f"SELECT id, {', '.join(columns)} FROM {table} {where} ORDER BY id", params)
+    try:
+        while True:
+            rows = cursor.fetchmany(chunk_size)
+            if not rows:
+                break
+            yield pd.DataFrame(rows, columns=["id", *columns])
+    finally:
+        cursor.close()
+
+
+def apply_rules(df: pd.DataFrame, active, types, counts, examples):
+    """
+    Run every active rule on the chunk. A rule returning NULL for a row leaves the stored
+    value alone (backfill never blanks data). Returns the changed rows: id + target columns.
+    """
+    updates = pd.DataFrame({"id": df["id"]})
+    changed_any = pd.Series(False, index=df.index)
+    for name in active:
+        target, sources, func = RULES[name]
+        new = func(*(df[col] for col in sources))
+        if types[target] in TEXT_TYPES:
+            new = new.astype("string")
+        new = new.astype(object).where(new.notna(), None)
+        old = df[target].astype(object)
+
+        changed = new.notna() & ~(new == old)
+        counts[name] = counts.get(name, 0) + int(changed.sum())
+        if len(examples.setdefault(name, [])) < EXAMPLES_PER_RULE:
+            for idx in changed[changed].index[: EXAMPLES_PER_RULE - len(examples[name])]:
+                examples[name].append((df.at[idx, "id"], old[idx], new[idx]))
+
+        updates[target] = old.where(~changed, new)
+        changed_any |= changed
+    return updates[changed_any]
+
+
+def write_updates(conn, table: str, stage: str, updates: pd.DataFrame) -> None:
+    """COPY the changed rows into the staging table, then one set-based UPDATE ... FROM."""
+    columns = list(updates.columns)
+    buffer = io.StringIO()
+    updates.to_csv(buffer, index=False, header=False, na_rep="\\N")
+    buffer.seek(0)
+
+    cursor = conn.cursor()
+    try:
+        cursor.copy_expert(
+            f"COPY {stage} ({', '.join(columns)}) FROM STDIN WITH (FORMAT csv, NULL '\\N')",
+            buffer,
+        )
+        assignments = ", ".join(f"{col} = s.{col}" for col in columns if col != "id")
+        cursor.execute(f"UPDATE {table} t SET {assignments} FROM {stage} s WHERE t.id = s.id")
+        cursor.execute(f"TRUNCATE {stage}")
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        cursor.close()
+
+
+def backfill_table(get_conn, table: str, rule_names, args) -> None:
+    reader = get_conn()
+    writer = None if args.dry_run else get_conn()
+    try:
+        types = column_types(reader, table)
+        if not types:
+            print(f"\n=== {table} === table not found, skipped")
+            return
+        active, skipped = select_rules(rule_names, types)
+
+        print(f"\n=== {table} ===")
+        for name, reason in skipped.items():
+            print(f"skip rule {name}: {reason}")
+        if not active:
+            return
+
+        columns = sorted({col for name in active for col in (RULES[name][0], *RULES[name][1])})
+        targets = [RULES[name][0] for name in active]
+        stage = f"{table}_backfill_stage"
+        if writer is not None:
+            cursor = writer.cursor()
+            cursor.execute(
+                f"CREATE TEMP TABLE IF NOT EXISTS {stage} AS SELECT id, {', '.join(targets)} FROM {table} WITH NO DATA"
+            )
+            writer.commit()
+            cursor.close()
+
+        counts = {}
+        examples = {}
+        scanned = 0
+        changed_rows = 0
+        started = time.perf_counter()
+        for chunk in iter_chunks(reader, table, columns, args.chunk_size, args.start_id, args.end_id):
+            updates = apply_rules(chunk, active, types, counts, examples)
+            scanned += len(chunk)
+            changed_rows += len(updates)
+            if writer is not None and not updates.empty:
+                write_updates(writer, table, stage, updates)
+            elapsed = max(time.perf_counter() - started, 1e-9)
+            print(f"  {scanned} rows scanned, {changed_rows} changed ({scanned / elapsed:,.0f} rows/s)")
+
+        elapsed = max(time.perf_counter() - started, 1e-9)
+        print(f"Rows scanned   : {scanned}")
+        print(f"Rows {'to update' if args.dry_run else 'updated'} : {changed_rows}")
+        print(f"Elapsed        : {elapsed:.1f}s ({scanned / elapsed:,.0f} rows/s)")
+        for name in active:
+            print(f"  {name:<22} {counts.get(name, 0)} changed")
+            if args.dry_run:
+                for row_id, old, new in examples.get(name, []):
+                    print(f"      id={row_id}: {old!r} -> {new!r}")
+    finally:
+        reader.close()
+        if writer is not None:
+            writer.close()
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description=(
+            "Re-apply the current normalization rules to stored listings: stream rows in "
+            "chunks, normalize with vectorized pandas operations, COPY changed rows into a "
+            "staging table and update the table in one statement per chunk."
+        )
+    )
+    parser.add_argument(
+        "--site",
+        choices=sorted(SITES),
+        required=True,
+        help="Site whose table is backfilled.",
+    )
+    parser.add_argument(
+        "--table",
+        help="Live table name (default: env DB_TABLE_SCRAP_CARLIST / DB_TABLE_SCRAP_MUDAH).",
+    )
+    parser.add_argument(
+        "--source",
+        choices=SOURCES,
+        default="live",
+        help="Backfill the live table, its _archive table, or both (default: live).",
+    )
+    parser.add_argument(
+        "--rules",
+        help=f"Comma separated rules (available: {', '.join(RULES)}; default: all rules for the site).",
+    )
+    parser.add_argument(
+        "--chunk-size",
+        type=int,
+        default=20000,
+        help="Rows per chunk (default: 20000).",
+    )
+    parser.add_argument(
+        "--start-id",
+        type=int,
+        help="Only rows with id >= start-id.",
+    )
+    parser.add_argument(
+        "--end-id",
+        type=int,
+        help="Only rows with id <= end-id.",
+    )
+    parser.add_argument(
+        "--dry-run",
+        action="store_true",
+        help="Only count (and show examples of) changes, do not write.",
+    )
+    return parser.parse_args()
+
+
+def main() -> int:
+    args = parse_args()
+    get_conn, table_env, table_default = SITES[args.site]
+    live_table = args.table or os.getenv(table_env, table_default)
+
+    rule_names = [r.strip() for r in args.rules.split(",") if r.strip()] if args.rules else list(SITE_RULES[args.site])
+    unknown = [name for name in rule_names if name not in RULES]
+    if unknown:
+        print(f"unknown rule(s): {', '.join(unknown)}", file=sys.stderr)
+        return 2
+
+    # Same answers as the scrapers first: every value that differs gets written
+    mismatches = [m for m in check_parity() if m[0] in rule_names]
+    if mismatches:
+        for name, raw, expected, got in mismatches:
+            print(f"rule {name}: {raw!r} -> scraper {expected!r}, vectorized {got!r}", file=sys.stderr)
+        return 2
+
+    for table, _ in tables_for_source(live_table, args.source):
+        backfill_table(get_conn, table, rule_names, args)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+import argparse
+import os
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+import requests
+
+# Ensure repository root is on sys.path so module imports work when run from anywhere
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from common.image_downloader import ImageDownloader
+
+
+def make_handler(payload: bytes, latency: float):
+    class ImageHandler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"  # keep-alive, like a real CDN
+
+        def do_GET(self):
+            if latency:
+                time.sleep(latency)
+            self.send_response(200)
+            self.send_header("Content-Type", "image/jpeg")
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def log_message(self, format, *args):
+            pass
+
+    return ImageHandler
+
+
+def start_server(payload: bytes, latency: float):
+    server = ThreadingHTTPServer(("127.0.0.1", 0), make_handler(payload, latency))
+    server.daemon_threads = True
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    return server
+
+
+def report(label: str, count: int, total_bytes: int, elapsed: float) -> None:
+    elapsed = max(elapsed, 1e-9)
+    print(
+        f"{label:<12} {count:>6} images  {elapsed:>7.2f}s  "
+        f"{count / elapsed:>8.1f} img/s  {total_bytes / elapsed / (1024 * 1024):>7.2f} MB/s"
+    )
+
+
+def bench_serial(urls, out_dir: Path) -> None:
+    """Baseline: what the image_scrap_* scripts used to do (fresh requests.get per image)."""
+    total_bytes = 0
+    start = time.perf_counter()
+    for idx, url in enumerate(urls):
+        response = requests.get(url, timeout=20)
+        response.raise_for_status()
+        (out_dir / f"{idx}.jpg").write_bytes(response.content)
+        total_bytes += len(response.content)
+    report("serial", len(urls), total_bytes, time.perf_counter() - start)
+
+
+def bench_pooled(urls, out_dir: Path, workers: int, per_host: int) -> None:
+    with ImageDownloader(workers=workers, per_host=per_host, retries=0) as downloader:
+        start = time.perf_counter()
+        results = downloader.download_all((url, str(out_dir / f"{idx}.jpg")) for idx, url in enumerate(urls))
+        elapsed = time.perf_counter() - start
+        stats = downloader.stats()
+    failed = results.count(False)
+    report(f"pooled x{workers}", stats["images_ok"], stats["bytes"], elapsed)
+    if failed:
+        print(f"  {failed} downloads failed")
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description="Benchmark common.image_downloader against a local HTTP server."
+    )
+    parser.add_argument("--images", type=int, default=500, help="Number of images to fetch (default: 500).")
+    parser.add_argument("--size-kb", type=int, default=150, help="Size of each image in KB (default: 150).")
+    parser.add_argument(
+        "--latency-ms",
+        type=float,
+        default=50,
+        help="Artificial server latency per request, to mimic a remote CDN (default: 50).",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        nargs="+",
+        default=[4, 16, 32],
+        help="Worker counts to benchmark (default: 4 16 32).",
+    )
+    parser.add_argument("--per-host", type=int, default=32, help="Per-host connection limit (default: 32).")
+    parser.add_argument("--skip-serial", action="store_true", help="Skip the serial requests.get baseline.")
+    return parser.parse_args()
+
+
+def main() -> int:
+    args = parse_args()
+    payload = os.urandom(args.size_kb * 1024)
+    server = start_server(payload, args.latency_ms / 1000.0)
+    host, port = server.server_address
+    urls = [f"http://{host}:{port}/img/{idx}.jpg" for idx in range(args.images)]
+
+    print(f"{args.images} images x {args.size_kb} KB, {args.latency_ms} ms latency, server {host}:{port}")
+    try:
+        with tempfile.TemporaryDirectory(prefix="bench_imgdl_") as tmp:
+            if not args.skip_serial:
+                out_dir = Path(tmp) / "serial"
+                out_dir.mkdir()
+                bench_serial(urls, out_dir)
+            for workers in args.workers:
+                out_dir = Path(tmp) / f"pooled_{workers}"
+                out_dir.mkdir()
+                bench_pooled(urls, out_dir, workers, args.per_host)
+    finally:
+        server.shutdown()
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,172 @@
+#!/usr/bin/env python3
+import argparse
+import logging
+import random
+import re
+import sys
+import time
+from pathlib import Path
+
+# Ensure repository root is on sys.path so module imports work when run from anywhere
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from common import normalization
+
+
+BRANDS = ["Perodua", "Proton", "Toyota", "Honda", "Mercedes-Benz", "BMW", "Land_Rover", "Mini"]
+MODELS = ["Myvi", "Axia", "X70", "Saga", "Vios", "City", "C-Class", "3 Series", "Range Rover (Evoque)", "Cooper"]
+VARIANTS = ["1.5 AV", "G (A)", "N/A", "-", "1.5 V-Spec", "C200 AMG Line", "320i M Sport", "S_Turbo", "2.0 Hybrid"]
+YEARS = ["2019", "2021", "1995 or older", "N/A", "2016"]
+MILEAGES = ["<4k", "10k - 20k", ">500k", "85,000", "95000 km", "N/A", "35k"]
+
+
+# Pre-refactor implementations (regex compiled per call, INFO log per call) as the baseline
+def legacy_normalize_model_variant(text):
+    if not text or str(text).strip() in ["N/A", "-", ""]:
+        return "NO VARIANT"
+    cleaned = re.sub(r'[\-\(\)_]', ' ', text)
+    cleaned = re.sub(r'[^\w\s]', '', cleaned)
+    cleaned = ' '.join(cleaned.split())
+    cleaned = cleaned.upper()
+    return cleaned if cleaned else "NO VARIANT"
+
+
+def legacy_normalize_brand_name(brand_str):
+    if not brand_str or brand_str == "N/A":
+        return brand_str
+    normalized = brand_str.replace('-', ' ').replace('_', ' ').strip().upper()
+    normalized = ' '.join(normalized.split())
+    logging.info(f"Brand normalized: '{brand_str}' -> '{normalized}'")
+    return normalized
+
+
+def legacy_convert_year_to_int(year_str):
+    if not year_str or year_str == "N/A":
+        return None
+    year_match = re.search(r'\d{4}', year_str)
+    if year_match:
+        year_int = int(year_match.group(0))
+        logging.info(f"Converting year from '{year_str}' to {year_int}")
+        return year_int
+    return None
+
+
+def legacy_convert_mileage(mileage_str):
+    if not mileage_str or mileage_str == "N/A":
+        return None
+    try:
+        if mileage_str.startswith("<"):
+            return int(mileage_str[1:-1]) * 1000 if "k" in mileage_str else int(mileage_str[1:])
+        if " - " in mileage_str:
+            max_part = mileage_str.split(" - ")[-1]
+            if "k" in max_part:
+                return int(float(max_part.replace("k", "")) * 1000)
+            return int(max_part)
+        if mileage_str.startswith(">"):
+            return int(mileage_str[1:-1]) * 1000 if "k" in mileage_str else int(mileage_str[1:])
+        if "k" in mileage_str:
+            return int(float(mileage_str.replace("k", "")) * 1000)
+        return int(mileage_str.replace(",", "").replace("km", "").strip())
+    except Exception as e:
+        logging.warning(f"Gagal mengkonversi mileage '{mileage_str}': {e}")
+        return None
+
+
+def make_rows(count: int, seed: int):
+    rng = random.Random(seed)
+    return [
+        (rng.choice(BRANDS), rng.choice(MODELS), rng.choice(VARIANTS), rng.choice(YEARS), rng.choice(MILEAGES))
+        for _ in range(count)
+    ]
+
+
+def run(rows, brand_fn, variant_fn, year_fn, mileage_fn):
+    start = time.perf_counter()
+    for brand, model, variant, year, mileage in rows:
+        brand_fn(brand)
+        variant_fn(model)
+        variant_fn(variant)
+        year_fn(year)
+        mileage_fn(mileage)
+    return time.perf_counter() - start
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description="Micro-benchmark the shared normalization functions against the old per-service copies."
+    )
+    parser.add_argument(
+        "--rows",
+        type=int,
+        default=200_000,
+        help="Synthetic rows to normalize (default: 200000).",
+    )
+    parser.add_argument(
+        "--log-level",
+        default="INFO",
+        help="Root log level during the run; INFO mirrors production (default: INFO).",
+    )
+    parser.add_argument(
+        "--seed",
+        type=int,
+        default=42,
+        help="Random seed for the synthetic rows.",
+    )
+    return parser.parse_args()
+
+
+def main() -> int:
+    args = parse_args()
+    # Production logs go to file/stream handlers; a NullHandler keeps the formatting cost
+    # of each record without flooding the terminal
+    logging.basicConfig(level=args.log_level.upper(), handlers=[logging.NullHandler()])
+
+    rows = make_rows(args.rows, args.seed)
+    calls = args.rows * 5
+
+    # Same answers first: the benchmark is meaningless if the shared module drifted
+    for brand, model, variant, year, mileage in rows[:2000]:
+        assert normalization.normalize_brand_name(brand) == legacy_normalize_brand_name(brand)
+        assert normalization.normalize_model_variant(model) == legacy_normalize_model_variant(model)
+        assert normalization.normalize_model_variant(variant) == legacy_normalize_model_variant(variant)
+        assert normalization.convert_year_to_int(year) == legacy_convert_year_to_int(year)
+        assert normalization.convert_mileage(mileage) == legacy_convert_mileage(mileage)
+
+    legacy = (
+        legacy_normalize_brand_name,
+        legacy_normalize_model_variant,
+        legacy_convert_year_to_int,
+        legacy_convert_mileage,
+    )
+    shared = (
+        normalization.normalize_brand_name,
+        normalization.normalize_model_variant,
+        normalization.convert_year_to_int,
+        normalization.convert_mileage,
+    )
+    # Unique values: every call is a cache miss, which isolates the precompiled-regex / logging gain
+    unique_rows = [
+        (f"{brand}-{i}", f"{model} {i}", f"{variant}_{i}", f"{year} {i}", str(1000 + i))
+        for i, (brand, model, variant, year, _) in enumerate(rows)
+    ]
+
+    print(f"rows={args.rows} calls={calls}")
+    for scenario, data in (("repeated values", rows), ("unique values", unique_rows)):
+        baseline = run(data, *legacy)
+        normalization.clear_caches()
+        results = [("legacy (re per call, INFO log)", baseline), ("shared, cold cache", run(data, *shared))]
+        if data is rows:
+            results.append(("shared, warm cache", run(data, *shared)))
+        print(f"\n[{scenario}]")
+        for label, elapsed in results:
+            print(f"{label:<32} {elapsed * 1e9 / calls:8.0f} ns/call  {baseline / elapsed:6.1f}x")
+        for name, stats in normalization.cache_stats().items():
+            if stats["hits"] or stats["misses"]:
+                print(f"  {name:<24} hits={stats['hits']} misses={stats['misses']} size={stats['size']}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+import argparse
+import os
+import sys
+import time
+from pathlib import Path
+
+from filter_interior_yolo import (
+    EXPORT_FORMATS,
+    iter_images,
+    load_model,
+    measure_throughput,
+    predict_arrays,
+    set_inference_threads,
+    tuning_grid,
+)
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description=(
+            "Benchmark the YOLO interior filter on CPU: img/s of the old serial path "
+            "(path-based predict) vs the prefetching pipeline for each batch/worker setting."
+        )
+    )
+    parser.add_argument(
+        "--input-dir",
+        type=Path,
+        required=True,
+        help="Folder with sample images.",
+    )
+    parser.add_argument(
+        "--model",
+        default="yolo11n.pt",
+        help="YOLO model path or name (default: yolo11n.pt).",
+    )
+    parser.add_argument(
+        "--export",
+        action="append",
+        choices=sorted(EXPORT_FORMATS),
+        default=[],
+        help="Also benchmark an exported model format (repeatable).",
+    )
+    parser.add_argument(
+        "--limit",
+        type=int,
+        default=128,
+        help="Number of sample images (default: 128).",
+    )
+    parser.add_argument(
+        "--imgsz",
+        type=int,
+        default=640,
+        help="Inference image size.",
+    )
+    parser.add_argument(
+        "--conf",
+        type=float,
+        default=0.05,
+        help="Confidence threshold.",
+    )
+    parser.add_argument(
+        "--iou",
+        type=float,
+        default=0.45,
+        help="IoU threshold for NMS.",
+    )
+    parser.add_argument(
+        "--device",
+        default="cpu",
+        help="Device (default: cpu).",
+    )
+    return parser.parse_args()
+
+
+def serial_throughput(model, paths, imgsz, conf, iou, device) -> float:
+    """Baseline: Ultralytics reads and decodes each file itself, batch 16, default threads."""
+    set_inference_threads(os.cpu_count() or 1)
+    start = time.perf_counter()
+    for i in range(0, len(paths), 16):
+        predict_arrays(model, [str(p) for p in paths[i : i + 16]], conf, iou, imgsz, device)
+    return len(paths) / max(time.perf_counter() - start, 1e-9)
+
+
+def main() -> int:
+    args = parse_args()
+    input_dir = args.input_dir.expanduser().resolve()
+    if not input_dir.exists():
+        print(f"input dir not found: {input_dir}", file=sys.stderr)
+        return 2
+
+    paths = list(iter_images(input_dir, None))[: args.limit]
+    if not paths:
+        print("no images found")
+        return 0
+
+    print(f"images={len(paths)} cores={os.cpu_count()} imgsz={args.imgsz}")
+    for export_format in [None, *args.export]:
+        model, key = load_model(args.model, export_format, args.imgsz)
+        # Warm-up so the first measurement does not include lazy initialisation
+        predict_arrays(model, [str(p) for p in paths[:2]], args.conf, args.iou, args.imgsz, args.device)
+
+        print(f"\n[{key}]")
+        rate = serial_throughput(model, paths, args.imgsz, args.conf, args.iou, args.device)
+        print(f"{'serial':<40} {rate:8.1f} img/s")
+        for batch, decode, threads in tuning_grid():
+            rate = measure_throughput(
+                model, paths, args.imgsz, batch, decode, threads, args.conf, args.iou, args.device
+            )
+            label = f"batch={batch} decode_workers={decode} threads={threads}"
+            print(f"{label:<40} {rate:8.1f} img/s")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
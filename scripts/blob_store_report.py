@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+import argparse
+import os
+import sys
+from pathlib import Path
+
+# Ensure repository root is on sys.path so module imports work when run from anywhere
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from common.blob_store import BlobStore, default_blob_root
+
+
+IMAGE_EXTS = (".jpg", ".jpeg", ".png", ".webp", ".bmp", ".tif", ".tiff")
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description=(
+            "Report dedup stats of the content-addressed image store, optionally "
+            "ingesting an existing brand/model/variant/year/id tree first."
+        )
+    )
+    parser.add_argument(
+        "--image-root",
+        type=Path,
+        required=True,
+        help="Image tree root (e.g. images_carlist or images_mudah).",
+    )
+    parser.add_argument(
+        "--blob-root",
+        type=Path,
+        help="Blob store root (default: <image-root>.blobs or env IMAGE_BLOB_ROOT).",
+    )
+    parser.add_argument(
+        "--ingest",
+        action="store_true",
+        help="Hash every existing image into the store and replace it with a hardlink.",
+    )
+    return parser.parse_args()
+
+
+def ingest(store: BlobStore, image_root: Path) -> int:
+    count = 0
+    for dirpath, _, filenames in os.walk(image_root):
+        for name in filenames:
+            if not name.lower().endswith(IMAGE_EXTS):
+                continue
+            path = Path(dirpath) / name
+            try:
+                store.put_file(path, dest_path=path)
+                count += 1
+            except OSError as e:
+                print(f"skip {path}: {e}")
+            if count and count % 1000 == 0:
+                print(f"ingested {count} files...")
+    return count
+
+
+def main() -> int:
+    args = parse_args()
+    image_root = args.image_root.expanduser().resolve()
+    if not image_root.exists():
+        print(f"image root not found: {image_root}")
+        return 2
+
+    store = BlobStore(args.blob_root or default_blob_root(image_root))
+    try:
+        if args.ingest:
+            print(f"ingested {ingest(store, image_root)} files from {image_root}")
+
+        report = store.dedup_report()
+        mb = 1024 * 1024
+        print(f"blob root      : {store.root}")
+        print(f"logical files  : {report['logical_files']}")
+        print(f"unique blobs   : {report['unique_blobs']}")
+        print(f"known urls     : {report['known_urls']}")
+        print(f"logical size   : {report['logical_bytes'] / mb:.1f} MB")
+        print(f"physical size  : {report['physical_bytes'] / mb:.1f} MB")
+        print(f"saved          : {report['saved_bytes'] / mb:.1f} MB")
+        print(f"dedup ratio    : {report['dedup_ratio']}x")
+    finally:
+        store.close()
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
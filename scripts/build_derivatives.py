@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+import argparse
+import logging
+import sys
+from pathlib import Path
+
+# Ensure repository root is on sys.path so module imports work when run from anywhere
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from common.derivatives import DEFAULT_SPECS, DerivativeGenerator, parse_specs
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description=(
+            "Generate thumbnails and dataset-resolution copies for an image tree. "
+            "Incremental: only new or changed sources are rendered."
+        )
+    )
+    parser.add_argument(
+        "--image-root",
+        type=Path,
+        required=True,
+        help="Image tree root (e.g. images_carlist or images_mudah).",
+    )
+    parser.add_argument(
+        "--output-root",
+        type=Path,
+        help="Derivative root (default: <image-root>.derivatives or env IMAGE_DERIVATIVE_ROOT).",
+    )
+    parser.add_argument(
+        "--specs",
+        default=",".join(f"{name}={size}:{quality}" for name, (size, quality) in DEFAULT_SPECS.items()),
+        help="Comma separated name=max_side:quality (default: %(default)s).",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        help="Worker processes (default: all cores).",
+    )
+    return parser.parse_args()
+
+
+def main() -> int:
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+    args = parse_args()
+    image_root = args.image_root.expanduser().resolve()
+    if not image_root.exists():
+        print(f"image root not found: {image_root}")
+        return 2
+
+    generator = DerivativeGenerator(
+        image_root,
+        specs=parse_specs(args.specs),
+        workers=args.workers,
+        output_root=args.output_root,
+    )
+    stats = generator.run()
+    print(f"generated={stats['generated']} skipped={stats['skipped']} failed={stats['failed']}")
+    return 1 if stats["failed"] else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -12,6 +12,8 @@ if str(ROOT) not in sys.path:
 
 from scrap_carlistmy_monitors_playwright.database import get_connection as get_carlist_conn
 from scrap_mudahmy_monitors_playwright.database import get_connection as get_mudah_conn
+from common.listing_source import SOURCES, count_listings, iter_listings
+from common.file_inventory import REFRESH_MODES, open_inventory
 
 
 def normalize_segment(value: str) -> str:
@@ -46,43 +48,37 @@ def build_folder(base_folder: Path, brand: str, model: str, variant: str, year,
     )
 
 
-def index_existing_folders(base_folder: Path):
-    """
-    Build a mapping from numeric folder name (car_id) to the actual folder path.
-    This avoids repeated rglob for every row.
-    """
-    mapping = {}
-    if not base_folder.exists():
-        return mapping
-    for path in base_folder.rglob("*"):
-        if path.is_dir() and path.name.isdigit():
-            mapping[int(path.name)] = path
-    return mapping
-
-
-def check_site(name: str, conn, table: str, base_folder: Path, limit: int = None):
-    cursor = conn.cursor()
-    cursor.execute(
-        f"""
-        SELECT id, brand, model, variant, year, images
-        FROM {table}
-        WHERE images IS NOT NULL AND images != ''
-        """
-    )
-    rows = cursor.fetchall()
+def check_site(
+    name: str,
+    conn,
+    table: str,
+    base_folder: Path,
+    limit: int = None,
+    source: str = "live",
+    refresh: str = "incremental",
+):
+    total_rows = count_listings(conn, table, source=source)
+    rows = iter_listings(conn, table, source=source, limit=limit)
 
-    total_rows = len(rows)
     complete = []
     partial = []
     missing = []
     json_error = []
 
-    existing_folders = index_existing_folders(base_folder)
-
-    for idx, (car_id, brand, model, variant, year, images_str) in enumerate(rows, start=1):
-        if limit and idx > limit:
-            break
+    # Folder/file lookups come from the inventory index instead of stat/rglob per row
+    inventory = open_inventory(base_folder, refresh=refresh)
+    if inventory.last_refresh:
+        stats = inventory.last_refresh
+        print(
+            f"[{name}] inventory refresh: {stats['dirs_scanned']}/{stats['dirs']} dirs scanned, "
+            f"+{stats['files_added']} -{stats['files_removed']} files in {stats['elapsed_sec']}s"
+        )
+    known_dirs = inventory.dir_paths()
+    file_counts = inventory.file_counts()
+    existing_folders = inventory.listing_dirs()
+    inventory.close()
 
+    for car_id, brand, model, variant, year, images_str, _ in rows:
         try:
             images_list = json.loads(images_str)
             expected = len(images_list)
@@ -90,26 +86,25 @@ def check_site(name: str, conn, table: str, base_folder: Path, limit: int = None
             json_error.append(car_id)
             continue
 
-        folder = build_folder(base_folder, brand, model, variant, year, car_id)
+        folder = build_folder(Path(), brand, model, variant, year, car_id).as_posix()
         legacy_folder = (
-            base_folder
-            / normalize_segment(brand)
+            Path(normalize_segment(brand))
             / normalize_segment(model)
             / normalize_segment(variant)
             / str(car_id)
-        )
-        if not folder.exists() and legacy_folder.exists():
+        ).as_posix()
+        if folder not in known_dirs and legacy_folder in known_dirs:
             folder = legacy_folder
-        if not folder.exists():
+        if folder not in known_dirs:
             # Fallback: use any folder that matches the car_id regardless of brand/model/variant
             folder = existing_folders.get(car_id)
 
-        if folder is None or not Path(folder).exists():
+        if folder is None:
             missing.append(car_id)
             continue
 
-        # Count files only (ignore subdirs)
-        actual = len([p for p in Path(folder).iterdir() if p.is_file()])
+        # Count image files directly in the folder (ignore subdirs)
+        actual = file_counts.get(folder, 0)
 
         if expected == 0:
             # Nothing to download, treat as complete
@@ -121,7 +116,7 @@ def check_site(name: str, conn, table: str, base_folder: Path, limit: int = None
         else:
             partial.append(car_id)
 
-    print(f"\n=== {name.upper()} ===")
+    print(f"\n=== {name.upper()} ({source}) ===")
     print(f"Rows checked   : {len(complete) + len(partial) + len(missing) + len(json_error)} / {total_rows}")
     print(f"Complete       : {len(complete)}")
     print(f"Partial        : {len(partial)}")
@@ -135,8 +130,6 @@ def check_site(name: str, conn, table: str, base_folder: Path, limit: int = None
     if json_error:
         print(f"JSON error IDs (first 20): {json_error[:20]}")
 
-    cursor.close()
-
 
 def main():
     parser = argparse.ArgumentParser(description="Check downloaded images against database records.")
@@ -161,6 +154,12 @@ def main():
         type=int,
         help="Optional limit of rows to scan (per site)",
     )
+    parser.add_argument(
+        "--source",
+        choices=SOURCES,
+        default="live",
+        help="Rows to check: live table, its _archive table, or both",
+    )
     parser.add_argument(
         "--carlist-folder",
         default="images_carlist",
@@ -171,6 +170,12 @@ def main():
         default="images_mudah",
         help="Base folder for Mudah images",
     )
+    parser.add_argument(
+        "--refresh",
+        choices=REFRESH_MODES,
+        default="incremental",
+        help="How to update the file inventory index before checking (default: incremental)",
+    )
     args = parser.parse_args()
 
     if args.site in ("carlist", "both"):
@@ -182,6 +187,8 @@ def main():
                 args.carlist_table,
                 Path(args.carlist_folder),
                 limit=args.limit,
+                source=args.source,
+                refresh=args.refresh,
             )
         finally:
             conn.close()
@@ -195,6 +202,8 @@ def main():
                 args.mudah_table,
                 Path(args.mudah_folder),
                 limit=args.limit,
+                source=args.source,
+                refresh=args.refresh,
             )
         finally:
             conn.close()
@@ -1,14 +1,15 @@
 #!/usr/bin/env python3
 import argparse
+import sys
 from collections import defaultdict
 from pathlib import Path
 
+# Ensure repository root is on sys.path so module imports work when run from anywhere
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
 
-IMAGE_EXTS = (".jpg", ".jpeg", ".png", ".webp", ".bmp", ".tif", ".tiff")
-
-
-def is_image_file(path: Path) -> bool:
-    return path.is_file() and path.name.lower().endswith(IMAGE_EXTS)
+from common.file_inventory import REFRESH_MODES, open_inventory
 
 
 def parse_args() -> argparse.Namespace:
@@ -29,6 +30,12 @@ def parse_args() -> argparse.Namespace:
         default=3,
         help="Number of leading path parts to group by (default: 3).",
     )
+    parser.add_argument(
+        "--refresh",
+        choices=REFRESH_MODES,
+        default="incremental",
+        help="How to update the file inventory index before counting (default: incremental).",
+    )
     return parser.parse_args()
 
 
@@ -40,17 +47,13 @@ def main() -> int:
         return 2
 
     counts = defaultdict(int)
-    for path in root.rglob("*"):
-        if not is_image_file(path):
-            continue
-        try:
-            rel_parts = path.relative_to(root).parts
-        except ValueError:
-            continue
-        if len(rel_parts) < args.depth:
-            continue
-        bucket = Path(*rel_parts[: args.depth])
-        counts[str(bucket)] += 1
+    with open_inventory(root, refresh=args.refresh) as inventory:
+        for rel, _, _ in inventory.iter_files():
+            rel_parts = rel.split("/")
+            if len(rel_parts) < args.depth:
+                continue
+            bucket = Path(*rel_parts[: args.depth])
+            counts[str(bucket)] += 1
 
     if not counts:
         print("no images found")
@@ -0,0 +1,312 @@
+#!/usr/bin/env python3
+import argparse
+import json
+import os
+import sqlite3
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+from tqdm import tqdm
+
+# Ensure repository root is on sys.path so module imports work when run from anywhere
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from common.move_journal import MoveJournal, new_run_id, unique_path
+
+
+IMAGE_EXTS = (".jpg", ".jpeg", ".png", ".webp", ".bmp", ".tif", ".tiff")
+
+HASH_SIZE = 8
+DCT_SIZE = 32
+
+
+def is_image_file(path: Path) -> bool:
+    return path.is_file() and path.name.lower().endswith(IMAGE_EXTS)
+
+
+def iter_images(root: Path, blacklist_dir: Optional[Path]):
+    for path in root.rglob("*"):
+        if blacklist_dir is not None and blacklist_dir in path.parents:
+            continue
+        if is_image_file(path):
+            yield path
+
+
+def _dct_matrix(n: int) -> np.ndarray:
+    k = np.arange(n)
+    matrix = np.cos(np.pi * (2 * k[None, :] + 1) * k[:, None] / (2 * n))
+    matrix[0] *= 1 / np.sqrt(2)
+    return matrix * np.sqrt(2 / n)
+
+
+DCT = _dct_matrix(DCT_SIZE)
+
+
+def phash(path: str) -> Tuple[str, Optional[int], int, int, Optional[str]]:
+    """
+    64-bit DCT perceptual hash. Runs in a worker process.
+    Returns (path, hash, width, height, error).
+    """
+    from PIL import Image
+
+    try:
+        with Image.open(path) as img:
+            width, height = img.size
+            # JPEG draft decode at reduced scale: we only need 32x32 anyway
+            img.draft("L", (DCT_SIZE * 4, DCT_SIZE * 4))
+            small = img.convert("L").resize((DCT_SIZE, DCT_SIZE), Image.LANCZOS)
+        pixels = np.asarray(small, dtype=np.float64)
+        coeffs = DCT @ pixels @ DCT.T
+        low = coeffs[:HASH_SIZE, :HASH_SIZE].flatten()
+        # Median without the DC term, which only carries overall brightness
+        bits = low > np.median(low[1:])
+        value = 0
+        for bit in bits:
+            value = (value << 1) | int(bit)
+        return path, value, width, height, None
+    except Exception as exc:
+        return path, None, 0, 0, str(exc)
+
+
+class BKTree:
+    """BK-tree over Hamming distance; queries only visit subtrees that can be within radius."""
+
+    def __init__(self):
+        self.root = None  # node = [hash, item, {distance: child}]
+
+    def add(self, value: int, item) -> None:
+        if self.root is None:
+            self.root = [value, item, {}]
+            return
+        node = self.root
+        while True:
+            dist = bin(node[0] ^ value).count("1")
+            child = node[2].get(dist)
+            if child is None:
+                node[2][dist] = [value, item, {}]
+                return
+            node = child
+
+    def find_nearest(self, value: int, radius: int):
+        """Return (distance, item) of the closest entry within radius, or None."""
+        if self.root is None:
+            return None
+        best = None
+        stack = [self.root]
+        while stack:
+            node = stack.pop()
+            dist = bin(node[0] ^ value).count("1")
+            if dist <= radius and (best is None or dist < best[0]):
+                best = (dist, node[1])
+                if dist == 0:
+                    return best
+            low, high = dist - radius, dist + radius
+            for edge, child in node[2].items():
+                if low <= edge <= high:
+                    stack.append(child)
+        return best
+
+
+def open_cache(path: Optional[Path]):
+    if path is None:
+        return None
+    conn = sqlite3.connect(str(path))
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS phash (
+            path TEXT PRIMARY KEY,
+            mtime_ns INTEGER NOT NULL,
+            size INTEGER NOT NULL,
+            hash TEXT NOT NULL,
+            width INTEGER,
+            height INTEGER
+        )
+        """
+    )
+    return conn
+
+
+def compute_hashes(images: List[Path], workers: int, cache) -> Dict[Path, Tuple[int, int, int, int]]:
+    """Return {path: (hash, width, height, file_size)}; unchanged files come from the cache."""
+    hashes = {}
+    todo = []
+    stats = {}
+    for path in images:
+        st = path.stat()
+        stats[path] = st
+        if cache is not None:
+            row = cache.execute(
+                "SELECT hash, width, height FROM phash WHERE path = ? AND mtime_ns = ? AND size = ?",
+                (str(path), st.st_mtime_ns, st.st_size),
+            ).fetchone()
+            if row:
+                hashes[path] = (int(row[0], 16), row[1], row[2], st.st_size)
+                continue
+        todo.append(path)
+
+    if todo:
+        new_rows = []
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            results = pool.map(phash, [str(p) for p in todo], chunksize=64)
+            for path_str, value, width, height, error in tqdm(results, total=len(todo), desc="Hashing", unit="img"):
+                path = Path(path_str)
+                if value is None:
+                    print(f"skip {path}: {error}", file=sys.stderr)
+                    continue
+                st = stats[path]
+                hashes[path] = (value, width, height, st.st_size)
+                new_rows.append((path_str, st.st_mtime_ns, st.st_size, f"{value:016x}", width, height))
+        if cache is not None and new_rows:
+            with cache:
+                cache.executemany("INSERT OR REPLACE INTO phash VALUES (?, ?, ?, ?, ?, ?)", new_rows)
+
+    return hashes
+
+
+def cluster(hashes: Dict[Path, Tuple[int, int, int, int]], threshold: int) -> Dict[Path, List[Tuple[Path, int]]]:
+    """
+    Greedy clustering: best copies (most pixels, then largest file) are visited first and
+    become representatives; every later image within `threshold` bits joins the nearest one.
+    """
+    order = sorted(hashes, key=lambda p: (-(hashes[p][1] * hashes[p][2]), -hashes[p][3], str(p)))
+    tree = BKTree()
+    clusters: Dict[Path, List[Tuple[Path, int]]] = {}
+    for path in tqdm(order, desc="Indexing", unit="img"):
+        value = hashes[path][0]
+        match = tree.find_nearest(value, threshold)
+        if match is None:
+            tree.add(value, path)
+            clusters[path] = []
+        else:
+            dist, rep = match
+            clusters[rep].append((path, dist))
+    return {rep: dups for rep, dups in clusters.items() if dups}
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description=(
+            "Find near-duplicate images with perceptual hashes and report them or move "
+            "the duplicates (keeping the best copy of each cluster) into a blacklist folder."
+        )
+    )
+    parser.add_argument(
+        "--input-dir",
+        type=Path,
+        required=True,
+        help="Root folder to scan for images.",
+    )
+    parser.add_argument(
+        "--blacklist-dir",
+        type=Path,
+        help="Destination folder for duplicates. Without it only a report is produced.",
+    )
+    parser.add_argument(
+        "--threshold",
+        type=int,
+        default=6,
+        help="Max Hamming distance (of 64 bits) to treat two images as duplicates (default: 6).",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=os.cpu_count(),
+        help="Worker processes for hashing (default: all cores).",
+    )
+    parser.add_argument(
+        "--cache",
+        type=Path,
+        help="SQLite file to cache hashes by path/mtime/size between runs.",
+    )
+    parser.add_argument(
+        "--report",
+        type=Path,
+        help="Write clusters as JSON to this file.",
+    )
+    parser.add_argument(
+        "--copy",
+        action="store_true",
+        help="Copy instead of move.",
+    )
+    parser.add_argument(
+        "--dry-run",
+        action="store_true",
+        help="Print actions without moving files.",
+    )
+    parser.add_argument(
+        "--run-id",
+        help="Run id recorded in the blacklist journal (default: timestamp based).",
+    )
+    return parser.parse_args()
+
+
+def main() -> int:
+    args = parse_args()
+    input_dir = args.input_dir.expanduser().resolve()
+    blacklist_dir = args.blacklist_dir.expanduser().resolve() if args.blacklist_dir else None
+
+    if not input_dir.exists():
+        print(f"input dir not found: {input_dir}", file=sys.stderr)
+        return 2
+
+    images = list(iter_images(input_dir, blacklist_dir))
+    if not images:
+        print("no images found")
+        return 0
+
+    cache = open_cache(args.cache)
+    try:
+        hashes = compute_hashes(images, args.workers, cache)
+    finally:
+        if cache is not None:
+            cache.close()
+
+    clusters = cluster(hashes, args.threshold)
+    duplicates = sum(len(dups) for dups in clusters.values())
+
+    if args.report:
+        report = [
+            {
+                "keep": str(rep),
+                "duplicates": [{"path": str(path), "distance": dist} for path, dist in dups],
+            }
+            for rep, dups in sorted(clusters.items(), key=lambda item: -len(item[1]))
+        ]
+        args.report.write_text(json.dumps(report, indent=2))
+
+    moved = 0
+    run_id = args.run_id or new_run_id()
+    if blacklist_dir is not None:
+        blacklist_dir.mkdir(parents=True, exist_ok=True)
+        journal = MoveJournal.for_blacklist(blacklist_dir)
+        for rep, dups in clusters.items():
+            for path, dist in dups:
+                try:
+                    rel = path.relative_to(input_dir)
+                except ValueError:
+                    rel = Path(path.name)
+
+                if args.dry_run:
+                    print(f"DRY RUN: move {path} -> {unique_path(blacklist_dir / rel)} (dup of {rep}, distance {dist})")
+                else:
+                    journal.move(path, blacklist_dir / rel, run_id, "near-duplicate", copy=args.copy)
+                moved += 1
+        journal.close()
+    else:
+        for rep, dups in sorted(clusters.items(), key=lambda item: -len(item[1]))[:20]:
+            print(f"{rep} <- {len(dups)} duplicates")
+
+    print(
+        f"done. images={len(hashes)} clusters={len(clusters)} duplicates={duplicates} "
+        f"moved={moved} ratio={duplicates / max(len(hashes), 1):.2%} run_id={run_id}"
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
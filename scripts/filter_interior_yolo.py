@@ -1,17 +1,36 @@
 #!/usr/bin/env python3
 import argparse
-import shutil
+import hashlib
+import json
+import multiprocessing
+import os
+import sqlite3
 import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
 from pathlib import Path
 
-from typing import Iterable, Optional, Sequence
+from typing import Dict, Iterable, List, Optional, Sequence
 
-from ultralytics import YOLO
 from tqdm import tqdm
 
+# Ensure repository root is on sys.path so module imports work when run from anywhere
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from common.image_decode import decode_image
+from common.move_journal import MoveJournal, new_run_id, unique_path
+
 
 IMAGE_EXTS = (".jpg", ".jpeg", ".png", ".webp", ".bmp", ".tif", ".tiff")
 
+# Bump when extract_detections or the decode path changes what a cached row means.
+# v2: normalized xyxyn boxes from draft-decoded arrays (v1 rows: pixel xyxy from full decode)
+DETECTIONS_FORMAT = 2
+
 
 def is_image_file(path: Path) -> bool:
     return path.is_file() and path.name.lower().endswith(IMAGE_EXTS)
@@ -39,26 +58,253 @@ def find_class_ids(names, targets: Sequence[str]) -> set[int]:
     return class_ids
 
 
-def has_any_class(result, class_ids: Iterable[int]) -> bool:
+def extract_detections(result) -> List[List[float]]:
+    """
+    Detections as [class_id, conf, x1, y1, x2, y2] so they can be re-thresholded later.
+    Boxes are normalized (0-1) so they do not depend on the decode resolution.
+    """
     if result.boxes is None or len(result.boxes) == 0:
-        return False
+        return []
+    return [
+        [int(cls_id), round(float(conf), 4), *[round(float(v), 4) for v in box]]
+        for cls_id, conf, box in zip(
+            result.boxes.cls.tolist(), result.boxes.conf.tolist(), result.boxes.xyxyn.tolist()
+        )
+    ]
+
+
+def has_any_class(detections: List[List[float]], class_ids: Iterable[int], conf: float) -> bool:
     class_ids = set(class_ids)
-    for cls_id in result.boxes.cls.tolist():
-        if int(cls_id) in class_ids:
+    for det in detections:
+        if int(det[0]) in class_ids and det[1] >= conf:
             return True
     return False
 
 
-def unique_dest(path: Path) -> Path:
-    if not path.exists():
-        return path
-    suffix = "".join(path.suffixes)
-    base = path.name[: -len(suffix)] if suffix else path.name
-    for i in range(1, 10_000):
-        candidate = path.with_name(f"{base}__dup{i}{suffix}")
-        if not candidate.exists():
-            return candidate
-    raise RuntimeError(f"too many name collisions for {path}")
+def file_sha256(path: Path) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def model_key(model: str) -> str:
+    """Model name plus a content hash when it is a local weights file, so retrained weights miss the cache."""
+    path = Path(model)
+    if path.is_file():
+        return f"{path.name}:{file_sha256(path)[:16]}"
+    return model
+
+
+EXPORT_FORMATS = {
+    # format -> name of the artifact Ultralytics writes next to the .pt weights
+    "onnx": "{stem}.onnx",
+    "openvino": "{stem}_openvino_model",
+    "torchscript": "{stem}.torchscript",
+}
+
+
+def load_model(model: str, export_format: Optional[str], imgsz: int):
+    """
+    Load the model, optionally as a CPU-optimized export (ONNX / OpenVINO / TorchScript).
+    The export is created once next to the weights and reused while it is newer than them.
+    Returns (model, cache key).
+    """
+    # Imported here: spawn decode workers re-import this script as __mp_main__ and must
+    # not pull in ultralytics / torch
+    from ultralytics import YOLO
+
+    if not export_format:
+        return YOLO(model), model_key(model)
+
+    weights = Path(model)
+    exported = weights.with_name(EXPORT_FORMATS[export_format].format(stem=weights.stem))
+    if not exported.exists() or (weights.exists() and exported.stat().st_mtime < weights.stat().st_mtime):
+        exported = Path(YOLO(model).export(format=export_format, imgsz=imgsz, dynamic=True, half=False))
+    return YOLO(str(exported), task="detect"), f"{model_key(model)}:{export_format}"
+
+
+def cpu_defaults(batch: int = 0, decode_workers: int = 0, threads: int = 0):
+    """Fill in 0 (auto) values: ~1/4 of cores decode, the rest run inference, batch 8."""
+    cores = os.cpu_count() or 1
+    decode_workers = decode_workers or max(1, cores // 4)
+    threads = threads or max(1, cores - decode_workers)
+    return batch or 8, decode_workers, threads
+
+
+def set_inference_threads(threads: int) -> None:
+    import torch
+
+    torch.set_num_threads(threads)
+
+
+def iter_decoded_batches(paths: Sequence[Path], imgsz: int, batch: int, decode_workers: int, prefetch: int = 4):
+    """
+    Producer/consumer: a process pool decodes up to `prefetch` batches ahead while the caller
+    runs inference on the current one. Yields lists of (path, array-or-None) in input order.
+    """
+    window = batch * prefetch
+    it = iter(paths)
+    pending = deque()
+    # spawn, not fork: the parent already holds torch / inference runtime threads
+    with ProcessPoolExecutor(max_workers=decode_workers, mp_context=multiprocessing.get_context("spawn")) as pool:
+        def fill():
+            while len(pending) < window:
+                path = next(it, None)
+                if path is None:
+                    return
+                pending.append((path, pool.submit(decode_image, str(path), imgsz)))
+
+        fill()
+        while pending:
+            items = []
+            while pending and len(items) < batch:
+                path, future = pending.popleft()
+                items.append((path, future.result()))
+            fill()
+            yield items
+
+
+def predict_arrays(model, arrays, conf: float, iou: float, imgsz: int, device):
+    return model.predict(source=arrays, conf=conf, iou=iou, imgsz=imgsz, device=device, verbose=False)
+
+
+def measure_throughput(model, paths, imgsz, batch, decode_workers, threads, conf, iou, device) -> float:
+    """Images/sec of the full decode + inference pipeline over `paths` at one setting."""
+    set_inference_threads(threads)
+    start = time.perf_counter()
+    count = 0
+    for items in iter_decoded_batches(paths, imgsz, batch, decode_workers):
+        arrays = [array for _, array in items if array is not None]
+        if arrays:
+            predict_arrays(model, arrays, conf, iou, imgsz, device)
+        count += len(items)
+    return count / max(time.perf_counter() - start, 1e-9)
+
+
+def tuning_grid():
+    cores = os.cpu_count() or 1
+    decode_options = sorted({1, max(1, cores // 4), max(1, cores // 2)})
+    return [(batch, decode, max(1, cores - decode)) for decode in decode_options for batch in (1, 4, 8, 16)]
+
+
+def autotune(model, sample, imgsz, conf, iou, device, report=print):
+    """Try every (batch, decode_workers, threads) in the grid on `sample`; return the fastest."""
+    # Warm-up so the first setting does not pay for lazy initialisation
+    measure_throughput(model, sample[:4], imgsz, 1, 1, os.cpu_count() or 1, conf, iou, device)
+    best = None
+    for batch, decode, threads in tuning_grid():
+        rate = measure_throughput(model, sample, imgsz, batch, decode, threads, conf, iou, device)
+        report(f"batch={batch:<3} decode_workers={decode:<3} threads={threads:<3} {rate:8.1f} img/s")
+        if best is None or rate > best[0]:
+            best = (rate, batch, decode, threads)
+    return best
+
+
+class InferenceCache:
+    """
+    SQLite cache of YOLO detections keyed by (file sha256, model, imgsz, iou, conf).
+    Detections are stored at `conf` (a low floor), so any higher threshold can be applied
+    afterwards without running the model again. File hashes are reused while path, mtime
+    and size are unchanged. The model column carries DETECTIONS_FORMAT, so rows written in
+    an older format are never returned (they are simply re-inferred).
+    """
+
+    def __init__(self, path: Path):
+        self.conn = sqlite3.connect(str(path))
+        self.conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS files (
+                path TEXT PRIMARY KEY,
+                mtime_ns INTEGER NOT NULL,
+                size INTEGER NOT NULL,
+                sha256 TEXT NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS models (
+                model TEXT PRIMARY KEY,
+                names TEXT NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS detections (
+                sha256 TEXT NOT NULL,
+                model TEXT NOT NULL,
+                imgsz INTEGER NOT NULL,
+                iou REAL NOT NULL,
+                conf REAL NOT NULL,
+                detections TEXT NOT NULL,
+                created_at TEXT NOT NULL,
+                PRIMARY KEY (sha256, model, imgsz, iou, conf)
+            );
+            """
+        )
+        self.conn.commit()
+
+    def file_hash(self, path: Path) -> str:
+        st = path.stat()
+        row = self.conn.execute(
+            "SELECT sha256 FROM files WHERE path = ? AND mtime_ns = ? AND size = ?",
+            (str(path), st.st_mtime_ns, st.st_size),
+        ).fetchone()
+        if row:
+            return row[0]
+        sha256 = file_sha256(path)
+        self.conn.execute(
+            "INSERT OR REPLACE INTO files (path, mtime_ns, size, sha256) VALUES (?, ?, ?, ?)",
+            (str(path), st.st_mtime_ns, st.st_size, sha256),
+        )
+        return sha256
+
+    def model_names(self, model: str):
+        row = self.conn.execute("SELECT names FROM models WHERE model = ?", (model,)).fetchone()
+        if not row:
+            return None
+        return {int(k): v for k, v in json.loads(row[0]).items()}
+
+    def save_model_names(self, model: str, names) -> None:
+        if isinstance(names, (list, tuple)):
+            names = dict(enumerate(names))
+        with self.conn:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO models (model, names) VALUES (?, ?)",
+                (model, json.dumps({str(k): v for k, v in names.items()})),
+            )
+
+    @staticmethod
+    def detections_key(model: str) -> str:
+        return f"{model}#v{DETECTIONS_FORMAT}"
+
+    def lookup(self, hashes: Sequence[str], model: str, imgsz: int, iou: float, conf: float) -> Dict[str, list]:
+        model = self.detections_key(model)
+        found = {}
+        unique = list(dict.fromkeys(hashes))
+        for i in range(0, len(unique), 500):
+            chunk = unique[i : i + 500]
+            rows = self.conn.execute(
+                f"SELECT sha256, detections FROM detections "
+                f"WHERE model = ? AND imgsz = ? AND iou = ? AND conf = ? "
+                f"AND sha256 IN ({','.join('?' * len(chunk))})",
+                (model, imgsz, iou, conf, *chunk),
+            ).fetchall()
+            for sha256, detections in rows:
+                found[sha256] = json.loads(detections)
+        return found
+
+    def store(self, rows: Dict[str, list], model: str, imgsz: int, iou: float, conf: float) -> None:
+        model = self.detections_key(model)
+        now = datetime.now().isoformat(timespec="seconds")
+        with self.conn:
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO detections (sha256, model, imgsz, iou, conf, detections, created_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                [(sha256, model, imgsz, iou, conf, json.dumps(dets), now) for sha256, dets in rows.items()],
+            )
+
+    def commit(self) -> None:
+        self.conn.commit()
+
+    def close(self) -> None:
+        self.conn.commit()
+        self.conn.close()
 
 
 def iter_images(root: Path, blacklist_dir: Path):
@@ -98,11 +344,54 @@ def parse_args() -> argparse.Namespace:
         default=0.25,
         help="Confidence threshold for detection.",
     )
+    parser.add_argument(
+        "--cache",
+        type=Path,
+        default=None,
+        help="Inference cache (SQLite). Default: <input-dir>/.yolo_cache.sqlite.",
+    )
+    parser.add_argument(
+        "--cache-conf",
+        type=float,
+        default=0.05,
+        help=(
+            "Confidence floor used when running the model and storing detections. "
+            "Any --conf at or above it is answered from the cache (default: 0.05)."
+        ),
+    )
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Ignore the cache and run inference on every image.",
+    )
     parser.add_argument(
         "--batch",
         type=int,
-        default=16,
-        help="Batch size for inference.",
+        default=0,
+        help="Batch size for inference (default: 0 = auto).",
+    )
+    parser.add_argument(
+        "--decode-workers",
+        type=int,
+        default=0,
+        help="Processes decoding/resizing images ahead of inference (default: 0 = auto).",
+    )
+    parser.add_argument(
+        "--threads",
+        type=int,
+        default=0,
+        help="Inference threads (default: 0 = auto, cores not used for decoding).",
+    )
+    parser.add_argument(
+        "--auto-tune",
+        action="store_true",
+        help="Benchmark batch/worker settings on a sample of the images first and use the fastest.",
+    )
+    parser.add_argument(
+        "--export",
+        choices=sorted(EXPORT_FORMATS),
+        default=None,
+        help="Run a CPU-optimized export of the model (created once next to the weights).",
     )
     parser.add_argument(
         "--imgsz",
@@ -136,6 +425,10 @@ def parse_args() -> argparse.Namespace:
         action="store_true",
         help="Print actions without moving files.",
     )
+    parser.add_argument(
+        "--run-id",
+        help="Run id recorded in the blacklist journal (default: timestamp based).",
+    )
     return parser.parse_args()
 
 
@@ -150,61 +443,99 @@ def main() -> int:
 
     blacklist_dir.mkdir(parents=True, exist_ok=True)
 
-    model = YOLO(args.model)
+    if args.conf < args.cache_conf:
+        print(f"--conf {args.conf} is below --cache-conf {args.cache_conf}", file=sys.stderr)
+        return 2
+
+    images = list(iter_images(input_dir, blacklist_dir))
+    if not images:
+        print("no images found")
+        return 0
+
+    cache = InferenceCache(args.cache or input_dir / ".yolo_cache.sqlite")
+    key = model_key(args.model) if not args.export else f"{model_key(args.model)}:{args.export}"
+    infer_conf = args.cache_conf
+
+    hashes = {path: cache.file_hash(path) for path in tqdm(images, desc="Hashing", unit="img")}
+    cache.commit()
+    detections = {} if args.no_cache else cache.lookup(list(hashes.values()), key, args.imgsz, args.iou, infer_conf)
+    todo = [path for path in images if hashes[path] not in detections]
+    print(f"cached={len(images) - len(todo)} to_infer={len(todo)}")
+
+    batch, decode_workers, threads = cpu_defaults(args.batch, args.decode_workers, args.threads)
+    names = cache.model_names(key)
+    model = None
+    if todo or names is None:
+        # ONNX Runtime / OpenVINO read OMP_NUM_THREADS once, when the model session is created;
+        # --auto-tune afterwards only changes the torch thread count
+        os.environ["OMP_NUM_THREADS"] = str(threads)
+        model, key = load_model(args.model, args.export, args.imgsz)
+        names = model.names
+        cache.save_model_names(key, names)
+
     keep_classes = [c.strip() for c in args.keep_classes.split(",") if c.strip()]
-    class_ids = find_class_ids(model.names, keep_classes)
+    class_ids = find_class_ids(names, keep_classes)
     if not class_ids:
         print(
             "model does not contain requested classes. "
             "Use a COCO-trained model like yolo11n.pt.",
             file=sys.stderr,
         )
+        cache.close()
         return 3
 
-    images = list(iter_images(input_dir, blacklist_dir))
-    if not images:
-        print("no images found")
-        return 0
+    if todo and args.auto_tune:
+        sample = todo[: max(64, batch * 4)]
+        _, batch, decode_workers, threads = autotune(model, sample, args.imgsz, infer_conf, args.iou, args.device)
+    if todo:
+        print(f"batch={batch} decode_workers={decode_workers} threads={threads}")
+        set_inference_threads(threads)
+
+    unreadable = set()
+    with tqdm(total=len(todo), desc="Inference", unit="img") as progress:
+        for items in iter_decoded_batches(todo, args.imgsz, batch, decode_workers):
+            readable = [(path, array) for path, array in items if array is not None]
+            unreadable.update(path for path, array in items if array is None)
+            if readable:
+                results = predict_arrays(
+                    model, [array for _, array in readable], infer_conf, args.iou, args.imgsz, args.device
+                )
+                new_rows = {hashes[path]: extract_detections(result) for (path, _), result in zip(readable, results)}
+                detections.update(new_rows)
+                # Stored per batch so an interrupted run keeps what it already computed
+                cache.store(new_rows, key, args.imgsz, args.iou, infer_conf)
+            progress.update(len(items))
+
+    cache.close()
 
     moved = 0
     kept = 0
+    run_id = args.run_id or new_run_id()
+    reason = f"no-{'+'.join(keep_classes)}"
+    journal = MoveJournal.for_blacklist(blacklist_dir)
 
-    for i in tqdm(
-        range(0, len(images), args.batch),
-        desc="Inference",
-        unit="batch",
-    ):
-        batch_paths = images[i : i + args.batch]
-        results = model.predict(
-            source=[str(p) for p in batch_paths],
-            conf=args.conf,
-            iou=args.iou,
-            imgsz=args.imgsz,
-            device=args.device,
-            verbose=False,
-        )
-        for path, result in zip(batch_paths, results):
-            if has_any_class(result, class_ids):
-                kept += 1
-                continue
-
-            try:
-                rel = path.relative_to(input_dir)
-            except ValueError:
-                rel = Path(path.name)
-
-            dest = unique_dest(blacklist_dir / rel)
-            if args.dry_run:
-                print(f"DRY RUN: move {path} -> {dest}")
-            else:
-                dest.parent.mkdir(parents=True, exist_ok=True)
-                if args.copy:
-                    shutil.copy2(path, dest)
-                else:
-                    shutil.move(path, dest)
-            moved += 1
-
-    print(f"done. kept={kept} moved={moved} total={len(images)}")
+    for path in images:
+        if path in unreadable:
+            print(f"skip unreadable image: {path}", file=sys.stderr)
+            continue
+        if has_any_class(detections[hashes[path]], class_ids, args.conf):
+            kept += 1
+            continue
+
+        try:
+            rel = path.relative_to(input_dir)
+        except ValueError:
+            rel = Path(path.name)
+
+        if args.dry_run:
+            print(f"DRY RUN: move {path} -> {unique_path(blacklist_dir / rel)}")
+        else:
+            # The cache hash is the file's sha256, so the journal does not re-read the file
+            journal.move(path, blacklist_dir / rel, run_id, reason, sha256=hashes[path], copy=args.copy)
+        moved += 1
+
+    journal.close()
+    print(f"done. kept={kept} moved={moved} total={len(images)} run_id={run_id}")
     return 0
 
 
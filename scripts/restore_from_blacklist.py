@@ -4,35 +4,22 @@ import shutil
 import sys
 from pathlib import Path
 
+# Ensure repository root is on sys.path so module imports work when run from anywhere
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
 
-IMAGE_EXTS = (".jpg", ".jpeg", ".png", ".webp", ".bmp", ".tif", ".tiff")
-
-
-def is_image_file(path: Path) -> bool:
-    return path.is_file() and path.name.lower().endswith(IMAGE_EXTS)
-
-
-def unique_dest(path: Path) -> Path:
-    if not path.exists():
-        return path
-    suffix = "".join(path.suffixes)
-    base = path.name[: -len(suffix)] if suffix else path.name
-    for i in range(1, 10_000):
-        candidate = path.with_name(f"{base}__dup{i}{suffix}")
-        if not candidate.exists():
-            return candidate
-    raise RuntimeError(f"too many name collisions for {path}")
-
-
-def iter_images(root: Path):
-    for path in root.rglob("*"):
-        if is_image_file(path):
-            yield path
+from common.file_inventory import REFRESH_MODES, open_inventory
+from common.move_journal import CONFLICT_MODES, MoveJournal, unique_path
 
 
 def parse_args() -> argparse.Namespace:
     parser = argparse.ArgumentParser(
-        description="Restore images from blacklist back to the dataset root."
+        description=(
+            "Restore images from blacklist back to where they were moved from, by replaying "
+            "the blacklist journal (optionally only one run or reason). With --target-dir, "
+            "every file in the blacklist is restored under that root by relative path instead."
+        )
     )
     parser.add_argument(
         "--blacklist-dir",
@@ -43,8 +30,26 @@ def parse_args() -> argparse.Namespace:
     parser.add_argument(
         "--target-dir",
         type=Path,
-        required=True,
-        help="Root folder to restore images into (e.g. SC).",
+        help="Restore the whole blacklist tree into this root (for blacklists without a journal).",
+    )
+    parser.add_argument(
+        "--run",
+        help="Only restore moves from this run id.",
+    )
+    parser.add_argument(
+        "--reason",
+        help="Only restore moves with this reason (e.g. near-duplicate, no-car).",
+    )
+    parser.add_argument(
+        "--list-runs",
+        action="store_true",
+        help="List journaled runs and how many of their files are still blacklisted.",
+    )
+    parser.add_argument(
+        "--on-conflict",
+        choices=CONFLICT_MODES,
+        default="rename",
+        help="When the original path is taken by a different file (default: rename to __dupN).",
     )
     parser.add_argument(
         "--copy",
@@ -56,33 +61,58 @@ def parse_args() -> argparse.Namespace:
         action="store_true",
         help="Print actions without moving files.",
     )
+    parser.add_argument(
+        "--refresh",
+        choices=REFRESH_MODES,
+        default="incremental",
+        help="How to update the blacklist inventory index before restoring (default: incremental).",
+    )
     return parser.parse_args()
 
 
-def main() -> int:
-    args = parse_args()
-    blacklist_dir = args.blacklist_dir.expanduser().resolve()
-    target_dir = args.target_dir.expanduser().resolve()
+def restore_journal(args, blacklist_dir: Path) -> int:
+    with MoveJournal.for_blacklist(blacklist_dir) as journal:
+        if args.list_runs:
+            for run in journal.runs():
+                print(
+                    f"{run['run_id']}\t{run['started']}\t{','.join(sorted(run['reasons']))}\t"
+                    f"moved={run['moved']}\tpending={run['pending']}"
+                )
+            return 0
+
+        entries = journal.pending(run_id=args.run, reason=args.reason)
+        if not entries:
+            print(f"nothing to restore in {journal.path}")
+            return 0
+
+        counts = {}
+        for entry in entries:
+            status, dest = journal.restore(entry, on_conflict=args.on_conflict, copy=args.copy, dry_run=args.dry_run)
+            counts[status] = counts.get(status, 0) + 1
+            if args.dry_run:
+                print(f"DRY RUN: {status} {entry['dest']} -> {dest}")
+
+    print("done. " + " ".join(f"{status}={count}" for status, count in sorted(counts.items())))
+    return 0
 
-    if not blacklist_dir.exists():
-        print(f"blacklist dir not found: {blacklist_dir}", file=sys.stderr)
-        return 2
 
+def restore_tree(args, blacklist_dir: Path, target_dir: Path) -> int:
     target_dir.mkdir(parents=True, exist_ok=True)
 
     moved = 0
-    images = list(iter_images(blacklist_dir))
+    with open_inventory(blacklist_dir, refresh=args.refresh) as inventory:
+        images = [rel for rel, _, _ in inventory.iter_files()]
     if not images:
         print("no images found in blacklist")
         return 0
 
-    for path in images:
-        try:
-            rel = path.relative_to(blacklist_dir)
-        except ValueError:
-            rel = Path(path.name)
+    for rel_str in images:
+        path = blacklist_dir / rel_str
+        if not path.exists():
+            # Index was not refreshed (--refresh none) and the file is gone already
+            continue
 
-        dest = unique_dest(target_dir / rel)
+        dest = unique_path(target_dir / rel_str)
         if args.dry_run:
             print(f"DRY RUN: move {path} -> {dest}")
         else:
@@ -97,5 +127,18 @@ def main() -> int:
     return 0
 
 
+def main() -> int:
+    args = parse_args()
+    blacklist_dir = args.blacklist_dir.expanduser().resolve()
+
+    if not blacklist_dir.exists():
+        print(f"blacklist dir not found: {blacklist_dir}", file=sys.stderr)
+        return 2
+
+    if args.target_dir is None:
+        return restore_journal(args, blacklist_dir)
+    return restore_tree(args, blacklist_dir, args.target_dir.expanduser().resolve())
+
+
 if __name__ == "__main__":
     raise SystemExit(main())
@@ -0,0 +1,215 @@
+#!/usr/bin/env python3
+import argparse
+import statistics
+import sys
+from datetime import datetime, timedelta
+from pathlib import Path
+
+# Ensure repository root is on sys.path so module imports work when run from anywhere
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from scrap_carlistmy_monitors_playwright.database import get_connection as get_carlist_conn
+from scrap_mudahmy_monitors_playwright.database import get_connection as get_mudah_conn
+from common.run_ledger import KINDS, RUN_LEDGER_TABLE
+
+
+# Each site's services write the ledger into that site's database (data_archiver: carlist)
+SITES = {
+    "carlist": get_carlist_conn,
+    "mudah": get_mudah_conn,
+}
+
+# Buckets compared against the median of this many earlier buckets of the same service
+BASELINE_BUCKETS = 4
+
+
+def build_filter(args):
+    conditions = ["started_at >= %s"]
+    params = [datetime.now() - timedelta(days=args.days)]
+    if args.service:
+        conditions.append("service = %s")
+        params.append(args.service)
+    if args.kind:
+        conditions.append("kind = %s")
+        params.append(args.kind)
+    return " AND ".join(conditions), params
+
+
+def per_minute(count, seconds):
+    return count * 60 / seconds if seconds else 0.0
+
+
+def ratio(part, whole):
+    return part / whole if whole else 0.0
+
+
+def show_runs(conn, args):
+    where, params = build_filter(args)
+    cursor = conn.cursor()
+    cursor.execute(
+        f"""
+        SELECT id, started_at, service, host, proxy_mode, duration_sec, processed, succeeded,
+               failed, blocks, bytes, avg_latency_sec, exit_reason
+        FROM {args.table} WHERE {where}
+        ORDER BY started_at DESC LIMIT %s
+        """,
+        [*params, args.limit],
+    )
+    rows = cursor.fetchall()
+    cursor.close()
+
+    print(
+        f"{'id':>6} {'started':<16} {'service':<24} {'host':<12} {'proxy':<8} {'dur':>7} {'proc':>6} "
+        f"{'ok%':>6} {'blocks':>6} {'/min':>7} {'MB':>8} {'lat':>6}  exit"
+    )
+    for (run_id, started, service, host, proxy, duration, processed, succeeded,
+         failed, blocks, byte_count, latency, exit_reason) in rows:
+        print(
+            f"{run_id:>6} {started:%Y-%m-%d %H:%M} {service:<24.24} {(host or '-'):<12.12} {(proxy or '-'):<8.8} "
+            f"{(duration or 0) / 60:>6.1f}m {processed:>6} {ratio(succeeded, processed) * 100:>5.1f}% {blocks:>6} "
+            f"{per_minute(processed, duration):>7.2f} {byte_count / 1e6:>8.1f} "
+            f"{f'{latency:.1f}s' if latency is not None else '-':>6}  {exit_reason or '-'}"
+        )
+    if not rows:
+        print("no runs recorded in this window")
+
+
+def show_trend(conn, args):
+    where, params = build_filter(args)
+    cursor = conn.cursor()
+    cursor.execute(
+        f"""
+        SELECT service, date_trunc(%s, started_at) AS bucket, COUNT(*), SUM(processed)::bigint,
+               SUM(failed)::bigint, SUM(blocks)::bigint, SUM(bytes)::bigint, SUM(duration_sec),
+               AVG(avg_latency_sec),
+               COUNT(*) FILTER (WHERE exit_reason <> 'completed')
+        FROM {args.table} WHERE {where}
+        GROUP BY service, bucket
+        ORDER BY service, bucket
+        """,
+        [args.bucket, *params],
+    )
+    rows = cursor.fetchall()
+    cursor.close()
+
+    print(
+        f"{'service':<24} {args.bucket:<10} {'runs':>4} {'proc':>7} {'/min':>7} {'fail%':>6} "
+        f"{'block%':>7} {'lat':>6} {'MB':>8} {'!exit':>5}  flags"
+    )
+    history = {}
+    for (service, bucket, runs, processed, failed, blocks, byte_count,
+         duration, latency, abnormal) in rows:
+        processed = processed or 0
+        rate = per_minute(processed, duration)
+        block_rate = ratio(blocks or 0, processed)
+        previous = history.setdefault(service, [])[-BASELINE_BUCKETS:]
+
+        flags = []
+        if previous:
+            base_rate = statistics.median(p[0] for p in previous)
+            base_blocks = statistics.median(p[1] for p in previous)
+            latencies = [p[2] for p in previous if p[2] is not None]
+            if base_rate and rate < base_rate * (1 - args.threshold):
+                flags.append(f"throughput {(rate / base_rate - 1) * 100:+.0f}%")
+            if block_rate > max(base_blocks * (1 + args.threshold), args.min_block_rate):
+                flags.append(f"blocks {base_blocks * 100:.1f}%->{block_rate * 100:.1f}%")
+            if latency is not None and latencies:
+                base_latency = statistics.median(latencies)
+                if base_latency and latency > base_latency * (1 + args.threshold):
+                    flags.append(f"latency {(latency / base_latency - 1) * 100:+.0f}%")
+        history[service].append((rate, block_rate, latency))
+
+        print(
+            f"{service:<24.24} {bucket:%Y-%m-%d} {runs:>4} {processed:>7} {rate:>7.2f} "
+            f"{ratio(failed or 0, processed) * 100:>5.1f}% {block_rate * 100:>6.1f}% "
+            f"{f'{latency:.1f}s' if latency is not None else '-':>6} {(byte_count or 0) / 1e6:>8.1f} {abnormal:>5}  "
+            f"{', '.join(flags)}"
+        )
+    if not rows:
+        print("no runs recorded in this window")
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description=(
+            "Compare runs recorded in the run ledger: list recent runs, or aggregate per "
+            "service and day/week and flag throughput drops, rising block rates and slower "
+            "page loads against the preceding buckets."
+        )
+    )
+    parser.add_argument(
+        "--site",
+        choices=sorted(SITES),
+        required=True,
+        help="Database to read (each site's services write their runs into that site's database).",
+    )
+    parser.add_argument(
+        "--view",
+        choices=["runs", "trend"],
+        default="runs",
+        help="runs: one line per run (default); trend: aggregated per service and --bucket.",
+    )
+    parser.add_argument(
+        "--bucket",
+        choices=["day", "week"],
+        default="day",
+        help="Trend bucket size (default: day).",
+    )
+    parser.add_argument(
+        "--service",
+        help="Only this service (e.g. scrape_mudahmy, tracker_carlistmy, image_download_mudah).",
+    )
+    parser.add_argument(
+        "--kind",
+        choices=KINDS,
+        help="Only runs of this kind.",
+    )
+    parser.add_argument(
+        "--days",
+        type=int,
+        default=30,
+        help="Look back this many days (default: 30).",
+    )
+    parser.add_argument(
+        "--limit",
+        type=int,
+        default=50,
+        help="Maximum runs listed in the runs view (default: 50).",
+    )
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=0.25,
+        help="Relative change against the baseline median that is flagged (default: 0.25).",
+    )
+    parser.add_argument(
+        "--min-block-rate",
+        type=float,
+        default=0.02,
+        help="Block rates below this are never flagged (default: 0.02).",
+    )
+    parser.add_argument(
+        "--table",
+        default=RUN_LEDGER_TABLE,
+        help=f"Ledger table (default: env RUN_LEDGER_TABLE or {RUN_LEDGER_TABLE}).",
+    )
+    return parser.parse_args()
+
+
+def main() -> int:
+    args = parse_args()
+    conn = SITES[args.site]()
+    try:
+        if args.view == "trend":
+            show_trend(conn, args)
+        else:
+            show_runs(conn, args)
+    finally:
+        conn.close()
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
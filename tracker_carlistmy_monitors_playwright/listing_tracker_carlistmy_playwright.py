@@ -12,41 +12,28 @@ from pathlib import Path
 from bs4 import BeautifulSoup
 
 from .database import get_connection
+from common.normalization import parse_mileage
+from common.logging_setup import setup_logging
+from common.metrics import DB_WRITE, LISTING_STATUS, LISTINGS, PAGE_LOAD, record_block
+from common.run_ledger import recorded_run
+from common.snapshots import SnapshotManager
+from common.waits import budgeted, log_report as log_wait_report, pace, reset as reset_waits, wait_until
 
 load_dotenv(override=True)
 
 DB_TABLE_PRIMARY = os.getenv("DB_TABLE_SCRAP_CARLIST", "cars_scrap")
-
-START_DATE = datetime.now().strftime('%Y%m%d')
+METRICS_SERVICE = "tracker_carlistmy"
 
 log_dir = Path(__file__).resolve().parents[0].parents[0] / "logs"
 log_dir.mkdir(parents=True, exist_ok=True)
+snapshots = SnapshotManager("carlistmy_tracker", log_dir)
 
-log_file = log_dir / f"tracker_carlistmy_{START_DATE}.log"
-
-logging.basicConfig(
-    level=logging.INFO,
-    format="%(asctime)s - %(levelname)s - %(message)s",
-    handlers=[
-        logging.FileHandler(log_file),
-        logging.StreamHandler()
-    ]
-)
+setup_logging("tracker_carlistmy", log_dir=log_dir)
 logger = logging.getLogger("carlistmy_tracker")
 
 
 def take_screenshot(page, name: str):
-    try:
-        error_folder_name = datetime.now().strftime('%Y%m%d') + "_error_carlistmy_tracker"
-        screenshot_dir = log_dir / error_folder_name
-        screenshot_dir.mkdir(parents=True, exist_ok=True)
-
-        timestamp = datetime.now().strftime('%H%M%S')
-        screenshot_path = screenshot_dir / f"{name}_{timestamp}.png"
-        page.screenshot(path=str(screenshot_path))
-        logger.info(f"📸 Screenshot disimpan: {screenshot_path}")
-    except Exception as e:
-        logger.warning(f"❌ Gagal menyimpan screenshot: {e}")
+    snapshots.capture(page, name)
 
 def get_custom_proxy_list():
     raw = os.getenv("CUSTOM_PROXIES_CARLIST", "")
@@ -69,6 +56,7 @@ class ListingTrackerCarlistmyPlaywright:
         self.listings_per_batch = listings_per_batch
         self.sold_text_indicator = "This car has already been sold."
         self.custom_proxies = get_custom_proxy_list()
+        self.current_proxy = None
         self.session_id = self.generate_session_id()
 
     def generate_session_id(self):
@@ -106,6 +94,7 @@ class ListingTrackerCarlistmyPlaywright:
             logging.info(f"🌐 Proxy digunakan: {proxy['server']}")
         else:
             logging.info("⚡ Browser dijalankan tanpa proxy")
+        self.current_proxy = proxy
 
         self.browser = self.playwright.chromium.launch(**launch_kwargs)
 
@@ -167,6 +156,7 @@ class ListingTrackerCarlistmyPlaywright:
             logger.error("❌ Gagal koneksi database saat update full data.")
             return
         cursor = conn.cursor()
+        started = time.perf_counter()
         try:
             now = datetime.now()
             image_urls_str = json.dumps(car_data.get("image", []))
@@ -185,6 +175,7 @@ class ListingTrackerCarlistmyPlaywright:
                 car_data.get("engine_cc"), car_data.get("fuel_type"), now, now, image_urls_str, car_id
             ))
             conn.commit()
+            DB_WRITE.labels(METRICS_SERVICE, "update_listing").observe(time.perf_counter() - started)
             logger.info(f"✅ Full data berhasil diupdate untuk ID={car_id}")
         except Exception as e:
             logger.error(f"❌ Gagal update full data ID={car_id}: {e}")
@@ -218,6 +209,7 @@ class ListingTrackerCarlistmyPlaywright:
             logger.error("Tidak bisa update status, koneksi database gagal.")
             return
         cursor = conn.cursor()
+        started = time.perf_counter()
         try:
             now = datetime.now()
             if sold_at:
@@ -236,6 +228,8 @@ class ListingTrackerCarlistmyPlaywright:
                     WHERE id = %s
                 """, (status, now, car_id))
             conn.commit()
+            DB_WRITE.labels(METRICS_SERVICE, "update_status").observe(time.perf_counter() - started)
+            LISTING_STATUS.labels(METRICS_SERVICE, status).inc()
             logger.info(f"> ID={car_id} => Status diupdate ke '{status}', waktu cek status diset ke {now}")
         except Exception as e:
             logger.error(f"❌ Gagal update_car_status ID={car_id}: {e}")
@@ -243,36 +237,6 @@ class ListingTrackerCarlistmyPlaywright:
             cursor.close()
             conn.close()
 
-    def normalize_field(self, text, default_value):
-        if not text or str(text).strip() in ["-", "N/A", ""]:
-            return default_value
-        cleaned = re.sub(r'[\-\(\)_]', ' ', text)
-        cleaned = re.sub(r'[^\w\s]', '', cleaned)
-        cleaned = ' '.join(cleaned.split())
-        cleaned = cleaned.upper()
-        return cleaned if cleaned else default_value
-
-    def parse_mileage(self, mileage_str):
-        if not mileage_str or mileage_str.strip() == "- km":
-            return 0
-        try:
-            # Cek rentang, ambil nilai kanan
-            if "-" in mileage_str:
-                right = mileage_str.split("-")[-1].strip()
-            else:
-                right = mileage_str.strip()
-            # Hilangkan 'km' dan spasi
-            right = right.replace("km", "").replace("KM", "").replace("Km", "").strip()
-            # Ganti K/k dengan ribuan
-            right = right.replace("K", "000").replace("k", "000")
-            # Hilangkan spasi sisa
-            right = right.replace(" ", "")
-            # Ambil angka saja
-            mileage_int = int(re.sub(r"[^\d]", "", right))
-            return mileage_int
-        except Exception:
-            return 0
-
     def parse_information_ads_date(self, information_ads):
         """
         Konversi information_ads ke format YYYY-MM-DD
@@ -372,6 +336,7 @@ class ListingTrackerCarlistmyPlaywright:
         try:
             title = self.page.title()
             if "Just a moment..." in title:
+                record_block(METRICS_SERVICE, "cloudflare", self.current_proxy)
                 take_screenshot(self.page, "cloudflare_block")
                 logger.warning("⚠️ Terblokir Cloudflare, reinit browser & ganti proxy.")
                 return True
@@ -380,6 +345,7 @@ class ListingTrackerCarlistmyPlaywright:
             logger.warning(f"❌ Gagal cek title: {e}")
             return False
 
+    @budgeted("tracker_carlist.detail")
     def scrape_detail(self, url):
         """Scrape detail lengkap dari halaman listing"""
         try:
@@ -391,12 +357,13 @@ class ListingTrackerCarlistmyPlaywright:
                     "> div:nth-child(1) > div > div.c-tabs--overflow > div > a:nth-child(2)"
                 )
                 if self.page.is_visible(spec_tab_selector):
+                    pace(0.3, 0.9)
                     self.page.click(spec_tab_selector)
                     self.page.wait_for_selector(
                         '#tab-specifications span.u-text-bold.u-width-1\\\\/2.u-align-right',
                         timeout=7000
                     )
-                    time.sleep(1)
+                    wait_until(self.page, root="#tab-specifications", quiet_ms=300, timeout_ms=1000, legacy=1, label="spec_tab_settle")
             except Exception as e:
                 logger.warning(f"Gagal klik tab specifications: {e}")
 
@@ -505,7 +472,7 @@ class ListingTrackerCarlistmyPlaywright:
 
             price = int(re.sub(r"[^\d]", "", price_string)) if price_string else 0
             year_int = int(re.search(r"\d{4}", year).group()) if year else 0
-            mileage_int = self.parse_mileage(mileage)
+            mileage_int = parse_mileage(mileage)
             
             # Parse information_ads_date
             information_ads_date = self.parse_information_ads_date(information_ads)
@@ -550,6 +517,7 @@ class ListingTrackerCarlistmyPlaywright:
             logger.error(f"❌ Gagal scrape detail untuk {url}: {e}")
             return None
 
+    @recorded_run("tracker", METRICS_SERVICE, get_connection, proxy_env="PROXY_MODE_CARLIST")
     def track_listings(self, start_id=1, status_filter="all"):
         if status_filter not in ["all", "active", "unknown"]:
             logger.warning(f"⚠️ Status filter tidak valid: {status_filter}, fallback ke 'all'")
@@ -591,13 +559,27 @@ class ListingTrackerCarlistmyPlaywright:
         logger.info(f"📄 Total data: {len(listings)} | Reinit setiap {self.listings_per_batch} listing")
         self.init_browser()
         time.sleep(random.uniform(3, 5))
+        reset_waits()
 
         for index, (car_id, url, _, old_price) in enumerate(listings, start=1):
             logger.info(f"🔍 Memeriksa ID={car_id} - {url}")
+            LISTINGS.labels(METRICS_SERVICE, "checked").inc()
 
             try:
-                self.page.goto(url, wait_until="networkidle", timeout=90000)
-                time.sleep(7)
+                with PAGE_LOAD.labels(METRICS_SERVICE, "status").time():
+                    self.page.goto(url, wait_until="domcontentloaded", timeout=90000)
+                # Tanpa networkidle: tunggu konten detail, halaman challenge, atau kartu listing
+                # (redirect sold) lalu DOM tenang
+                wait_until(
+                    self.page,
+                    selectors=["#listing-detail", '[id^="listing_"]'],
+                    texts=[("title", "Just a moment")],
+                    quiet_ms=500,
+                    root="#listing-detail",
+                    timeout_ms=20000,
+                    legacy=7,
+                    label="detail_ready",
+                )
 
                 if self.detect_cloudflare_block():
                     raise Exception("Cloudflare block detected")
@@ -617,6 +599,7 @@ class ListingTrackerCarlistmyPlaywright:
                 # Scrape detail lengkap dari halaman
                 detail_data = self.scrape_detail(url)
                 if detail_data:
+                    LISTINGS.labels(METRICS_SERVICE, "scraped").inc()
                     new_price = detail_data.get("price", 0)
                     
                     # Cek apakah ada perubahan harga
@@ -628,6 +611,7 @@ class ListingTrackerCarlistmyPlaywright:
                     logger.info(f"🔄 Update full data untuk ID={car_id}")
                     self.update_full_data(car_id, detail_data)
                 else:
+                    LISTINGS.labels(METRICS_SERVICE, "failed").inc()
                     logger.warning(f"⚠️ Gagal scrape detail untuk ID={car_id}, hanya update status")
 
                 self.update_car_status(car_id, "active")
@@ -642,4 +626,5 @@ class ListingTrackerCarlistmyPlaywright:
                 self.retry_with_new_proxy()
 
         self.quit_browser()
+        log_wait_report("Wait report tracker carlist", logger)
         logger.info("✅ Selesai semua listing.")
\ No newline at end of file
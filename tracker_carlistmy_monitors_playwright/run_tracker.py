@@ -1,6 +1,8 @@
 import argparse
 from dotenv import load_dotenv
 from tracker_carlistmy_monitors_playwright.listing_tracker_carlistmy_playwright import ListingTrackerCarlistmyPlaywright
+from common.metrics import start_metrics_server
+from common.profiling import add_profile_arguments, profile_run
 
 load_dotenv()
 
@@ -14,11 +16,15 @@ def main():
         default="all",
         help="Status listing yang ingin dicek: unknown, active, atau all (default: all)"
     )
+    parser.add_argument("--metrics-port", type=int, help="Ekspos metrics Prometheus di port ini (default: env METRICS_PORT, kosong = tidak diekspos)")
+    add_profile_arguments(parser)
 
     args = parser.parse_args()
+    start_metrics_server(args.metrics_port)
 
     tracker = ListingTrackerCarlistmyPlaywright()
-    tracker.track_listings(start_id=args.start_id, status_filter=args.status)
+    with profile_run("tracker_carlistmy", args):
+        tracker.track_listings(start_id=args.start_id, status_filter=args.status)
 
 if __name__ == "__main__":
     main()
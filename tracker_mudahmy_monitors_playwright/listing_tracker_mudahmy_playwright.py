@@ -12,42 +12,54 @@ from playwright_stealth import stealth_sync
 from pathlib import Path
 
 from .database import get_connection
+from common.normalization import convert_mileage, convert_year_to_int, normalize_brand_name, normalize_model_variant
+from common.logging_setup import setup_logging
+from common.metrics import DB_WRITE, LISTING_STATUS, LISTINGS, PAGE_LOAD, record_block
+from common.spans import log_report, reset as reset_spans, span, stage, traced
+from common.run_ledger import recorded_run
+from common.snapshots import SnapshotManager
+from common.waits import budgeted, log_report as log_wait_report, pace, reset as reset_waits, wait_until
+from common.gallery import gallery_incomplete, harvest_gallery
+from common.field_spec import MUDAH_DETAIL_FIELDS, extract_fields
 
 load_dotenv(override=True)
 
 DB_TABLE_PRIMARY = os.getenv("DB_TABLE_SCRAP_MUDAH", "cars_scrap")
-
-START_DATE = datetime.now().strftime('%Y%m%d')
+METRICS_SERVICE = "tracker_mudahmy"
 
 log_dir = Path(__file__).resolve().parents[0].parents[0] / "logs"
 log_dir.mkdir(parents=True, exist_ok=True)
+snapshots = SnapshotManager("mudahmy_tracker", log_dir)
 
-log_file = log_dir / f"tracker_mudahmy_{START_DATE}.log"
-
-logging.basicConfig(
-    level=logging.INFO,
-    format="%(asctime)s - %(levelname)s - %(message)s",
-    handlers=[
-        logging.FileHandler(log_file),
-        logging.StreamHandler(sys.stdout)
-    ]
-)
+setup_logging("tracker_mudahmy", log_dir=log_dir, stream=sys.stdout)
 logger = logging.getLogger("tracker")
 
 
 def take_screenshot(page, name: str):
-    try:
-        error_folder_name = datetime.now().strftime('%Y%m%d') + "_error_mudahmy_tracker"
-        screenshot_dir = log_dir / error_folder_name
-        screenshot_dir.mkdir(parents=True, exist_ok=True)
+    snapshots.capture(page, name)
+
+
+def valid_brand(brand_raw):
+    # Fix brand extraction issue - jangan ambil "Model" sebagai brand
+    if brand_raw and brand_raw.lower() not in ['model', 'n/a', 'brand']:
+        return brand_raw
+    logger.warning(f"Brand extraction issue, got: '{brand_raw}' - set to N/A")
+    return "N/A"
+
 
-        timestamp = datetime.now().strftime('%H%M%S')
-        screenshot_path = screenshot_dir / f"{name}_{timestamp}.png"
+def valid_mileage(mileage_raw):
+    # Fix mileage extraction - jangan ambil text label sebagai value
+    if mileage_raw and not any(x in mileage_raw.lower() for x in ['mileage to', 'mileage', 'km to']):
+        return mileage_raw
+    logger.warning(f"Mileage extraction issue, got: '{mileage_raw}' - set to N/A")
+    return "N/A"
 
-        page.screenshot(path=str(screenshot_path))
-        logger.info(f"📸 Screenshot disimpan: {screenshot_path}")
-    except Exception as e:
-        logger.warning(f"❌ Gagal menyimpan screenshot: {e}")
+
+TRACKER_DETAIL_FIELDS = {
+    **MUDAH_DETAIL_FIELDS,
+    "brand": {**MUDAH_DETAIL_FIELDS["brand"], "post": valid_brand},
+    "mileage": {**MUDAH_DETAIL_FIELDS["mileage"], "post": valid_mileage},
+}
 
 def get_custom_proxy_list():
     raw = os.getenv("CUSTOM_PROXIES_MUDAH", "")
@@ -71,6 +83,7 @@ class ListingTrackerMudahmyPlaywright:
         self.active_selector = "#ad_view_ad_highlights h1"
         self.sold_text_indicator = "This car has already been sold."
         self.custom_proxies = get_custom_proxy_list()
+        self.current_proxy = None
         self.session_id = self.generate_session_id()
 
     def generate_session_id(self):
@@ -113,6 +126,7 @@ class ListingTrackerMudahmyPlaywright:
             logging.info(f"🌐 Proxy digunakan: {proxy['server']}")
         else:
             logging.info("⚡ Browser tanpa proxy")
+        self.current_proxy = proxy
 
         self.browser = self.playwright.chromium.launch(**launch_kwargs)
 
@@ -191,6 +205,7 @@ class ListingTrackerMudahmyPlaywright:
             return
 
         cursor = conn.cursor()
+        started = time.perf_counter()
         try:
             if sold_at:
                 cursor.execute(f"""
@@ -206,6 +221,8 @@ class ListingTrackerMudahmyPlaywright:
                 """, (status, datetime.now(), car_id))
 
             conn.commit()
+            DB_WRITE.labels(METRICS_SERVICE, "update_status").observe(time.perf_counter() - started)
+            LISTING_STATUS.labels(METRICS_SERVICE, status).inc()
             logger.info(f"> ID={car_id} => Status diupdate ke '{status}', last_status_check diperbarui.")
         except Exception as e:
             logger.error(f"❌ Error update_car_status untuk ID={car_id}: {e}")
@@ -226,85 +243,6 @@ class ListingTrackerMudahmyPlaywright:
             logger.error(f"❌ Gagal extract harga dari halaman: {e}")
         return None
 
-    def get_highlight_info(self, page):
-        try:
-            parent = page.query_selector('#ad_view_ad_highlights > div > div > div:nth-child(1) > div > div')
-            if not parent:
-                return None
-            children = parent.query_selector_all('div')
-            if len(children) == 2:
-                return children[1].inner_text().strip()
-            elif len(children) == 1:
-                return children[0].inner_text().strip()
-            else:
-                return parent.inner_text().strip()
-        except Exception as e:
-            logger.warning(f"❌ Gagal ekstrak highlight info: {e}")
-            return None
-
-    def normalize_model_variant(self, text):
-        """Membersihkan string model/variant"""
-        if not text or str(text).strip() in ["N/A", "-", ""]:
-            return "NO VARIANT"
-        cleaned = re.sub(r'[\-\(\)_]', ' ', text)
-        cleaned = re.sub(r'[^\w\s]', '', cleaned)
-        cleaned = ' '.join(cleaned.split())
-        cleaned = cleaned.upper()
-        if not cleaned:
-            return "NO VARIANT"
-        return cleaned
-
-    def normalize_brand_name(self, brand_str):
-        """Normalize brand name by replacing dashes with spaces and cleaning up format."""
-        if not brand_str or brand_str == "N/A":
-            return brand_str
-        try:
-            normalized = (
-                brand_str.replace('-', ' ')
-                .replace('_', ' ')
-                .strip()
-                .upper()
-            )
-            normalized = ' '.join(normalized.split())
-            logger.info(f"Brand normalized: '{brand_str}' -> '{normalized}'")
-            return normalized
-        except Exception as e:
-            logger.warning(f"Error normalizing brand '{brand_str}': {e}")
-            return brand_str
-
-    def convert_mileage(self, mileage_str):
-        """Convert mileage string to integer in km"""
-        if not mileage_str or mileage_str == "N/A":
-            return None
-        try:
-            if mileage_str.startswith("<"):
-                return int(mileage_str[1:-1]) * 1000 if "k" in mileage_str else int(mileage_str[1:])
-            if " - " in mileage_str:
-                parts = mileage_str.split(" - ")
-                max_part = parts[-1]
-                if "k" in max_part:
-                    return int(float(max_part.replace("k", "")) * 1000)
-                return int(max_part)
-            if mileage_str.startswith(">"):
-                return int(mileage_str[1:-1]) * 1000 if "k" in mileage_str else int(mileage_str[1:])
-            if "k" in mileage_str:
-                return int(float(mileage_str.replace("k", "")) * 1000)
-            return int(mileage_str.replace(",", "").replace("km", "").strip())
-        except Exception as e:
-            logger.warning(f"Gagal mengkonversi mileage '{mileage_str}': {e}")
-            return None
-
-    def convert_year_to_int(self, year_str):
-        """Convert year string to integer"""
-        if not year_str or year_str == "N/A":
-            return None
-        year_match = re.search(r'\d{4}', year_str)
-        if year_match:
-            year_int = int(year_match.group(0))
-            logger.info(f"Converting year from '{year_str}' to {year_int}")
-            return year_int
-        return None
-
     def convert_information_ads_to_date(self, info_ads_str):
         """Convert information_ads text to actual date"""
         if not info_ads_str or info_ads_str.strip() in ["N/A", ""]:
@@ -377,27 +315,39 @@ class ListingTrackerMudahmyPlaywright:
             logger.error(f"Error converting information_ads to date '{info_ads_str}': {e}")
             return datetime.now().strftime('%Y-%m-%d')
 
+    @traced("tracker_mudah.detail")
+    @budgeted("tracker_mudah.detail")
     def scrape_full_listing_data_in_new_tab(self, url):
         """Scrape semua data dari halaman listing dalam tab baru - seperti mudahmy_service.py"""
         detail_page = self.context.new_page()
         try:
             logger.info(f"🆕 Opening new tab for detail scraping: {url}")
-            detail_page.goto(url, wait_until="domcontentloaded", timeout=60000)
+            stage("goto")
+            with PAGE_LOAD.labels(METRICS_SERVICE, "detail").time():
+                detail_page.goto(url, wait_until="domcontentloaded", timeout=60000)
             
             # Check if blocked
-            if (
+            stage("block_check")
+            if detail_page.locator("text='verify you are human'").count() > 0:
+                blocked = "captcha"
+            elif (
                 "Access Denied" in detail_page.title() or
                 "block" in detail_page.url or
-                detail_page.locator("text='Access Denied'").count() > 0 or
-                detail_page.locator("text='verify you are human'").count() > 0
+                detail_page.locator("text='Access Denied'").count() > 0
             ):
+                blocked = "access_denied"
+            else:
+                blocked = None
+            if blocked:
+                record_block(METRICS_SERVICE, blocked, self.current_proxy)
                 logger.warning("🚨 Blokir atau captcha terdeteksi di halaman detail!")
                 return None
 
             # Wait for specifications section
+            stage("wait_specs")
             try:
                 detail_page.wait_for_selector('#ad_view_car_specifications', timeout=15000)
-                time.sleep(3)
+                wait_until(detail_page, root="#ad_view_car_specifications", quiet_ms=400, timeout_ms=3000, legacy=3, label="specs_settle")
             except Exception as e:
                 logger.warning(f"⚠️ Specifications section tidak ditemukan: {e}")
                 return None
@@ -406,6 +356,7 @@ class ListingTrackerMudahmyPlaywright:
             show_more_clicked = False
             
             # Method 1: Direct selector click
+            stage("show_more_click")
             try:
                 show_more_btn = detail_page.wait_for_selector(
                     "#ad_view_car_specifications button:has-text('SHOW MORE')", 
@@ -414,17 +365,19 @@ class ListingTrackerMudahmyPlaywright:
                 )
                 if show_more_btn:
                     show_more_btn.scroll_into_view_if_needed()
+                    pace(0.4, 1.2)
                     show_more_btn.click()
-                    time.sleep(3)
+                    wait_until(detail_page, texts=[("button", "SHOW LESS")], timeout_ms=3000, legacy=3, label="show_more")
                     if detail_page.locator("button:has-text('SHOW LESS')").count() > 0:
                         show_more_clicked = True
                         logger.info("✅ Tombol 'SHOW MORE' specifications diklik (metode 1)")
-                        time.sleep(2)
+                        wait_until(detail_page, root="#ad_view_car_specifications", quiet_ms=300, timeout_ms=2000, legacy=2, label="show_more_settle")
             except Exception:
                 logger.info("❌ Metode 1 gagal: mencoba metode berikutnya")
 
             # Method 2: JavaScript click
             if not show_more_clicked:
+                stage("show_more_js")
                 try:
                     detail_page.evaluate("""
                         const btn = document.querySelector('#ad_view_car_specifications button');
@@ -432,7 +385,7 @@ class ListingTrackerMudahmyPlaywright:
                             btn.click();
                         }
                     """)
-                    time.sleep(3)
+                    wait_until(detail_page, texts=[("button", "SHOW LESS")], timeout_ms=3000, legacy=3, label="show_more")
                     if detail_page.locator("button:has-text('SHOW LESS')").count() > 0:
                         show_more_clicked = True
                         logger.info("✅ Tombol 'SHOW MORE' specifications diklik via JavaScript")
@@ -441,6 +394,7 @@ class ListingTrackerMudahmyPlaywright:
 
             # Method 3: DOM Manipulation (like in mudahmy_service.py)
             if not show_more_clicked:
+                stage("show_more_dom")
                 try:
                     detail_page.evaluate("""
                         const specDiv = document.querySelector('#ad_view_car_specifications');
@@ -459,155 +413,29 @@ class ListingTrackerMudahmyPlaywright:
                 except Exception:
                     logger.info("❌ Semua metode gagal expand specifications")
 
-            # Safe extraction helper
-            def safe_extract(selectors, fallback="N/A"):
-                for selector in selectors:
-                    try:
-                        if detail_page.locator(selector).count() > 0:
-                            return detail_page.locator(selector).first.inner_text().strip()
-                    except Exception:
-                        continue
-                return fallback
-
-            # Extract all data
-            data = {}
-            # Extract brand dengan validasi tambahan
-            brand_raw = safe_extract([
-                "#ad_view_car_specifications div:nth-child(1) > div:nth-child(3)",
-                "div:has-text('Brand') + div",
-            ])
-            # Fix brand extraction issue - jangan ambil "Model" sebagai brand
-            if brand_raw and brand_raw.lower() not in ['model', 'n/a', 'brand']:
-                data["brand"] = brand_raw
-            else:
-                data["brand"] = "N/A"
-                logger.warning(f"Brand extraction issue, got: '{brand_raw}' - set to N/A")
-            
-            data["model"] = safe_extract([
-                "#ad_view_car_specifications div:nth-child(2) > div:nth-child(3)",
-                "div:has-text('Model') + div",
-            ])
-            data["variant"] = safe_extract([
-                "#ad_view_car_specifications div:nth-child(4) > div:nth-child(3)",
-                "div:has-text('Variant') + div",
-            ])
-            data["engine_cc"] = safe_extract([
-                "#ad_view_car_specifications > div > div > div:nth-child(2) > div > div > div:nth-child(1) > div:nth-child(1) > div:nth-child(2)",
-                "div:has-text('Engine CC') + div",
-            ])
-            
-            # Get highlight info for condition and information_ads
-            full_info = self.get_highlight_info(detail_page)
-            if not full_info:
-                full_info = safe_extract([
-                    "#ad_view_ad_highlights > div > div > div:nth-child(1) > div > div > div",
-                    "div.text-\\[\\#666666\\].text-xs.lg\\:text-base",
-                ])
-            if full_info and full_info != "N/A":
-                parts = full_info.split(",", 1)
-                data["condition"] = parts[0].strip()
-                data["information_ads"] = parts[1].strip() if len(parts) > 1 else ""
-            else:
-                data["condition"] = "N/A"
-                data["information_ads"] = ""
-
-            data["location"] = safe_extract([
-                "#ad_view_ad_highlights > div > div > div.flex.flex-wrap.lg\\:flex-nowrap.gap-3\\.5 > div:nth-child(4) > div",
-                "div.font-bold.truncate.text-sm.md\\:text-base",
-                "#ad_view_ad_highlights div.font-bold.truncate",
-            ])
-            data["price"] = safe_extract([
-                "div.flex.gap-1.md\\:items-end > div"
-            ])
-            data["year"] = safe_extract([
-                "#ad_view_car_specifications div:nth-child(3) > div:nth-child(3)",
-                "div:has-text('Year') + div",
-            ])
-            # Extract mileage dengan validasi
-            mileage_raw = safe_extract([
-                "#ad_view_ad_highlights > div > div > div.flex.flex-wrap.lg\\:flex-nowrap.gap-3\\.5 > div:nth-child(3) > div",
-                "div:has-text('Mileage') + div",
-            ])
-            # Fix mileage extraction - jangan ambil text label sebagai value
-            if mileage_raw and not any(x in mileage_raw.lower() for x in ['mileage to', 'mileage', 'km to']):
-                data["mileage"] = mileage_raw
-            else:
-                data["mileage"] = "N/A"
-                logger.warning(f"Mileage extraction issue, got: '{mileage_raw}' - set to N/A")
-            data["transmission"] = safe_extract([
-                "#ad_view_ad_highlights > div > div > div.flex.flex-wrap.lg\\:flex-nowrap.gap-3\\.5 > div:nth-child(2) > div",
-                "div:has-text('Transmission') + div",
-            ])
-            data["seat_capacity"] = safe_extract([
-                "#ad_view_car_specifications > div > div > div > div > div > div:nth-child(2) > div:nth-child(3) > div:nth-child(3)",
-                "div:has-text('Seat Capacity') + div",
-            ])
-            data["fuel_type"] = safe_extract([
-                "#ad_view_car_specifications > div > div > div:nth-child(1) > div > div > div:nth-child(2) > div:nth-child(4) > div:nth-child(3)",
-                "#ad_view_car_specifications div.flex.flex-col.gap-4 div:has-text('Fuel Type') + div",
-                "div:has-text('Fuel Type') + div",
-            ])
+            stage("extract")
+            data = extract_fields(detail_page, TRACKER_DETAIL_FIELDS)
 
             # Extract images - same approach as mudahmy_service.py
-            image_urls = set()
+            stage("gallery")
             try:
                 detail_page.wait_for_selector('#ad_view_gallery', timeout=15000)
                 logger.info("🖼️ Galeri ditemukan, siap proses gambar")
                 
-                # Process Show All gallery (like in mudahmy_service.py)
-                show_all_clicked = False
-                try:
-                    show_all_button = detail_page.wait_for_selector(
-                        "#ad_view_gallery a[data-action-step='17']",
-                        timeout=5000
+                # URL galeri diambil tanpa membuka modal (ld+json, state halaman, srcset, network)
+                image_urls, expected = harvest_gallery(detail_page, url)
+                if gallery_incomplete(image_urls, expected):
+                    # Fallback: buka galeri sekali lalu ambil ulang dari modal (kosong / kurang dari jumlah galeri)
+                    gallery_opener = detail_page.query_selector(
+                        "#ad_view_gallery a[data-action-step='17'], #ad_view_gallery div[data-action-step='1']"
                     )
-                    if show_all_button:
-                        show_all_button.click()
-                        logger.info("✅ Tombol 'Show All' gallery diklik (metode 1)")
-                        show_all_clicked = True
-                        time.sleep(random.uniform(6, 9))
-                except Exception as e:
-                    logger.info(f"❌ Gagal klik tombol 'Show All' gallery metode 1: {e}")
+                    if gallery_opener:
+                        pace(0.8, 2.0)
+                        gallery_opener.click()
+                        logger.info(f"🖼️ Galeri dibuka karena hanya {len(image_urls)}/{expected or '?'} gambar tanpa klik (fallback)")
+                        wait_until(detail_page, selectors="div[data-index] img[src]", quiet_ms=500, timeout_ms=9000, legacy=7.5, label="gallery")
+                        image_urls = max(image_urls, harvest_gallery(detail_page, url)[0], key=len)
 
-                if not show_all_clicked:
-                    try:
-                        show_all_button = detail_page.query_selector("button:has-text('Show All'), a:has-text('Show All')")
-                        if show_all_button:
-                            show_all_button.scroll_into_view_if_needed()
-                            show_all_button.click()
-                            logger.info("✅ Tombol 'Show All' gallery diklik (metode 2)")
-                            show_all_clicked = True
-                            time.sleep(random.uniform(6, 9))
-                    except Exception as e:
-                        logger.info(f"❌ Gagal klik tombol 'Show All' gallery metode 2: {e}")
-
-                if not show_all_clicked:
-                    try:
-                        main_image_div = detail_page.query_selector("#ad_view_gallery div[data-action-step='1']")
-                        if main_image_div:
-                            main_image_div.click()
-                            logger.info("✅ Gambar utama galeri diklik (metode 3)")
-                            time.sleep(random.uniform(6, 9))
-                    except Exception as e:
-                        logger.info(f"❌ Tidak bisa klik gambar utama sebagai fallback: {e}")
-
-                # Extract image URLs
-                image_divs = detail_page.query_selector_all("div[data-index]")
-                logger.info(f"🔍 Ditemukan {len(image_divs)} div dengan data-index")
-                
-                for div in image_divs:
-                    try:
-                        img = div.query_selector("img")
-                        if img:
-                            src = img.get_attribute("src")
-                            if src and src.startswith(('http', '//')):
-                                clean_url = src.split('?')[0]
-                                if not clean_url.startswith('http'):
-                                    clean_url = f"https:{clean_url}"
-                                image_urls.add(clean_url)
-                    except Exception:
-                        continue
-                        
                 data["images"] = list(image_urls)
                 if image_urls:
                     logger.info(f"✅ Berhasil ekstrak {len(image_urls)} gambar")
@@ -649,14 +477,14 @@ class ListingTrackerMudahmyPlaywright:
 
             # Convert mileage
             mileage_str = scraped_data.get("mileage", "")
-            mileage_conv = self.convert_mileage(mileage_str)
+            mileage_conv = convert_mileage(mileage_str)
             if mileage_conv is None:
                 mileage_conv = 0
 
             # Normalize fields dengan length validation
-            normalized_brand = self.normalize_brand_name(scraped_data.get("brand"))
-            normalized_model = self.normalize_model_variant(scraped_data.get("model"))
-            normalized_variant = self.normalize_model_variant(scraped_data.get("variant"))
+            normalized_brand = normalize_brand_name(scraped_data.get("brand"))
+            normalized_model = normalize_model_variant(scraped_data.get("model"))
+            normalized_variant = normalize_model_variant(scraped_data.get("variant"))
             
             # Truncate fields yang mungkin terlalu panjang untuk database schema
             def safe_truncate(value, max_length=255):
@@ -701,7 +529,7 @@ class ListingTrackerMudahmyPlaywright:
                 information_ads,
                 location,
                 price_int,
-                self.convert_year_to_int(scraped_data.get("year")),
+                convert_year_to_int(scraped_data.get("year")),
                 mileage_conv,
                 transmission,
                 seat_capacity,
@@ -738,6 +566,7 @@ class ListingTrackerMudahmyPlaywright:
             cursor.close()
             conn.close()
 
+    @recorded_run("tracker", METRICS_SERVICE, get_connection, proxy_env="PROXY_MODE_MUDAH")
     def track_listings(self, start_id=1, status_filter='all'):
         conn = get_connection()
         if not conn:
@@ -764,6 +593,8 @@ class ListingTrackerMudahmyPlaywright:
         conn.close()
 
         logger.info(f"📄 Total data: {len(listings)} (Filter: {status_filter})")
+        reset_spans()
+        reset_waits()
 
         url_count = 0
 
@@ -776,8 +607,19 @@ class ListingTrackerMudahmyPlaywright:
                 logger.info(f"🔍 Memeriksa ID={car_id} - {url}")
                 redirected_sold = False
 
+                LISTINGS.labels(METRICS_SERVICE, "checked").inc()
                 try:
-                    self.page.goto(url, wait_until="networkidle", timeout=30000)
+                    with PAGE_LOAD.labels(METRICS_SERVICE, "status").time():
+                        self.page.goto(url, wait_until="domcontentloaded", timeout=30000)
+                    # Pengganti networkidle: cukup sampai judul listing, teks sold, atau kartu
+                    # listing halaman cars-for-sale (redirect sold) muncul
+                    wait_until(
+                        self.page,
+                        selectors=[self.active_selector, "div[data-testid^='listing-ad-item-']"],
+                        texts=[("body", self.sold_text_indicator)],
+                        timeout_ms=15000,
+                        label="status_ready",
+                    )
 
                     if self.page.url == "about:blank":
                         logger.error("Halaman stuck di about:blank")
@@ -802,15 +644,19 @@ class ListingTrackerMudahmyPlaywright:
                         # Lakukan full re-scraping dalam tab baru untuk listing yang masih aktif
                         scraped_data = self.scrape_full_listing_data_in_new_tab(url)
                         if scraped_data:
+                            LISTINGS.labels(METRICS_SERVICE, "scraped").inc()
                             # Update semua data ke database
-                            success = self.update_full_listing_data(car_id, scraped_data, url)
+                            with DB_WRITE.labels(METRICS_SERVICE, "update_listing").time(), span("tracker_mudah.save"):
+                                success = self.update_full_listing_data(car_id, scraped_data, url)
                             if success:
                                 logger.info(f"✅ Data lengkap berhasil diupdate untuk ID={car_id}")
                             else:
                                 logger.error(f"❌ Gagal update data lengkap untuk ID={car_id}")
                         else:
+                            LISTINGS.labels(METRICS_SERVICE, "failed").inc()
                             logger.warning(f"⚠️ Gagal scrape data lengkap untuk ID={car_id}")
                     else:
+                        LISTINGS.labels(METRICS_SERVICE, "skipped").inc()
                         logger.info(f"⏩ Skip scraping untuk ID={car_id} - Status sudah SOLD")
 
                     if not redirected_sold:
@@ -866,4 +712,6 @@ class ListingTrackerMudahmyPlaywright:
 
             self.quit_browser()
 
+        log_report("Span report tracker mudah", logger)
+        log_wait_report("Wait report tracker mudah", logger)
         logger.info("✅ Proses tracking selesai.")
\ No newline at end of file
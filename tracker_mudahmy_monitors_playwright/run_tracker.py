@@ -1,5 +1,7 @@
 import argparse
 from tracker_mudahmy_monitors_playwright.listing_tracker_mudahmy_playwright import ListingTrackerMudahmyPlaywright
+from common.metrics import start_metrics_server
+from common.profiling import add_profile_arguments, profile_run
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -14,11 +16,15 @@ def main():
         default="all",
         help="Status listing yang ingin dicek: unknown, active, atau all (default: all)"
     )
+    parser.add_argument("--metrics-port", type=int, help="Ekspos metrics Prometheus di port ini (default: env METRICS_PORT, kosong = tidak diekspos)")
+    add_profile_arguments(parser)
 
     args = parser.parse_args()
+    start_metrics_server(args.metrics_port)
 
     tracker = ListingTrackerMudahmyPlaywright()
-    tracker.track_listings(start_id=args.start_id, status_filter=args.status)
+    with profile_run("tracker_mudahmy", args):
+        tracker.track_listings(start_id=args.start_id, status_filter=args.status)
 
 if __name__ == "__main__":
     main()